@@ -0,0 +1,62 @@
+"""
+Сравнение скалярного (find_potential_intersection_points_neighbors) и векторного
+(find_potential_intersection_segments) отбора отрезков-кандидатов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.batch_engine_bench --points 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import pack_trajectories
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000, help="суммарное число точек траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=1000, help="число точек в одной траектории")
+    parser.add_argument("--size", type=int, default=1000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--flag", type=int, default=1, choices=(0, 1), help="метод отбора кандидатов")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coords = np.linspace(0.0, 25.0 * (args.size - 1), args.size)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    surface = PreparedSurface(coords, coords, -2500.0 + 50.0 * np.sin(xx / 3000.0) * np.cos(yy / 2000.0))
+
+    trajectories = []
+    for _ in range(max(1, args.points // args.points_per_trajectory)):
+        start = rng.uniform(0.1, 0.5, 2) * coords[-1]
+        end = rng.uniform(0.5, 0.9, 2) * coords[-1]
+        t = np.linspace(0.0, 1.0, args.points_per_trajectory)
+        xy = start + np.outer(t, end - start)
+        z = np.linspace(-2000.0, -3000.0, args.points_per_trajectory)
+        trajectories.append(np.column_stack([xy, z]).tolist())
+
+    processor = TrajectoryProcessor(surface)
+    points, offsets = pack_trajectories(trajectories)
+
+    start = time.perf_counter()
+    scalar = sum(
+        len(processor.find_potential_intersection_points_neighbors(
+            trajectory, surface.z_max, surface.z_min, args.flag))
+        for trajectory in trajectories
+    )
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = processor.find_potential_intersection_segments(points, offsets, surface.z_max, surface.z_min, args.flag)
+    batch_time = time.perf_counter() - start
+
+    print(f"points: {len(points)}, trajectories: {len(trajectories)}, flag: {args.flag}")
+    print(f"scalar: {scalar_time:8.3f} s, candidates: {scalar}")
+    print(f"batch:  {batch_time:8.3f} s, candidates: {len(batch)}")
+    print(f"speedup: {scalar_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
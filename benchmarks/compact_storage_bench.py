@@ -0,0 +1,60 @@
+"""
+Хранение высот в float64 против компактного режима (float32, упакованные маски пустых узлов и ячеек,
+пирамида float32, коэффициенты блоками).
+
+Печатает объем памяти поверхности по частям и на узел, время расчета и наибольшее отличие высот
+пересечений компактной поверхности от float64 для совпадающих пересечений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.compact_storage_bench --size 2000 --kind vertical
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--wells", type=int, default=2000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=500, help="число точек в траектории")
+    parser.add_argument("--kind", default="vertical", choices=TRAJECTORY_KINDS)
+    parser.add_argument("--surface-mode", default="bilinear", choices=("plane", "bilinear"))
+    args = parser.parse_args()
+
+    base = make_surface(args.size)
+    batch = make_trajectories(base, args.kind, args.wells, args.points_per_trajectory)
+    results = {}
+    for storage in ("float64", "compact"):
+        surface = base if storage == "float64" else PreparedSurface.from_surface(base, storage)
+        processor = TrajectoryProcessor(surface, surface_mode=args.surface_mode)
+        start = time.perf_counter()
+        results[storage] = processor.intersect_batch(batch, trusted=True)
+        elapsed = time.perf_counter() - start
+        footprint = surface.memory_footprint()
+        print(f"{storage:8s} {elapsed:8.3f} s, intersections: {len(results[storage])}, "
+              f"memory: {footprint['bytes'] / 2 ** 20:.1f} MiB ({footprint['bytes_per_node']:.1f} B/node)")
+        print(f"         heights {footprint['heights_bytes'] / 2 ** 20:.1f} MiB, "
+              f"masks {footprint['mask_bytes'] / 2 ** 20:.1f} MiB, "
+              f"cell stats {footprint['cell_stats_bytes'] / 2 ** 20:.1f} MiB, "
+              f"pyramid {footprint['pyramid_bytes'] / 2 ** 20:.1f} MiB, "
+              f"coefficients {footprint['coefficients_bytes'] / 2 ** 20:.1f} MiB")
+
+    exact, compact = results["float64"], results["compact"]
+    keys = {key: n for n, key in enumerate(zip(exact.trajectory.tolist(), exact.segment.tolist()))}
+    pairs = [(keys[key], n) for n, key in enumerate(zip(compact.trajectory.tolist(), compact.segment.tolist()))
+             if key in keys]
+    if pairs:
+        rows = np.array(pairs)
+        deviation = np.abs(compact.z[rows[:, 1]] - exact.z[rows[:, 0]]).max()
+        print(f"max |dz| of {len(pairs)} matching intersections: {deviation:.2e} "
+              f"(|z| up to {np.abs(exact.z).max():.0f})")
+
+
+if __name__ == "__main__":
+    main()
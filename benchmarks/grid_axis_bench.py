@@ -0,0 +1,63 @@
+"""
+Микробенчмарк поиска ячейки по оси сетки: линейный перебор (прежний find_index
+в bresenham_grid_with_corners), двоичный поиск по списку и GridAxis.
+
+Запуск из корня репозитория:
+    python -m benchmarks.grid_axis_bench
+"""
+import argparse
+import bisect
+import time
+
+import numpy as np
+
+from src.grid_axis import GridAxis
+
+
+def linear_find_index(grid, value):
+    """Прежний поиск ячейки линейным перебором."""
+    for i in range(len(grid) - 1):
+        if grid[i] <= value <= grid[i + 1]:
+            return i
+    return None
+
+
+def per_lookup(func, values) -> float:
+    """Среднее время одного вызова func, в микросекундах."""
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=20_000, help="число поисков для быстрых методов")
+    parser.add_argument("--linear-lookups", type=int, default=20, help="число поисков линейным перебором")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'width':>10} {'linear':>12} {'bisect':>10} {'uniform':>10} {'non-unif.':>10} {'batch':>10}  (us/lookup)")
+    for size in args.sizes:
+        coords = 61352.0 + 25.0 * np.arange(size)
+        coords_list = coords.tolist()
+        uniform_axis = GridAxis(coords)
+        irregular_axis = GridAxis(coords + rng.uniform(-1.0, 1.0, size))
+        values = rng.uniform(coords[0], coords[-1], args.lookups)
+        values_list = values.tolist()
+
+        linear = per_lookup(lambda v: linear_find_index(coords_list, v), values_list[:args.linear_lookups])
+        bisected = per_lookup(lambda v: bisect.bisect_left(coords_list, v) - 1, values_list)
+        uniform = per_lookup(lambda v: uniform_axis.locate_scalar(v, "left"), values_list)
+        irregular = per_lookup(lambda v: irregular_axis.locate_scalar(v, "left"), values_list)
+
+        start = time.perf_counter()
+        uniform_axis.locate(values, "left")
+        batch = (time.perf_counter() - start) / len(values) * 1e6
+
+        print(f"{size:>10} {linear:>12.2f} {bisected:>10.3f} {uniform:>10.3f} {irregular:>10.3f} {batch:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Время чтения поверхности IRAP ASCII: разбор текста read_irap и загрузка из двоичного кэша.
+С ключом --legacy дополнительно измеряется test/parser.py::parse.
+
+Запуск из корня репозитория:
+    python -m benchmarks.irap_bench --size 3000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.irap import IRAP_NULL_VALUE, read_irap
+
+
+def write_irap(filename: str, size: int) -> None:
+    """Записывает синтетическую поверхность size x size с пустыми узлами в формате IRAP ASCII."""
+    coords = np.linspace(0.0, 25.0 * (size - 1), size)
+    yy, xx = np.meshgrid(coords, coords, indexing="ij")
+    heights = -2500.0 + 50.0 * np.sin(xx / 3000.0) * np.cos(yy / 2000.0)
+    heights[: size // 20, : size // 20] = IRAP_NULL_VALUE
+    with open(filename, "w") as irap_file:
+        irap_file.write(f"-996 {size} 25.0 25.0\n0.0 {coords[-1]} 0.0 {coords[-1]}\n{size} 0.0 0.0 0.0\n")
+        irap_file.write("0 0 0 0 0 0 0\n")
+        np.savetxt(irap_file, heights.reshape(-1, 6), fmt="%.4f")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=3000, help="число узлов сетки по каждой оси (кратно 6)")
+    parser.add_argument("--legacy", action="store_true", help="измерить также test/parser.py::parse")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "surface.irap")
+        write_irap(filename, args.size)
+        print(f"grid: {args.size}x{args.size}, file: {os.path.getsize(filename) / 2 ** 20:.1f} MiB")
+
+        if args.legacy:
+            from test.parser import parse
+            start = time.perf_counter()
+            parse(filename)
+            print(f"test.parser.parse:       {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        read_irap(filename)
+        print(f"read_irap:               {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        read_irap(filename, use_cache=True)
+        print(f"read_irap (write cache): {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        read_irap(filename, use_cache=True)
+        print(f"read_irap (mmap cache):  {time.perf_counter() - start:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Сравнение реализаций обхода ячеек и пересечения с ними: backend="numpy" (traverse_grid_cells_batch
+и векторное решение по ячейкам) и backend="numba" (объединенное ядро fused_segment_hits).
+Первый вызов с numba включает компиляцию (или загрузку из кэша) и измеряется отдельно.
+
+Запуск из корня репозитория:
+    python -m benchmarks.numba_bench --size 2500 --wells 2000 --kind lateral
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.numba_kernels import NUMBA_AVAILABLE
+from src.stats import ProcessorStats
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--wells", type=int, default=2000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=500, help="число точек в траектории")
+    parser.add_argument("--kind", default="lateral", choices=TRAJECTORY_KINDS)
+    parser.add_argument("--surface-mode", default="plane", choices=("plane", "bilinear"))
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов, берется лучшее время")
+    args = parser.parse_args()
+
+    if not NUMBA_AVAILABLE:
+        print("numba не установлена, сравнивать не с чем")
+        return
+
+    surface = make_surface(args.size)
+    surface.pyramid
+    surface.coefficients
+    batch = make_trajectories(surface, args.kind, args.wells, args.points_per_trajectory)
+
+    start = time.perf_counter()
+    TrajectoryProcessor(surface, surface_mode=args.surface_mode, backend="numba").intersect_batch(batch, trusted=True)
+    print(f"first numba call (compile or cache load): {time.perf_counter() - start:.3f} s")
+
+    for backend in ("numpy", "numba"):
+        best_total, best_hits = float("inf"), float("inf")
+        for _ in range(args.repeat):
+            stats = ProcessorStats()
+            processor = TrajectoryProcessor(surface, surface_mode=args.surface_mode, stats=stats, backend=backend)
+            start = time.perf_counter()
+            result = processor.intersect_batch(batch, trusted=True)
+            best_total = min(best_total, time.perf_counter() - start)
+            best_hits = min(best_hits, stats.stage_seconds["traversal"] + stats.stage_seconds["solve"])
+        print(f"{backend:6s} total {best_total * 1e3:9.2f} ms, traversal+solve {best_hits * 1e3:9.2f} ms, "
+              f"intersections: {len(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Масштабирование calculate_intersections_parallel по числу рабочих процессов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.parallel_bench --trajectories 20000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.parallel import calculate_intersections_parallel
+from src.surface import PreparedSurface
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trajectories", type=int, default=20000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=200, help="число точек в одной траектории")
+    parser.add_argument("--size", type=int, default=2000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="числа процессов")
+    parser.add_argument("--surface-mode", default="plane", choices=("plane", "bilinear"))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coords = np.linspace(0.0, 25.0 * (args.size - 1), args.size)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    surface = PreparedSurface(coords, coords, -2500.0 + 50.0 * np.sin(xx / 3000.0) * np.cos(yy / 2000.0))
+
+    trajectories = []
+    for _ in range(args.trajectories):
+        start = rng.uniform(0.1, 0.9, 2) * coords[-1]
+        end = start + rng.uniform(-1000.0, 1000.0, 2)
+        t = np.linspace(0.0, 1.0, args.points_per_trajectory)
+        xy = start + np.outer(t, end - start)
+        z = np.linspace(-2000.0, -3000.0, args.points_per_trajectory)
+        trajectories.append(np.column_stack([xy, z]).tolist())
+
+    print(f"trajectories: {len(trajectories)}, grid: {args.size}x{args.size}, cpus: {os.cpu_count()}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        calculate_intersections_parallel(surface, trajectories, workers=workers, surface_mode=args.surface_mode)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers: {workers:3d}  time: {elapsed:8.3f} s  speedup: {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Сравнение задержки одного запроса calculate_intersections: сетка во входном словаре
+против подготовленной поверхности PreparedSurface.
+
+Запуск из корня репозитория:
+    python -m benchmarks.prepared_surface_bench --size 2000 --repeat 3
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def make_grid(size: int) -> dict:
+    """Создает сетку size x size с волнистой поверхностью и пустыми узлами."""
+    coords = np.linspace(0.0, 25.0 * (size - 1), size)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    heights = -2500.0 + 50.0 * np.sin(xx / 3000.0) * np.cos(yy / 2000.0)
+    height_matrix = heights.astype(object)
+    height_matrix[: size // 20, : size // 20] = None
+    return {
+        "x_coords": coords.tolist(),
+        "y_coords": coords.tolist(),
+        "height_matrix": height_matrix.tolist(),
+    }
+
+
+def make_trajectories(grid: dict, count: int) -> list:
+    """Создает вертикальные траектории, пересекающие поверхность."""
+    rng = np.random.default_rng(0)
+    x_max = grid["x_coords"][-1]
+    y_max = grid["y_coords"][-1]
+    trajectories = []
+    for _ in range(count):
+        x, y = rng.uniform(0.1 * x_max, 0.9 * x_max), rng.uniform(0.1 * y_max, 0.9 * y_max)
+        trajectories.append([[x, y, float(z)] for z in range(-3005, 0, 100)])
+    return trajectories
+
+
+def measure(func, repeat: int) -> float:
+    """Возвращает минимальное время выполнения func за repeat запусков, в секундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--trajectories", type=int, default=1, help="число траекторий в одном запросе")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов каждого замера")
+    args = parser.parse_args()
+
+    grid = make_grid(args.size)
+    trajectories = make_trajectories(grid, args.trajectories)
+
+    dict_processor = TrajectoryProcessor()
+    dict_time = measure(
+        lambda: dict_processor.calculate_intersections({"grid": grid, "trajectories": trajectories}), args.repeat)
+
+    start = time.perf_counter()
+    surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"])
+    prepare_time = time.perf_counter() - start
+
+    prepared_processor = TrajectoryProcessor(surface)
+    prepared_time = measure(
+        lambda: prepared_processor.calculate_intersections({"trajectories": trajectories}), args.repeat)
+
+    print(f"grid {args.size}x{args.size}, trajectories per call: {args.trajectories}")
+    print(f"dict path:             {dict_time * 1e3:10.2f} ms/call")
+    print(f"PreparedSurface build: {prepare_time * 1e3:10.2f} ms (once)")
+    print(f"prepared path:         {prepared_time * 1e3:10.2f} ms/call")
+    print(f"speedup:               {dict_time / prepared_time:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
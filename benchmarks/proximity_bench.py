@@ -0,0 +1,62 @@
+"""
+Поиск наибольшего сближения траекторий с поверхностью (closest_approach) в сравнении с расчетом пересечений
+по тем же траекториям, со счетчиками отсева отрезков и ячеек по оболочке min/max.
+
+--shift сдвигает поверхность по высоте, чтобы траектории проходили рядом с горизонтом, не пересекая его
+(например, горизонтальные стволы "lateral", идущие параллельно кровле пласта).
+
+Запуск из корня репозитория:
+    python -m benchmarks.proximity_bench --size 2000 --wells 1000 --kind lateral --shift -100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--wells", type=int, default=1000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=500, help="число точек в траектории")
+    parser.add_argument("--kind", default="lateral", choices=TRAJECTORY_KINDS)
+    parser.add_argument("--surface-mode", default="plane", choices=("plane", "bilinear"))
+    parser.add_argument("--shift", type=float, default=-100.0, help="сдвиг поверхности по высоте, м")
+    parser.add_argument("--vertical-only", action="store_true", help="не искать истинное расстояние")
+    args = parser.parse_args()
+
+    base = make_surface(args.size)
+    surface = PreparedSurface(base.x_coords, base.y_coords, base.heights + args.shift, trusted=True)
+    surface.pyramid
+    surface.coefficients
+    batch = make_trajectories(base, args.kind, args.wells, args.points_per_trajectory)
+
+    processor = TrajectoryProcessor(surface, surface_mode=args.surface_mode)
+    start = time.perf_counter()
+    intersections = processor.intersect_batch(batch, trusted=True)
+    intersect_time = time.perf_counter() - start
+
+    stats = ProcessorStats()
+    processor = TrajectoryProcessor(surface, surface_mode=args.surface_mode, stats=stats)
+    start = time.perf_counter()
+    result = processor.closest_approach(batch, trusted=True, true_distance=not args.vertical_only)
+    proximity_time = time.perf_counter() - start
+
+    crossing = int(np.sum(result.vertical_distance == 0.0))
+    print(f"intersect:        {intersect_time:8.3f} s, intersections: {len(intersections)}")
+    print(f"closest approach: {proximity_time:8.3f} s, crossing wells: {crossing} of {len(result)}")
+    print(f"median |vertical|: {np.nanmedian(np.abs(result.vertical_distance)):.2f} m")
+    if not args.vertical_only:
+        print(f"median true:       {np.nanmedian(result.true_distance):.2f} m")
+    for name in ("proximity_segments_pruned", "proximity_cells_pruned", "proximity_cell_pairs",
+                 "proximity_cells_solved"):
+        print(f"{name}: {stats.counters.get(name, 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Повторные запросы с кэшем результатов: первый расчет, повтор без изменений и повтор
+после изменения одной точки одной скважины (как при редактировании скважины в интерфейсе планирования).
+
+Запуск из корня репозитория:
+    python -m benchmarks.result_cache_bench --size 1000 --wells 500
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.result_cache import ResultCache
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--wells", type=int, default=500, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=200, help="число точек в траектории")
+    parser.add_argument("--kind", default="deviated", choices=TRAJECTORY_KINDS)
+    parser.add_argument("--cache-dir", help="каталог кэша на диске")
+    args = parser.parse_args()
+
+    surface = make_surface(args.size)
+    surface.pyramid
+    surface.coefficients
+    surface.content_hash
+    batch = make_trajectories(surface, args.kind, args.wells, args.points_per_trajectory)
+    points = batch.points.copy()
+    points[batch.offsets[0] + args.points_per_trajectory // 2, 0] += 10.0
+    edited = TrajectoryBatch(points, batch.offsets)
+
+    start = time.perf_counter()
+    TrajectoryProcessor(surface).intersect_batch(batch, trusted=True)
+    print(f"without cache     {(time.perf_counter() - start) * 1e3:9.2f} ms")
+
+    for segment_entries in (True, False):
+        print(f"segment entries: {segment_entries}")
+        cache = ResultCache(directory=args.cache_dir, segment_entries=segment_entries)
+        processor = TrajectoryProcessor(surface, cache=cache)
+        for label, current in (("first call", batch), ("unchanged", batch), ("one well edited", edited)):
+            start = time.perf_counter()
+            processor.intersect_batch(current, trusted=True)
+            print(f"  {label:17s} {(time.perf_counter() - start) * 1e3:9.2f} ms")
+        print(f"  {cache.memory_footprint()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Набор скважин против нескольких поверхностей: intersect_batch без индекса и с SegmentIndex,
+построенным один раз для всего набора.
+
+Запуск из корня репозитория:
+    python -m benchmarks.segment_index_bench --wells 20000 --surfaces 40
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.segment_index import SegmentIndex
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wells", type=int, default=20000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=100, help="число точек в одной траектории")
+    parser.add_argument("--surfaces", type=int, default=40, help="число поверхностей")
+    parser.add_argument("--size", type=int, default=300, help="число узлов каждой поверхности по каждой оси")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    field = 200_000.0
+    starts = rng.uniform(0.0, field, (args.wells, 2))
+    ends = starts + rng.uniform(-1500.0, 1500.0, (args.wells, 2))
+    t = np.linspace(0.0, 1.0, args.points_per_trajectory)
+    xy = starts[:, None, :] + t[None, :, None] * (ends - starts)[:, None, :]
+    z = np.broadcast_to(np.linspace(0.0, -4000.0, args.points_per_trajectory), (args.wells, args.points_per_trajectory))
+    batch = TrajectoryBatch(np.concatenate([xy, z[..., None]], axis=2).reshape(-1, 3),
+                            np.arange(args.wells + 1) * args.points_per_trajectory)
+
+    surfaces = []
+    for k in range(args.surfaces):
+        origin = rng.uniform(0.0, field - 25.0 * args.size, 2)
+        x_coords = origin[0] + 25.0 * np.arange(args.size)
+        y_coords = origin[1] + 25.0 * np.arange(args.size)
+        xx, yy = np.meshgrid(x_coords, y_coords, indexing="ij")
+        depth = -500.0 - 80.0 * k
+        surfaces.append(PreparedSurface(x_coords, y_coords, depth + 30.0 * np.sin(xx / 900.0) * np.cos(yy / 700.0)))
+
+    start = time.perf_counter()
+    index = SegmentIndex.from_batch(batch)
+    build_time = time.perf_counter() - start
+    print(f"segments: {len(index)}, surfaces: {len(surfaces)}, index build: {build_time:.3f} s, "
+          f"{index.nbytes / 2 ** 20:.1f} MiB, depth {index.depth}")
+
+    for label, segment_index in (("without index", None), ("with index", index)):
+        start = time.perf_counter()
+        hits = 0
+        for surface in surfaces:
+            hits += len(TrajectoryProcessor(surface).intersect_batch(batch, trusted=True, segment_index=segment_index))
+        print(f"{label:14s} {time.perf_counter() - start:8.3f} s, intersections: {hits}")
+
+    pruned = sum(index.query_surface(surface).pruned for surface in surfaces)
+    print(f"pruned by index: {pruned / (len(index) * len(surfaces)):.1%} of segment-surface pairs")
+
+
+if __name__ == "__main__":
+    main()
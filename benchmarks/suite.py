@@ -0,0 +1,179 @@
+"""
+Набор бенчмарков на синтетических данных (без сети и внешних файлов).
+
+Для каждого размера сетки и типа траекторий измеряются время подготовки поверхности,
+время этапов расчета по ProcessorStats (проверка граничных значений, поиск кандидатов, отсев
+по пирамиде, обход ячеек, пересечение с ячейками),
+пропускная способность в отрезках и пересечениях в секунду и пиковый объем памяти (tracemalloc).
+Отдельно измеряются bresenham_grid_with_corners, best_fit_plane и их векторные замены.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite --sizes 100 500 1000 2500 5000 --json results.json
+    python -m benchmarks.suite --quick --baseline results.json
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.cell_coefficients import plane_coefficients
+from src.grid_axis import GridAxis
+from src.grid_math import bresenham_grid_with_corners, traverse_grid_cells_batch
+from src.spatial_geometry import best_fit_plane
+from src.stats import STAGES, ProcessorStats
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def run_stages(processor: TrajectoryProcessor, batch: TrajectoryBatch) -> Dict[str, float]:
+    """
+    Выполняет intersect_batch со статистикой ProcessorStats.
+
+    :return: Словарь с временем этапов (секунды, ключи "<этап>_s") и счетчиками.
+    """
+    processor.stats = ProcessorStats()
+    processor.intersect_batch(batch, trusted=True)
+    metrics = {f"{stage}_s": seconds for stage, seconds in processor.stats.stage_seconds.items()}
+    metrics.update(processor.stats.counters)
+    return metrics
+
+
+def run_case(
+        size: int, kind: str, wells: int, points_per_trajectory: int, surface_mode: str, candidate_flag: int = 1
+) -> Dict[str, float]:
+    """
+    Измеряет один сценарий: сетка size x size и wells траекторий типа kind.
+
+    Время измеряется в отдельном прогоне без tracemalloc, так как отслеживание выделений памяти
+    замедляет NumPy; пиковая память - во втором прогоне с подготовкой поверхности.
+
+    :return: Словарь с временем этапов (секунды), пропускной способностью и пиковой памятью (байты).
+    """
+    start = time.perf_counter()
+    surface = make_surface(size)
+    surface.pyramid
+    surface.coefficients
+    prepare_time = time.perf_counter() - start
+
+    batch = make_trajectories(surface, kind, wells, points_per_trajectory)
+    metrics = run_stages(TrajectoryProcessor(surface, surface_mode=surface_mode, candidate_flag=candidate_flag), batch)
+    del surface
+
+    tracemalloc.start()
+    surface = make_surface(size)
+    run_stages(TrajectoryProcessor(surface, surface_mode=surface_mode, candidate_flag=candidate_flag), batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(metrics[f"{stage}_s"] for stage in STAGES)
+    metrics.update({
+        "prepare_s": prepare_time,
+        "total_s": total,
+        "segments_per_s": metrics["segments"] / total,
+        "intersections_per_s": metrics["accepted_intersections"] / total,
+        "peak_memory_bytes": peak,
+    })
+    return metrics
+
+
+def run_kernels(repeat: int) -> Dict[str, float]:
+    """
+    Измеряет отдельные функции: обход ячеек и аппроксимацию плоскостью, скалярные и векторные варианты.
+
+    :return: Словарь с временем одного вызова в микросекундах.
+    """
+    rng = np.random.default_rng(0)
+    coords = np.arange(1000, dtype=np.float64) * 25.0
+    axis = GridAxis(coords)
+    segments = rng.uniform(0.0, coords[-1], (repeat, 4))
+    segments[:, 2:] = segments[:, :2] + rng.uniform(-200.0, 200.0, (repeat, 2))
+    segments = np.clip(segments, 0.0, coords[-1])
+    corners = rng.uniform(-2600.0, -2400.0, (repeat, 4))
+
+    timings = {}
+    start = time.perf_counter()
+    for x1, y1, x2, y2 in segments.tolist():
+        bresenham_grid_with_corners(x1, y1, x2, y2, coords, coords)
+    timings["bresenham_grid_with_corners_us"] = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    traverse_grid_cells_batch(segments[:, 0], segments[:, 1], segments[:, 2], segments[:, 3], axis, axis)
+    timings["traverse_grid_cells_batch_us"] = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for f11, f12, f21, f22 in corners.tolist():
+        best_fit_plane([(0.0, 0.0, f11), (0.0, 25.0, f12), (25.0, 0.0, f21), (25.0, 25.0, f22)])
+    timings["best_fit_plane_us"] = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    plane_coefficients(0.0, 25.0, 0.0, 25.0, corners[:, 0], corners[:, 1], corners[:, 2], corners[:, 3])
+    timings["plane_coefficients_us"] = (time.perf_counter() - start) / repeat * 1e6
+    return timings
+
+
+def print_comparison(results: Dict, baseline: Optional[Dict]) -> None:
+    """Печатает результаты и, если задан базовый прогон, отношение времени к нему."""
+    for name, metrics in results.items():
+        line = f"{name:32s}"
+        for key in ("prepare",) + STAGES[1:]:
+            if f"{key}_s" in metrics:
+                line += f" {key}={metrics[f'{key}_s'] * 1e3:8.2f} ms"
+        if "segments_per_s" in metrics:
+            line += (f"  {metrics['segments_per_s'] / 1e6:7.2f} Mseg/s"
+                     f"  {metrics['intersections_per_s']:10.0f} hit/s"
+                     f"  peak={metrics['peak_memory_bytes'] / 2 ** 20:8.1f} MiB")
+        for key, value in metrics.items():
+            if key.endswith("_us"):
+                line += f" {key[:-3]}={value:8.2f} us"
+        print(line)
+
+        reference = (baseline or {}).get(name)
+        if reference:
+            key = "total_s" if "total_s" in metrics else next(iter(metrics))
+            print(f"{'':32s} vs baseline {key}: {metrics[key] / reference[key]:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2500, 5000],
+                        help="размеры сеток (узлов по каждой оси)")
+    parser.add_argument("--kinds", nargs="+", default=list(TRAJECTORY_KINDS), choices=TRAJECTORY_KINDS)
+    parser.add_argument("--wells", type=int, default=2000, help="число траекторий в сценарии")
+    parser.add_argument("--points-per-trajectory", type=int, default=500, help="число точек в траектории")
+    parser.add_argument("--surface-mode", default="plane", choices=("plane", "bilinear"))
+    parser.add_argument("--candidate-flag", type=int, default=1, choices=(0, 1, 2),
+                        help="метод отбора отрезков-кандидатов (см. find_candidate_segments)")
+    parser.add_argument("--kernel-repeat", type=int, default=2000, help="число вызовов в замерах функций")
+    parser.add_argument("--quick", action="store_true", help="только сетки 100 и 500, 200 траекторий")
+    parser.add_argument("--json", help="сохранить результаты в JSON-файл")
+    parser.add_argument("--baseline", help="JSON-файл предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    sizes: List[int] = [100, 500] if args.quick else args.sizes
+    wells = 200 if args.quick else args.wells
+
+    results = {}
+    for size in sizes:
+        for kind in args.kinds:
+            name = f"{kind}_{size}x{size}"
+            results[name] = run_case(size, kind, wells, args.points_per_trajectory, args.surface_mode,
+                                     args.candidate_flag)
+    results["kernels"] = run_kernels(args.kernel_repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_comparison(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
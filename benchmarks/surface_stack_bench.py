@@ -0,0 +1,56 @@
+"""
+Пересечения с набором горизонтов: отдельный расчет по каждой поверхности против одного прохода
+по набору SurfaceStack (общие поиск ячеек концов отрезков, отсев и обход ячеек).
+
+Горизонты - копии синтетической поверхности, сдвинутые по высоте с шагом --spacing.
+
+Запуск из корня репозитория:
+    python -m benchmarks.surface_stack_bench --horizons 40 --size 1000 --kind deviated
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--horizons", type=int, default=40, help="число горизонтов")
+    parser.add_argument("--spacing", type=float, default=15.0, help="расстояние между горизонтами по высоте, м")
+    parser.add_argument("--wells", type=int, default=2000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=500, help="число точек в траектории")
+    parser.add_argument("--kind", default="deviated", choices=TRAJECTORY_KINDS)
+    parser.add_argument("--surface-mode", default="plane", choices=("plane", "bilinear"))
+    args = parser.parse_args()
+
+    base = make_surface(args.size)
+    shifts = args.spacing * (np.arange(args.horizons) - args.horizons / 2)
+    stack = SurfaceStack(base.x_coords, base.y_coords, base.heights[None] + shifts[:, None, None], trusted=True)
+    surfaces = [PreparedSurface(base.x_coords, base.y_coords, layer, trusted=True) for layer in stack.heights]
+    for surface in surfaces + stack.surfaces:
+        surface.pyramid
+        surface.coefficients
+    stack.pyramid
+    batch = make_trajectories(base, args.kind, args.wells, args.points_per_trajectory)
+
+    start = time.perf_counter()
+    separate = sum(len(TrajectoryProcessor(surface, surface_mode=args.surface_mode).intersect_batch(batch, trusted=True))
+                   for surface in surfaces)
+    separate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = TrajectoryProcessor(stack, surface_mode=args.surface_mode).intersect_batch(batch, trusted=True)
+    stack_time = time.perf_counter() - start
+
+    print(f"per surface: {separate_time:8.3f} s, intersections: {separate}")
+    print(f"stack:       {stack_time:8.3f} s, intersections: {len(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Скважины по инклинометрии: равномерное сгущение траекторий с шагом 1 м против адаптивного
+выбора точек методом минимальной кривизны (Survey.sample) вблизи поверхности.
+
+Запуск из корня репозитория:
+    python -m benchmarks.survey_bench --wells 500 --size 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_surface
+from src.survey import Survey
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def make_surveys(surface, count: int, stations: int, seed: int = 0):
+    """Создает наклонно-направленные скважины с замерами через 30 м: вертикальный участок, набор угла, стабилизация."""
+    rng = np.random.default_rng(seed)
+    extent = surface.x_coords[-1]
+    md = 30.0 * np.arange(stations)
+    surveys = []
+    for _ in range(count):
+        kickoff = rng.uniform(300.0, 1500.0)
+        build = rng.uniform(1.0, 3.0) / 30.0
+        inc = np.clip((md - kickoff) * build, 0.0, rng.uniform(30.0, 88.0))
+        azi = np.full(stations, rng.uniform(0.0, 360.0))
+        head = rng.uniform(0.2 * extent, 0.8 * extent, 2)
+        surveys.append(Survey(md, inc, azi, origin=(head[0], head[1], 0.0)))
+    return surveys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--wells", type=int, default=500, help="число скважин")
+    parser.add_argument("--stations", type=int, default=150, help="число замеров в скважине (через 30 м)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="допустимое отклонение хорды от дуги, м")
+    args = parser.parse_args()
+
+    surface = make_surface(args.size)
+    surveys = make_surveys(surface, args.wells, args.stations)
+    processor = TrajectoryProcessor(surface, candidate_flag=2)
+
+    start = time.perf_counter()
+    dense = TrajectoryBatch.from_lists([survey.interpolate(np.arange(survey.md[0], survey.md[-1], 1.0))
+                                        for survey in surveys])
+    dense_result = processor.intersect_batch(dense, trusted=True)
+    dense_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = processor.intersect_surveys(surveys, tolerance=args.tolerance)
+    adaptive_time = time.perf_counter() - start
+
+    print(f"1 m stations: {dense.points.shape[0]:9d} points, {dense_time:7.3f} s, intersections: {len(dense_result)}")
+    print(f"adaptive:     {int(sum(len(s.sample(surface, args.tolerance)[0]) for s in surveys)):9d} points, "
+          f"{adaptive_time:7.3f} s, intersections: {len(result)}")
+
+
+if __name__ == "__main__":
+    main()
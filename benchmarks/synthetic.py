@@ -0,0 +1,90 @@
+"""
+Генераторы синтетических поверхностей и траекторий для бенчмарков.
+
+Поверхность - волнистый горизонт на глубине около 2500 м с шагом сетки 25 м и круглыми
+областями пустых узлов. Траектории трех типов:
+    - vertical: вертикальные скважины;
+    - deviated: наклонно-направленные (вертикальный участок, набор угла, прямолинейный наклонный участок);
+    - lateral: горизонтальные, с длинным участком вдоль горизонта, многократно пересекающим его.
+"""
+import numpy as np
+
+from src.surface import PreparedSurface
+from src.trajectory_arrays import TrajectoryBatch
+
+GRID_STEP = 25.0
+HORIZON_DEPTH = -2500.0
+TRAJECTORY_KINDS = ("vertical", "deviated", "lateral")
+
+
+def make_surface(size: int, null_fraction: float = 0.05, seed: int = 0) -> PreparedSurface:
+    """
+    Создает поверхность size x size узлов с шагом GRID_STEP и пустыми узлами в круглых областях.
+
+    :param size: Число узлов по каждой оси.
+    :param null_fraction: Примерная доля пустых узлов.
+    :param seed: Начальное значение генератора случайных чисел.
+    :return: Подготовленная поверхность.
+    """
+    rng = np.random.default_rng(seed)
+    coords = GRID_STEP * np.arange(size, dtype=np.float64)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    extent = coords[-1]
+    heights = (HORIZON_DEPTH + 60.0 * np.sin(xx / (0.11 * extent + 1.0)) * np.cos(yy / (0.07 * extent + 1.0))
+               + 15.0 * np.sin((xx + yy) / 400.0))
+
+    holes = 8
+    radius = extent * np.sqrt(null_fraction / (holes * np.pi))
+    for cx, cy in rng.uniform(0.0, extent, (holes, 2)):
+        i0, i1 = np.searchsorted(coords, (cx - radius, cx + radius))
+        j0, j1 = np.searchsorted(coords, (cy - radius, cy + radius))
+        block = (xx[i0:i1, j0:j1] - cx) ** 2 + (yy[i0:i1, j0:j1] - cy) ** 2 <= radius ** 2
+        heights[i0:i1, j0:j1][block] = np.nan
+    return PreparedSurface(coords, coords, heights, trusted=True)
+
+
+def make_trajectories(
+        surface: PreparedSurface, kind: str, count: int, points_per_trajectory: int, seed: int = 0
+) -> TrajectoryBatch:
+    """
+    Создает набор траекторий заданного типа, устья которых равномерно распределены над поверхностью.
+
+    :param surface: Поверхность, над которой располагаются скважины.
+    :param kind: Тип траекторий: "vertical", "deviated" или "lateral".
+    :param count: Число траекторий.
+    :param points_per_trajectory: Число точек в каждой траектории.
+    :param seed: Начальное значение генератора случайных чисел.
+    :return: Набор траекторий.
+    :raises ValueError: Если тип траекторий неизвестен.
+    """
+    if kind not in TRAJECTORY_KINDS:
+        raise ValueError(f"Неизвестный тип траекторий: {kind}")
+    rng = np.random.default_rng(seed)
+    extent = surface.x_coords[-1]
+    heads = rng.uniform(0.1 * extent, 0.9 * extent, (count, 2))
+    azimuth = rng.uniform(0.0, 2.0 * np.pi, count)
+    direction = np.stack([np.cos(azimuth), np.sin(azimuth)], axis=1)
+    s = np.linspace(0.0, 1.0, points_per_trajectory)
+
+    if kind == "vertical":
+        offset = np.zeros((count, points_per_trajectory))
+        z = np.broadcast_to(-500.0 - 3500.0 * s, (count, points_per_trajectory))
+    elif kind == "deviated":
+        reach = rng.uniform(0.05, 0.3, count)[:, None] * extent
+        kickoff = 0.3
+        along = np.clip((s - kickoff) / (1.0 - kickoff), 0.0, 1.0)
+        offset = reach * along ** 1.5
+        z = np.broadcast_to(-500.0 - 3000.0 * s, (count, points_per_trajectory))
+    else:
+        reach = rng.uniform(0.05, 0.2, count)[:, None] * extent
+        landing = 0.3
+        along = np.clip((s - landing) / (1.0 - landing), 0.0, 1.0)
+        offset = reach * along
+        build = np.minimum(s / landing, 1.0)
+        undulation = 40.0 * np.sin(12.0 * np.pi * along)
+        z = np.broadcast_to(-500.0 + (HORIZON_DEPTH + 500.0) * build + undulation * (s > landing),
+                            (count, points_per_trajectory))
+
+    xy = heads[:, None, :] + offset[..., None] * direction[:, None, :]
+    points = np.concatenate([xy, z[..., None]], axis=2).reshape(-1, 3)
+    return TrajectoryBatch(points, np.arange(count + 1, dtype=np.int64) * points_per_trajectory)
@@ -0,0 +1,64 @@
+"""
+Поверхность в памяти (PreparedSurface) против поверхности тайлами в файле (TiledSurface)
+с ограниченным числом тайлов в памяти.
+
+Печатает время расчета, число чтений тайлов, попаданий и вытеснений кэша тайлов
+и объем высот в памяти в обоих случаях.
+
+Запуск из корня репозитория:
+    python -m benchmarks.tiled_surface_bench --size 2000 --tile-size 256 --max-tiles 16
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import TRAJECTORY_KINDS, make_surface, make_trajectories
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="число узлов сетки по каждой оси")
+    parser.add_argument("--tile-size", type=int, default=256, help="число ячеек в тайле по каждой оси")
+    parser.add_argument("--block-size", type=int, default=16, help="число ячеек в блоке пирамиды по каждой оси")
+    parser.add_argument("--max-tiles", type=int, default=16, help="максимальное число тайлов в памяти")
+    parser.add_argument("--wells", type=int, default=2000, help="число траекторий")
+    parser.add_argument("--points-per-trajectory", type=int, default=500, help="число точек в траектории")
+    parser.add_argument("--kind", default="deviated", choices=TRAJECTORY_KINDS)
+    parser.add_argument("--surface-mode", default="plane", choices=("plane", "bilinear"))
+    args = parser.parse_args()
+
+    surface = make_surface(args.size)
+    surface.pyramid
+    surface.coefficients
+    batch = make_trajectories(surface, args.kind, args.wells, args.points_per_trajectory)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "surface.tiles.npy")
+        start = time.perf_counter()
+        tiled = TiledSurface.create(path, surface.x_coords, surface.y_coords, surface.heights,
+                                    args.tile_size, args.block_size, args.max_tiles)
+        create_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = TrajectoryProcessor(surface, surface_mode=args.surface_mode).intersect_batch(batch, trusted=True)
+        memory_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = TrajectoryProcessor(tiled, surface_mode=args.surface_mode).intersect_batch(batch, trusted=True)
+        tiled_time = time.perf_counter() - start
+        footprint = tiled.memory_footprint()
+
+    print(f"tiles written: {create_time:8.3f} s, tiles: {footprint['tiles_total']}")
+    print(f"in memory:     {memory_time:8.3f} s, intersections: {len(expected)}, "
+          f"heights: {surface.heights.nbytes / 2 ** 20:.1f} MiB")
+    print(f"tiled:         {tiled_time:8.3f} s, intersections: {len(result)}, "
+          f"tiles in memory: {footprint['bytes'] / 2 ** 20:.1f} MiB")
+    print(f"tile reads: {footprint['misses']}, hits: {footprint['hits']}, evictions: {footprint['evictions']}, "
+          f"read time: {footprint['load_seconds']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
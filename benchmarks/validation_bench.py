@@ -0,0 +1,43 @@
+"""
+Стоимость проверки входной сетки: pydantic (GridModel по спискам Python) против
+векторной проверки массивов NumPy (validate_grid_arrays).
+
+Запуск из корня репозитория:
+    python -m benchmarks.validation_bench --size 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.model import GridModel
+from src.validation import validate_grid_arrays
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2000, help="число узлов сетки по каждой оси")
+    args = parser.parse_args()
+
+    coords = np.linspace(0.0, 25.0 * (args.size - 1), args.size)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    heights = -2500.0 + 50.0 * np.sin(xx / 3000.0) * np.cos(yy / 2000.0)
+    heights[: args.size // 20, : args.size // 20] = np.nan
+    grid = {"x_coords": coords.tolist(), "y_coords": coords.tolist(), "height_matrix": heights.tolist()}
+
+    start = time.perf_counter()
+    GridModel(**grid)
+    pydantic_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    validate_grid_arrays(coords, coords, heights)
+    numpy_time = time.perf_counter() - start
+
+    print(f"grid: {args.size}x{args.size}")
+    print(f"pydantic GridModel:   {pydantic_time:8.4f} s")
+    print(f"validate_grid_arrays: {numpy_time:8.4f} s")
+    print(f"speedup: {pydantic_time / numpy_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
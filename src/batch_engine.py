@@ -0,0 +1,308 @@
+import numpy as np
+from typing import Optional, Tuple
+
+from src.grid_axis import GridAxis
+from src.surface import PreparedSurface
+from src.trajectory_arrays import segment_starts
+
+
+def locate_cells(axis: GridAxis, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Находит ячейки сетки вдоль одной оси для массива значений, аналогично binary_search_nearest.
+
+    :param axis: Ось сетки.
+    :param values: Значения координат точек.
+    :return: Кортеж (cell, on_node, inside):
+             - cell: индекс нижнего узла ячейки;
+             - on_node: True, если значение совпало с узлом (binary_search_nearest возвращает узлы
+               в порядке [cell, cell + 1]), иначе узлы возвращаются в порядке [cell + 1, cell];
+             - inside: True, если значение лежит в пределах оси.
+    """
+    coords = axis.coords
+    last = len(coords) - 1
+    cell = axis.locate(values, side="right")
+    inside = (values >= coords[0]) & (values <= coords[last])
+    cell = np.clip(cell, 0, last - 1)
+    on_node = (coords[cell] == values) | (values == coords[last])
+    return cell, on_node, inside
+
+
+def ordered_corner_heights(
+        surface: PreparedSurface,
+        ix: np.ndarray, x_on_node: np.ndarray,
+        iy: np.ndarray, y_on_node: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Собирает координаты и высоты углов ячеек в том порядке, в котором их возвращает скалярный путь.
+
+    :return: Кортеж (x_pair, y_pair, z): x_pair и y_pair - массивы формы (N, 2) координат узлов,
+             z - массив формы (N, 4) высот [f11, f12, f21, f22]; для набора поверхностей SurfaceStack -
+             форма (n_surfaces, N, 4).
+    """
+    x_index = np.where(x_on_node[:, None], np.stack([ix, ix + 1], axis=1), np.stack([ix + 1, ix], axis=1))
+    y_index = np.where(y_on_node[:, None], np.stack([iy, iy + 1], axis=1), np.stack([iy + 1, iy], axis=1))
+    heights = surface.heights
+    z = np.stack([
+        heights[..., x_index[:, 0], y_index[:, 0]], heights[..., x_index[:, 0], y_index[:, 1]],
+        heights[..., x_index[:, 1], y_index[:, 0]], heights[..., x_index[:, 1], y_index[:, 1]],
+    ], axis=-1)
+    return surface.x_coords[x_index], surface.y_coords[y_index], z
+
+
+def bilinear_interpolation_batch(
+        x: np.ndarray, y: np.ndarray, x_pair: np.ndarray, y_pair: np.ndarray, z: np.ndarray
+) -> np.ndarray:
+    """
+    Векторный вариант bilinear_interpolation_4terms с тем же порядком арифметических операций.
+
+    :param x: Координаты x точек.
+    :param y: Координаты y точек.
+    :param x_pair: Координаты (x1, x4) узлов ячеек, форма (N, 2).
+    :param y_pair: Координаты (y1, y4) узлов ячеек, форма (N, 2).
+    :param z: Высоты углов [f11, f12, f21, f22], форма (..., N, 4).
+    :return: Интерполированные значения, форма (..., N).
+    """
+    x1, x4 = x_pair[:, 0], x_pair[:, 1]
+    y1, y4 = y_pair[:, 0], y_pair[:, 1]
+    area = (x4 - x1) * (y4 - y1)
+    term1 = z[..., 0] * (x4 - x) * (y4 - y) / area
+    term2 = z[..., 1] * (x4 - x) * (y - y1) / area
+    term3 = z[..., 2] * (x - x1) * (y4 - y) / area
+    term4 = z[..., 3] * (x - x1) * (y - y1) / area
+    return term1 + term2 + term3 + term4
+
+
+def find_candidate_segments(
+        surface: PreparedSurface,
+        points: np.ndarray,
+        offsets: np.ndarray,
+        max_grid_z: float,
+        min_grid_z: float,
+        flag: int,
+        starts: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Векторный вариант TrajectoryProcessor.find_potential_intersection_points_neighbors
+    сразу для всех отрезков всех траекторий.
+
+    :param surface: Подготовленная поверхность.
+    :param points: Упакованные точки траекторий, форма (N, 3).
+    :param offsets: Смещения траекторий, длина T + 1.
+    :param max_grid_z: Максимальная высота в сетке.
+    :param min_grid_z: Минимальная высота в сетке.
+    :param flag: 0 - билинейная интерполяция, 1 - экстремальные значения квадрата,
+                 2 - оболочка высот вдоль всего отрезка (bracket_segments): находит и отрезки, пересекающие
+                 поверхность дважды, и отрезки с концами за пределами сетки.
+    :param starts: Проверять только отрезки с этими начальными точками (по возрастанию), например
+                   отобранные SegmentIndex.query_surface; по умолчанию - все отрезки.
+    :return: Индексы начальных точек отрезков, на которых возможно пересечение (по возрастанию).
+    """
+    if flag not in (0, 1, 2):
+        raise ValueError(f"Неизвестный метод отбора кандидатов: {flag}")
+
+    if flag == 2:
+        starts = segment_starts(offsets) if starts is None else np.asarray(starts, dtype=np.int64)
+        return bracket_segments(surface, points, starts)
+
+    starts, mask = endpoint_candidate_mask(surface, points, offsets, max_grid_z, min_grid_z, flag, starts)
+    return starts[mask]
+
+
+def endpoint_candidate_mask(
+        surface,
+        points: np.ndarray,
+        offsets: np.ndarray,
+        max_grid_z,
+        min_grid_z,
+        flag: int,
+        starts: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Отбирает отрезки-кандидаты по высотам поверхности в концах отрезков (flag 0 и 1 find_candidate_segments).
+
+    Ячейки концов отрезков находятся один раз; для набора поверхностей SurfaceStack высоты углов
+    берутся сразу для всех поверхностей, и результат содержит отдельную маску для каждой из них.
+
+    :param surface: Подготовленная поверхность или набор поверхностей SurfaceStack.
+    :param points: Упакованные точки траекторий, форма (N, 3).
+    :param offsets: Смещения траекторий, длина T + 1.
+    :param max_grid_z: Максимальная высота в сетке; для набора - массив формы (n_surfaces, 1).
+    :param min_grid_z: Минимальная высота в сетке; для набора - массив формы (n_surfaces, 1).
+    :param flag: 0 - билинейная интерполяция, 1 - экстремальные значения квадрата.
+    :param starts: Проверять только отрезки с этими начальными точками (по возрастанию); по умолчанию - все.
+    :return: Кортеж (starts, mask): индексы начальных точек проверенных отрезков и маска кандидатов
+             формы (S,), для набора поверхностей - (n_surfaces, S).
+    """
+    if starts is None:
+        starts = segment_starts(offsets)
+        a, b = starts, starts + 1
+    else:
+        starts = np.asarray(starts, dtype=np.int64)
+        needed = np.unique(np.concatenate([starts, starts + 1]))
+        a, b = np.searchsorted(needed, starts), np.searchsorted(needed, starts + 1)
+        points = points[needed]
+    if starts.size == 0:
+        return starts, np.zeros(np.shape(max_grid_z)[:-1] + (0,), dtype=bool)
+
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    ix, x_on_node, x_inside = locate_cells(surface.x_axis, x)
+    iy, y_on_node, y_inside = locate_cells(surface.y_axis, y)
+
+    # Углы хранятся отдельными массивами: поэлементные операции над ними быстрее редукций
+    # по короткой последней оси, особенно для набора поверхностей.
+    if flag == 0:
+        x_pair, y_pair, corners = ordered_corner_heights(surface, ix, x_on_node, iy, y_on_node)
+        f11, f12, f21, f22 = (corners[..., k] for k in range(4))
+    else:
+        heights = surface.heights
+        f11, f12 = heights[..., ix, iy], heights[..., ix, iy + 1]
+        f21, f22 = heights[..., ix + 1, iy], heights[..., ix + 1, iy + 1]
+    if isinstance(surface, PreparedSurface):
+        valid = x_inside & y_inside & surface.cell_valid[ix, iy]
+    else:
+        # У SurfaceStack и TiledSurface маски ячеек нет: пустые ячейки находятся по высотам углов.
+        valid = x_inside & y_inside & ~np.isnan(f11 + f12 + f21 + f22)
+
+    z_a, z_b = z[a], z[b]
+    mask = valid[..., a] & valid[..., b]
+    mask &= ~((z_a > max_grid_z) & (z_b > max_grid_z))
+    mask &= ~((z_a < min_grid_z) & (z_b < min_grid_z))
+
+    if flag == 0:
+        with np.errstate(invalid="ignore"):
+            surface_z = bilinear_interpolation_batch(x, y, x_pair, y_pair, corners)
+            mask &= (surface_z[..., a] > z_a) != (surface_z[..., b] > z_b)
+    else:
+        with np.errstate(invalid="ignore"):
+            corner_min = np.minimum(np.minimum(f11, f12), np.minimum(f21, f22))
+            corner_max = np.maximum(np.maximum(f11, f12), np.maximum(f21, f22))
+            mask &= (((corner_max[..., a] < z_a) & (corner_min[..., b] > z_b))
+                     | ((corner_min[..., a] > z_a) & (corner_max[..., b] < z_b)))
+    return starts, mask
+
+
+def segment_cell_bounds(
+        surface: PreparedSurface, points: np.ndarray, starts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Находит прямоугольники ячеек, покрывающие проекции отрезков на плоскость XY.
+    Точка, лежащая на линии сетки, относится к обеим соседним ячейкам.
+
+    :param surface: Подготовленная поверхность.
+    :param points: Упакованные точки траекторий, форма (N, 3).
+    :param starts: Индексы начальных точек отрезков.
+    :return: Кортеж (i0, i1, j0, j1) индексов ячеек (включительно).
+    """
+    a, b = points[starts], points[starts + 1]
+    return box_cell_bounds(surface, np.minimum(a, b), np.maximum(a, b))
+
+
+def box_cell_bounds(
+        surface: PreparedSurface, low: np.ndarray, high: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Находит прямоугольники ячеек, покрывающие прямоугольники [low, high] на плоскости XY.
+    Точка, лежащая на линии сетки, относится к обеим соседним ячейкам.
+
+    :param surface: Подготовленная поверхность.
+    :param low: Минимальные координаты прямоугольников, форма (N, 2) или (N, 3).
+    :param high: Максимальные координаты прямоугольников, форма (N, 2) или (N, 3).
+    :return: Кортеж (i0, i1, j0, j1) индексов ячеек (включительно).
+    """
+    bounds = []
+    for column, axis in ((0, surface.x_axis), (1, surface.y_axis)):
+        last_cell = axis.size - 2
+        bounds.append(np.clip(axis.locate(low[:, column], side="left"), 0, last_cell))
+        bounds.append(np.clip(axis.locate(high[:, column], side="right"), 0, last_cell))
+    return bounds[0], bounds[1], bounds[2], bounds[3]
+
+
+def bracket_segments(
+        surface: PreparedSurface, points: np.ndarray, starts: np.ndarray, max_depth: int = 48
+) -> np.ndarray:
+    """
+    Отбирает отрезки, на которых диапазон высот хотя бы одного участка пересекается с оболочкой
+    поверхности над ячейками этого участка.
+
+    В отличие от сравнения высот в концах отрезка (flag 0 и 1) находит и отрезки, которые входят
+    в поверхность и выходят из нее (например, проходят под куполом между редкими точками замеров),
+    поэтому траектории не нужно предварительно сгущать. Отрезок делится пополам только там,
+    где оболочка по пирамиде MinMaxPyramid над участком пересекается с его диапазоном высот;
+    деление прекращается, когда участок покрывает не более 2 x 2 ячеек, - дальше точный
+    отсев выполняет обход ячеек. Участки вне сетки отбрасываются.
+
+    :param surface: Подготовленная поверхность.
+    :param points: Упакованные точки траекторий, форма (N, 3).
+    :param starts: Индексы начальных точек проверяемых отрезков (по возрастанию).
+    :param max_depth: Максимальное число делений; отрезки, не разрешенные за это число делений, остаются.
+    :return: Индексы начальных точек отрезков-кандидатов (по возрастанию).
+    """
+    if starts.size == 0:
+        return starts
+    a, b = points[starts], points[starts + 1]
+    x_coords, y_coords = surface.x_coords, surface.y_coords
+    hit = np.zeros(starts.size, dtype=bool)
+
+    piece = np.arange(starts.size)
+    t0 = np.zeros(starts.size)
+    t1 = np.ones(starts.size)
+    for _ in range(max_depth):
+        direction = b[piece] - a[piece]
+        p0 = a[piece] + t0[:, None] * direction
+        p1 = a[piece] + t1[:, None] * direction
+        low, high = np.minimum(p0, p1), np.maximum(p0, p1)
+
+        inside = ((high[:, 0] >= x_coords[0]) & (low[:, 0] <= x_coords[-1])
+                  & (high[:, 1] >= y_coords[0]) & (low[:, 1] <= y_coords[-1]))
+        i0, i1, j0, j1 = box_cell_bounds(surface, low, high)
+        overlap = inside & surface.pyramid.overlaps(i0, i1, j0, j1, low[:, 2], high[:, 2])
+        resolved = overlap & (i1 - i0 <= 1) & (j1 - j0 <= 1)
+        hit[piece[resolved]] = True
+
+        split = overlap & ~resolved & ~hit[piece]
+        piece, t0, t1 = piece[split], t0[split], t1[split]
+        if piece.size == 0:
+            break
+        middle = (t0 + t1) / 2
+        piece = np.concatenate([piece, piece])
+        t0, t1 = np.concatenate([t0, middle]), np.concatenate([middle, t1])
+    hit[piece] = True
+    return starts[hit]
+
+
+def cull_segments(surface: PreparedSurface, points: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Отбрасывает отрезки, диапазон высот которых не пересекается с оболочкой поверхности
+    над их ограничивающим прямоугольником (по пирамиде минимумов и максимумов).
+
+    :param surface: Подготовленная поверхность.
+    :param points: Упакованные точки траекторий, форма (N, 3).
+    :param starts: Индексы начальных точек отрезков.
+    :return: Индексы начальных точек оставшихся отрезков.
+    """
+    if starts.size == 0:
+        return starts
+    i0, i1, j0, j1 = segment_cell_bounds(surface, points, starts)
+    z_a, z_b = points[starts, 2], points[starts + 1, 2]
+    mask = surface.pyramid.overlaps(i0, i1, j0, j1, np.minimum(z_a, z_b), np.maximum(z_a, z_b))
+    return starts[mask]
+
+
+def reachable_cells(
+        surface, cell_i: np.ndarray, cell_j: np.ndarray, z_low: np.ndarray, z_high: np.ndarray
+) -> np.ndarray:
+    """
+    Отбирает участки отрезков в ячейках, где поверхность может достигать диапазона высот участка:
+    по оболочке ячейки (блока) в пирамиде и, для PreparedSurface, по маске непустых ячеек cell_valid.
+
+    :param surface: Подготовленная поверхность или TiledSurface.
+    :param cell_i: Индексы ячеек по оси X.
+    :param cell_j: Индексы ячеек по оси Y.
+    :param z_low: Нижние границы диапазонов высот участков.
+    :param z_high: Верхние границы диапазонов высот участков.
+    :return: Булев массив; False - в ячейке нет пересечения с участком.
+    """
+    reachable = surface.pyramid.cell_overlaps(cell_i, cell_j, z_low, z_high)
+    if isinstance(surface, PreparedSurface):
+        reachable &= surface.cell_valid[cell_i, cell_j]
+    return reachable
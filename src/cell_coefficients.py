@@ -0,0 +1,233 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+PLANE_VALUES = 4
+BILINEAR_VALUES = 4
+
+
+def plane_coefficients(
+        x0: np.ndarray, x1: np.ndarray, y0: np.ndarray, y1: np.ndarray,
+        f11: np.ndarray, f12: np.ndarray, f21: np.ndarray, f22: np.ndarray
+) -> np.ndarray:
+    """
+    Вычисляет коэффициенты плоскостей Ax + By + Cz + D = 0, наилучшим образом аппроксимирующих
+    высоты четырех углов прямоугольных ячеек (в явном виде, без np.linalg.lstsq).
+
+    Результат совпадает с best_fit_plane для точек (x0, y0, f11), (x0, y1, f12), (x1, y0, f21), (x1, y1, f22)
+    с точностью до ошибок округления.
+
+    :return: Массив формы (..., 4) коэффициентов (A, B, C, D), C = 1; NaN для ячеек с пустыми углами.
+    """
+    half_x = (x1 - x0) / 2
+    half_y = (y1 - y0) / 2
+    slope_x = (f21 + f22 - f11 - f12) / 4 / half_x
+    slope_y = (f12 + f22 - f11 - f21) / 4 / half_y
+    intercept = (f11 + f12 + f21 + f22) / 4 - slope_x * (x0 + half_x) - slope_y * (y0 + half_y)
+    return np.stack([-slope_x, -slope_y, np.ones_like(slope_x), -intercept], axis=-1)
+
+
+def bilinear_coefficients(f11: np.ndarray, f12: np.ndarray, f21: np.ndarray, f22: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет коэффициенты билинейных патчей z(u, v) = a0 + a1 * u + a2 * v + a3 * u * v,
+    где u = (x - x0) / (x1 - x0) и v = (y - y0) / (y1 - y0) - локальные координаты внутри ячейки.
+
+    :return: Массив формы (..., 4) коэффициентов (a0, a1, a2, a3); NaN для ячеек с пустыми углами.
+    """
+    return np.stack([f11, f21 - f11, f12 - f11, f11 - f12 - f21 + f22], axis=-1)
+
+
+def plane_patch_coefficients(
+        planes: np.ndarray, x0: np.ndarray, x1: np.ndarray, y0: np.ndarray, y1: np.ndarray
+) -> np.ndarray:
+    """
+    Записывает плоскости Ax + By + Cz + D = 0 над ячейками в виде билинейных патчей с a3 = 0
+    (в локальных координатах ячейки, как bilinear_coefficients), чтобы обе модели поверхности
+    обрабатывались одними функциями.
+
+    :param planes: Коэффициенты плоскостей (A, B, C, D), форма (N, 4).
+    :return: Массив формы (N, 4) коэффициентов (a0, a1, a2, a3).
+    """
+    A, B, C, D = planes[:, 0], planes[:, 1], planes[:, 2], planes[:, 3]
+    return np.stack([-(A * x0 + B * y0 + D) / C, -A * (x1 - x0) / C, -B * (y1 - y0) / C, np.zeros_like(A)], axis=-1)
+
+
+class CellCoefficientCache:
+    """
+    Кэш коэффициентов поверхности по ячейкам: плоскости (A, B, C, D) и, по желанию, билинейные патчи.
+
+    Режимы:
+        - "eager": коэффициенты всех ячеек вычисляются одним векторным расчетом при создании
+          (PLANE_VALUES * 8 байт на ячейку для плоскостей и еще BILINEAR_VALUES * 8 для патчей);
+        - "lazy": коэффициенты вычисляются блоками tile_size x tile_size ячеек при первом обращении,
+          в памяти хранится не более max_tiles блоков, вытесняются давно не использованные (LRU);
+        - "auto": "eager", если его объем не превышает eager_limit_bytes, иначе "lazy".
+    """
+
+    def __init__(
+            self,
+            surface,
+            mode: str = "auto",
+            bilinear: bool = False,
+            tile_size: int = 64,
+            max_tiles: int = 1024,
+            eager_limit_bytes: int = 256 * 2 ** 20
+    ) -> None:
+        """
+        Создает кэш коэффициентов.
+
+        :param surface: Подготовленная поверхность PreparedSurface.
+        :param mode: "eager", "lazy" или "auto".
+        :param bilinear: Хранить также коэффициенты билинейных патчей.
+        :param tile_size: Размер блока ячеек в режиме "lazy".
+        :param max_tiles: Максимальное число блоков в памяти в режиме "lazy".
+        :param eager_limit_bytes: Порог объема памяти для выбора режима в "auto".
+        :raises ValueError: Если режим неизвестен.
+        """
+        if mode not in ("eager", "lazy", "auto"):
+            raise ValueError(f"Неизвестный режим кэша коэффициентов: {mode}")
+
+        self.surface = surface
+        self.bilinear = bilinear
+        self.cells_shape: Tuple[int, int] = (surface.x_coords.size - 1, surface.y_coords.size - 1)
+        self.values_per_cell: int = PLANE_VALUES + (BILINEAR_VALUES if bilinear else 0)
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+
+        if mode == "auto":
+            mode = "eager" if self.estimate_nbytes("eager") <= eager_limit_bytes else "lazy"
+        self.mode = mode
+
+        self._eager: Optional[np.ndarray] = None
+        self._tiles: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        if mode == "eager":
+            self._eager = self._compute(0, self.cells_shape[0], 0, self.cells_shape[1])
+
+    def estimate_nbytes(self, mode: str) -> int:
+        """
+        Оценивает объем памяти под коэффициенты в заданном режиме.
+
+        :param mode: "eager" или "lazy".
+        :return: Объем в байтах: для "eager" - все ячейки сетки, для "lazy" - max_tiles заполненных блоков.
+        """
+        cells = self.cells_shape[0] * self.cells_shape[1]
+        if mode == "lazy":
+            cells = min(cells, self.max_tiles * self.tile_size ** 2)
+        return cells * self.values_per_cell * 8
+
+    @property
+    def nbytes(self) -> int:
+        """Фактический объем памяти, занимаемый коэффициентами, в байтах."""
+        if self._eager is not None:
+            return self._eager.nbytes
+        return sum(tile.nbytes for tile in self._tiles.values())
+
+    def memory_footprint(self) -> Dict[str, Union[str, int]]:
+        """
+        Возвращает сведения об объеме памяти кэша для выбора между режимами "eager" и "lazy".
+
+        :return: Словарь с режимом, фактическим объемом, оценками объема в обоих режимах,
+                 числом блоков в памяти и статистикой попаданий.
+        """
+        return {
+            "mode": self.mode,
+            "bytes": self.nbytes,
+            "eager_bytes": self.estimate_nbytes("eager"),
+            "lazy_max_bytes": self.estimate_nbytes("lazy"),
+            "tiles_cached": len(self._tiles),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def planes(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """
+        Возвращает коэффициенты плоскостей ячеек.
+
+        :param i: Индексы ячеек по оси X.
+        :param j: Индексы ячеек по оси Y.
+        :return: Массив формы (N, 4) коэффициентов (A, B, C, D); NaN для ячеек с пустыми углами.
+        """
+        return self._lookup(i, j)[:, :PLANE_VALUES]
+
+    def bilinear_patches(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """
+        Возвращает коэффициенты билинейных патчей ячеек.
+
+        :param i: Индексы ячеек по оси X.
+        :param j: Индексы ячеек по оси Y.
+        :return: Массив формы (N, 4) коэффициентов (a0, a1, a2, a3); NaN для ячеек с пустыми углами.
+        :raises ValueError: Если кэш создан без bilinear=True.
+        """
+        if not self.bilinear:
+            raise ValueError("Кэш создан без коэффициентов билинейных патчей")
+        return self._lookup(i, j)[:, PLANE_VALUES:]
+
+    def plane(self, i: int, j: int) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Возвращает коэффициенты плоскости одной ячейки, как best_fit_plane.
+
+        :param i: Индекс ячейки по оси X.
+        :param j: Индекс ячейки по оси Y.
+        :return: Кортеж (A, B, C, D) или None, если у ячейки есть пустые углы.
+        """
+        coefficients = self.planes(np.array([i]), np.array([j]))[0]
+        if np.isnan(coefficients).any():
+            return None
+        return tuple(coefficients)
+
+    def _compute(self, i0: int, i1: int, j0: int, j1: int) -> np.ndarray:
+        """
+        Вычисляет коэффициенты ячеек [i0, i1) x [j0, j1) одним векторным расчетом.
+        Высоты блока приводятся к float64, поэтому для компактной поверхности (float32) расчет не теряет точность.
+        """
+        h = np.asarray(self.surface.heights[i0:i1 + 1, j0:j1 + 1], dtype=np.float64)
+        x = self.surface.x_coords
+        y = self.surface.y_coords
+        f11, f12 = h[:-1, :-1], h[:-1, 1:]
+        f21, f22 = h[1:, :-1], h[1:, 1:]
+        x0, x1 = x[i0:i1, None], x[i0 + 1:i1 + 1, None]
+        y0, y1 = y[None, j0:j1], y[None, j0 + 1:j1 + 1]
+
+        result = np.empty((i1 - i0, j1 - j0, self.values_per_cell))
+        result[..., :PLANE_VALUES] = plane_coefficients(x0, x1, y0, y1, f11, f12, f21, f22)
+        if self.bilinear:
+            result[..., PLANE_VALUES:] = bilinear_coefficients(f11, f12, f21, f22)
+        return result
+
+    def _tile(self, ti: int, tj: int) -> np.ndarray:
+        """Возвращает блок коэффициентов, вычисляя его при промахе и вытесняя самый старый блок при переполнении."""
+        key = (ti, tj)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+            return tile
+
+        self.misses += 1
+        size = self.tile_size
+        tile = self._compute(ti * size, min((ti + 1) * size, self.cells_shape[0]),
+                             tj * size, min((tj + 1) * size, self.cells_shape[1]))
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def _lookup(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Собирает коэффициенты ячеек из полного массива или из блоков."""
+        i = np.asarray(i, dtype=np.int64)
+        j = np.asarray(j, dtype=np.int64)
+        if self._eager is not None:
+            return self._eager[i, j]
+
+        result = np.empty((i.size, self.values_per_cell))
+        size = self.tile_size
+        # Ячейки группируются по блокам одной сортировкой, как в TiledHeights._gather.
+        tile_keys = (i // size) * (self.cells_shape[1] // size + 1) + j // size
+        order = np.argsort(tile_keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(tile_keys[order])) + 1
+        for group in np.split(order, bounds) if order.size else ():
+            ti, tj = int(i[group[0]] // size), int(j[group[0]] // size)
+            result[group] = self._tile(ti, tj)[i[group] % size, j[group] % size]
+        return result
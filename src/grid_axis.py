@@ -0,0 +1,106 @@
+import math
+import numpy as np
+from bisect import bisect_left, bisect_right
+from typing import Sequence, Union
+
+
+class GridAxis:
+    """
+    Ось сетки: отсортированные координаты узлов и поиск ячейки по координате.
+
+    Для равномерной оси (как в сетках IRAP с шагом x_inc / y_inc) индекс ячейки вычисляется
+    арифметически за O(1), для неравномерной - двоичным поиском за O(log n).
+    Результат в обоих случаях совпадает с np.searchsorted(coords, value, side) - 1.
+    """
+
+    def __init__(self, coords: Sequence[float], tolerance: float = 1e-6) -> None:
+        """
+        Создает ось сетки.
+
+        :param coords: Координаты узлов по возрастанию.
+        :param tolerance: Допустимое отклонение узлов от равномерной сетки, в долях шага.
+        """
+        self.coords: np.ndarray = np.ascontiguousarray(coords, dtype=np.float64)
+        self.size: int = self.coords.size
+        self._coords_list = self.coords.tolist()
+
+        self.origin: float = self._coords_list[0] if self.size else 0.0
+        self.step: float = (self._coords_list[-1] - self.origin) / (self.size - 1) if self.size > 1 else 0.0
+        self.uniform: bool = self.size > 1 and self.step > 0 and bool(np.all(
+            np.abs(self.coords - (self.origin + self.step * np.arange(self.size))) <= tolerance * self.step
+        ))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index):
+        return self.coords[index]
+
+    def locate_scalar(self, value: float, side: str = "right") -> int:
+        """
+        Находит индекс k узла слева от значения.
+
+        :param value: Координата точки.
+        :param side: "right" - coords[k] <= value < coords[k + 1], "left" - coords[k] < value <= coords[k + 1].
+        :return: Индекс k от -1 до size - 1.
+        """
+        coords = self._coords_list
+        if not self.uniform:
+            return (bisect_right if side == "right" else bisect_left)(coords, value) - 1
+
+        position = (value - self.origin) / self.step
+        if not math.isfinite(position):
+            return (bisect_right if side == "right" else bisect_left)(coords, value) - 1
+        k = min(max(math.floor(position) if side == "right" else math.ceil(position) - 1, -1), self.size - 1)
+        if side == "right":
+            if k + 1 < self.size and coords[k + 1] <= value:
+                k += 1
+            elif k >= 0 and coords[k] > value:
+                k -= 1
+        else:
+            if k + 1 < self.size and coords[k + 1] < value:
+                k += 1
+            elif k >= 0 and coords[k] >= value:
+                k -= 1
+        return k
+
+    def locate(self, values: np.ndarray, side: str = "right") -> np.ndarray:
+        """
+        Векторный вариант locate_scalar.
+
+        :param values: Координаты точек.
+        :param side: Как в locate_scalar.
+        :return: Массив int64 индексов от -1 до size - 1.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not self.uniform:
+            return np.searchsorted(self.coords, values, side=side).astype(np.int64) - 1
+
+        with np.errstate(invalid="ignore"):
+            position = (values - self.origin) / self.step
+            guess = np.floor(position) if side == "right" else np.ceil(position) - 1
+            k = np.clip(np.nan_to_num(guess, nan=self.size - 1), -1, self.size - 1).astype(np.int64)
+
+        coords = self.coords
+        next_node = coords[np.minimum(k + 1, self.size - 1)]
+        if side == "right":
+            k = np.where((k + 1 < self.size) & (next_node <= values), k + 1, k)
+            k = np.where((k >= 0) & (coords[np.maximum(k, 0)] > values), k - 1, k)
+        else:
+            k = np.where((k + 1 < self.size) & (next_node < values), k + 1, k)
+            k = np.where((k >= 0) & (coords[np.maximum(k, 0)] >= values), k - 1, k)
+        return k
+
+
+def locate_in(grid: Union[GridAxis, Sequence[float]], value: float, side: str = "right") -> int:
+    """
+    Находит индекс узла слева от значения в оси GridAxis или в отсортированной последовательности.
+
+    :param grid: Ось сетки или отсортированная последовательность координат.
+    :param value: Координата точки.
+    :param side: Как в GridAxis.locate_scalar.
+    :return: Индекс от -1 до len(grid) - 1.
+    """
+    if isinstance(grid, GridAxis):
+        return grid.locate_scalar(value, side)
+    return (bisect_right if side == "right" else bisect_left)(grid, value) - 1
@@ -1,6 +1,8 @@
 import math
 import numpy as np
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Sequence, Union
+
+from src.grid_axis import GridAxis, locate_in
 
 def bilinear_interpolation_4terms(x: float, y: float, x1: float, x4: float, y1: float, y4: float, z: List[float]) -> Optional[float]:
     """
@@ -29,30 +31,25 @@ def bilinear_interpolation_4terms(x: float, y: float, x1: float, x4: float, y1:
 
 
 
-def binary_search_nearest(arr: List[float], target: float) -> Dict[str, List[Optional[float]]]:
+def binary_search_nearest(arr: Union[GridAxis, Sequence[float]], target: float) -> Dict[str, List[Optional[float]]]:
     """
     Находит ближайший по значению элемент в отсортированном массиве.
 
-    :param arr: отсортированный массив
+    :param arr: отсортированный массив или ось сетки GridAxis (для равномерной оси поиск выполняется за O(1))
     :param target: искомое значение
-    :return: Словарь с ближайшими значениями  и их индексами вершин квадрата в которой лежит заданая точка
+    :return: Словарь с ближайшими значениями  и их индексами вершин квадрата в которой лежит заданая точка,
+             значения None если точка лежит вне массива
     """
-    if not arr:
+    size = len(arr)
+    k = locate_in(arr, target) if size > 1 else -1
+    if k < 0 or (k == size - 1 and arr[k] != target):
         return {"value": [None, None], "index": [None, None]}
 
-    left, right = 0, len(arr) - 1
-    while left <= right:
-        mid = (left + right) // 2
-        if arr[mid] == target:
-            if mid < len(arr) - 1:
-                return {"value": [arr[mid], arr[mid + 1]], "index": [mid, mid + 1]}
-            else:
-                return {"value": [arr[mid - 1], arr[mid]], "index": [mid - 1, mid]}
-        if arr[mid] > target:
-            right = mid - 1
-        else:
-            left = mid + 1
-    return {"value": [arr[left], arr[right]], "index": [left, right]}
+    if arr[k] == target:
+        if k < size - 1:
+            return {"value": [arr[k], arr[k + 1]], "index": [k, k + 1]}
+        return {"value": [arr[k - 1], arr[k]], "index": [k - 1, k]}
+    return {"value": [arr[k + 1], arr[k]], "index": [k + 1, k]}
 
 def is_point_in_rectangle(intersection: Tuple[float, float, float], points: List[Tuple[float, float]]) -> bool:
     """
@@ -73,7 +70,7 @@ def is_point_in_rectangle(intersection: Tuple[float, float, float], points: List
 
 def bresenham_grid_with_corners(
     x1: float, y1: float, x2: float, y2: float,
-    grid_x: List[float], grid_y: List[float]
+    grid_x: Union[GridAxis, Sequence[float]], grid_y: Union[GridAxis, Sequence[float]]
 ) -> List[Dict[str, Tuple[int, int, int, int]]]:
     """
     Определяет, через какие ячейки проходит отрезок, и возвращает координаты их углов.
@@ -82,16 +79,15 @@ def bresenham_grid_with_corners(
     :param y1: Координата Y начала отрезка
     :param x2: Координата X конца отрезка
     :param y2: Координата Y конца отрезка
-    :param grid_x: Список координат узлов сетки по оси X
-    :param grid_y: Список координат узлов сетки по оси Y
+    :param grid_x: Список координат узлов сетки по оси X или ось GridAxis
+    :param grid_y: Список координат узлов сетки по оси Y или ось GridAxis
     :return: Список клеток, каждая представлена индексами угловых координат и их значениями
     """
-    def find_index(grid: List[float], value: float) -> Optional[int]:
-        """Ищет индекс ячейки, в которую попадает заданное значение."""
-        for i in range(len(grid) - 1):
-            if grid[i] <= value <= grid[i + 1]:
-                return i
-        return None
+    def find_index(grid: Union[GridAxis, Sequence[float]], value: float) -> Optional[int]:
+        """Ищет индекс первой ячейки, в которую попадает заданное значение (границы ячейки включительно)."""
+        if len(grid) < 2 or not grid[0] <= value <= grid[len(grid) - 1]:
+            return None
+        return max(locate_in(grid, value, side="left"), 0)
 
     i1, j1 = find_index(grid_x, x1), find_index(grid_y, y1)
     i2, j2 = find_index(grid_x, x2), find_index(grid_y, y2)
@@ -124,3 +120,133 @@ def bresenham_grid_with_corners(
             j1 += sy
 
     return cells
+
+
+def traverse_grid_cells_batch(
+    x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray,
+    x_axis: GridAxis, y_axis: GridAxis
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Точный обход ячеек сетки (алгоритм Amanatides–Woo) сразу для многих отрезков.
+
+    Отрезок задается параметрически как P(t) = P1 + t * (P2 - P1), t из [0, 1], и обрезается по границам сетки.
+    Для каждой ячейки, через которую проходит отрезок, возвращается интервал [t_enter, t_exit],
+    на котором отрезок лежит внутри ячейки. Ячейки, которых отрезок касается только в одной точке
+    (при проходе точно через узел сетки), не возвращаются.
+
+    :param x1: Координаты X начал отрезков.
+    :param y1: Координаты Y начал отрезков.
+    :param x2: Координаты X концов отрезков.
+    :param y2: Координаты Y концов отрезков.
+    :param x_axis: Ось сетки по X.
+    :param y_axis: Ось сетки по Y.
+    :return: Кортеж массивов (segment, i, j, t_enter, t_exit) одинаковой длины, упорядоченных по отрезкам
+             и по t внутри отрезка; segment - номер отрезка во входных массивах, (i, j) - индекс ячейки.
+    """
+    x1, y1, x2, y2 = (np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (x1, y1, x2, y2))
+    count = x1.size
+    empty = (np.empty(0, dtype=np.int64),) * 3 + (np.empty(0),) * 2
+    if count == 0 or x_axis.size < 2 or y_axis.size < 2:
+        return empty
+
+    t_min = np.zeros(count)
+    t_max = np.ones(count)
+    starts, directions, axes = (x1, y1), (x2 - x1, y2 - y1), (x_axis, y_axis)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start, direction, axis in zip(starts, directions, axes):
+            low, high = axis.coords[0], axis.coords[-1]
+            t_low = (low - start) / direction
+            t_high = (high - start) / direction
+            moving = direction != 0
+            t_min = np.where(moving, np.maximum(t_min, np.minimum(t_low, t_high)), t_min)
+            t_max = np.where(moving, np.minimum(t_max, np.maximum(t_low, t_high)), t_max)
+            outside = ~moving & ((start < low) | (start > high))
+            t_max = np.where(outside, -1.0, t_max)
+
+    keep = np.flatnonzero(t_min <= t_max)
+    if keep.size == 0:
+        return empty
+    t_min, t_max = t_min[keep], t_max[keep]
+
+    first_cells, event_segments, event_t, event_axis = [], [], [], []
+    for axis_number, (start, direction, axis) in enumerate(zip(starts, directions, axes)):
+        start, direction = start[keep], direction[keep]
+        last_cell = axis.size - 2
+        entry = np.clip(start + t_min * direction, axis.coords[0], axis.coords[-1])
+        leave = np.clip(start + t_max * direction, axis.coords[0], axis.coords[-1])
+        forward = direction > 0
+        backward = direction < 0
+
+        first = np.clip(np.where(backward, axis.locate(entry, "left"), axis.locate(entry, "right")), 0, last_cell)
+        last = np.clip(np.where(forward, axis.locate(leave, "left"), axis.locate(leave, "right")), 0, last_cell)
+        last = np.where(forward, np.maximum(last, first), np.where(backward, np.minimum(last, first), first))
+        first_cells.append(first)
+
+        crossings = np.abs(last - first)
+        segment = np.repeat(np.arange(keep.size), crossings)
+        step = np.arange(crossings.sum()) - np.repeat(np.cumsum(crossings) - crossings, crossings)
+        line = np.where(forward[segment], first[segment] + 1 + step, first[segment] - step)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (axis.coords[line] - start[segment]) / direction[segment]
+        event_segments.append(segment)
+        event_t.append(np.clip(t, t_min[segment], t_max[segment]))
+        event_axis.append(np.full(segment.size, axis_number))
+
+    segment = np.concatenate(event_segments)
+    t = np.concatenate(event_t)
+    axis_number = np.concatenate(event_axis)
+    order = np.lexsort((axis_number, t, segment))
+    segment, t, axis_number = segment[order], t[order], axis_number[order]
+
+    # Каждый отрезок дает (число событий + 1) интервалов между t_min, точками пересечения линий сетки и t_max.
+    events_per_segment = np.bincount(segment, minlength=keep.size)
+    pieces_per_segment = events_per_segment + 1
+    piece_segment = np.repeat(np.arange(keep.size), pieces_per_segment)
+    piece_start = np.cumsum(pieces_per_segment) - pieces_per_segment
+    is_first_piece = np.zeros(piece_segment.size, dtype=bool)
+    is_first_piece[piece_start] = True
+
+    t_enter = np.empty(piece_segment.size)
+    t_enter[piece_start] = t_min
+    t_enter[~is_first_piece] = t
+    t_exit = np.empty(piece_segment.size)
+    t_exit[:-1] = t_enter[1:]
+    t_exit[piece_start + pieces_per_segment - 1] = t_max
+
+    cells = []
+    for axis_number_value, direction in enumerate(directions):
+        sign = np.sign(direction[keep]).astype(np.int64)
+        steps = np.zeros(piece_segment.size, dtype=np.int64)
+        steps[~is_first_piece] = (axis_number == axis_number_value) * sign[segment]
+        cumulative = np.cumsum(steps)
+        cumulative -= np.repeat(cumulative[piece_start], pieces_per_segment)
+        cells.append(first_cells[axis_number_value][piece_segment] + cumulative)
+
+    # Отрезки нулевой длины в плоскости XY целиком лежат в одной ячейке, остальные интервалы
+    # нулевой длины возникают при проходе точно через узел сетки и отбрасываются.
+    single_point = (t_min == t_max)[piece_segment]
+    mask = (t_exit > t_enter) | single_point
+    mask &= (cells[0] >= 0) & (cells[0] <= x_axis.size - 2) & (cells[1] >= 0) & (cells[1] <= y_axis.size - 2)
+    return keep[piece_segment][mask], cells[0][mask], cells[1][mask], t_enter[mask], t_exit[mask]
+
+
+def traverse_grid_cells(
+    x1: float, y1: float, x2: float, y2: float,
+    grid_x: Union[GridAxis, Sequence[float]], grid_y: Union[GridAxis, Sequence[float]]
+) -> List[Tuple[int, int, float, float]]:
+    """
+    Определяет все ячейки, через которые проходит отрезок, вместе с интервалом параметра t внутри каждой ячейки.
+    В отличие от bresenham_grid_with_corners не пропускает ячейки на диагональных отрезках.
+
+    :param x1: Координата X начала отрезка
+    :param y1: Координата Y начала отрезка
+    :param x2: Координата X конца отрезка
+    :param y2: Координата Y конца отрезка
+    :param grid_x: Список координат узлов сетки по оси X или ось GridAxis
+    :param grid_y: Список координат узлов сетки по оси Y или ось GridAxis
+    :return: Список (i, j, t_enter, t_exit) в порядке прохождения отрезка
+    """
+    x_axis = grid_x if isinstance(grid_x, GridAxis) else GridAxis(grid_x)
+    y_axis = grid_y if isinstance(grid_y, GridAxis) else GridAxis(grid_y)
+    _, i, j, t_enter, t_exit = traverse_grid_cells_batch(x1, y1, x2, y2, x_axis, y_axis)
+    return list(zip(i.tolist(), j.tolist(), t_enter.tolist(), t_exit.tolist()))
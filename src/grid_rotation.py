@@ -0,0 +1,96 @@
+import math
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+class GridRotation:
+    """
+    Поворот сетки вокруг точки (как rot, x_rot, y_rot в заголовке IRAP): мировые координаты узла
+    world = pivot + R(angle) (local - pivot), где local - координаты узла по x_coords, y_coords
+    неповернутой сетки, R(angle) - поворот против часовой стрелки.
+
+    Матрицы прямого и обратного аффинного преобразования вычисляются один раз при создании, поэтому
+    перевод точек траекторий в систему координат сетки и обратно - одно умножение матрицы 3 x 3
+    на массив точек и сложение со сдвигом. Высоты z не меняются, а параметр t точки на отрезке
+    при повороте сохраняется.
+    """
+
+    def __init__(self, angle: float, pivot_x: float = 0.0, pivot_y: float = 0.0) -> None:
+        """
+        Создает поворот.
+
+        :param angle: Угол поворота сетки против часовой стрелки, в градусах.
+        :param pivot_x: Координата X центра поворота.
+        :param pivot_y: Координата Y центра поворота.
+        """
+        self.angle = float(angle)
+        self.pivot_x = float(pivot_x)
+        self.pivot_y = float(pivot_y)
+        cos, sin = math.cos(math.radians(self.angle)), math.sin(math.radians(self.angle))
+        self._to_world = self._affine(cos, sin)
+        self._to_local = self._affine(cos, -sin)
+
+    @classmethod
+    def from_parameters(cls, parameters: Sequence[float]) -> Optional["GridRotation"]:
+        """
+        Создает поворот из массива parameters (обратное к свойству parameters).
+
+        :param parameters: Пустой массив или [angle, pivot_x, pivot_y].
+        :return: Поворот или None для пустого массива.
+        """
+        return cls(*parameters) if len(parameters) else None
+
+    @property
+    def parameters(self) -> np.ndarray:
+        """Массив [angle, pivot_x, pivot_y] для сохранения в файлы и хеша содержимого."""
+        return np.array([self.angle, self.pivot_x, self.pivot_y])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GridRotation) and np.array_equal(self.parameters, other.parameters)
+
+    def __repr__(self) -> str:
+        return f"GridRotation({self.angle!r}, {self.pivot_x!r}, {self.pivot_y!r})"
+
+    def to_local(self, points: np.ndarray) -> np.ndarray:
+        """
+        Переводит точки из мировых координат в координаты неповернутой сетки.
+
+        :param points: Точки формы (..., 3).
+        :return: Новый массив той же формы.
+        """
+        return self._apply(self._to_local, points)
+
+    def to_world(self, points: np.ndarray) -> np.ndarray:
+        """
+        Переводит точки из координат неповернутой сетки в мировые.
+
+        :param points: Точки формы (..., 3).
+        :return: Новый массив той же формы.
+        """
+        return self._apply(self._to_world, points)
+
+    def world_bounds(self, x_coords: np.ndarray, y_coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Возвращает прямоугольник в мировых координатах, содержащий повернутую сетку.
+
+        :param x_coords: Координаты узлов по оси X неповернутой сетки.
+        :param y_coords: Координаты узлов по оси Y неповернутой сетки.
+        :return: Кортеж (low, high) - массивы [x, y] нижнего левого и верхнего правого углов.
+        """
+        corners = np.array([[x, y, 0.0] for x in (x_coords[0], x_coords[-1]) for y in (y_coords[0], y_coords[-1])])
+        corners = self.to_world(corners)[:, :2]
+        return corners.min(axis=0), corners.max(axis=0)
+
+    def _affine(self, cos: float, sin: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Матрица 3 x 3 и сдвиг поворота вокруг центра на угол с косинусом cos и синусом sin."""
+        matrix = np.array([[cos, -sin, 0.0], [sin, cos, 0.0], [0.0, 0.0, 1.0]])
+        pivot = np.array([self.pivot_x, self.pivot_y, 0.0])
+        return matrix, pivot - matrix @ pivot
+
+    @staticmethod
+    def _apply(affine: Tuple[np.ndarray, np.ndarray], points: np.ndarray) -> np.ndarray:
+        """Применяет аффинное преобразование к точкам; z переносится без изменений (строка матрицы 0, 0, 1)."""
+        matrix, shift = affine
+        transformed = np.dot(np.asarray(points, dtype=np.float64), matrix.T)
+        transformed += shift
+        return transformed
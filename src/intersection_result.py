@@ -0,0 +1,122 @@
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+COLUMNS = ("trajectory", "segment", "cell_i", "cell_j", "t", "x", "y", "z")
+
+
+class IntersectionResult:
+    """
+    Пересечения траекторий с поверхностью в виде столбцов NumPy.
+
+    Каждая строка - одно пересечение: индекс траектории, индекс отрезка внутри траектории
+    (точки segment и segment + 1), индексы ячейки сетки (cell_i, cell_j), параметр t на отрезке
+    и координаты точки x, y, z. Строки упорядочены по траекториям, внутри траектории - вдоль нее.
+    Для траекторий, построенных по инклинометрии, добавляется измеренная глубина md, для набора
+    поверхностей SurfaceStack - номер горизонта horizon (пересечения в одной точке упорядочены по номеру).
+    """
+
+    def __init__(
+            self,
+            trajectory: np.ndarray,
+            segment: np.ndarray,
+            cell_i: np.ndarray,
+            cell_j: np.ndarray,
+            t: np.ndarray,
+            xyz: np.ndarray,
+            trajectory_count: int,
+            ids: Optional[Sequence[Hashable]] = None,
+            md: Optional[np.ndarray] = None,
+            horizon: Optional[np.ndarray] = None,
+            horizon_names: Optional[Sequence[Hashable]] = None
+    ) -> None:
+        """
+        Создает результат из столбцов.
+
+        :param trajectory: Индексы траекторий, int64.
+        :param segment: Индексы отрезков внутри траекторий, int64.
+        :param cell_i: Индексы ячеек по оси X, int64.
+        :param cell_j: Индексы ячеек по оси Y, int64.
+        :param t: Параметры пересечений на отрезках, от 0 до 1.
+        :param xyz: Координаты точек пересечения, форма (M, 3).
+        :param trajectory_count: Общее число траекторий, включая траектории без пересечений.
+        :param ids: Идентификаторы траекторий длины trajectory_count.
+        :param md: Измеренные глубины пересечений.
+        :param horizon: Номера горизонтов набора поверхностей, int64.
+        :param horizon_names: Имена горизонтов, индексируемые номерами horizon.
+        """
+        self.trajectory: np.ndarray = np.asarray(trajectory, dtype=np.int64)
+        self.segment: np.ndarray = np.asarray(segment, dtype=np.int64)
+        self.cell_i: np.ndarray = np.asarray(cell_i, dtype=np.int64)
+        self.cell_j: np.ndarray = np.asarray(cell_j, dtype=np.int64)
+        self.t: np.ndarray = np.asarray(t, dtype=np.float64)
+        self.xyz: np.ndarray = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+        self.trajectory_count = trajectory_count
+        self.ids = list(ids) if ids is not None else None
+        self.md: Optional[np.ndarray] = np.asarray(md, dtype=np.float64) if md is not None else None
+        self.horizon: Optional[np.ndarray] = np.asarray(horizon, dtype=np.int64) if horizon is not None else None
+        self.horizon_names = list(horizon_names) if horizon_names is not None else None
+
+    @classmethod
+    def empty(cls, trajectory_count: int, ids: Optional[Sequence[Hashable]] = None) -> "IntersectionResult":
+        """Создает результат без пересечений для trajectory_count траекторий."""
+        index = np.empty(0, dtype=np.int64)
+        return cls(index, index, index, index, np.empty(0), np.empty((0, 3)), trajectory_count, ids)
+
+    def __len__(self) -> int:
+        return self.t.size
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.xyz[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.xyz[:, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.xyz[:, 2]
+
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти столбцов в байтах."""
+        optional = [array for array in (self.md, self.horizon) if array is not None]
+        return sum(array.nbytes for array in optional) + sum(
+            array.nbytes for array in (self.trajectory, self.segment, self.cell_i, self.cell_j, self.t, self.xyz))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Возвращает столбцы результата, например для pandas.DataFrame(result.columns()) или pyarrow.table.
+
+        :return: Словарь имя столбца -> массив; при заданных идентификаторах добавляется столбец "id",
+                 при заданных глубинах - столбец "md", для набора поверхностей - "horizon"
+                 и, если заданы имена горизонтов, "horizon_name".
+        """
+        columns = {name: getattr(self, name) for name in COLUMNS}
+        if self.md is not None:
+            columns["md"] = self.md
+        if self.horizon is not None:
+            columns["horizon"] = self.horizon
+            if self.horizon_names is not None:
+                columns["horizon_name"] = np.asarray(self.horizon_names, dtype=object)[self.horizon]
+        if self.ids is not None:
+            columns["id"] = np.asarray(self.ids, dtype=object)[self.trajectory]
+        return columns
+
+    def bounds(self) -> np.ndarray:
+        """
+        Возвращает границы строк каждой траектории.
+
+        :return: Массив int64 длины trajectory_count + 1; пересечения траектории k - строки bounds[k]:bounds[k + 1].
+        """
+        return np.searchsorted(self.trajectory, np.arange(self.trajectory_count + 1)).astype(np.int64)
+
+    def to_lists(self) -> List[List[Tuple[float, float, float]]]:
+        """
+        Преобразует результат в формат calculate_intersections: список пересечений для каждой траектории.
+
+        :return: Список списков кортежей (x, y, z).
+        """
+        bounds = self.bounds()
+        points = [tuple(point) for point in self.xyz]
+        return [points[bounds[k]:bounds[k + 1]] for k in range(self.trajectory_count)]
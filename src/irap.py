@@ -0,0 +1,235 @@
+import os
+import numpy as np
+from pydantic import BaseModel
+from typing import Iterator, Optional, TextIO, Tuple
+
+from src.grid_rotation import GridRotation
+from src.surface import PreparedSurface
+from src.tiled_surface import TiledSurface, write_tiles
+
+IRAP_NULL_VALUE = 9999900.0
+CACHE_FORMAT_VERSION = 2
+
+
+class IrapHeader(BaseModel):
+    """
+    Заголовок файла IRAP ASCII (формат IRAP Classic / ROFF).
+    """
+    id: str
+    y_cnt: int
+    x_inc: float
+    y_inc: float
+    x_min: float
+    x_max: float
+    y_min: float
+    y_max: float
+    x_cnt: int
+    rot: float
+    x_rot: float
+    y_rot: float
+
+    @property
+    def rotation(self) -> Optional[GridRotation]:
+        """Поворот сетки на rot градусов против часовой стрелки вокруг (x_rot, y_rot); None при rot = 0."""
+        return GridRotation(self.rot, self.x_rot, self.y_rot) if self.rot != 0.0 else None
+
+
+def read_irap_header(irap_data: TextIO) -> IrapHeader:
+    """
+    Читает заголовок IRAP ASCII: три строки параметров сетки и строку из семи нулей.
+
+    :param irap_data: Открытый текстовый файл, позиция - начало файла.
+    :return: Провалидированный заголовок; позиция файла - начало значений высот.
+    """
+    first_row = irap_data.readline().split()
+    second_row = irap_data.readline().split()
+    third_row = irap_data.readline().split()
+    irap_data.readline()
+
+    return IrapHeader(
+        id=first_row[0], y_cnt=first_row[1], x_inc=first_row[2], y_inc=first_row[3],
+        x_min=second_row[0], x_max=second_row[1], y_min=second_row[2], y_max=second_row[3],
+        x_cnt=third_row[0], rot=third_row[1], x_rot=third_row[2], y_rot=third_row[3],
+    )
+
+
+def read_irap(
+        filename: str, use_cache: bool = False, cache_path: Optional[str] = None, storage: str = "float64"
+) -> PreparedSurface:
+    """
+    Читает поверхность из файла IRAP ASCII в подготовленную поверхность.
+
+    Значения высот разбираются одним вызовом NumPy в массив float64, значение 9999900 заменяется на NaN.
+    В файле X меняется быстрее Y, поэтому массив (y_cnt, x_cnt) транспонируется в форму
+    (x_cnt, y_cnt), принятую в PreparedSurface. Повернутая сетка (rot != 0) не пересчитывается на
+    прямоугольную: поверхность хранит поворот (GridRotation), а x_min .. x_max, y_min .. y_max задают
+    координаты узлов до поворота.
+
+    При use_cache=True рядом с файлом сохраняется двоичная копия высот (.npy), которая при следующих
+    запусках отображается в память (np.load(mmap_mode="r")) вместо разбора текста. Копия считается
+    устаревшей, если изменились размер или время изменения исходного файла, или если она сохранена
+    в другом режиме хранения высот.
+
+    :param filename: Путь к файлу IRAP ASCII.
+    :param use_cache: Использовать двоичный кэш высот.
+    :param cache_path: Путь к файлу кэша; по умолчанию filename + ".npy".
+    :param storage: Режим хранения высот PreparedSurface: "float64" или "compact" (float32).
+    :return: Подготовленная поверхность.
+    :raises ValueError: Если число значений не совпадает с заголовком.
+    """
+    if use_cache:
+        cache_path = cache_path or filename + ".npy"
+        surface = load_surface_cache(cache_path, source=filename)
+        if surface is not None and surface.storage == storage:
+            return surface
+
+    with open(filename) as irap_data:
+        header = read_irap_header(irap_data)
+        depths = np.fromstring(irap_data.read(), dtype=np.float64, sep=" ")
+
+    if depths.size != header.x_cnt * header.y_cnt:
+        raise ValueError(
+            f"Число значений высот {depths.size} не совпадает с {header.x_cnt} x {header.y_cnt} из заголовка"
+        )
+
+    depths[depths == IRAP_NULL_VALUE] = np.nan
+    heights = np.ascontiguousarray(depths.reshape((header.y_cnt, header.x_cnt)).T)
+    x_coords = np.linspace(header.x_min, header.x_max, header.x_cnt)
+    y_coords = np.linspace(header.y_min, header.y_max, header.y_cnt)
+    surface = PreparedSurface(x_coords, y_coords, heights, rotation=header.rotation, storage=storage)
+
+    if use_cache:
+        save_surface_cache(surface, cache_path, source=filename)
+    return surface
+
+
+def convert_irap_to_tiles(
+        filename: str,
+        path: str,
+        tile_size: int = 256,
+        block_size: int = 16,
+        max_tiles: int = 256,
+        chunk_chars: int = 2 ** 24
+) -> TiledSurface:
+    """
+    Преобразует файл IRAP ASCII в файл тайлов TiledSurface, не загружая все высоты в память.
+
+    Текст читается частями по chunk_chars символов; строки сетки (в файле X меняется быстрее Y)
+    собираются в полосы по tile_size + 1 строк, которые сразу записываются тайлами.
+
+    :param filename: Путь к файлу IRAP ASCII.
+    :param path: Путь к файлу тайлов.
+    :param tile_size: Число ячеек в тайле по каждой оси, степень двойки.
+    :param block_size: Число ячеек в блоке пирамиды по каждой оси.
+    :param max_tiles: Максимальное число тайлов в памяти открытой поверхности.
+    :param chunk_chars: Размер части текста, читаемой за один раз.
+    :return: Открытая поверхность.
+    :raises ValueError: Если число значений не совпадает с заголовком.
+    """
+    with open(filename) as irap_data:
+        header = read_irap_header(irap_data)
+        x_coords = np.linspace(header.x_min, header.x_max, header.x_cnt)
+        y_coords = np.linspace(header.y_min, header.y_max, header.y_cnt)
+        bands = _irap_column_bands(_irap_rows(irap_data, header, chunk_chars), header, tile_size)
+        write_tiles(path, x_coords, y_coords, bands, tile_size, block_size, header.rotation)
+    return TiledSurface(path, max_tiles)
+
+
+def _irap_rows(irap_data: TextIO, header: IrapHeader, chunk_chars: int) -> Iterator[np.ndarray]:
+    """Читает значения высот частями и возвращает полные строки сетки (по Y) массивами формы (k, x_cnt)."""
+    pending = np.empty(0)
+    tail = ""
+    rows_read = 0
+    while True:
+        text = irap_data.read(chunk_chars)
+        final = not text
+        text = tail + text
+        cut = len(text) if final else max(text.rfind(" "), text.rfind("\n")) + 1
+        tail = text[cut:]
+        pending = np.concatenate([pending, np.fromstring(text[:cut].strip(), dtype=np.float64, sep=" ")])
+        rows = pending.size // header.x_cnt
+        if rows:
+            rows_read += rows
+            yield pending[:rows * header.x_cnt].reshape(rows, header.x_cnt)
+            pending = pending[rows * header.x_cnt:]
+        if final:
+            break
+    if pending.size or rows_read != header.y_cnt:
+        raise ValueError(
+            f"Число значений высот {rows_read * header.x_cnt + pending.size} не совпадает с "
+            f"{header.x_cnt} x {header.y_cnt} из заголовка"
+        )
+
+
+def _irap_column_bands(
+        rows: Iterator[np.ndarray], header: IrapHeader, tile_size: int
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Собирает строки сетки в полосы высот [:, j0:j0 + tile_size + 1] для write_tiles; соседние полосы делят строку."""
+    band = np.empty((0, header.x_cnt))
+    j0 = 0
+    for chunk in rows:
+        band = np.concatenate([band, chunk])
+        while band.shape[0] >= tile_size + 1:
+            yield j0, _irap_heights(band[:tile_size + 1])
+            band = band[tile_size:]
+            j0 += tile_size
+    if band.shape[0] > 1 or j0 == 0:
+        yield j0, _irap_heights(band)
+
+
+def _irap_heights(rows: np.ndarray) -> np.ndarray:
+    """Переводит строки IRAP (по Y) в высоты формы (x, y) с NaN вместо значения 9999900."""
+    heights = rows.T.copy()
+    heights[heights == IRAP_NULL_VALUE] = np.nan
+    return heights
+
+
+def _axes_path(cache_path: str) -> str:
+    """Путь к файлу координат узлов, сопровождающему кэш высот."""
+    return cache_path + ".axes.npz"
+
+
+def _source_stamp(source: Optional[str]) -> np.ndarray:
+    """Версия формата кэша, размер и время изменения исходного файла."""
+    if source is None:
+        return np.array([CACHE_FORMAT_VERSION, -1, -1], dtype=np.int64)
+    stat = os.stat(source)
+    return np.array([CACHE_FORMAT_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def save_surface_cache(surface: PreparedSurface, cache_path: str, source: Optional[str] = None) -> None:
+    """
+    Сохраняет двоичный кэш поверхности: высоты в cache_path (.npy), координаты узлов, поворот сетки
+    и отметку исходного файла в cache_path + ".axes.npz".
+
+    :param surface: Подготовленная поверхность.
+    :param cache_path: Путь к файлу высот.
+    :param source: Исходный файл, по размеру и времени изменения которого проверяется актуальность кэша.
+    """
+    with open(cache_path, "wb") as cache_file:
+        np.save(cache_file, surface.heights)
+    with open(_axes_path(cache_path), "wb") as axes_file:
+        rotation = np.empty(0) if surface.rotation is None else surface.rotation.parameters
+        np.savez(axes_file, x_coords=surface.x_coords, y_coords=surface.y_coords, rotation=rotation,
+                 stamp=_source_stamp(source))
+
+
+def load_surface_cache(cache_path: str, source: Optional[str] = None) -> Optional[PreparedSurface]:
+    """
+    Загружает поверхность из двоичного кэша, отображая высоты в память без чтения всего файла.
+    Режим хранения поверхности определяется по типу высот в кэше (float32 - "compact").
+
+    :param cache_path: Путь к файлу высот.
+    :param source: Исходный файл; если задан и изменился после сохранения кэша, кэш не используется.
+    :return: Подготовленная поверхность или None, если кэша нет или он устарел.
+    """
+    if not (os.path.exists(cache_path) and os.path.exists(_axes_path(cache_path))):
+        return None
+    with np.load(_axes_path(cache_path)) as axes:
+        if not np.array_equal(axes["stamp"], _source_stamp(source)):
+            return None
+        x_coords, y_coords = axes["x_coords"], axes["y_coords"]
+        rotation = GridRotation.from_parameters(axes["rotation"])
+    heights = np.load(cache_path, mmap_mode="r")
+    storage = "compact" if heights.dtype == np.float32 else "float64"
+    return PreparedSurface(x_coords, y_coords, heights, trusted=True, rotation=rotation, storage=storage)
@@ -6,6 +6,9 @@ class GridModel(BaseModel):
     y_coords: List[float]
     height_matrix: List[List[Any]]
 
+class TrajectoryListModel(BaseModel):
+    trajectories: List[List[List[float]]]
+
 class TrajectoriesModel(BaseModel):
     grid: GridModel
     trajectories: List[List[List[float]]]
\ No newline at end of file
@@ -0,0 +1,245 @@
+import math
+import numpy as np
+from typing import Tuple
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+MODE_PLANE = 0
+MODE_BILINEAR = 1
+
+
+def _jit(func):
+    """Компилирует функцию numba.njit, если numba установлена, иначе возвращает ее без изменений."""
+    if numba is None:
+        return func
+    return numba.njit(cache=True, nogil=True)(func)
+
+
+@_jit
+def _locate(coords: np.ndarray, value: float, right: bool) -> int:
+    """Индекс узла слева от значения, как GridAxis.locate (np.searchsorted(coords, value, side) - 1)."""
+    if right:
+        return np.searchsorted(coords, value, side="right") - 1
+    return np.searchsorted(coords, value, side="left") - 1
+
+
+@_jit
+def _clip_index(value: int, low: int, high: int) -> int:
+    """Ограничивает индекс диапазоном [low, high]."""
+    return max(low, min(value, high))
+
+
+@_jit
+def _axis_clip(start: float, direction: float, low: float, high: float,
+               t_min: float, t_max: float) -> Tuple[float, float]:
+    """Обрезает интервал параметра отрезка по границам сетки вдоль одной оси."""
+    if direction != 0:
+        t_low = (low - start) / direction
+        t_high = (high - start) / direction
+        t_min = max(t_min, min(t_low, t_high))
+        t_max = min(t_max, max(t_low, t_high))
+    elif start < low or start > high:
+        t_max = -1.0
+    return t_min, t_max
+
+
+@_jit
+def _first_last_cells(coords: np.ndarray, start: float, direction: float,
+                      t_min: float, t_max: float) -> Tuple[int, int]:
+    """Первая и последняя ячейки отрезка вдоль оси, как в traverse_grid_cells_batch."""
+    low, high = coords[0], coords[coords.size - 1]
+    last_cell = coords.size - 2
+    entry = min(max(start + t_min * direction, low), high)
+    leave = min(max(start + t_max * direction, low), high)
+    first = _clip_index(_locate(coords, entry, direction >= 0), 0, last_cell)
+    last = _clip_index(_locate(coords, leave, direction <= 0), 0, last_cell)
+    if direction > 0:
+        last = max(last, first)
+    elif direction < 0:
+        last = min(last, first)
+    else:
+        last = first
+    return first, last
+
+
+@_jit
+def _event_t(coords: np.ndarray, start: float, direction: float, cell: int, last: int,
+             t_min: float, t_max: float) -> float:
+    """Параметр t пересечения следующей линии сетки вдоль оси или inf, если линий больше нет."""
+    if cell == last:
+        return math.inf
+    line = cell + 1 if direction > 0 else cell
+    return min(max((coords[line] - start) / direction, t_min), t_max)
+
+
+@_jit
+def _piece_hits(
+        segment: int, i: int, j: int, t_enter: float, t_exit: float, last_piece: bool,
+        origin: np.ndarray, direction: np.ndarray,
+        x_coords: np.ndarray, y_coords: np.ndarray, heights: np.ndarray,
+        envelope_min: np.ndarray, envelope_max: np.ndarray, envelope_shift: int, mode: int,
+        out_segment, out_i, out_j, out_t, counters: np.ndarray
+) -> None:
+    """Отсев участка отрезка в ячейке (i, j) по оболочке высот и пересечение с поверхностью ячейки."""
+    x0, y0, z0 = origin[0], origin[1], origin[2]
+    dx, dy, dz = direction[0], direction[1], direction[2]
+    z_enter = z0 + t_enter * dz
+    z_exit = z0 + t_exit * dz
+    bi, bj = i >> envelope_shift, j >> envelope_shift
+    if not (min(z_enter, z_exit) <= envelope_max[bi, bj] and max(z_enter, z_exit) >= envelope_min[bi, bj]):
+        counters[1] += 1
+        return
+    # Высоты компактной поверхности (float32) приводятся к float64, как в CellCoefficientCache.
+    f11, f12 = np.float64(heights[i, j]), np.float64(heights[i, j + 1])
+    f21, f22 = np.float64(heights[i + 1, j]), np.float64(heights[i + 1, j + 1])
+    # Оболочка блока не отсекает пустые ячейки внутри него; они отбрасываются, как по cell_valid.
+    if math.isnan(f11 + f12 + f21 + f22):
+        counters[1] += 1
+        return
+    counters[2] += 1
+
+    cx0, cx1 = x_coords[i], x_coords[i + 1]
+    cy0, cy1 = y_coords[j], y_coords[j + 1]
+    r0 = math.nan
+    r1 = math.nan
+    if mode == MODE_PLANE:
+        # Те же операции и в том же порядке, что plane_coefficients и line_plane_intersection_parameters.
+        half_x = (cx1 - cx0) / 2
+        half_y = (cy1 - cy0) / 2
+        slope_x = (f21 + f22 - f11 - f12) / 4 / half_x
+        slope_y = (f12 + f22 - f11 - f21) / 4 / half_y
+        intercept = (f11 + f12 + f21 + f22) / 4 - slope_x * (cx0 + half_x) - slope_y * (cy0 + half_y)
+        a, b, d = -slope_x, -slope_y, -intercept
+        denom = a * dx + b * dy + 1.0 * dz
+        distance = a * x0 + b * y0 + 1.0 * z0 + d
+        if abs(denom) < 1e-10:
+            if abs(distance) < 1e-10:
+                r0 = 0.0
+        else:
+            r0 = -distance / denom
+    else:
+        # Те же операции, что bilinear_coefficients и line_bilinear_intersection_parameters.
+        a0, a1, a2, a3 = f11, f21 - f11, f12 - f11, f11 - f12 - f21 + f22
+        width = cx1 - cx0
+        height = cy1 - cy0
+        u0 = (x0 - cx0) / width
+        v0 = (y0 - cy0) / height
+        du = dx / width
+        dv = dy / height
+        qa = a3 * du * dv
+        qb = a1 * du + a2 * dv + a3 * (u0 * dv + v0 * du) - dz
+        qc = a0 + a1 * u0 + a2 * v0 + a3 * u0 * v0 - z0
+        discriminant = qb * qb - 4 * qa * qc
+        if discriminant >= 0:
+            q = -0.5 * (qb + (-1.0 if qb < 0 else 1.0) * math.sqrt(discriminant))
+            r0 = q / qa if qa != 0 else math.nan
+            r1 = qc / q if q != 0 else math.nan
+            if not math.isfinite(r0):
+                r0 = math.nan
+            if not math.isfinite(r1):
+                r1 = math.nan
+            if r0 == r1:
+                r1 = math.nan
+            if math.isnan(r0) or (not math.isnan(r1) and r1 < r0):
+                r0, r1 = r1, r0
+
+    for root in (r0, r1):
+        if math.isnan(root):
+            continue
+        if t_enter <= root and (root < t_exit or (last_piece and root <= t_exit)):
+            out_segment.append(segment)
+            out_i.append(i)
+            out_j.append(j)
+            out_t.append(root)
+        else:
+            counters[3] += 1
+
+
+@_jit
+def fused_segment_hits(
+        start: np.ndarray, end: np.ndarray,
+        x_coords: np.ndarray, y_coords: np.ndarray, heights: np.ndarray,
+        envelope_min: np.ndarray, envelope_max: np.ndarray, envelope_shift: int, mode: int
+):
+    """
+    Объединенное ядро обхода ячеек, отсева по оболочке высот и пересечения с поверхностью ячейки
+    для отрезков-кандидатов: один проход по плоским массивам вместо промежуточных массивов
+    на каждый этап TrajectoryProcessor._segment_hits. Обход повторяет traverse_grid_cells_batch
+    (при равных t первой пересекается линия сетки по X), пересечение - plane_coefficients
+    или bilinear_coefficients, поэтому результаты совпадают с NumPy-вариантом.
+
+    :param start: Начальные точки отрезков, форма (S, 3).
+    :param end: Конечные точки отрезков, форма (S, 3).
+    :param x_coords: Координаты узлов по оси X.
+    :param y_coords: Координаты узлов по оси Y.
+    :param heights: Высоты узлов, форма (nx, ny), NaN для пустых узлов.
+    :param envelope_min: Нижняя оболочка высот ячеек (уровень 0 пирамиды).
+    :param envelope_max: Верхняя оболочка высот ячеек (уровень 0 пирамиды).
+    :param envelope_shift: block_shift пирамиды: оболочка ячейки (i, j) - элемент (i >> shift, j >> shift).
+    :param mode: MODE_PLANE или MODE_BILINEAR.
+    :return: Кортеж (segment, cell_i, cell_j, t, counters) в порядке следования вдоль отрезков;
+             counters - массив int64 [cells_traversed, cells_culled, plane_fits, rejected_by_rectangle].
+    """
+    out_segment = [np.int64(0) for _ in range(0)]
+    out_i = [np.int64(0) for _ in range(0)]
+    out_j = [np.int64(0) for _ in range(0)]
+    out_t = [np.float64(0.0) for _ in range(0)]
+    counters = np.zeros(4, dtype=np.int64)
+    nx, ny = x_coords.size, y_coords.size
+
+    for s in range(start.shape[0] if nx >= 2 and ny >= 2 else 0):
+        origin = start[s]
+        direction = end[s] - origin
+        x0, y0, dx, dy = origin[0], origin[1], direction[0], direction[1]
+
+        t_min, t_max = _axis_clip(x0, dx, x_coords[0], x_coords[nx - 1], 0.0, 1.0)
+        t_min, t_max = _axis_clip(y0, dy, y_coords[0], y_coords[ny - 1], t_min, t_max)
+        if not t_min <= t_max:
+            continue
+        single_point = t_min == t_max
+
+        i, last_i = _first_last_cells(x_coords, x0, dx, t_min, t_max)
+        j, last_j = _first_last_cells(y_coords, y0, dy, t_min, t_max)
+        step_i = 1 if dx > 0 else -1
+        step_j = 1 if dy > 0 else -1
+
+        # Участок решается, когда известен следующий: признак последнего участка относится
+        # к последнему оставленному участку отрезка, как в NumPy-варианте.
+        pending = False
+        pending_i, pending_j, pending_enter, pending_exit = 0, 0, 0.0, 0.0
+        t_enter = t_min
+        while True:
+            tx = _event_t(x_coords, x0, dx, i, last_i, t_min, t_max)
+            ty = _event_t(y_coords, y0, dy, j, last_j, t_min, t_max)
+            finished = tx == math.inf and ty == math.inf
+            t_exit = t_max if finished else min(tx, ty)
+
+            if (t_exit > t_enter or single_point) and 0 <= i <= nx - 2 and 0 <= j <= ny - 2:
+                counters[0] += 1
+                if pending:
+                    _piece_hits(s, pending_i, pending_j, pending_enter, pending_exit, False, origin, direction,
+                                x_coords, y_coords, heights, envelope_min, envelope_max, envelope_shift, mode,
+                                out_segment, out_i, out_j, out_t, counters)
+                pending = True
+                pending_i, pending_j, pending_enter, pending_exit = i, j, t_enter, t_exit
+
+            if finished:
+                break
+            if tx <= ty:
+                i += step_i
+            else:
+                j += step_j
+            t_enter = t_exit
+
+        if pending:
+            _piece_hits(s, pending_i, pending_j, pending_enter, pending_exit, True, origin, direction,
+                        x_coords, y_coords, heights, envelope_min, envelope_max, envelope_shift, mode,
+                        out_segment, out_i, out_j, out_t, counters)
+
+    return (np.array(out_segment, dtype=np.int64), np.array(out_i, dtype=np.int64),
+            np.array(out_j, dtype=np.int64), np.array(out_t, dtype=np.float64), counters)
@@ -0,0 +1,68 @@
+import numpy as np
+from typing import Tuple
+
+# Число единичных битов в каждом значении байта.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class PackedMask:
+    """
+    Булев массив, хранящийся по одному биту на элемент (np.packbits, порядок C): в восемь раз
+    меньше массива bool. Поддерживает выборку по массивам целых индексов, как массив NumPy той же формы.
+    """
+
+    def __init__(self, mask: np.ndarray) -> None:
+        """
+        Упаковывает булев массив.
+
+        :param mask: Булев массив любой формы.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        self.shape: Tuple[int, ...] = mask.shape
+        self.size: int = mask.size
+        self.bits: np.ndarray = np.packbits(mask, axis=None)
+
+    @classmethod
+    def from_bits(cls, bits: np.ndarray, shape: Tuple[int, ...]) -> "PackedMask":
+        """
+        Создает маску поверх уже упакованных битов без копирования (например, из разделяемой памяти).
+
+        :param bits: Упакованные биты, как атрибут bits.
+        :param shape: Форма распакованного массива.
+        :return: Маска.
+        """
+        mask = cls.__new__(cls)
+        mask.shape = tuple(shape)
+        mask.size = int(np.prod(mask.shape))
+        mask.bits = bits
+        return mask
+
+    @property
+    def nbytes(self) -> int:
+        """Объем упакованных битов в байтах."""
+        return self.bits.nbytes
+
+    def __getitem__(self, key) -> np.ndarray:
+        """
+        Возвращает элементы по индексам: по одному целому или массиву целых индексов на каждую ось.
+
+        :raises ValueError: Если индекс вне массива.
+        """
+        flat = np.ravel_multi_index(key if isinstance(key, tuple) else (key,), self.shape)
+        return ((self.bits[flat >> 3] >> (7 - (flat & 7))) & 1).astype(bool)
+
+    def unpack(self) -> np.ndarray:
+        """Возвращает распакованный булев массив."""
+        return np.unpackbits(self.bits, count=self.size).reshape(self.shape).view(bool)
+
+    def sum(self) -> int:
+        """Число истинных элементов."""
+        return int(POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def all(self) -> bool:
+        """Все ли элементы истинны."""
+        return self.sum() == self.size
+
+    def any(self) -> bool:
+        """Есть ли истинные элементы."""
+        return bool(self.bits.any())
@@ -0,0 +1,186 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.cell_coefficients import CellCoefficientCache
+from src.result_cache import ResultCache
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+# Выравнивание массивов в блоке разделяемой памяти, в байтах.
+SHARED_ALIGNMENT = 64
+# Число блоков коэффициентов ячеек в памяти рабочего процесса (CellCoefficientCache в режиме "lazy", около 16 МиБ).
+WORKER_COEFFICIENT_TILES = 64
+
+_worker_processor: Optional[TrajectoryProcessor] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def _flatten(arrays: Dict, path: Tuple = ()) -> Iterator[Tuple[Tuple, np.ndarray]]:
+    """Перебирает массивы вложенного словаря (как в PreparedSurface.shared_state) вместе с путями ключей."""
+    for key, value in arrays.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, path + (key,))
+        else:
+            yield path + (key,), np.asarray(value)
+
+
+def _share_arrays(arrays: Dict) -> Tuple[shared_memory.SharedMemory, List[Tuple]]:
+    """
+    Копирует массивы вложенного словаря в один блок разделяемой памяти.
+
+    :return: Кортеж (memory, layout): блок памяти и список (путь ключей, форма, тип, смещение) для _attach_arrays.
+    """
+    flat = list(_flatten(arrays))
+    layout, size = [], 0
+    for path, array in flat:
+        size = -(-size // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+        layout.append((path, array.shape, array.dtype.str, size))
+        size += array.nbytes
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (_, array), (_, shape, dtype, offset) in zip(flat, layout):
+        np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)[...] = array
+    return memory, layout
+
+
+def _attach_arrays(memory: shared_memory.SharedMemory, layout: List[Tuple]) -> Dict:
+    """Восстанавливает вложенный словарь массивов NumPy поверх блока разделяемой памяти (без копирования)."""
+    arrays: Dict = {}
+    for path, shape, dtype, offset in layout:
+        target = arrays
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+    return arrays
+
+
+def _init_worker(
+        surface_type: type,
+        memory_name: str,
+        layout: List[Tuple],
+        attributes: Dict,
+        options: Dict,
+        collect_stats: bool,
+        cache_options: Optional[Dict]
+) -> None:
+    """
+    Восстанавливает в рабочем процессе поверхность поверх ее массивов в разделяемой памяти
+    (высоты, маски, оболочки ячеек, пирамида - без копирования и пересчета; TiledSurface открывается
+    по пути к файлу тайлов) и создает процессор
+    с параметрами options. Коэффициенты ячеек вычисляются блоками: не более WORKER_COEFFICIENT_TILES
+    блоков на процесс.
+    """
+    global _worker_processor, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    surface = surface_type.from_shared_state(_attach_arrays(_worker_memory, layout), attributes)
+    if isinstance(surface, SurfaceStack):
+        layers = surface.surfaces
+    elif isinstance(surface, PreparedSurface):
+        layers = [surface]
+    else:
+        # TiledSurface уже вычисляет коэффициенты по тайлам (CellCoefficientCache в режиме "lazy").
+        layers = []
+    for layer in layers:
+        layer.coefficients = CellCoefficientCache(
+            layer, mode="lazy", bilinear=True, max_tiles=WORKER_COEFFICIENT_TILES)
+    _worker_processor = TrajectoryProcessor(
+        surface, stats=ProcessorStats() if collect_stats else None,
+        cache=ResultCache(**cache_options) if cache_options is not None else None, **options)
+
+
+def _process_chunk(
+        trajectories: List[List[List[float]]]
+) -> Tuple[Optional[List[List[Tuple[float, float, float]]]], Dict[str, Dict]]:
+    """
+    Вычисляет пересечения для одной порции траекторий в рабочем процессе.
+
+    :return: Кортеж (пересечения, статистика порции в виде ProcessorStats.to_dict()).
+    """
+    stats = _worker_processor.stats
+    stats.reset()
+    return _worker_processor.calculate_intersections({"trajectories": trajectories}), stats.to_dict()
+
+
+def calculate_intersections_parallel(
+        surface: Union[PreparedSurface, SurfaceStack, TiledSurface],
+        trajectories: Sequence[Sequence[Sequence[float]]],
+        workers: int = 1,
+        chunk_size: Optional[int] = None,
+        surface_mode: str = "plane",
+        mp_context=None,
+        stats: Optional[ProcessorStats] = None,
+        backend: str = "numpy",
+        candidate_flag: int = 1,
+        cache: Optional[ResultCache] = None
+) -> Optional[List[List[Tuple[float, float, float]]]]:
+    """
+    Вычисляет пересечения траекторий с поверхностью в нескольких процессах.
+
+    Массивы поверхности (высоты, маски пустых узлов и ячеек, оболочки ячеек и уровни пирамиды,
+    см. PreparedSurface.shared_state; для набора горизонтов SurfaceStack - общий массив высот
+    и те же массивы каждого горизонта) строятся один раз в текущем процессе и копируются в один блок
+    multiprocessing.shared_memory; рабочие процессы используют их напрямую как массивы NumPy
+    и не пересчитывают. Коэффициенты ячеек каждый процесс вычисляет блоками и держит в памяти
+    не больше WORKER_COEFFICIENT_TILES блоков, поэтому собственная память процесса не зависит
+    от размера сетки. Поверхность в файле тайлов TiledSurface в разделяемую память не копируется:
+    каждый процесс открывает тот же файл и держит в памяти собственные max_tiles тайлов.
+    Траектории делятся на порции, результаты возвращаются в порядке входных траекторий.
+
+    Параметры процессора (surface_mode, backend, candidate_flag) передаются рабочим процессам, поэтому
+    результат совпадает с TrajectoryProcessor с теми же параметрами. Статистика рабочих процессов
+    добавляется в stats (ProcessorStats.merge; время этапов суммируется по процессам). Каждый рабочий
+    процесс создает собственный ResultCache с параметрами cache: общими между процессами и с cache
+    текущего процесса являются только записи на диске (directory), счетчики cache не меняются.
+
+    :param surface: Подготовленная поверхность, набор горизонтов SurfaceStack или поверхность в файле
+                    тайлов TiledSurface.
+    :param trajectories: Список траекторий, каждая - список точек [x, y, z].
+    :param workers: Число рабочих процессов; при workers = 1 расчет выполняется в текущем процессе.
+    :param chunk_size: Число траекторий в одной порции; по умолчанию - около четырех порций на процесс.
+    :param surface_mode: Режим поверхности, как в TrajectoryProcessor.
+    :param mp_context: Контекст multiprocessing (например, multiprocessing.get_context("spawn")).
+    :param stats: Статистика этапов и счетчиков, как в TrajectoryProcessor.
+    :param backend: Реализация обхода ячеек, как в TrajectoryProcessor.
+    :param candidate_flag: Метод отбора отрезков-кандидатов, как в TrajectoryProcessor.
+    :param cache: Кэш результатов, как в TrajectoryProcessor.
+    :return: Список пересечений для каждой траектории или None при ошибке валидации.
+    :raises ValueError: Если параметры процессора неизвестны.
+    """
+    processor = TrajectoryProcessor(surface, surface_mode, stats, backend, candidate_flag, cache)
+    trajectories = list(trajectories)
+    if workers <= 1 or len(trajectories) <= 1:
+        return processor.calculate_intersections({"trajectories": trajectories})
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(trajectories) // (workers * 4)))
+    chunks = [trajectories[start:start + chunk_size] for start in range(0, len(trajectories), chunk_size)]
+
+    options = {"surface_mode": processor.surface_mode, "backend": processor.backend,
+               "candidate_flag": processor.candidate_flag}
+    cache_options = None if cache is None else {
+        "max_bytes": cache.max_bytes, "directory": cache.directory, "segment_entries": cache.segment_entries}
+    arrays, attributes = surface.shared_state()
+    memory, layout = _share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(type(surface), memory.name, layout, attributes, options, processor.stats.enabled,
+                          cache_options)
+        ) as executor:
+            chunk_results = []
+            for chunk, chunk_stats in executor.map(_process_chunk, chunks):
+                processor.stats.merge(chunk_stats)
+                chunk_results.append(chunk)
+    finally:
+        memory.close()
+        memory.unlink()
+
+    if any(chunk is None for chunk in chunk_results):
+        return None
+    return [intersections for chunk in chunk_results for intersections in chunk]
@@ -0,0 +1,448 @@
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from src.batch_engine import box_cell_bounds, locate_cells
+from src.cell_coefficients import plane_patch_coefficients
+from src.grid_math import traverse_grid_cells_batch
+from src.spatial_geometry import (
+    bilinear_line_polynomials, quadratic_roots, segment_closest_parameters, segment_patch_closest_points
+)
+from src.stats import NULL_STATS
+from src.trajectory_arrays import point_trajectory_index, segment_starts
+
+COLUMNS = (
+    "trajectory", "segment", "t", "x", "y", "z", "cell_i", "cell_j", "surface_z", "vertical_distance",
+    "true_distance", "true_segment", "true_t", "true_x", "true_y", "true_z", "true_cell_i", "true_cell_j",
+    "true_surface_x", "true_surface_y", "true_surface_z",
+)
+
+# Число равномерных значений v при поиске ближайших точек билинейных патчей (segment_patch_closest_points);
+# для плоскостей достаточно двух.
+BILINEAR_SAMPLES = 17
+
+# Число пар отрезок-ячейка на траекторию в первом раунде точного расчета истинного расстояния.
+PROXIMITY_FIRST_ROUND = 16
+
+# Число подряд идущих отрезков траектории, отсеиваемых вместе по оболочке их общего прямоугольника
+# перед проверкой каждого отрезка.
+PROXIMITY_CHUNK = 16
+
+
+class ProximityResult:
+    """
+    Наибольшее сближение траекторий с поверхностью: по одной строке на траекторию.
+
+    Вертикальное сближение - точка траектории с наименьшей разностью высот с поверхностью под ней
+    (над ней): отрезок segment, параметр t, координаты xyz, ячейка (cell_i, cell_j), высота
+    поверхности surface_z и vertical_distance = z - surface_z (положительное - траектория выше
+    поверхности, 0 - пересечение). Истинное сближение - наименьшее расстояние в пространстве
+    true_distance между точкой траектории true_xyz (отрезок true_segment, параметр true_t) и точкой
+    поверхности true_surface_xyz в ячейке (true_cell_i, true_cell_j).
+
+    Для траекторий, не проходящих над непустыми ячейками поверхности, расстояния и координаты равны NaN,
+    а индексы равны -1.
+    """
+
+    def __init__(
+            self,
+            segment: np.ndarray,
+            t: np.ndarray,
+            xyz: np.ndarray,
+            cell_i: np.ndarray,
+            cell_j: np.ndarray,
+            surface_z: np.ndarray,
+            true_segment: np.ndarray,
+            true_t: np.ndarray,
+            true_xyz: np.ndarray,
+            true_cell_i: np.ndarray,
+            true_cell_j: np.ndarray,
+            true_surface_xyz: np.ndarray,
+            ids: Optional[Sequence[Hashable]] = None
+    ) -> None:
+        """
+        Создает результат из столбцов длины T (число траекторий).
+
+        :param segment: Индексы отрезков точек вертикального сближения внутри траекторий, int64.
+        :param t: Параметры точек вертикального сближения на отрезках.
+        :param xyz: Координаты точек вертикального сближения, форма (T, 3).
+        :param cell_i: Индексы ячеек под точками вертикального сближения по оси X, int64.
+        :param cell_j: Индексы ячеек по оси Y, int64.
+        :param surface_z: Высоты поверхности под точками вертикального сближения.
+        :param true_segment: Индексы отрезков точек истинного сближения, int64.
+        :param true_t: Параметры точек истинного сближения на отрезках.
+        :param true_xyz: Координаты точек траекторий истинного сближения, форма (T, 3).
+        :param true_cell_i: Индексы ячеек ближайших точек поверхности по оси X, int64.
+        :param true_cell_j: Индексы ячеек ближайших точек поверхности по оси Y, int64.
+        :param true_surface_xyz: Координаты ближайших точек поверхности, форма (T, 3).
+        :param ids: Идентификаторы траекторий.
+        """
+        self.segment: np.ndarray = np.asarray(segment, dtype=np.int64)
+        self.t: np.ndarray = np.asarray(t, dtype=np.float64)
+        self.xyz: np.ndarray = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+        self.cell_i: np.ndarray = np.asarray(cell_i, dtype=np.int64)
+        self.cell_j: np.ndarray = np.asarray(cell_j, dtype=np.int64)
+        self.surface_z: np.ndarray = np.asarray(surface_z, dtype=np.float64)
+        self.true_segment: np.ndarray = np.asarray(true_segment, dtype=np.int64)
+        self.true_t: np.ndarray = np.asarray(true_t, dtype=np.float64)
+        self.true_xyz: np.ndarray = np.asarray(true_xyz, dtype=np.float64).reshape(-1, 3)
+        self.true_cell_i: np.ndarray = np.asarray(true_cell_i, dtype=np.int64)
+        self.true_cell_j: np.ndarray = np.asarray(true_cell_j, dtype=np.int64)
+        self.true_surface_xyz: np.ndarray = np.asarray(true_surface_xyz, dtype=np.float64).reshape(-1, 3)
+        self.ids = list(ids) if ids is not None else None
+
+    @classmethod
+    def empty(cls, trajectory_count: int, ids: Optional[Sequence[Hashable]] = None) -> "ProximityResult":
+        """Создает результат для trajectory_count траекторий без найденного сближения (NaN и -1)."""
+        def index() -> np.ndarray:
+            return np.full(trajectory_count, -1, dtype=np.int64)
+
+        def value() -> np.ndarray:
+            return np.full(trajectory_count, np.nan)
+
+        def point() -> np.ndarray:
+            return np.full((trajectory_count, 3), np.nan)
+
+        return cls(index(), value(), point(), index(), index(), value(),
+                   index(), value(), point(), index(), index(), point(), ids)
+
+    def __len__(self) -> int:
+        return self.t.size
+
+    @property
+    def vertical_distance(self) -> np.ndarray:
+        """Разность высот траектории и поверхности в точках вертикального сближения."""
+        return self.xyz[:, 2] - self.surface_z
+
+    @property
+    def true_distance(self) -> np.ndarray:
+        """Расстояние между точками истинного сближения."""
+        return np.linalg.norm(self.true_xyz - self.true_surface_xyz, axis=1)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Возвращает столбцы результата, например для pandas.DataFrame(result.columns()).
+
+        :return: Словарь имя столбца -> массив (COLUMNS); при заданных идентификаторах добавляется столбец "id".
+        """
+        columns = {
+            "trajectory": np.arange(len(self), dtype=np.int64),
+            "x": self.xyz[:, 0], "y": self.xyz[:, 1], "z": self.xyz[:, 2],
+            "vertical_distance": self.vertical_distance,
+            "true_distance": self.true_distance,
+            "true_x": self.true_xyz[:, 0], "true_y": self.true_xyz[:, 1], "true_z": self.true_xyz[:, 2],
+            "true_surface_x": self.true_surface_xyz[:, 0], "true_surface_y": self.true_surface_xyz[:, 1],
+            "true_surface_z": self.true_surface_xyz[:, 2],
+        }
+        columns = {name: columns[name] if name in columns else getattr(self, name) for name in COLUMNS}
+        if self.ids is not None:
+            columns["id"] = np.asarray(self.ids, dtype=object)
+        return columns
+
+
+def find_closest_approach(
+        surface,
+        points: np.ndarray,
+        offsets: np.ndarray,
+        surface_mode: str = "plane",
+        true_distance: bool = True,
+        ids: Optional[Sequence[Hashable]] = None,
+        stats=NULL_STATS
+) -> ProximityResult:
+    """
+    Находит для каждой траектории точки наибольшего вертикального и истинного сближения с поверхностью
+    методом ветвей и границ по пирамиде оболочек высот.
+
+    Начальная оценка вертикального расстояния - разность высот в самих точках траекторий. Группы
+    из PROXIMITY_CHUNK отрезков, а затем отдельные отрезки, у которых зазор между диапазоном высот
+    и оболочкой поверхности над их прямоугольником ячеек больше этой оценки, отбрасываются;
+    у оставшихся обходятся ячейки, и отбрасываются ячейки с таким же зазором больше оценки.
+    На оставшихся участках разность высот - квадратный многочлен по t, его минимум по модулю
+    находится точно (концы участка, вершина и корни).
+
+    Истинное расстояние не больше вертикального, поэтому оно ищется только среди ячеек, расстояние
+    до оболочки которых (прямоугольник ячеек и диапазон высот) от ограничивающего прямоугольника
+    отрезка не больше текущей оценки: блоки пирамиды перебираются от крупных к мелким, и оценка
+    уточняется расстояниями до центров ячеек в серединах блоков. Для оставшихся пар отрезок-ячейка
+    расстояние находит segment_patch_closest_points, раундами по возрастанию нижней границы.
+
+    :param surface: Подготовленная поверхность PreparedSurface или TiledSurface.
+    :param points: Упакованные точки траекторий в системе координат сетки, форма (N, 3).
+    :param offsets: Смещения траекторий, длина T + 1.
+    :param surface_mode: Модель поверхности внутри ячейки: "plane" или "bilinear".
+    :param true_distance: Искать также истинное сближение; иначе его столбцы равны NaN и -1.
+    :param ids: Идентификаторы траекторий.
+    :param stats: Статистика ProcessorStats для счетчиков отсева.
+    :return: Сближения ProximityResult.
+    """
+    result = ProximityResult.empty(len(offsets) - 1, ids)
+    starts = segment_starts(offsets)
+    _vertical_approach(surface, points, offsets, starts, surface_mode, result, stats)
+    if true_distance:
+        _true_approach(surface, points, offsets, starts, surface_mode, result, stats)
+    return result
+
+
+def cell_patches(surface, cell_i: np.ndarray, cell_j: np.ndarray, surface_mode: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Возвращает модель поверхности в ячейках в виде билинейных патчей (для "plane" - с a3 = 0).
+
+    :return: Кортеж (patches, cell_bounds) массивов формы (N, 4): (a0, a1, a2, a3) и (x0, x1, y0, y1).
+    """
+    x_coords, y_coords = surface.x_coords, surface.y_coords
+    cell_bounds = np.stack([x_coords[cell_i], x_coords[cell_i + 1], y_coords[cell_j], y_coords[cell_j + 1]], axis=1)
+    if cell_i.size == 0:
+        return np.empty((0, 4)), cell_bounds
+    if surface_mode == "bilinear":
+        return surface.coefficients.bilinear_patches(cell_i, cell_j), cell_bounds
+    return plane_patch_coefficients(surface.coefficients.planes(cell_i, cell_j), *cell_bounds.T), cell_bounds
+
+
+def _vertical_approach(
+        surface, points: np.ndarray, offsets: np.ndarray, starts: np.ndarray, surface_mode: str,
+        result: ProximityResult, stats
+) -> None:
+    """Заполняет столбцы вертикального сближения result (см. find_closest_approach)."""
+    count = len(offsets) - 1
+    ix, _, x_inside = locate_cells(surface.x_axis, points[:, 0])
+    iy, _, y_inside = locate_cells(surface.y_axis, points[:, 1])
+    point = np.flatnonzero(x_inside & y_inside)
+    patches, cell_bounds = cell_patches(surface, ix[point], iy[point], surface_mode)
+    _, _, point_gap = bilinear_line_polynomials(patches, cell_bounds, points[point], np.zeros((point.size, 3)))
+    point_trajectory = point_trajectory_index(offsets, point)
+    bound = np.full(count, np.inf)
+    np.fmin.at(bound, point_trajectory, np.abs(point_gap))
+    nearest = np.abs(point_gap) == bound[point_trajectory]
+    point, point_trajectory, point_gap = point[nearest], point_trajectory[nearest], point_gap[nearest]
+
+    # Концы траекторий записываются как t = 1 последнего отрезка, траектория из одной точки - как t = 0.
+    local = point - offsets[point_trajectory]
+    point_segment = np.minimum(local, np.maximum(offsets[point_trajectory + 1] - offsets[point_trajectory] - 2, 0))
+    rows: List[Tuple[np.ndarray, ...]] = [
+        (point_trajectory, point_segment, (local - point_segment).astype(np.float64), points[point],
+         ix[point], iy[point], point_gap)
+    ]
+
+    trajectory = point_trajectory_index(offsets, starts)
+    a, b = points[starts], points[starts + 1]
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    x_coords, y_coords = surface.x_coords, surface.y_coords
+    inside = ((high[:, 0] >= x_coords[0]) & (low[:, 0] <= x_coords[-1])
+              & (high[:, 1] >= y_coords[0]) & (low[:, 1] <= y_coords[-1]))
+
+    keep = _chunk_segments(surface, low, high, trajectory, starts - offsets[trajectory], bound, False)
+    keep = keep[inside[keep]]
+    stats.count("proximity_segments_pruned", starts.size - keep.size)
+
+    piece, cell_i, cell_j, t_enter, t_exit = traverse_grid_cells_batch(
+        a[keep, 0], a[keep, 1], b[keep, 0], b[keep, 1], surface.x_axis, surface.y_axis)
+    segment = keep[piece]
+    dz = b[segment, 2] - a[segment, 2]
+    z_enter, z_exit = a[segment, 2] + t_enter * dz, a[segment, 2] + t_exit * dz
+    cell_min, cell_max = surface.pyramid.cell_envelope(cell_i, cell_j)
+    gap = np.maximum(np.maximum(cell_min - np.maximum(z_enter, z_exit), np.minimum(z_enter, z_exit) - cell_max), 0.0)
+    reachable = np.flatnonzero(gap <= bound[trajectory[segment]])
+    stats.count("proximity_cells_pruned", piece.size - reachable.size)
+    segment, cell_i, cell_j = segment[reachable], cell_i[reachable], cell_j[reachable]
+    t_enter, t_exit = t_enter[reachable], t_exit[reachable]
+
+    start, direction = a[segment], b[segment] - a[segment]
+    patches, cell_bounds = cell_patches(surface, cell_i, cell_j, surface_mode)
+    A, B, C = bilinear_line_polynomials(patches, cell_bounds, start, direction)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        candidates = np.column_stack([t_enter, t_exit, -B / (2 * A), quadratic_roots(A, B, C)])
+        candidates = np.where(np.isnan(candidates), t_enter[:, None],
+                              np.clip(candidates, t_enter[:, None], t_exit[:, None]))
+        gaps = (A[:, None] * candidates + B[:, None]) * candidates + C[:, None]
+        best = np.argmin(np.where(np.isnan(gaps), np.inf, np.abs(gaps)), axis=1)
+    t = candidates[np.arange(best.size), best]
+    piece_trajectory = trajectory[segment]
+    rows.append((piece_trajectory, starts[segment] - offsets[piece_trajectory], t, start + t[:, None] * direction,
+                 cell_i, cell_j, gaps[np.arange(best.size), best]))
+
+    trajectory, segment, t, xyz, cell_i, cell_j, gap = (np.concatenate(column) for column in zip(*rows))
+    best = _best_rows(trajectory, np.abs(gap), count)
+    found = np.flatnonzero(best >= 0)
+    row = best[found]
+    result.segment[found], result.t[found], result.xyz[found] = segment[row], t[row], xyz[row]
+    result.cell_i[found], result.cell_j[found] = cell_i[row], cell_j[row]
+    result.surface_z[found] = xyz[row, 2] + gap[row]
+
+
+def _true_approach(
+        surface, points: np.ndarray, offsets: np.ndarray, starts: np.ndarray, surface_mode: str,
+        result: ProximityResult, stats
+) -> None:
+    """Заполняет столбцы истинного сближения result по найденному вертикальному (см. find_closest_approach)."""
+    count = len(offsets) - 1
+    bound = np.abs(result.vertical_distance)
+    trajectory = point_trajectory_index(offsets, starts)
+    # Для пересекающих поверхность траекторий истинное расстояние равно нулю, как и вертикальное.
+    pair = np.flatnonzero(bound[trajectory] > 0)
+    a, b = points[starts], points[starts + 1]
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    pair = pair[_chunk_segments(surface, low[pair], high[pair], trajectory[pair],
+                                starts[pair] - offsets[trajectory[pair]], bound, True)]
+
+    pyramid = surface.pyramid
+    x_coords, y_coords = surface.x_coords, surface.y_coords
+    block_i = block_j = np.zeros(pair.size, dtype=np.int64)
+    for level in range(pyramid.depth - 1, -1, -1):
+        level_min, level_max = pyramid.levels_min[level], pyramid.levels_max[level]
+        if level < pyramid.depth - 1:
+            pair, block_i, block_j = _split_blocks(pair, block_i, block_j, 2, level_min.shape)
+        shift = level + pyramid.block_shift
+        gap = _box_gap(low[pair], high[pair], x_coords, y_coords, block_i << shift, (block_i + 1) << shift,
+                       block_j << shift, (block_j + 1) << shift, level_min[block_i, block_j],
+                       level_max[block_i, block_j])
+        near = gap <= bound[trajectory[pair]]
+        pair, block_i, block_j, gap = pair[near], block_i[near], block_j[near], gap[near]
+        # Центр ячейки в середине блока - точка поверхности, расстояние до нее уточняет оценку сверху.
+        center_i = np.minimum((block_i << shift) + (1 << shift >> 1), x_coords.size - 2)
+        center_j = np.minimum((block_j << shift) + (1 << shift >> 1), y_coords.size - 2)
+        np.fmin.at(bound, trajectory[pair], _center_distance(surface, a[pair], b[pair], center_i, center_j))
+    cell_i, cell_j = block_i, block_j
+    if pyramid.block_shift:
+        pair, cell_i, cell_j = _split_blocks(pair, block_i, block_j, pyramid.block_size,
+                                             (x_coords.size - 1, y_coords.size - 1))
+        gap = _box_gap(low[pair], high[pair], x_coords, y_coords, cell_i, cell_i + 1, cell_j, cell_j + 1,
+                       *pyramid.cell_envelope(cell_i, cell_j))
+    near = gap <= bound[trajectory[pair]]
+    pair, cell_i, cell_j, gap = pair[near], cell_i[near], cell_j[near], gap[near]
+    stats.count("proximity_cell_pairs", pair.size)
+
+    # Точка вертикального сближения - начальная оценка, поэтому истинное расстояние не больше вертикального.
+    found = np.flatnonzero(np.isfinite(bound))
+    vertical_surface = np.column_stack([result.xyz[found, :2], result.surface_z[found]])
+    rows = [(found, result.segment[found], result.t[found], result.xyz[found], result.cell_i[found],
+             result.cell_j[found], vertical_surface, bound[found])]
+
+    # Пары решаются раундами по возрастанию нижней границы внутри траектории (в каждом раунде вдвое больше),
+    # после раунда оценка уточняется, и пары с нижней границей больше нее отбрасываются.
+    order = np.lexsort((gap, trajectory[pair]))
+    pair, cell_i, cell_j, gap = pair[order], cell_i[order], cell_j[order], gap[order]
+    pair_trajectory = trajectory[pair]
+    rank = np.arange(pair.size) - np.searchsorted(pair_trajectory, pair_trajectory)
+    samples = BILINEAR_SAMPLES if surface_mode == "bilinear" else 2
+    first, last = 0, PROXIMITY_FIRST_ROUND
+    while pair.size and first <= rank.max():
+        selected = np.flatnonzero((rank >= first) & (rank < last) & (gap <= bound[pair_trajectory]))
+        first, last = last, 2 * last
+        stats.count("proximity_cells_solved", selected.size)
+        patches, cell_bounds = cell_patches(surface, cell_i[selected], cell_j[selected], surface_mode)
+        start, direction = a[pair[selected]], b[pair[selected]] - a[pair[selected]]
+        distance, t, u, v = segment_patch_closest_points(patches, cell_bounds, start, direction, samples)
+        a0, a1, a2, a3 = patches.T
+        surface_xyz = np.stack([cell_bounds[:, 0] + u * (cell_bounds[:, 1] - cell_bounds[:, 0]),
+                                cell_bounds[:, 2] + v * (cell_bounds[:, 3] - cell_bounds[:, 2]),
+                                a0 + a1 * u + a2 * v + a3 * u * v], axis=1)
+        solved = pair_trajectory[selected]
+        np.fmin.at(bound, solved, distance)
+        rows.append((solved, starts[pair[selected]] - offsets[solved], t, start + t[:, None] * direction,
+                     cell_i[selected], cell_j[selected], surface_xyz, distance))
+
+    trajectory, segment, t, xyz, cell_i, cell_j, surface_xyz, distance = (
+        np.concatenate(column) for column in zip(*rows))
+    best = _best_rows(trajectory, distance, count)
+    found = np.flatnonzero(best >= 0)
+    row = best[found]
+    result.true_segment[found], result.true_t[found], result.true_xyz[found] = segment[row], t[row], xyz[row]
+    result.true_cell_i[found], result.true_cell_j[found] = cell_i[row], cell_j[row]
+    result.true_surface_xyz[found] = surface_xyz[row]
+
+
+def _vertical_gap(surface, low: np.ndarray, high: np.ndarray, reach: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Нижняя граница вертикального расстояния от прямоугольных параллелепипедов [low, high] до поверхности
+    по оболочке пирамиды; NaN, если под ними нет заполненных ячеек.
+
+    Если задан reach, оболочка берется над прямоугольниками, расширенными на reach по X и Y: тогда все точки
+    поверхности на расстоянии не больше reach от параллелепипеда лежат в оболочке, и граница больше reach
+    исключает их.
+    """
+    cell_low, cell_high = low, high
+    if reach is not None:
+        cell_low, cell_high = low.copy(), high.copy()
+        cell_low[:, :2] -= reach[:, None]
+        cell_high[:, :2] += reach[:, None]
+    env_min, env_max = surface.pyramid.envelope(*box_cell_bounds(surface, cell_low, cell_high))
+    return np.maximum(np.maximum(env_min - high[:, 2], low[:, 2] - env_max), 0.0)
+
+
+def _chunk_segments(
+        surface, low: np.ndarray, high: np.ndarray, trajectory: np.ndarray, local: np.ndarray, bound: np.ndarray,
+        horizontal: bool
+) -> np.ndarray:
+    """
+    Отбирает отрезки, вертикальная граница расстояния которых (см. _vertical_gap) не больше bound их траекторий:
+    сначала для групп по PROXIMITY_CHUNK подряд идущих отрезков одной траектории, затем для отрезков
+    оставшихся групп. При horizontal прямоугольники расширяются на bound, как для истинного расстояния.
+
+    :param local: Номера отрезков внутри траекторий (trajectory - по неубыванию).
+    :return: Индексы отобранных отрезков.
+    """
+    chunk = local // PROXIMITY_CHUNK
+    first = np.flatnonzero(np.r_[True, (chunk[1:] != chunk[:-1]) | (trajectory[1:] != trajectory[:-1])])
+    chunk_bound = bound[trajectory[first]]
+    gap = _vertical_gap(surface, np.minimum.reduceat(low, first), np.maximum.reduceat(high, first),
+                        chunk_bound if horizontal else None)
+    keep = np.flatnonzero(np.repeat(gap <= chunk_bound, np.diff(np.r_[first, low.shape[0]])))
+    segment_bound = bound[trajectory[keep]]
+    gap = _vertical_gap(surface, low[keep], high[keep], segment_bound if horizontal else None)
+    return keep[gap <= segment_bound]
+
+
+def _center_distance(
+        surface, a: np.ndarray, b: np.ndarray, cell_i: np.ndarray, cell_j: np.ndarray
+) -> np.ndarray:
+    """
+    Расстояние от отрезков [a, b] до центров ячеек. Центр лежит на поверхности в обеих моделях
+    (среднее высот углов), поэтому расстояние - оценка сверху истинного расстояния; NaN для ячеек с пустыми углами.
+    """
+    x_coords, y_coords = surface.x_coords, surface.y_coords
+    center = np.column_stack([(x_coords[cell_i] + x_coords[cell_i + 1]) / 2,
+                              (y_coords[cell_j] + y_coords[cell_j + 1]) / 2,
+                              surface.corner_heights(cell_i, cell_j).astype(np.float64).mean(axis=1)])
+    _, t = segment_closest_parameters(center, np.zeros_like(center), a, b - a)
+    # Небольшой запас компенсирует ошибки округления: оценка не должна оказаться меньше расстояния до патча.
+    distance = np.sqrt(((a + t[:, None] * (b - a) - center) ** 2).sum(axis=1))
+    return distance * (1.0 + 1e-9)
+
+
+def _split_blocks(
+        pair: np.ndarray, block_i: np.ndarray, block_j: np.ndarray, factor: int, shape: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Заменяет каждый блок factor x factor дочерними блоками, лежащими в пределах shape."""
+    di, dj = (offset.ravel() for offset in np.meshgrid(np.arange(factor), np.arange(factor), indexing="ij"))
+    pair = np.repeat(pair, di.size)
+    block_i = (np.repeat(block_i, di.size) * factor).reshape(-1, di.size) + di
+    block_j = (np.repeat(block_j, di.size) * factor).reshape(-1, di.size) + dj
+    block_i, block_j = block_i.ravel(), block_j.ravel()
+    inside = (block_i < shape[0]) & (block_j < shape[1])
+    return pair[inside], block_i[inside], block_j[inside]
+
+
+def _box_gap(
+        low: np.ndarray, high: np.ndarray, x_coords: np.ndarray, y_coords: np.ndarray,
+        i0: np.ndarray, i1: np.ndarray, j0: np.ndarray, j1: np.ndarray, z_low: np.ndarray, z_high: np.ndarray
+) -> np.ndarray:
+    """
+    Расстояние между прямоугольными параллелепипедами [low, high] и прямоугольниками узлов [i0, i1] x [j0, j1]
+    с диапазоном высот [z_low, z_high]; индексы узлов за пределами сетки обрезаются. NaN для пустых оболочек.
+    """
+    box_low = np.stack([x_coords[i0], y_coords[j0], z_low], axis=1)
+    box_high = np.stack([x_coords[np.minimum(i1, x_coords.size - 1)], y_coords[np.minimum(j1, y_coords.size - 1)],
+                         z_high], axis=1)
+    gap = np.maximum(np.maximum(box_low - high, low - box_high), 0.0)
+    return np.sqrt((gap * gap).sum(axis=1))
+
+
+def _best_rows(trajectory: np.ndarray, value: np.ndarray, count: int) -> np.ndarray:
+    """Возвращает для каждой траектории строку с наименьшим значением (NaN не учитываются) или -1."""
+    rows = np.flatnonzero(~np.isnan(value))
+    order = rows[np.lexsort((value[rows], trajectory[rows]))]
+    ordered = trajectory[order]
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = ordered[1:] != ordered[:-1]
+    best = np.full(count, -1, dtype=np.int64)
+    best[ordered[first]] = order[first]
+    return best
@@ -0,0 +1,264 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Число строк ячеек, обрабатываемых за раз при построении пирамиды компактной поверхности
+# (кратно COMPACT_BLOCK_SIZE).
+PYRAMID_CHUNK_ROWS = 1024
+# Число ячеек в блоке уровня 0 пирамиды компактной поверхности по каждой оси.
+COMPACT_BLOCK_SIZE = 4
+
+
+def cell_plane_padding(heights: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет |f11 - f12 - f21 + f22| / 4 для каждой ячейки - на столько плоскость наименьших квадратов
+    по четырем углам может выходить за пределы высот углов внутри ячейки.
+
+    :param heights: Высоты узлов, форма (nx, ny).
+    :return: Массив формы (nx - 1, ny - 1); NaN для ячеек с пустыми углами.
+    """
+    h = heights
+    return np.abs(h[:-1, :-1] - h[:-1, 1:] - h[1:, :-1] + h[1:, 1:]) / 4
+
+
+def cell_corner_range(heights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Вычисляет минимум и максимум высот четырех углов каждой ячейки.
+
+    :param heights: Высоты узлов, форма (nx, ny).
+    :return: Кортеж массивов формы (nx - 1, ny - 1); NaN, если хотя бы один угол пустой.
+    """
+    h = heights
+    corners = (h[:-1, :-1], h[:-1, 1:], h[1:, :-1], h[1:, 1:])
+    cell_min = np.minimum(np.minimum(corners[0], corners[1]), np.minimum(corners[2], corners[3]))
+    cell_max = np.maximum(np.maximum(corners[0], corners[1]), np.maximum(corners[2], corners[3]))
+    return cell_min, cell_max
+
+
+def round_outward(values: np.ndarray, dtype: np.dtype, down: bool) -> np.ndarray:
+    """
+    Приводит значения к типу dtype, округляя вниз (down=True) или вверх, чтобы оболочка не сужалась.
+
+    :param values: Значения.
+    :param dtype: Тип результата.
+    :param down: Направление округления.
+    :return: Массив типа dtype; NaN сохраняются.
+    """
+    values = np.asarray(values)
+    if values.dtype == dtype:
+        return values
+    converted = values.astype(dtype)
+    moved = converted > values if down else converted < values
+    if moved.any():
+        converted[moved] = np.nextafter(converted[moved], dtype.type(-np.inf if down else np.inf))
+    return converted
+
+
+class MinMaxPyramid:
+    """
+    Пирамида минимумов и максимумов высот по ячейкам сетки.
+
+    Уровень 0 - оболочка [min, max] каждой ячейки, уровень k - оболочка блоков 2^k x 2^k ячеек.
+    Пустые ячейки (NaN) в оболочку не входят; блок, целиком состоящий из пустых ячеек, равен NaN.
+
+    Для сеток, не помещающихся в память (TiledSurface), уровень 0 может хранить оболочки блоков
+    block_size x block_size ячеек; индексы ячеек в запросах при этом остаются индексами ячеек,
+    а оболочка становится шире, но по-прежнему не уже точной. Для компактных поверхностей уровень 0
+    хранит оболочки блоков COMPACT_BLOCK_SIZE x COMPACT_BLOCK_SIZE ячеек, уровни хранятся в float32,
+    минимумы округляются вниз, а максимумы вверх.
+    """
+
+    def __init__(
+            self, cell_min: np.ndarray, cell_max: np.ndarray, block_size: int = 1, dtype: np.dtype = np.float64
+    ) -> None:
+        """
+        Строит пирамиду по оболочкам ячеек или блоков ячеек.
+
+        :param cell_min: Минимальная высота каждой ячейки (блока), форма (nx - 1, ny - 1)
+                         или (ceil((nx - 1) / block_size), ceil((ny - 1) / block_size)).
+        :param cell_max: Максимальная высота каждой ячейки (блока) той же формы.
+        :param block_size: Число ячеек в блоке уровня 0 по каждой оси, степень двойки.
+        :param dtype: Тип значений уровней: np.float64 или np.float32.
+        :raises ValueError: Если block_size не степень двойки.
+        """
+        if block_size < 1 or block_size & (block_size - 1):
+            raise ValueError(f"Размер блока пирамиды должен быть степенью двойки: {block_size}")
+        self.block_size = block_size
+        self.block_shift = block_size.bit_length() - 1
+        dtype = np.dtype(dtype)
+        self.levels_min: List[np.ndarray] = [np.ascontiguousarray(round_outward(cell_min, dtype, down=True))]
+        self.levels_max: List[np.ndarray] = [np.ascontiguousarray(round_outward(cell_max, dtype, down=False))]
+
+        while self.levels_min[-1].shape[0] > 1 or self.levels_min[-1].shape[1] > 1:
+            self.levels_min.append(self._reduce(self.levels_min[-1], np.fmin))
+            self.levels_max.append(self._reduce(self.levels_max[-1], np.fmax))
+
+    @classmethod
+    def from_surface(cls, surface, plane_padding: bool = True) -> "MinMaxPyramid":
+        """
+        Строит пирамиду по подготовленной поверхности.
+
+        Для компактной поверхности (высоты float32, без массивов cell_min и cell_max) оболочки
+        вычисляются в float64 полосами по PYRAMID_CHUNK_ROWS строк ячеек, объединяются в блоки
+        COMPACT_BLOCK_SIZE x COMPACT_BLOCK_SIZE ячеек и хранятся в float32.
+
+        :param surface: Подготовленная поверхность PreparedSurface.
+        :param plane_padding: Расширить оболочку ячеек на |f11 - f12 - f21 + f22| / 4 - на столько
+                              плоскость наименьших квадратов по четырем углам может выходить
+                              за пределы высот углов внутри ячейки.
+        :return: Пирамида минимумов и максимумов.
+        """
+        if surface.cell_min is None:
+            return cls._from_compact_surface(surface, plane_padding)
+        cell_min, cell_max = surface.cell_min, surface.cell_max
+        if plane_padding:
+            padding = cell_plane_padding(surface.heights)
+            cell_min, cell_max = cell_min - padding, cell_max + padding
+        return cls(cell_min, cell_max)
+
+    @classmethod
+    def _from_compact_surface(cls, surface, plane_padding: bool) -> "MinMaxPyramid":
+        """
+        Строит пирамиду float32 с блоками COMPACT_BLOCK_SIZE x COMPACT_BLOCK_SIZE ячеек на уровне 0
+        по высотам компактной поверхности, не создавая массивов float64 во всю сетку.
+        """
+        heights = surface.heights
+        nx, ny = heights.shape
+        block = COMPACT_BLOCK_SIZE
+        block_min = np.empty((-(-max(nx - 1, 0) // block), -(-max(ny - 1, 0) // block)), dtype=heights.dtype)
+        block_max = np.empty_like(block_min)
+        for start in range(0, nx - 1, PYRAMID_CHUNK_ROWS):
+            stop = min(start + PYRAMID_CHUNK_ROWS, nx - 1)
+            band = np.asarray(heights[start:stop + 1], dtype=np.float64)
+            low, high = cell_corner_range(band)
+            if plane_padding:
+                padding = cell_plane_padding(band)
+                low, high = low - padding, high + padding
+            rows = slice(start // block, -(-stop // block))
+            block_min[rows] = round_outward(cls._reduce(low, np.fmin, block), heights.dtype, down=True)
+            block_max[rows] = round_outward(cls._reduce(high, np.fmax, block), heights.dtype, down=False)
+        return cls(block_min, block_max, block_size=block, dtype=heights.dtype)
+
+    @classmethod
+    def from_shared_state(cls, arrays: Dict[str, np.ndarray], attributes: Dict) -> "MinMaxPyramid":
+        """
+        Восстанавливает пирамиду из shared_state без пересчета и копирования уровней.
+
+        :param arrays: Уровни пирамиды, как в shared_state.
+        :param attributes: Атрибуты пирамиды, как в shared_state.
+        :return: Пирамида минимумов и максимумов.
+        """
+        pyramid = cls.__new__(cls)
+        pyramid.block_size = attributes["block_size"]
+        pyramid.block_shift = pyramid.block_size.bit_length() - 1
+        pyramid.levels_min = [arrays[f"min_{level}"] for level in range(attributes["depth"])]
+        pyramid.levels_max = [arrays[f"max_{level}"] for level in range(attributes["depth"])]
+        return pyramid
+
+    def shared_state(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """
+        Возвращает уровни пирамиды и ее атрибуты для восстановления в другом процессе (from_shared_state).
+
+        :return: Кортеж (arrays, attributes): словарь уровней {"min_k", "max_k"} и словарь block_size и depth.
+        """
+        arrays = {}
+        for level, (level_min, level_max) in enumerate(zip(self.levels_min, self.levels_max)):
+            arrays[f"min_{level}"], arrays[f"max_{level}"] = level_min, level_max
+        return arrays, {"block_size": self.block_size, "depth": self.depth}
+
+    @property
+    def depth(self) -> int:
+        """Количество уровней пирамиды."""
+        return len(self.levels_min)
+
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти, занимаемый всеми уровнями пирамиды, в байтах."""
+        return sum(level.nbytes for level in self.levels_min) + sum(level.nbytes for level in self.levels_max)
+
+    @staticmethod
+    def _reduce(level: np.ndarray, func, factor: int = 2) -> np.ndarray:
+        """Объединяет блоки factor x factor уровня, дополняя некратные размеры значением NaN."""
+        rows, cols = level.shape
+        padded = np.full((-(-rows // factor) * factor, -(-cols // factor) * factor), np.nan, dtype=level.dtype)
+        padded[:rows, :cols] = level
+        blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+        return func.reduce(func.reduce(blocks, axis=3), axis=1)
+
+    def envelope(
+            self, i0: np.ndarray, i1: np.ndarray, j0: np.ndarray, j1: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Возвращает оболочку высот над прямоугольниками ячеек [i0, i1] x [j0, j1] (включительно).
+
+        Для каждого прямоугольника выбирается уровень, на котором он покрывается не более чем
+        тремя блоками по каждой оси, поэтому оболочка может быть шире точной, но никогда не уже.
+
+        :param i0: Начальные индексы ячеек по оси X.
+        :param i1: Конечные индексы ячеек по оси X.
+        :param j0: Начальные индексы ячеек по оси Y.
+        :param j1: Конечные индексы ячеек по оси Y.
+        :return: Кортеж (env_min, env_max); NaN, если все ячейки прямоугольника пустые.
+        """
+        i0, i1, j0, j1 = (np.atleast_1d(np.asarray(a, dtype=np.int64)) >> self.block_shift
+                          for a in (i0, i1, j0, j1))
+        span = np.maximum(i1 - i0, j1 - j0) + 1
+        level = np.clip(np.ceil(np.log2(span)).astype(np.int64) - 1, 0, self.depth - 1)
+
+        env_min = np.full(i0.shape, np.nan)
+        env_max = np.full(i0.shape, np.nan)
+        for current in np.unique(level):
+            selected = level == current
+            bi0, bi1 = i0[selected] >> current, i1[selected] >> current
+            bj0, bj1 = j0[selected] >> current, j1[selected] >> current
+            level_min, level_max = self.levels_min[current], self.levels_max[current]
+
+            block_min = np.full(bi0.shape, np.nan)
+            block_max = np.full(bi0.shape, np.nan)
+            for di in range(3):
+                bi = np.minimum(bi0 + di, bi1)
+                for dj in range(3):
+                    bj = np.minimum(bj0 + dj, bj1)
+                    block_min = np.fmin(block_min, level_min[bi, bj])
+                    block_max = np.fmax(block_max, level_max[bi, bj])
+            env_min[selected] = block_min
+            env_max[selected] = block_max
+        return env_min, env_max
+
+    def overlaps(
+            self, i0: np.ndarray, i1: np.ndarray, j0: np.ndarray, j1: np.ndarray,
+            z_low: np.ndarray, z_high: np.ndarray
+    ) -> np.ndarray:
+        """
+        Проверяет, пересекается ли диапазон высот [z_low, z_high] с оболочкой поверхности над прямоугольниками ячеек.
+
+        :return: Булев массив; False гарантирует, что поверхность над прямоугольником не достигает диапазона.
+        """
+        env_min, env_max = self.envelope(i0, i1, j0, j1)
+        return (np.asarray(z_low) <= env_max) & (np.asarray(z_high) >= env_min)
+
+    def cell_overlaps(
+            self, i: np.ndarray, j: np.ndarray, z_low: np.ndarray, z_high: np.ndarray
+    ) -> np.ndarray:
+        """
+        Проверяет, пересекается ли диапазон высот [z_low, z_high] с оболочкой ячеек.
+
+        :param i: Индексы ячеек по оси X (число или массив).
+        :param j: Индексы ячеек по оси Y (число или массив).
+        :param z_low: Нижние границы диапазонов высот.
+        :param z_high: Верхние границы диапазонов высот.
+        :return: True для ячеек, поверхность в которых может достигать диапазона высот.
+        """
+        cell_min, cell_max = self.cell_envelope(i, j)
+        return (z_low <= cell_max) & (z_high >= cell_min)
+
+    def cell_envelope(self, i: np.ndarray, j: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Возвращает оболочку высот ячеек (для блоков уровня 0 - оболочку блока, содержащего ячейку).
+
+        :param i: Индексы ячеек по оси X (число или массив).
+        :param j: Индексы ячеек по оси Y (число или массив).
+        :return: Кортеж (cell_min, cell_max); NaN для пустых ячеек.
+        """
+        if self.block_shift:
+            i, j = np.asarray(i) >> self.block_shift, np.asarray(j) >> self.block_shift
+        return self.levels_min[0][i, j], self.levels_max[0][i, j]
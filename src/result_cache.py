@@ -0,0 +1,196 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Примерные накладные расходы Python на одну запись (словарь, объекты массивов, ключ).
+ENTRY_OVERHEAD_BYTES = 512
+
+
+def content_hash(*arrays: np.ndarray, prefix: bytes = b"") -> str:
+    """
+    Вычисляет хеш содержимого массивов (BLAKE2b, 128 бит) с учетом их формы и типа.
+
+    :param arrays: Массивы.
+    :param prefix: Дополнительные байты ключа, например хеш поверхности и параметры расчета.
+    :return: Шестнадцатеричная строка.
+    """
+    digest = hashlib.blake2b(prefix, digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Кэш результатов расчета пересечений: ключ - хеш содержимого поверхности, параметров и траектории
+    (или другой хешируемый объект, например байты отрезка), значение - словарь столбцов NumPy.
+
+    Записи хранятся в памяти не более max_bytes байт, при переполнении вытесняются давно
+    не использованные (LRU). Если задан каталог directory, записи с persist=True дополнительно
+    сохраняются в файлы .npz (ключ должен быть строкой) и доступны другим процессам и последующим запускам.
+    """
+
+    def __init__(
+            self, max_bytes: int = 256 * 2 ** 20, directory: Optional[str] = None, segment_entries: bool = True
+    ) -> None:
+        """
+        Создает пустой кэш.
+
+        :param max_bytes: Максимальный объем записей в памяти, в байтах.
+        :param directory: Каталог для записей на диске; создается при необходимости.
+        :param segment_entries: Хранить, кроме траекторий, записи отдельных отрезков, чтобы у измененной
+                                траектории пересчитывались только измененные отрезки. Запись на каждый
+                                отрезок замедляет первый расчет в несколько раз; без них измененная
+                                траектория пересчитывается целиком.
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.segment_entries = segment_entries
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries: "OrderedDict[Hashable, Dict[str, np.ndarray]]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries or (isinstance(key, str) and self.directory is not None
+                                        and os.path.exists(self._path(key)))
+
+    def get(self, key: Hashable) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Возвращает запись из памяти или с диска.
+
+        :param key: Ключ записи.
+        :return: Словарь столбцов или None при промахе.
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+        if isinstance(key, str) and self.directory is not None:
+            try:
+                with np.load(self._path(key)) as stored:
+                    value = {name: stored[name] for name in stored.files}
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Dict[str, np.ndarray], persist: bool = True) -> None:
+        """
+        Сохраняет запись.
+
+        :param key: Ключ записи.
+        :param value: Словарь столбцов.
+        :param persist: Сохранить запись и на диск, если задан каталог и ключ - строка.
+        """
+        self._remember(key, value)
+        if persist and isinstance(key, str) and self.directory is not None:
+            path = self._path(key)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                np.savez(file, **value)
+            os.replace(temporary, path)
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Optional[Dict[str, np.ndarray]]]:
+        """
+        Возвращает записи для многих ключей только из памяти (для записей, не сохраняемых на диск).
+
+        :param keys: Ключи записей.
+        :return: Список записей, None на месте промахов.
+        """
+        entries = self._entries
+        values = [entries.get(key) for key in keys]
+        for key, value in zip(keys, values):
+            if value is not None:
+                entries.move_to_end(key)
+        found = len(values) - values.count(None)
+        self.hits += found
+        self.misses += len(values) - found
+        return values
+
+    def put_many(self, items: Iterable[Tuple[Hashable, Dict[str, np.ndarray]]]) -> None:
+        """
+        Сохраняет многие записи только в памяти.
+
+        :param items: Пары (ключ, запись); одна и та же запись может повторяться для разных ключей.
+        """
+        sizes: Dict[int, int] = {}
+        entries, entry_sizes = self._entries, self._sizes
+        for key, value in items:
+            size = sizes.get(id(value))
+            if size is None:
+                size = sizes[id(value)] = ENTRY_OVERHEAD_BYTES + sum(array.nbytes for array in value.values())
+            if key in entries:
+                self.nbytes -= entry_sizes[key]
+            entries[key] = value
+            entries.move_to_end(key)
+            entry_sizes[key] = size
+            self.nbytes += size
+        self._evict()
+
+    def clear(self) -> None:
+        """Удаляет записи из памяти (файлы на диске сохраняются) и обнуляет статистику."""
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def memory_footprint(self) -> Dict[str, Union[int, float]]:
+        """
+        Возвращает статистику кэша.
+
+        :return: Словарь с числом записей, объемом в памяти, числом попаданий (в памяти и на диске),
+                 промахов, вытеснений и долей попаданий.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key: Hashable, value: Dict[str, np.ndarray]) -> None:
+        """Добавляет запись в память и вытесняет самые старые записи при превышении max_bytes."""
+        if key in self._entries:
+            self.nbytes -= self._sizes[key]
+        size = ENTRY_OVERHEAD_BYTES + sum(array.nbytes for array in value.values())
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self.nbytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Вытесняет самые старые записи, пока объем превышает max_bytes (последняя запись остается всегда)."""
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            old_key, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(old_key)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
@@ -0,0 +1,171 @@
+import math
+import numpy as np
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.result_cache import content_hash
+from src.trajectory_arrays import segment_starts
+
+
+class SegmentQuery(NamedTuple):
+    """
+    Результат запроса к SegmentIndex.
+
+    starts - индексы начальных точек отобранных отрезков (по возрастанию), total - число отрезков
+    в индексе, pruned - число отброшенных отрезков, nodes_tested - число проверенных узлов дерева.
+    """
+    starts: np.ndarray
+    total: int
+    pruned: int
+    nodes_tested: int
+
+
+class SegmentIndex:
+    """
+    R-дерево ограничивающих параллелепипедов (x, y, z) отрезков траекторий, упакованное методом STR
+    (Sort-Tile-Recursive), строится один раз для набора скважин и используется для запросов
+    к любому числу поверхностей.
+
+    Листья формируются STR-упорядочиванием отрезков: по x на вертикальные слои, внутри слоя по y
+    на полосы, внутри полосы по z; в листе не более node_capacity отрезков. Верхние уровни
+    объединяют по node_capacity соседних узлов нижнего уровня, поэтому дочерние узлы узла k
+    уровня - это узлы k * node_capacity ... (k + 1) * node_capacity - 1 нижнего уровня.
+    """
+
+    def __init__(self, points: np.ndarray, offsets: np.ndarray, node_capacity: int = 16) -> None:
+        """
+        Строит индекс по упакованным траекториям.
+
+        :param points: Массив точек формы (N, 3).
+        :param offsets: Смещения траекторий длины T + 1.
+        :param node_capacity: Максимальное число элементов в узле дерева.
+        :raises ValueError: Если node_capacity меньше 2.
+        """
+        if node_capacity < 2:
+            raise ValueError(f"node_capacity должно быть не меньше 2, получено {node_capacity}")
+        self.node_capacity = node_capacity
+        points = np.asarray(points, dtype=np.float64)
+        # Отпечаток набора: смещения и хеш точек (см. matches).
+        self.offsets: np.ndarray = np.array(offsets, dtype=np.int64)
+        self.points_hash: str = content_hash(points)
+        self._matched_points: Optional[np.ndarray] = None
+
+        starts = segment_starts(self.offsets)
+        a, b = points[starts], points[starts + 1]
+        box_min, box_max = np.minimum(a, b), np.maximum(a, b)
+
+        order = self._str_order((box_min + box_max) / 2, node_capacity)
+        self.starts: np.ndarray = starts[order]
+        self.levels_min: List[np.ndarray] = [box_min[order]]
+        self.levels_max: List[np.ndarray] = [box_max[order]]
+        while self.levels_min[-1].shape[0] > 1:
+            self.levels_min.append(self._pack(self.levels_min[-1], np.minimum))
+            self.levels_max.append(self._pack(self.levels_max[-1], np.maximum))
+
+    @classmethod
+    def from_batch(cls, batch, node_capacity: int = 16) -> "SegmentIndex":
+        """
+        Строит индекс по набору траекторий TrajectoryBatch.
+
+        :param batch: Набор траекторий.
+        :param node_capacity: Максимальное число элементов в узле дерева.
+        :return: Индекс отрезков.
+        """
+        return cls(batch.points, batch.offsets, node_capacity)
+
+    def __len__(self) -> int:
+        return self.starts.size
+
+    def matches(self, points: np.ndarray, offsets: np.ndarray) -> bool:
+        """
+        Проверяет, что индекс построен по этим траекториям: смещения совпадают, а хеш точек равен хешу
+        при построении. Хеш вычисляется один раз для каждого массива точек: после успешной проверки
+        тот же объект points принимается без повторного хеширования (изменения массива на месте
+        после этого не обнаруживаются).
+
+        :param points: Массив точек формы (N, 3).
+        :param offsets: Смещения траекторий длины T + 1.
+        :return: True, если набор совпадает с набором, по которому построен индекс.
+        """
+        if not np.array_equal(self.offsets, offsets):
+            return False
+        if points is self._matched_points:
+            return True
+        if content_hash(np.asarray(points, dtype=np.float64)) != self.points_hash:
+            return False
+        self._matched_points = points
+        return True
+
+    @property
+    def depth(self) -> int:
+        """Количество уровней дерева, включая уровень отрезков."""
+        return len(self.levels_min)
+
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти индекса в байтах."""
+        levels = sum(level.nbytes for level in self.levels_min + self.levels_max)
+        return self.starts.nbytes + self.offsets.nbytes + levels
+
+    @staticmethod
+    def _str_order(centers: np.ndarray, capacity: int) -> np.ndarray:
+        """Порядок элементов по методу STR для центров параллелепипедов формы (M, 3)."""
+        count = centers.shape[0]
+        if count <= capacity:
+            return np.lexsort((centers[:, 2], centers[:, 1], centers[:, 0]))
+        slices = math.ceil(math.ceil(count / capacity) ** (1 / 3))
+        slab_size = math.ceil(count / slices)
+        strip_size = math.ceil(slab_size / slices)
+
+        order = np.argsort(centers[:, 0], kind="stable")
+        slab = np.arange(count) // slab_size
+        order = order[np.lexsort((centers[order, 1], slab))]
+        strip = (np.arange(count) - slab * slab_size) // strip_size
+        return order[np.lexsort((centers[order, 2], strip, slab))]
+
+    def _pack(self, level: np.ndarray, func) -> np.ndarray:
+        """Объединяет по node_capacity соседних параллелепипедов уровня."""
+        count = level.shape[0]
+        parents = -(-count // self.node_capacity)
+        return func.reduceat(level, np.arange(parents) * self.node_capacity, axis=0)
+
+    def query(self, box_min: Sequence[float], box_max: Sequence[float]) -> SegmentQuery:
+        """
+        Отбирает отрезки, ограничивающий параллелепипед которых пересекается с заданным.
+
+        :param box_min: Нижний угол параллелепипеда (x, y, z).
+        :param box_max: Верхний угол параллелепипеда (x, y, z).
+        :return: Отобранные отрезки и статистика запроса.
+        """
+        box_min = np.asarray(box_min, dtype=np.float64)
+        box_max = np.asarray(box_max, dtype=np.float64)
+        total = len(self)
+        if total == 0:
+            return SegmentQuery(self.starts, 0, 0, 0)
+
+        nodes = np.arange(self.levels_min[-1].shape[0])
+        nodes_tested = 0
+        for level in range(self.depth - 1, -1, -1):
+            nodes_tested += nodes.size
+            overlap = ((self.levels_min[level][nodes] <= box_max) & (self.levels_max[level][nodes] >= box_min)).all(axis=1)
+            nodes = nodes[overlap]
+            if level > 0:
+                children = (nodes[:, None] * self.node_capacity + np.arange(self.node_capacity)).ravel()
+                nodes = children[children < self.levels_min[level - 1].shape[0]]
+
+        starts = np.sort(self.starts[nodes])
+        return SegmentQuery(starts, total, total - starts.size, nodes_tested)
+
+    def query_surface(self, surface) -> SegmentQuery:
+        """
+        Отбирает отрезки, которые могут пересекать поверхность: их параллелепипед пересекается
+        с областью сетки по x, y (для повернутой сетки - с описанным прямоугольником) и с диапазоном
+        высот поверхности по z.
+
+        :param surface: Подготовленная поверхность.
+        :return: Отобранные отрезки и статистика запроса.
+        """
+        low = (surface.x_coords[0], surface.y_coords[0])
+        high = (surface.x_coords[-1], surface.y_coords[-1])
+        if surface.rotation is not None:
+            low, high = surface.rotation.world_bounds(surface.x_coords, surface.y_coords)
+        return self.query((low[0], low[1], surface.z_min), (high[0], high[1], surface.z_max))
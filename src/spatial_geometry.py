@@ -60,6 +60,221 @@ def line_plane_intersection(
     return x0 + t * dx, y0 + t * dy, z0 + t * dz
 
 
+def line_plane_intersection_parameter(
+        plane: Tuple[float, float, float, float],
+        line_point: Tuple[float, float, float],
+        line_dir: Tuple[float, float, float]
+    ) -> Optional[float]:
+    """
+    Вычисляет параметр t точки пересечения прямой line_point + t * line_dir и плоскости.
+
+    :param plane: Коэффициенты плоскости (A, B, C, D).
+    :param line_point: Точка на прямой (x, y, z).
+    :param line_dir: Направляющий вектор прямой (dx, dy, dz).
+    :return:
+        - Параметр t точки пересечения, если пересечение существует.
+        - 0.0, если прямая лежит в плоскости (как line_plane_intersection, возвращающая line_point).
+        - None, если прямая параллельна плоскости и не лежит в ней.
+    """
+    A, B, C, D = plane
+    x0, y0, z0 = line_point
+    dx, dy, dz = line_dir
+
+    denom = A * dx + B * dy + C * dz
+
+    if abs(denom) < 1e-10:
+        if abs(A * x0 + B * y0 + C * z0 + D) < 1e-10:
+            return 0.0
+        return None
+
+    return -(A * x0 + B * y0 + C * z0 + D) / denom
+
+
+def line_plane_intersection_parameters(
+        planes: np.ndarray,
+        line_points: np.ndarray,
+        line_dirs: np.ndarray
+    ) -> np.ndarray:
+    """
+    Векторный вариант line_plane_intersection_parameter для многих пар прямая-плоскость.
+
+    :param planes: Коэффициенты плоскостей (A, B, C, D), форма (N, 4).
+    :param line_points: Точки на прямых, форма (N, 3).
+    :param line_dirs: Направляющие векторы прямых, форма (N, 3).
+    :return: Параметры t точек пересечения, форма (N,): 0.0 для прямых, лежащих в плоскости,
+             NaN для параллельных прямых и плоскостей с NaN-коэффициентами.
+    """
+    A, B, C, D = planes[:, 0], planes[:, 1], planes[:, 2], planes[:, 3]
+    denom = A * line_dirs[:, 0] + B * line_dirs[:, 1] + C * line_dirs[:, 2]
+    distance = A * line_points[:, 0] + B * line_points[:, 1] + C * line_points[:, 2] + D
+
+    parallel = np.abs(denom) < 1e-10
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(parallel, np.nan, -distance / denom)
+    return np.where(parallel & (np.abs(distance) < 1e-10), 0.0, t)
+
+
+def line_bilinear_intersection_parameters(
+        patches: np.ndarray,
+        cell_bounds: np.ndarray,
+        line_points: np.ndarray,
+        line_dirs: np.ndarray
+    ) -> np.ndarray:
+    """
+    Вычисляет параметры t точек пересечения прямых line_point + t * line_dir с билинейными патчами
+    z(u, v) = a0 + a1 * u + a2 * v + a3 * u * v, где u, v - локальные координаты ячейки от 0 до 1.
+
+    Разность высот патча и прямой вдоль прямой - квадратный многочлен по t (bilinear_line_polynomials),
+    его корни находятся quadratic_roots.
+
+    :param patches: Коэффициенты патчей (a0, a1, a2, a3), форма (N, 4).
+    :param cell_bounds: Границы ячеек (x0, x1, y0, y1), форма (N, 4).
+    :param line_points: Точки на прямых, форма (N, 3).
+    :param line_dirs: Направляющие векторы прямых, форма (N, 3).
+    :return: Массив формы (N, 2) параметров t по возрастанию; NaN на месте отсутствующих корней.
+    """
+    return quadratic_roots(*bilinear_line_polynomials(patches, cell_bounds, line_points, line_dirs))
+
+
+def bilinear_line_polynomials(
+        patches: np.ndarray,
+        cell_bounds: np.ndarray,
+        line_points: np.ndarray,
+        line_dirs: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Вычисляет коэффициенты квадратного многочлена A * t^2 + B * t + C - разности высоты билинейного
+    патча и высоты прямой line_point + t * line_dir над точкой прямой.
+
+    :param patches: Коэффициенты патчей (a0, a1, a2, a3), форма (N, 4).
+    :param cell_bounds: Границы ячеек (x0, x1, y0, y1), форма (N, 4).
+    :param line_points: Точки на прямых, форма (N, 3).
+    :param line_dirs: Направляющие векторы прямых, форма (N, 3).
+    :return: Кортеж (A, B, C) массивов формы (N,).
+    """
+    a0, a1, a2, a3 = patches[:, 0], patches[:, 1], patches[:, 2], patches[:, 3]
+    width = cell_bounds[:, 1] - cell_bounds[:, 0]
+    height = cell_bounds[:, 3] - cell_bounds[:, 2]
+    u0 = (line_points[:, 0] - cell_bounds[:, 0]) / width
+    v0 = (line_points[:, 1] - cell_bounds[:, 2]) / height
+    du = line_dirs[:, 0] / width
+    dv = line_dirs[:, 1] / height
+
+    A = a3 * du * dv
+    B = a1 * du + a2 * dv + a3 * (u0 * dv + v0 * du) - line_dirs[:, 2]
+    C = a0 + a1 * u0 + a2 * v0 + a3 * u0 * v0 - line_points[:, 2]
+    return A, B, C
+
+
+def quadratic_roots(A: np.ndarray, B: np.ndarray, C: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет корни многочленов A * t^2 + B * t + C устойчивой формулой q = -(B + sign(B) * sqrt(B^2 - 4AC)) / 2,
+    t1 = q / A, t2 = C / q, которая без особых случаев переходит в линейное уравнение при A = 0.
+
+    :return: Массив формы (N, 2) корней по возрастанию; NaN на месте отсутствующих корней.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discriminant = B * B - 4 * A * C
+        q = -0.5 * (B + np.where(B < 0, -1.0, 1.0) * np.sqrt(discriminant))
+        roots = np.stack([q / A, C / q], axis=1)
+        roots[~np.isfinite(roots)] = np.nan
+        roots[discriminant < 0] = np.nan
+        roots[(roots[:, 0] == roots[:, 1]), 1] = np.nan
+    return np.sort(roots, axis=1)
+
+
+# Число шагов золотого сечения при поиске ближайших точек отрезка и патча (сужение интервала в 1.6^40 раз).
+GOLDEN_STEPS = 40
+
+
+def segment_closest_parameters(
+        p: np.ndarray, d: np.ndarray, q: np.ndarray, e: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Находит параметры ближайших точек отрезков p + s * d и q + t * e (s, t от 0 до 1).
+
+    :param p: Начала первых отрезков, форма (N, 3).
+    :param d: Векторы первых отрезков, форма (N, 3).
+    :param q: Начала вторых отрезков, форма (N, 3).
+    :param e: Векторы вторых отрезков, форма (N, 3).
+    :return: Кортеж (s, t) массивов формы (N,); для вырожденных отрезков соответствующий параметр равен 0.
+    """
+    r = p - q
+    dd, ee, de = (d * d).sum(axis=1), (e * e).sum(axis=1), (d * e).sum(axis=1)
+    dr, er = (d * r).sum(axis=1), (e * r).sum(axis=1)
+    denom = dd * ee - de * de
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(denom > 1e-12 * dd * ee, np.clip((de * er - dr * ee) / denom, 0.0, 1.0), 0.0)
+        t = np.where(ee > 0, (de * s + er) / ee, 0.0)
+        s = np.where(t < 0, -dr / dd, np.where(t > 1, (de - dr) / dd, s))
+        s = np.where(dd > 0, np.clip(s, 0.0, 1.0), 0.0)
+    return s, np.clip(t, 0.0, 1.0)
+
+
+def segment_patch_closest_points(
+        patches: np.ndarray,
+        cell_bounds: np.ndarray,
+        line_points: np.ndarray,
+        line_dirs: np.ndarray,
+        samples: int = 2
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Находит ближайшие друг к другу точки отрезков line_point + t * line_dir (t от 0 до 1) и билинейных
+    патчей z(u, v) = a0 + a1 * u + a2 * v + a3 * u * v над ячейками (u, v от 0 до 1).
+
+    При постоянном v патч - отрезок по u, и расстояние до него находится точно (segment_closest_parameters),
+    поэтому остается минимизировать расстояние по одной переменной v: среди samples равномерных значений
+    выбирается лучшее, и интервал вокруг него уточняется золотым сечением. Для плоскости (a3 = 0)
+    расстояние - выпуклая функция v, и достаточно samples = 2; для билинейного патча минимум находится
+    внутри выбранного интервала. Возвращаемые точки в любом случае лежат на отрезке и патче.
+
+    :param patches: Коэффициенты патчей (a0, a1, a2, a3), форма (N, 4).
+    :param cell_bounds: Границы ячеек (x0, x1, y0, y1), форма (N, 4).
+    :param line_points: Начальные точки отрезков, форма (N, 3).
+    :param line_dirs: Векторы отрезков (конец минус начало), форма (N, 3).
+    :param samples: Число равномерных значений v для выбора интервала уточнения, не меньше 2.
+    :return: Кортеж (distance, t, u, v) массивов формы (N,); NaN для патчей с NaN-коэффициентами.
+    """
+    a0, a1, a2, a3 = patches[:, 0], patches[:, 1], patches[:, 2], patches[:, 3]
+    x0, width = cell_bounds[:, 0], cell_bounds[:, 1] - cell_bounds[:, 0]
+    y0, height = cell_bounds[:, 2], cell_bounds[:, 3] - cell_bounds[:, 2]
+    zeros = np.zeros_like(a0)
+
+    def closest(v: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        start = np.stack([x0, y0 + v * height, a0 + a2 * v], axis=1)
+        ruling = np.stack([width, zeros, a1 + a3 * v], axis=1)
+        t, u = segment_closest_parameters(line_points, line_dirs, start, ruling)
+        gap = line_points + t[:, None] * line_dirs - start - u[:, None] * ruling
+        return np.sqrt((gap * gap).sum(axis=1)), t, u
+
+    grid = np.linspace(0.0, 1.0, samples)
+    sampled = np.stack([closest(np.full(a0.shape, value))[0] for value in grid], axis=1)
+    best = np.argmin(np.where(np.isnan(sampled), np.inf, sampled), axis=1)
+    low, high = grid[np.maximum(best - 1, 0)], grid[np.minimum(best + 1, samples - 1)]
+
+    ratio = (np.sqrt(5.0) - 1.0) / 2.0
+    left, right = high - ratio * (high - low), low + ratio * (high - low)
+    left_distance, right_distance = closest(left)[0], closest(right)[0]
+    for _ in range(GOLDEN_STEPS):
+        shrink_high = left_distance <= right_distance
+        low, high = np.where(shrink_high, low, left), np.where(shrink_high, right, high)
+        left, right = (np.where(shrink_high, high - ratio * (high - low), right),
+                       np.where(shrink_high, left, low + ratio * (high - low)))
+        probe_distance = closest(np.where(shrink_high, left, right))[0]
+        left_distance, right_distance = (np.where(shrink_high, probe_distance, right_distance),
+                                         np.where(shrink_high, left_distance, probe_distance))
+
+    distance, t, u = np.full(a0.shape, np.inf), zeros.copy(), zeros.copy()
+    v = zeros.copy()
+    for candidate in (left, right, grid[best]):
+        candidate_distance, candidate_t, candidate_u = closest(candidate)
+        closer = candidate_distance < distance
+        distance = np.where(closer, candidate_distance, distance)
+        t, u, v = np.where(closer, candidate_t, t), np.where(closer, candidate_u, u), np.where(closer, candidate, v)
+    distance[np.isinf(distance)] = np.nan
+    return distance, t, u, v
+
+
 def line_from_two_points(p1: Tuple[float, float, float], p2: Tuple[float, float, float]) -> Tuple[
     Tuple[float, float, float], Tuple[float, float, float]]:
     """
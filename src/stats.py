@@ -0,0 +1,132 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, Optional
+
+STAGES = ("validation", "boundary", "candidates", "cull", "traversal", "solve")
+COUNTERS = (
+    "calls",
+    "points",
+    "segments",
+    "candidate_segments",
+    "segments_culled",
+    "cells_traversed",
+    "cells_culled",
+    "plane_fits",
+    "rejected_by_rectangle",
+    "accepted_intersections",
+)
+
+
+class ProcessorStats:
+    """
+    Статистика работы TrajectoryProcessor: суммарное время этапов и счетчики, накапливаемые
+    между вызовами до reset().
+
+    Этапы (секунды): validation - проверка массивов, boundary - check_boundary_values,
+    candidates - поиск отрезков-кандидатов, cull - отсев отрезков по пирамиде, traversal - обход
+    ячеек, solve - пересечение с плоскостями или патчами ячеек.
+
+    Счетчики: calls, points, segments, candidate_segments, segments_culled (отброшены по оболочке
+    прямоугольника ячеек), cells_traversed, cells_culled (ячейки, отброшенные по оболочке высот),
+    plane_fits (ячейки, для которых решалось пересечение), rejected_by_rectangle (решения вне участка
+    отрезка в своей ячейке), accepted_intersections.
+    """
+
+    enabled = True
+
+    def __init__(self, callback: Optional[Callable[[str, float], None]] = None) -> None:
+        """
+        Создает пустую статистику.
+
+        :param callback: Функция callback(stage, seconds), вызываемая по завершении каждого этапа.
+        """
+        self.callback = callback
+        self.stage_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Обнуляет время этапов и счетчики."""
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Измеряет время выполнения блока и добавляет его к этапу name.
+
+        :param name: Имя этапа.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + elapsed
+            if self.callback is not None:
+                self.callback(name, elapsed)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Увеличивает счетчик.
+
+        :param name: Имя счетчика.
+        :param value: Приращение.
+        """
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def merge(self, other: Dict[str, Dict]) -> None:
+        """
+        Добавляет время этапов и счетчики другой статистики, например собранной в рабочем процессе
+        (callback для добавленных этапов не вызывается).
+
+        :param other: Статистика в виде словаря to_dict().
+        """
+        for name, seconds in other.get("stages", {}).items():
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        for name, value in other.get("counters", {}).items():
+            self.count(name, value)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Возвращает статистику в виде словаря {"stages": {...}, "counters": {...}}."""
+        return {"stages": dict(self.stage_seconds), "counters": dict(self.counters)}
+
+    def to_json(self, **kwargs) -> str:
+        """
+        Возвращает статистику в формате JSON.
+
+        :param kwargs: Параметры json.dumps.
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+class NullStats:
+    """
+    Отключенная статистика с тем же интерфейсом, что и ProcessorStats: все методы ничего не делают.
+    Используется по умолчанию, чтобы инструментирование не влияло на время расчета.
+    """
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return self._context
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+    def merge(self, other: Dict[str, Dict]) -> None:
+        pass
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {"stages": {}, "counters": {}}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+NULL_STATS = NullStats()
@@ -0,0 +1,100 @@
+import csv
+from itertools import islice
+from typing import Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.result_cache import ResultCache
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def iter_intersections(
+        surface: Union[PreparedSurface, SurfaceStack, TiledSurface],
+        trajectory_iter: Iterable[Tuple[Hashable, Sequence[Sequence[float]]]],
+        chunk_size: int = 1000,
+        surface_mode: str = "plane",
+        stats: Optional[ProcessorStats] = None,
+        backend: str = "numpy",
+        candidate_flag: int = 1,
+        cache: Optional[ResultCache] = None
+) -> Iterator[Tuple[Hashable, List[Tuple[float, float, float]]]]:
+    """
+    Вычисляет пересечения траекторий с поверхностью потоково.
+
+    Траектории читаются из итератора порциями по chunk_size и обрабатываются одним вызовом
+    calculate_intersections, после чего результаты порции сразу отдаются вызывающему коду.
+    В памяти одновременно находится не больше одной порции траекторий, поэтому расход памяти
+    не зависит от общего числа скважин. Параметры процессора те же, что у TrajectoryProcessor, поэтому
+    результат совпадает с TrajectoryProcessor и calculate_intersections_parallel с теми же параметрами;
+    stats накапливает статистику по всем порциям.
+
+    :param surface: Подготовленная поверхность, набор горизонтов SurfaceStack или поверхность в файле
+                    тайлов TiledSurface.
+    :param trajectory_iter: Итератор пар (well_id, траектория); для списка траекторий без
+                            идентификаторов подойдет enumerate(trajectories).
+    :param chunk_size: Число траекторий в одной порции.
+    :param surface_mode: Режим поверхности, как в TrajectoryProcessor.
+    :param stats: Статистика этапов и счетчиков, как в TrajectoryProcessor.
+    :param backend: Реализация обхода ячеек, как в TrajectoryProcessor.
+    :param candidate_flag: Метод отбора отрезков-кандидатов, как в TrajectoryProcessor.
+    :param cache: Кэш результатов, как в TrajectoryProcessor.
+    :return: Генератор пар (well_id, список пересечений) в порядке входных траекторий.
+    :raises ValueError: Если параметры процессора неизвестны или траектории порции не прошли валидацию.
+    """
+    processor = TrajectoryProcessor(surface, surface_mode, stats, backend, candidate_flag, cache)
+    iterator = iter(trajectory_iter)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        well_ids = [well_id for well_id, _ in chunk]
+        result = processor.calculate_intersections({"trajectories": [trajectory for _, trajectory in chunk]})
+        if result is None:
+            raise ValueError(f"Ошибка валидации траекторий скважин {well_ids[0]!r} - {well_ids[-1]!r}")
+        yield from zip(well_ids, result)
+
+
+def read_trajectories_csv(
+        filename: str,
+        well_column: str = "well",
+        x_column: str = "x",
+        y_column: str = "y",
+        z_column: str = "z",
+        delimiter: str = ","
+) -> Iterator[Tuple[str, List[List[float]]]]:
+    """
+    Читает траектории из CSV-файла с заголовком, по одной строке на точку траектории.
+
+    Строки одной скважины должны идти подряд; из траекторий в памяти хранится только текущая.
+    Для проверки порядка строк хранятся идентификаторы уже прочитанных скважин, поэтому эта часть
+    памяти растет с числом скважин в файле (по одному идентификатору на скважину, без точек траекторий).
+
+    :param filename: Путь к CSV-файлу.
+    :param well_column: Имя столбца с идентификатором скважины.
+    :param x_column: Имя столбца с координатой X.
+    :param y_column: Имя столбца с координатой Y.
+    :param z_column: Имя столбца с высотой Z.
+    :param delimiter: Разделитель столбцов.
+    :return: Генератор пар (well_id, траектория), где траектория - список точек [x, y, z].
+    :raises ValueError: Если строки одной скважины разделены строками других скважин.
+    """
+    seen_wells = set()
+    current_well: Optional[str] = None
+    trajectory: List[List[float]] = []
+
+    with open(filename, newline="") as csv_file:
+        for row in csv.DictReader(csv_file, delimiter=delimiter):
+            well_id = row[well_column]
+            if well_id != current_well:
+                if current_well is not None:
+                    yield current_well, trajectory
+                if well_id in seen_wells:
+                    raise ValueError(f"Строки скважины {well_id!r} в файле {filename} идут не подряд")
+                seen_wells.add(well_id)
+                current_well, trajectory = well_id, []
+            trajectory.append([float(row[x_column]), float(row[y_column]), float(row[z_column])])
+
+    if current_well is not None:
+        yield current_well, trajectory
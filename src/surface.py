@@ -0,0 +1,255 @@
+import numpy as np
+from functools import cached_property
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from src.cell_coefficients import CellCoefficientCache
+from src.grid_axis import GridAxis
+from src.grid_rotation import GridRotation
+from src.model import GridModel
+from src.packed_mask import PackedMask
+from src.pyramid import MinMaxPyramid, cell_corner_range
+from src.result_cache import content_hash
+from src.validation import ArrayValidationError, validate_grid_arrays
+
+STORAGE_MODES = ("float64", "compact")
+
+
+class PreparedSurface:
+    """
+    Подготовленная поверхность: сетка проверяется и индексируется один раз,
+    после чего используется для любого числа запросов траекторий.
+
+    Высоты хранятся в непрерывном массиве float64 формы (len(x_coords), len(y_coords)),
+    как и height_matrix: первый индекс - по оси X, второй - по оси Y.
+    Пустые узлы (None) хранятся как NaN.
+
+    В режиме storage="compact" высоты хранятся в float32 (4 байта на узел), маски пустых узлов
+    null_mask и ячеек со всеми непустыми углами cell_valid - упакованными битами (PackedMask),
+    массивы cell_min и cell_max не хранятся (None), а коэффициенты ячеек вычисляются блоками
+    (CellCoefficientCache в режиме "lazy"). Пирамида хранится в float32, ее уровень 0 - оболочки
+    блоков COMPACT_BLOCK_SIZE x COMPACT_BLOCK_SIZE (4 x 4) ячеек, меньше 1 байта на узел: отсев
+    по пирамиде грубее, и до решения доходит больше ячеек, а пустые ячейки отбрасываются по маске
+    cell_valid. Пустые узлы и в этом режиме равны NaN. Высота узла округляется до 24 значащих битов:
+    ошибка не больше |z| * 2^-24 (1.2e-4 м при |z| < 4096 м, 4.9e-4 м при |z| < 16384 м), высота
+    поверхности внутри ячейки - не больше полутора таких ошибок (плоскость наименьших квадратов),
+    а точка пересечения смещается вдоль траектории на ошибку высоты, деленную на синус угла
+    между траекторией и поверхностью (для вертикальной скважины и пологой поверхности - примерно
+    на саму ошибку). Координаты узлов и траекторий остаются float64.
+
+    Повернутая сетка задается rotation: x_coords, y_coords - координаты узлов до поворота,
+    а траектории переводятся в эту систему координат при расчете (см. GridRotation).
+    """
+
+    def __init__(
+            self,
+            x_coords: Sequence[float],
+            y_coords: Sequence[float],
+            height_matrix: Sequence,
+            trusted: bool = False,
+            null_policy: str = "allow",
+            rotation: Optional[GridRotation] = None,
+            storage: str = "float64"
+    ) -> None:
+        """
+        Создает подготовленную поверхность.
+
+        :param x_coords: Координаты узлов сетки по оси X (по возрастанию).
+        :param y_coords: Координаты узлов сетки по оси Y (по возрастанию).
+        :param height_matrix: Матрица высот, None или NaN для пустых узлов.
+        :param trusted: Не проверять массивы (для заранее проверенных данных, например из кэша).
+        :param null_policy: Политика пустых узлов для validate_grid_arrays: "allow" или "forbid".
+        :param rotation: Поворот сетки; None - сетка не повернута.
+        :param storage: Хранение высот: "float64" или "compact" (float32 и упакованные маски).
+        :raises ValueError: Если режим хранения неизвестен.
+        :raises ArrayValidationError: Если массивы не прошли проверку validate_grid_arrays
+                                      или высоты не помещаются в float32.
+        """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Неизвестный режим хранения высот: {storage}")
+        if not trusted:
+            x_coords, y_coords, height_matrix = validate_grid_arrays(x_coords, y_coords, height_matrix, null_policy)
+        dtype = np.float32 if storage == "compact" else np.float64
+        self.storage = storage
+        self.x_coords: np.ndarray = np.ascontiguousarray(x_coords, dtype=np.float64)
+        self.y_coords: np.ndarray = np.ascontiguousarray(y_coords, dtype=np.float64)
+        with np.errstate(over="ignore"):
+            self.heights: np.ndarray = np.ascontiguousarray(np.asarray(height_matrix, dtype=dtype))
+        self.rotation: Optional[GridRotation] = rotation
+
+        self.x_axis: GridAxis = GridAxis(self.x_coords)
+        self.y_axis: GridAxis = GridAxis(self.y_coords)
+        nulls = np.isnan(self.heights)
+        if storage == "compact":
+            if np.isinf(self.heights).any():
+                raise ArrayValidationError("height_matrix содержит значения вне диапазона float32")
+            self.null_mask: Union[np.ndarray, PackedMask] = PackedMask(nulls)
+            valid = np.logical_not(nulls, out=nulls)
+            cell_valid = valid[:-1, :-1] & valid[:-1, 1:]
+            cell_valid &= valid[1:, :-1]
+            cell_valid &= valid[1:, 1:]
+            self.cell_valid: Union[np.ndarray, PackedMask] = PackedMask(cell_valid)
+            self.cell_min: Optional[np.ndarray] = None
+            self.cell_max: Optional[np.ndarray] = None
+        else:
+            self.null_mask = nulls
+            self.cell_min, self.cell_max = cell_corner_range(self.heights)
+            self.cell_valid = ~np.isnan(self.cell_min)
+        self.z_min, self.z_max = self._z_range()
+
+    @classmethod
+    def from_grid(cls, grid: GridModel) -> "PreparedSurface":
+        """
+        Создает подготовленную поверхность из провалидированной модели сетки.
+
+        :param grid: Модель сетки GridModel.
+        :return: Подготовленная поверхность.
+        """
+        return cls(grid.x_coords, grid.y_coords, grid.height_matrix)
+
+    @classmethod
+    def from_surface(cls, surface: "PreparedSurface", storage: str) -> "PreparedSurface":
+        """
+        Создает поверхность с той же сеткой и поворотом в другом режиме хранения высот.
+
+        :param surface: Подготовленная поверхность.
+        :param storage: Режим хранения высот: "float64" или "compact".
+        :return: Подготовленная поверхность.
+        """
+        return cls(surface.x_coords, surface.y_coords, surface.heights, trusted=True,
+                   rotation=surface.rotation, storage=storage)
+
+    @classmethod
+    def from_shared_state(cls, arrays: Dict, attributes: Dict) -> "PreparedSurface":
+        """
+        Восстанавливает поверхность из shared_state без проверки, пересчета и копирования массивов
+        (например, поверх массивов в разделяемой памяти multiprocessing.shared_memory).
+        Коэффициенты ячеек вычисляются заново при первом обращении.
+
+        :param arrays: Массивы поверхности, как в shared_state.
+        :param attributes: Остальные атрибуты поверхности, как в shared_state.
+        :return: Подготовленная поверхность.
+        """
+        surface = cls.__new__(cls)
+        surface.storage = attributes["storage"]
+        surface.x_coords, surface.y_coords = arrays["x_coords"], arrays["y_coords"]
+        surface.heights = arrays["heights"]
+        surface.rotation = attributes["rotation"]
+        surface.x_axis, surface.y_axis = GridAxis(surface.x_coords), GridAxis(surface.y_coords)
+        if surface.storage == "compact":
+            cells = tuple(max(size - 1, 0) for size in surface.heights.shape)
+            surface.null_mask = PackedMask.from_bits(arrays["null_mask"], surface.heights.shape)
+            surface.cell_valid = PackedMask.from_bits(arrays["cell_valid"], cells)
+            surface.cell_min = surface.cell_max = None
+        else:
+            surface.null_mask, surface.cell_valid = arrays["null_mask"], arrays["cell_valid"]
+            surface.cell_min, surface.cell_max = arrays["cell_min"], arrays["cell_max"]
+        surface.z_min, surface.z_max = attributes["z_range"]
+        surface.pyramid = MinMaxPyramid.from_shared_state(arrays["pyramid"], attributes["pyramid"])
+        return surface
+
+    def shared_state(self) -> Tuple[Dict, Dict]:
+        """
+        Возвращает массивы поверхности и остальные ее атрибуты для восстановления в другом процессе
+        (from_shared_state): высоты, маски, оболочки ячеек и уровни пирамиды (пирамида строится,
+        если еще не создана). Массивы можно разместить в разделяемой памяти, чтобы рабочие процессы
+        не копировали и не пересчитывали их.
+
+        :return: Кортеж (arrays, attributes): словарь массивов (уровни пирамиды - вложенным словарем
+                 "pyramid") и словарь небольших атрибутов.
+        """
+        pyramid_arrays, pyramid_attributes = self.pyramid.shared_state()
+        arrays = {"x_coords": self.x_coords, "y_coords": self.y_coords, "heights": self.heights,
+                  "pyramid": pyramid_arrays}
+        for name in ("null_mask", "cell_valid"):
+            mask = getattr(self, name)
+            arrays[name] = mask.bits if isinstance(mask, PackedMask) else mask
+        if self.cell_min is not None:
+            arrays["cell_min"], arrays["cell_max"] = self.cell_min, self.cell_max
+        attributes = {"storage": self.storage, "rotation": self.rotation, "z_range": (self.z_min, self.z_max),
+                      "pyramid": pyramid_attributes}
+        return arrays, attributes
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Количество узлов сетки по осям X и Y."""
+        return self.heights.shape
+
+    @cached_property
+    def pyramid(self) -> MinMaxPyramid:
+        """
+        Пирамида минимумов и максимумов высот по ячейкам, строится при первом обращении.
+        Оболочка ячеек расширена с учетом отклонения плоскости наименьших квадратов от углов.
+        """
+        return MinMaxPyramid.from_surface(self)
+
+    @cached_property
+    def coefficients(self) -> CellCoefficientCache:
+        """
+        Кэш коэффициентов плоскостей и билинейных патчей по ячейкам, создается при первом обращении
+        в режиме "auto" (для компактной поверхности - "lazy", не более 64 блоков, около 16 МиБ).
+        Чтобы выбрать режим явно, присвойте атрибуту собственный CellCoefficientCache.
+        """
+        if self.storage == "compact":
+            return CellCoefficientCache(self, mode="lazy", bilinear=True, max_tiles=64)
+        return CellCoefficientCache(self, bilinear=True)
+
+    @cached_property
+    def content_hash(self) -> str:
+        """Хеш координат узлов, высот и поворота, вычисляется при первом обращении (ключ кэша результатов)."""
+        rotation = () if self.rotation is None else (self.rotation.parameters,)
+        return content_hash(self.x_coords, self.y_coords, self.heights, *rotation)
+
+    def height_at(self, i: int, j: int) -> Optional[float]:
+        """
+        Возвращает высоту узла сетки.
+
+        :param i: Индекс узла по оси X.
+        :param j: Индекс узла по оси Y.
+        :return: Высота узла или None, если узел пустой.
+        """
+        value = self.heights[i, j]
+        return None if np.isnan(value) else value
+
+    def corner_heights(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """
+        Возвращает высоты четырех углов ячеек с нижними левыми узлами (i, j).
+
+        :param i: Индексы ячеек по оси X.
+        :param j: Индексы ячеек по оси Y.
+        :return: Массив формы (..., 4) со значениями [f11, f12, f21, f22].
+        """
+        i = np.asarray(i, dtype=np.intp)
+        j = np.asarray(j, dtype=np.intp)
+        return np.stack([
+            self.heights[i, j], self.heights[i, j + 1],
+            self.heights[i + 1, j], self.heights[i + 1, j + 1],
+        ], axis=-1)
+
+    def memory_footprint(self) -> Dict[str, Union[str, int, float]]:
+        """
+        Возвращает объем памяти поверхности по частям; пирамида и коэффициенты учитываются, если уже созданы.
+
+        :return: Словарь с режимом хранения, объемами высот, масок, оболочек ячеек, пирамиды
+                 и коэффициентов в байтах, общим объемом и объемом на узел.
+        """
+        masks = self.null_mask.nbytes + self.cell_valid.nbytes
+        cell_stats = 0 if self.cell_min is None else self.cell_min.nbytes + self.cell_max.nbytes
+        pyramid = self.__dict__["pyramid"].nbytes if "pyramid" in self.__dict__ else 0
+        coefficients = self.__dict__["coefficients"].nbytes if "coefficients" in self.__dict__ else 0
+        total = self.heights.nbytes + masks + cell_stats + pyramid + coefficients
+        return {
+            "storage": self.storage,
+            "heights_bytes": self.heights.nbytes,
+            "mask_bytes": masks,
+            "cell_stats_bytes": cell_stats,
+            "pyramid_bytes": pyramid,
+            "coefficients_bytes": coefficients,
+            "bytes": total,
+            "bytes_per_node": total / max(self.heights.size, 1),
+        }
+
+    def _z_range(self) -> Tuple[float, float]:
+        """Минимальная и максимальная высота непустых узлов сетки."""
+        if self.null_mask.all():
+            return float('inf'), float('-inf')
+        return float(np.nanmin(self.heights)), float(np.nanmax(self.heights))
@@ -0,0 +1,182 @@
+import numpy as np
+from functools import cached_property
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from src.grid_axis import GridAxis
+from src.grid_rotation import GridRotation
+from src.pyramid import MinMaxPyramid
+from src.result_cache import content_hash
+from src.surface import PreparedSurface
+from src.validation import ArrayValidationError, validate_grid_arrays
+
+
+class SurfaceStack:
+    """
+    Набор поверхностей (горизонтов) на общей сетке: координаты узлов и оси GridAxis общие,
+    высоты хранятся в непрерывном массиве float64 формы (n_surfaces, len(x_coords), len(y_coords)).
+
+    Каждый горизонт доступен как PreparedSurface (stack[k]) с собственными пирамидой и кэшем
+    коэффициентов; его высоты - представление массива heights без копирования. Пирамида набора
+    (pyramid) - оболочка всех горизонтов сразу, по ней отсеиваются отрезки, не достигающие ни одного из них.
+    """
+
+    def __init__(
+            self,
+            x_coords: Sequence[float],
+            y_coords: Sequence[float],
+            heights: Sequence,
+            names: Optional[Sequence[Hashable]] = None,
+            trusted: bool = False,
+            null_policy: str = "allow",
+            rotation: Optional[GridRotation] = None
+    ) -> None:
+        """
+        Создает набор поверхностей.
+
+        :param x_coords: Координаты узлов сетки по оси X (по возрастанию).
+        :param y_coords: Координаты узлов сетки по оси Y (по возрастанию).
+        :param heights: Высоты горизонтов, форма (n_surfaces, len(x_coords), len(y_coords)), NaN для пустых узлов.
+        :param names: Имена горизонтов длины n_surfaces; по умолчанию горизонты обозначаются номерами.
+        :param trusted: Не проверять массивы (для заранее проверенных данных).
+        :param null_policy: Политика пустых узлов для validate_grid_arrays: "allow" или "forbid".
+        :param rotation: Поворот общей сетки; None - сетка не повернута.
+        :raises ArrayValidationError: Если массивы не прошли проверку, горизонтов нет или число имен не совпадает.
+        """
+        heights = np.asarray(heights, dtype=np.float64) if trusted else np.asarray(heights)
+        if heights.ndim != 3 or heights.shape[0] == 0:
+            raise ArrayValidationError(f"heights должны иметь форму (n_surfaces, nx, ny), получено {heights.shape}")
+        if names is not None and len(names) != heights.shape[0]:
+            raise ArrayValidationError(f"Число имен горизонтов {len(names)} не совпадает с {heights.shape[0]}")
+        if not trusted:
+            layers = [validate_grid_arrays(x_coords, y_coords, layer, null_policy) for layer in heights]
+            x_coords, y_coords = layers[0][0], layers[0][1]
+            heights = np.stack([layer[2] for layer in layers])
+        self.x_coords: np.ndarray = np.ascontiguousarray(x_coords, dtype=np.float64)
+        self.y_coords: np.ndarray = np.ascontiguousarray(y_coords, dtype=np.float64)
+        self.heights: np.ndarray = np.ascontiguousarray(heights, dtype=np.float64)
+        self.names: Optional[List[Hashable]] = list(names) if names is not None else None
+        self.rotation: Optional[GridRotation] = rotation
+
+        self.x_axis: GridAxis = GridAxis(self.x_coords)
+        self.y_axis: GridAxis = GridAxis(self.y_coords)
+        self.surfaces: List[PreparedSurface] = []
+        for layer in self.heights:
+            surface = PreparedSurface(self.x_coords, self.y_coords, layer, trusted=True, rotation=rotation)
+            surface.x_axis, surface.y_axis = self.x_axis, self.y_axis
+            self.surfaces.append(surface)
+        self._set_z_ranges()
+
+    @classmethod
+    def from_surfaces(
+            cls, surfaces: Sequence[PreparedSurface], names: Optional[Sequence[Hashable]] = None
+    ) -> "SurfaceStack":
+        """
+        Создает набор из подготовленных поверхностей с одинаковыми координатами узлов и поворотом.
+
+        :param surfaces: Подготовленные поверхности.
+        :param names: Имена горизонтов.
+        :return: Набор поверхностей.
+        :raises ArrayValidationError: Если поверхностей нет или координаты узлов или поворот различаются.
+        """
+        if not surfaces:
+            raise ArrayValidationError("Набор поверхностей пуст")
+        first = surfaces[0]
+        for surface in surfaces[1:]:
+            if not (np.array_equal(surface.x_coords, first.x_coords)
+                    and np.array_equal(surface.y_coords, first.y_coords)):
+                raise ArrayValidationError("Координаты узлов поверхностей набора различаются")
+            if surface.rotation != first.rotation:
+                raise ArrayValidationError("Поворот сеток поверхностей набора различается")
+        return cls(first.x_coords, first.y_coords, np.stack([surface.heights for surface in surfaces]),
+                   names, trusted=True, rotation=first.rotation)
+
+    @classmethod
+    def from_shared_state(cls, arrays: Dict, attributes: Dict) -> "SurfaceStack":
+        """
+        Восстанавливает набор из shared_state без проверки, пересчета и копирования массивов
+        (как PreparedSurface.from_shared_state); высоты горизонтов - представления общего массива heights.
+
+        :param arrays: Массивы набора, как в shared_state.
+        :param attributes: Остальные атрибуты набора, как в shared_state.
+        :return: Набор поверхностей.
+        """
+        stack = cls.__new__(cls)
+        stack.x_coords, stack.y_coords, stack.heights = arrays["x_coords"], arrays["y_coords"], arrays["heights"]
+        stack.names, stack.rotation = attributes["names"], attributes["rotation"]
+        stack.x_axis, stack.y_axis = GridAxis(stack.x_coords), GridAxis(stack.y_coords)
+        stack.surfaces = []
+        for number, layer_attributes in enumerate(attributes["surfaces"]):
+            layer = dict(arrays["surfaces"][number], x_coords=stack.x_coords, y_coords=stack.y_coords,
+                         heights=stack.heights[number])
+            surface = PreparedSurface.from_shared_state(layer, layer_attributes)
+            surface.x_axis, surface.y_axis = stack.x_axis, stack.y_axis
+            stack.surfaces.append(surface)
+        stack._set_z_ranges()
+        stack.pyramid = MinMaxPyramid.from_shared_state(arrays["pyramid"], attributes["pyramid"])
+        return stack
+
+    def shared_state(self) -> Tuple[Dict, Dict]:
+        """
+        Возвращает массивы набора и остальные его атрибуты для восстановления в другом процессе
+        (from_shared_state): общий массив высот, массивы горизонтов из PreparedSurface.shared_state
+        (без повторения высот и координат) и уровни пирамиды набора.
+
+        :return: Кортеж (arrays, attributes), как в PreparedSurface.shared_state.
+        """
+        layers, layer_attributes = {}, []
+        for number, surface in enumerate(self.surfaces):
+            layer, attributes = surface.shared_state()
+            layers[number] = {name: array for name, array in layer.items()
+                              if name not in ("x_coords", "y_coords", "heights")}
+            layer_attributes.append(attributes)
+        pyramid_arrays, pyramid_attributes = self.pyramid.shared_state()
+        arrays = {"x_coords": self.x_coords, "y_coords": self.y_coords, "heights": self.heights,
+                  "surfaces": layers, "pyramid": pyramid_arrays}
+        return arrays, {"names": self.names, "rotation": self.rotation, "surfaces": layer_attributes,
+                        "pyramid": pyramid_attributes}
+
+    def _set_z_ranges(self) -> None:
+        """Вычисляет диапазоны высот горизонтов и всего набора."""
+        self.surface_z_min: np.ndarray = np.array([surface.z_min for surface in self.surfaces])
+        self.surface_z_max: np.ndarray = np.array([surface.z_max for surface in self.surfaces])
+        self.z_min = float(self.surface_z_min.min())
+        self.z_max = float(self.surface_z_max.max())
+
+    def __len__(self) -> int:
+        return len(self.surfaces)
+
+    def __getitem__(self, index: int) -> PreparedSurface:
+        return self.surfaces[index]
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Количество горизонтов и узлов сетки по осям X и Y."""
+        return self.heights.shape
+
+    @cached_property
+    def pyramid(self) -> MinMaxPyramid:
+        """Пирамида оболочки всех горизонтов: уровень 0 - объединение оболочек ячеек пирамид горизонтов."""
+        levels_min = np.stack([surface.pyramid.levels_min[0] for surface in self.surfaces])
+        levels_max = np.stack([surface.pyramid.levels_max[0] for surface in self.surfaces])
+        return MinMaxPyramid(np.fmin.reduce(levels_min, axis=0), np.fmax.reduce(levels_max, axis=0))
+
+    @cached_property
+    def content_hash(self) -> str:
+        """Хеш координат узлов, высот всех горизонтов и поворота."""
+        rotation = () if self.rotation is None else (self.rotation.parameters,)
+        return content_hash(self.x_coords, self.y_coords, self.heights, *rotation)
+
+    def corner_heights(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """
+        Возвращает высоты четырех углов ячеек с нижними левыми узлами (i, j) для всех горизонтов.
+
+        :param i: Индексы ячеек по оси X.
+        :param j: Индексы ячеек по оси Y.
+        :return: Массив формы (n_surfaces, ..., 4) со значениями [f11, f12, f21, f22].
+        """
+        i = np.asarray(i, dtype=np.intp)
+        j = np.asarray(j, dtype=np.intp)
+        return np.stack([
+            self.heights[:, i, j], self.heights[:, i, j + 1],
+            self.heights[:, i + 1, j], self.heights[:, i + 1, j + 1],
+        ], axis=-1)
@@ -0,0 +1,225 @@
+import numpy as np
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+from src.batch_engine import box_cell_bounds
+from src.surface import PreparedSurface
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def survey_tangents(inc: np.ndarray, azi: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет единичные касательные векторы ствола в координатах (восток, север, вниз).
+
+    :param inc: Зенитные углы в радианах (0 - вертикально вниз).
+    :param azi: Азимуты в радианах (0 - север, по часовой стрелке).
+    :return: Массив формы (N, 3).
+    """
+    return np.stack([np.sin(inc) * np.sin(azi), np.sin(inc) * np.cos(azi), np.cos(inc)], axis=-1)
+
+
+def dogleg_angles(t1: np.ndarray, t2: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет углы между касательными (dogleg) по устойчивой формуле 2 * arctan2(|t2 - t1|, |t2 + t1|).
+
+    :param t1: Касательные в начале интервалов, форма (N, 3).
+    :param t2: Касательные в конце интервалов, форма (N, 3).
+    :return: Углы в радианах, форма (N,).
+    """
+    return 2 * np.arctan2(np.linalg.norm(t2 - t1, axis=-1), np.linalg.norm(t2 + t1, axis=-1))
+
+
+def ratio_factor(dogleg: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет коэффициент минимальной кривизны 2 / dogleg * tan(dogleg / 2); 1 для прямых интервалов.
+
+    :param dogleg: Углы dogleg в радианах.
+    :return: Коэффициенты той же формы.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = 2 / dogleg * np.tan(dogleg / 2)
+    return np.where(dogleg < 1e-9, 1.0, factor)
+
+
+def arc_sagitta(length: np.ndarray, dogleg: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет наибольшее отклонение дуги окружности от ее хорды R * (1 - cos(dogleg / 2)), R = length / dogleg.
+
+    :param length: Длины дуг (приращения MD).
+    :param dogleg: Углы dogleg в радианах.
+    :return: Отклонения той же формы; 0 для прямых интервалов.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sagitta = length / dogleg * (1 - np.cos(dogleg / 2))
+    return np.where(dogleg < 1e-9, 0.0, sagitta)
+
+
+class Survey:
+    """
+    Инклинометрия скважины: измеренные глубины MD, зенитные углы и азимуты (в градусах) в точках замеров.
+
+    Траектория между точками замеров восстанавливается методом минимальной кривизны - дугой окружности
+    с постоянной кривизной. Координаты точек: x - восток, y - север, z = z0 - TVD (высота, как у поверхности).
+    """
+
+    def __init__(
+            self,
+            md: Sequence[float],
+            inc: Sequence[float],
+            azi: Sequence[float],
+            origin: Sequence[float] = (0.0, 0.0, 0.0)
+    ) -> None:
+        """
+        Создает инклинометрию и вычисляет координаты точек замеров.
+
+        :param md: Измеренные глубины, строго по возрастанию.
+        :param inc: Зенитные углы в градусах.
+        :param azi: Азимуты в градусах.
+        :param origin: Координаты (x, y, z) точки с первой измеренной глубиной.
+        :raises ValueError: Если длины массивов различаются, замеров нет или MD не возрастает.
+        """
+        self.md: np.ndarray = np.asarray(md, dtype=np.float64).ravel()
+        self.inc: np.ndarray = np.asarray(inc, dtype=np.float64).ravel()
+        self.azi: np.ndarray = np.asarray(azi, dtype=np.float64).ravel()
+        if not self.md.size == self.inc.size == self.azi.size:
+            raise ValueError("Длины массивов MD, зенитных углов и азимутов различаются")
+        if self.md.size == 0:
+            raise ValueError("Инклинометрия не содержит замеров")
+        if not np.all(np.isfinite(self.md) & np.isfinite(self.inc) & np.isfinite(self.azi)):
+            raise ValueError("Инклинометрия содержит NaN или бесконечные значения")
+        if np.any(np.diff(self.md) <= 0):
+            raise ValueError("Измеренные глубины должны строго возрастать")
+        self.origin: np.ndarray = np.asarray(origin, dtype=np.float64).reshape(3)
+
+        self.tangents: np.ndarray = survey_tangents(np.radians(self.inc), np.radians(self.azi))
+        self.doglegs: np.ndarray = dogleg_angles(self.tangents[:-1], self.tangents[1:])
+        steps = (np.diff(self.md) / 2 * ratio_factor(self.doglegs))[:, None] * (self.tangents[:-1] + self.tangents[1:])
+        offsets = np.zeros((self.md.size, 3))
+        np.cumsum(steps, axis=0, out=offsets[1:])
+        self.positions: np.ndarray = self._to_xyz(offsets)
+
+    def __len__(self) -> int:
+        return self.md.size
+
+    def _to_xyz(self, offsets: np.ndarray) -> np.ndarray:
+        """Переводит смещения (восток, север, TVD) от начальной точки в координаты (x, y, z)."""
+        return self.origin + offsets * np.array([1.0, 1.0, -1.0])
+
+    def interpolate(self, md: np.ndarray) -> np.ndarray:
+        """
+        Вычисляет координаты точек ствола на заданных глубинах по дугам минимальной кривизны.
+        Выше первого и ниже последнего замера траектория продолжается прямой по касательной.
+
+        :param md: Измеренные глубины.
+        :return: Массив координат формы (M, 3).
+        """
+        md = np.atleast_1d(np.asarray(md, dtype=np.float64))
+        flip = np.array([1.0, 1.0, -1.0])
+        result = np.empty((md.size, 3))
+        before, after = md < self.md[0], md > self.md[-1]
+        inside = ~before & ~after
+        result[before] = self.positions[0] + np.outer(md[before] - self.md[0], self.tangents[0] * flip)
+        result[after] = self.positions[-1] + np.outer(md[after] - self.md[-1], self.tangents[-1] * flip)
+        if self.md.size == 1:
+            result[inside] = self.positions[0]
+            return result
+
+        interval, fraction = self._locate(md[inside])
+        length = md[inside] - self.md[interval]
+        direction = self._tangents_at(interval, fraction)
+        step = (length / 2 * ratio_factor(fraction * self.doglegs[interval]))[:, None] \
+            * (self.tangents[interval] + direction)
+        result[inside] = self.positions[interval] + step * flip
+        return result
+
+    def sample(
+            self,
+            surface: Optional[PreparedSurface] = None,
+            tolerance: float = 0.1,
+            max_depth: int = 20
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Выбирает точки ствола так, чтобы хорды между ними отклонялись от дуг минимальной кривизны
+        не более чем на tolerance там, где траектория может пересечь поверхность.
+
+        Интервал между точками делится пополам, пока отклонение дуги от хорды больше tolerance и
+        (если задана поверхность) прямоугольник хорды, расширенный на это отклонение, пересекается
+        с оболочкой высот поверхности по пирамиде. Вдали от поверхности остаются только точки замеров,
+        поэтому число точек намного меньше, чем при равномерном сгущении.
+
+        :param surface: Поверхность; если не задана, сгущаются все изогнутые интервалы.
+        :param tolerance: Допустимое отклонение хорды от дуги, в единицах координат.
+        :param max_depth: Максимальное число делений интервала пополам.
+        :return: Кортеж (md, xyz): глубины по возрастанию и координаты точек формы (M, 3).
+        """
+        md = self.md
+        for _ in range(max_depth):
+            if md.size < 2:
+                break
+            refine = self._needs_refinement(md, surface, tolerance)
+            if not refine.any():
+                break
+            middle = (md[:-1][refine] + md[1:][refine]) / 2
+            md = np.sort(np.concatenate([md, middle]))
+        return md, self.interpolate(md)
+
+    def _needs_refinement(self, md: np.ndarray, surface: Optional[PreparedSurface], tolerance: float) -> np.ndarray:
+        """
+        Отмечает интервалы, хорды которых отклоняются от дуги больше tolerance вблизи поверхности.
+        Точки md - замеры и середины интервалов между ними, поэтому каждый интервал лежит на одной дуге.
+        """
+        xyz = self.interpolate(md)
+        tangents = self._tangents_at(*self._locate(md))
+        sagitta = arc_sagitta(np.diff(md), dogleg_angles(tangents[:-1], tangents[1:]))
+        refine = sagitta > tolerance
+        if surface is None or not refine.any():
+            return refine
+
+        candidates = np.flatnonzero(refine)
+        a, b = xyz[candidates], xyz[candidates + 1]
+        if surface.rotation is not None:
+            a, b = surface.rotation.to_local(a), surface.rotation.to_local(b)
+        low = np.minimum(a, b) - sagitta[candidates, None]
+        high = np.maximum(a, b) + sagitta[candidates, None]
+        x_coords, y_coords = surface.x_coords, surface.y_coords
+        inside = ((high[:, 0] >= x_coords[0]) & (low[:, 0] <= x_coords[-1])
+                  & (high[:, 1] >= y_coords[0]) & (low[:, 1] <= y_coords[-1]))
+        i0, i1, j0, j1 = box_cell_bounds(surface, low, high)
+        refine[candidates] = inside & surface.pyramid.overlaps(i0, i1, j0, j1, low[:, 2], high[:, 2])
+        return refine
+
+    def _locate(self, md: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Находит интервалы замеров, содержащие глубины md, и долю длины интервала до них."""
+        interval = np.clip(np.searchsorted(self.md, md, side="right") - 1, 0, self.md.size - 2)
+        fraction = np.clip((md - self.md[interval]) / (self.md[interval + 1] - self.md[interval]), 0.0, 1.0)
+        return interval, fraction
+
+    def _tangents_at(self, interval: np.ndarray, fraction: np.ndarray) -> np.ndarray:
+        """Касательные внутри интервалов замеров: сферическая интерполяция касательных концов интервала."""
+        dogleg = self.doglegs[interval]
+        straight = dogleg < 1e-9
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight1 = np.where(straight, 1 - fraction, np.sin((1 - fraction) * dogleg) / np.sin(dogleg))
+            weight2 = np.where(straight, fraction, np.sin(fraction * dogleg) / np.sin(dogleg))
+        direction = weight1[:, None] * self.tangents[interval] + weight2[:, None] * self.tangents[interval + 1]
+        return direction / np.linalg.norm(direction, axis=1)[:, None]
+
+
+def sample_surveys(
+        surveys: Sequence[Survey],
+        surface: Optional[PreparedSurface] = None,
+        tolerance: float = 0.1,
+        ids: Optional[Sequence[Hashable]] = None
+) -> Tuple[TrajectoryBatch, np.ndarray]:
+    """
+    Преобразует инклинометрии в набор траекторий с адаптивным выбором точек (Survey.sample).
+
+    :param surveys: Инклинометрии скважин.
+    :param surface: Поверхность, вблизи которой сгущаются точки.
+    :param tolerance: Допустимое отклонение хорды от дуги.
+    :param ids: Идентификаторы скважин.
+    :return: Кортеж (batch, md): набор траекторий и измеренные глубины всех его точек.
+    """
+    samples: List[Tuple[np.ndarray, np.ndarray]] = [survey.sample(surface, tolerance) for survey in surveys]
+    batch = TrajectoryBatch.from_lists([xyz for _, xyz in samples], ids)
+    md = np.concatenate([md for md, _ in samples]) if samples else np.empty(0)
+    return batch, md
@@ -0,0 +1,403 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.cell_coefficients import CellCoefficientCache
+from src.grid_axis import GridAxis
+from src.grid_rotation import GridRotation
+from src.pyramid import MinMaxPyramid, cell_corner_range, cell_plane_padding
+from src.validation import ArrayValidationError, validate_axis
+
+TILED_FORMAT_VERSION = 2
+
+
+class TiledHeights:
+    """
+    Высоты узлов сетки, хранящиеся блоками (тайлами) в отображаемом в память файле .npy
+    формы (n_tiles_x, n_tiles_y, tile_size + 1, tile_size + 1).
+
+    Тайл (ti, tj) содержит узлы [ti * tile_size, (ti + 1) * tile_size] x [tj * tile_size, (tj + 1) * tile_size]
+    включительно, то есть соседние тайлы перекрываются на один узел, и все четыре угла ячейки
+    лежат в одном тайле. Узлы за пределами сетки в крайних тайлах равны NaN.
+
+    Тайлы читаются из файла при первом обращении и хранятся в памяти не более max_tiles штук,
+    при переполнении вытесняются давно не использованные (LRU). Индексация поддерживает
+    срезы с шагом 1 и массивы индексов, как у массива NumPy формы (nx, ny).
+    """
+
+    def __init__(self, tiles: np.ndarray, shape: Tuple[int, int], tile_size: int, max_tiles: int = 256) -> None:
+        """
+        Создает доступ к тайлам.
+
+        :param tiles: Массив тайлов (обычно np.memmap).
+        :param shape: Число узлов сетки по осям X и Y.
+        :param tile_size: Число ячеек в тайле по каждой оси.
+        :param max_tiles: Максимальное число тайлов в памяти.
+        """
+        self.tiles = tiles
+        self.shape: Tuple[int, int] = (int(shape[0]), int(shape[1]))
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.ndim = 2
+        self.dtype = np.dtype(np.float64)
+        self._cache: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Объем тайлов в памяти, в байтах."""
+        return sum(tile.nbytes for tile in self._cache.values())
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def tile(self, ti: int, tj: int) -> np.ndarray:
+        """
+        Возвращает тайл, читая его из файла при промахе.
+
+        :param ti: Номер тайла по оси X.
+        :param tj: Номер тайла по оси Y.
+        :return: Массив высот формы (tile_size + 1, tile_size + 1).
+        """
+        key = (ti, tj)
+        tile = self._cache.get(key)
+        if tile is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return tile
+
+        self.misses += 1
+        start = time.perf_counter()
+        tile = np.array(self.tiles[ti, tj], dtype=np.float64)
+        self.load_seconds += time.perf_counter() - start
+        self._cache[key] = tile
+        if len(self._cache) > self.max_tiles:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def clear(self) -> None:
+        """Удаляет тайлы из памяти и обнуляет статистику."""
+        self._cache.clear()
+        self.hits = self.misses = self.evictions = 0
+        self.load_seconds = 0.0
+
+    def __getitem__(self, key) -> Union[np.ndarray, float]:
+        if not isinstance(key, tuple):
+            raise TypeError("TiledHeights индексируется парой (i, j)")
+        if key and key[0] is Ellipsis:
+            key = key[1:]
+        if len(key) != 2:
+            raise TypeError("TiledHeights индексируется парой (i, j)")
+        i, j = key
+        if isinstance(i, slice) and isinstance(j, slice):
+            return self._block(i, j)
+        if isinstance(i, slice) or isinstance(j, slice):
+            raise TypeError("TiledHeights индексируется парой срезов или парой массивов индексов")
+        return self._gather(np.asarray(i), np.asarray(j))
+
+    def _gather(self, i: np.ndarray, j: np.ndarray) -> Union[np.ndarray, float]:
+        """Собирает значения узлов (i, j), группируя их по тайлам."""
+        i, j = np.broadcast_arrays(i, j)
+        shape = i.shape
+        i, j = i.ravel().astype(np.int64), j.ravel().astype(np.int64)
+        if i.size and (i.min() < 0 or j.min() < 0 or i.max() >= self.shape[0] or j.max() >= self.shape[1]):
+            raise IndexError(f"Индексы узлов за пределами сетки {self.shape}")
+
+        size = self.tile_size
+        n_tiles_x, n_tiles_y = self.tiles.shape[:2]
+        ti = np.minimum(i // size, n_tiles_x - 1)
+        tj = np.minimum(j // size, n_tiles_y - 1)
+        keys = ti * n_tiles_y + tj
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        result = np.empty(i.size)
+        for group in np.split(order, bounds) if order.size else ():
+            tile_i, tile_j = int(ti[group[0]]), int(tj[group[0]])
+            result[group] = self.tile(tile_i, tile_j)[i[group] - tile_i * size, j[group] - tile_j * size]
+        result = result.reshape(shape)
+        return float(result) if result.ndim == 0 else result
+
+    def _block(self, rows: slice, columns: slice) -> np.ndarray:
+        """Собирает прямоугольный блок узлов из тайлов, которые его покрывают."""
+        (i0, i1, step_i), (j0, j1, step_j) = rows.indices(self.shape[0]), columns.indices(self.shape[1])
+        if step_i != 1 or step_j != 1:
+            raise TypeError("TiledHeights поддерживает только срезы с шагом 1")
+        result = np.empty((max(i1 - i0, 0), max(j1 - j0, 0)))
+        for a0, a1, ti in self._pieces(i0, i1, self.tiles.shape[0]):
+            for b0, b1, tj in self._pieces(j0, j1, self.tiles.shape[1]):
+                base_i, base_j = ti * self.tile_size, tj * self.tile_size
+                result[a0 - i0:a1 - i0, b0 - j0:b1 - j0] = self.tile(ti, tj)[a0 - base_i:a1 - base_i,
+                                                                              b0 - base_j:b1 - base_j]
+        return result
+
+    def _pieces(self, start: int, stop: int, n_tiles: int) -> Iterable[Tuple[int, int, int]]:
+        """Делит диапазон узлов [start, stop) на части, каждая из которых лежит в одном тайле (с перекрытием)."""
+        while start < stop:
+            tile = min(start // self.tile_size, n_tiles - 1)
+            end = min(stop, (tile + 1) * self.tile_size + 1)
+            yield start, end, tile
+            start = end
+
+    def memory_footprint(self) -> Dict[str, Union[int, float]]:
+        """
+        Возвращает статистику кэша тайлов.
+
+        :return: Словарь с числом тайлов в памяти и в файле, объемом в памяти, числом попаданий,
+                 промахов (чтений из файла), вытеснений, суммарным временем чтения и долей попаданий.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "tiles_cached": len(self._cache),
+            "tiles_total": int(self.tiles.shape[0] * self.tiles.shape[1]),
+            "max_tiles": self.max_tiles,
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "load_seconds": self.load_seconds,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TiledSurface:
+    """
+    Поверхность, высоты которой хранятся на диске тайлами (TiledHeights) и читаются только для ячеек,
+    через которые проходят отрезки траекторий. Подходит для сеток, не помещающихся в память.
+
+    Поверхность предоставляет тот же интерфейс, что и PreparedSurface, используемый TrajectoryProcessor:
+    координаты и оси узлов, heights, диапазон высот, пирамиду оболочек и кэш коэффициентов по ячейкам.
+    Пирамида хранит оболочки блоков block_size x block_size ячеек, вычисленные при записи файла,
+    поэтому открытие поверхности не читает высоты. Коэффициенты ячеек вычисляются по тайлам
+    (CellCoefficientCache в режиме "lazy" с тем же размером блока).
+
+    Файлы: path - тайлы высот (.npy), path + ".meta.npz" - координаты узлов, поворот сетки, оболочки блоков
+    и хеш содержимого.
+    """
+
+    def __init__(self, path: str, max_tiles: int = 256) -> None:
+        """
+        Открывает поверхность, записанную TiledSurface.create или convert_irap_to_tiles.
+
+        :param path: Путь к файлу тайлов.
+        :param max_tiles: Максимальное число тайлов высот (и блоков коэффициентов) в памяти.
+        :raises ValueError: Если версия формата файла не поддерживается.
+        """
+        with np.load(meta_path(path)) as meta:
+            if int(meta["version"]) != TILED_FORMAT_VERSION:
+                raise ValueError(f"Неподдерживаемая версия формата тайлов: {int(meta['version'])}")
+            self.x_coords: np.ndarray = meta["x_coords"]
+            self.y_coords: np.ndarray = meta["y_coords"]
+            self.tile_size = int(meta["tile_size"])
+            self.block_size = int(meta["block_size"])
+            self.z_min, self.z_max = (float(value) for value in meta["z_range"])
+            self.content_hash: str = str(meta["content_hash"])
+            self.rotation: Optional[GridRotation] = GridRotation.from_parameters(meta["rotation"])
+            block_min, block_max = meta["block_min"], meta["block_max"]
+        self.path = path
+        self.max_tiles = max_tiles
+        self.x_axis: GridAxis = GridAxis(self.x_coords)
+        self.y_axis: GridAxis = GridAxis(self.y_coords)
+        self.heights: TiledHeights = TiledHeights(
+            np.load(path, mmap_mode="r"), (self.x_coords.size, self.y_coords.size), self.tile_size, max_tiles)
+        self.pyramid: MinMaxPyramid = MinMaxPyramid(block_min, block_max, self.block_size)
+
+    @classmethod
+    def create(
+            cls,
+            path: str,
+            x_coords: Sequence[float],
+            y_coords: Sequence[float],
+            heights,
+            tile_size: int = 256,
+            block_size: int = 16,
+            max_tiles: int = 256,
+            rotation: Optional[GridRotation] = None
+    ) -> "TiledSurface":
+        """
+        Записывает поверхность в файл тайлов и открывает ее.
+
+        Высоты читаются полосами по tile_size + 1 столбцов (heights[:, j0:j1]), поэтому источником может
+        быть отображаемый в память массив (np.load(mmap_mode="r")), не помещающийся в память целиком.
+
+        :param path: Путь к файлу тайлов.
+        :param x_coords: Координаты узлов по оси X (по возрастанию).
+        :param y_coords: Координаты узлов по оси Y (по возрастанию).
+        :param heights: Высоты формы (len(x_coords), len(y_coords)) с поддержкой срезов; NaN для пустых узлов.
+        :param tile_size: Число ячеек в тайле по каждой оси, степень двойки.
+        :param block_size: Число ячеек в блоке пирамиды по каждой оси, степень двойки не больше tile_size.
+        :param max_tiles: Максимальное число тайлов в памяти открытой поверхности.
+        :param rotation: Поворот сетки; None - сетка не повернута.
+        :return: Открытая поверхность.
+        :raises ArrayValidationError: Если координаты или форма высот некорректны.
+        """
+        x_coords, y_coords = validate_axis("x_coords", x_coords), validate_axis("y_coords", y_coords)
+        if tuple(heights.shape) != (x_coords.size, y_coords.size):
+            raise ArrayValidationError(
+                f"Форма height_matrix {tuple(heights.shape)} не совпадает с ({x_coords.size}, {y_coords.size})")
+        step = tile_size
+        columns = ((j0, heights[:, j0:min(j0 + step + 1, y_coords.size)])
+                   for j0 in range(0, max(y_coords.size - 1, 1), step))
+        write_tiles(path, x_coords, y_coords, columns, tile_size, block_size, rotation)
+        return cls(path, max_tiles)
+
+    @classmethod
+    def from_shared_state(cls, arrays: Dict, attributes: Dict) -> "TiledSurface":
+        """
+        Открывает поверхность по shared_state в другом процессе (тот же интерфейс, что у PreparedSurface).
+
+        :param arrays: Пустой словарь, как в shared_state.
+        :param attributes: Путь к файлу тайлов и max_tiles, как в shared_state.
+        :return: Поверхность в файле тайлов.
+        """
+        return cls(attributes["path"], max_tiles=attributes["max_tiles"])
+
+    def shared_state(self) -> Tuple[Dict, Dict]:
+        """
+        Возвращает состояние для открытия поверхности в другом процессе (from_shared_state): высоты
+        не передаются через разделяемую память, процесс открывает тот же файл тайлов и держит в памяти
+        собственные max_tiles тайлов.
+
+        :return: Кортеж (arrays, attributes): пустой словарь массивов и словарь path и max_tiles.
+        """
+        return {}, {"path": os.path.abspath(self.path), "max_tiles": self.max_tiles}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Количество узлов сетки по осям X и Y."""
+        return self.heights.shape
+
+    @cached_property
+    def coefficients(self) -> CellCoefficientCache:
+        """Кэш коэффициентов плоскостей и билинейных патчей, вычисляемых по тайлам."""
+        return CellCoefficientCache(self, mode="lazy", bilinear=True, tile_size=self.tile_size,
+                                    max_tiles=self.max_tiles)
+
+    def height_at(self, i: int, j: int) -> Optional[float]:
+        """
+        Возвращает высоту узла сетки.
+
+        :param i: Индекс узла по оси X.
+        :param j: Индекс узла по оси Y.
+        :return: Высота узла или None, если узел пустой.
+        """
+        value = self.heights[i, j]
+        return None if np.isnan(value) else value
+
+    def corner_heights(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """
+        Возвращает высоты четырех углов ячеек с нижними левыми узлами (i, j).
+
+        :param i: Индексы ячеек по оси X.
+        :param j: Индексы ячеек по оси Y.
+        :return: Массив формы (..., 4) со значениями [f11, f12, f21, f22].
+        """
+        i = np.asarray(i, dtype=np.intp)
+        j = np.asarray(j, dtype=np.intp)
+        return np.stack([
+            self.heights[i, j], self.heights[i, j + 1],
+            self.heights[i + 1, j], self.heights[i + 1, j + 1],
+        ], axis=-1)
+
+    def memory_footprint(self) -> Dict[str, Union[int, float]]:
+        """Возвращает статистику кэша тайлов высот (TiledHeights.memory_footprint)."""
+        return self.heights.memory_footprint()
+
+
+def meta_path(path: str) -> str:
+    """Путь к файлу координат, оболочек блоков и хеша, сопровождающему файл тайлов."""
+    return path + ".meta.npz"
+
+
+def write_tiles(
+        path: str,
+        x_coords: np.ndarray,
+        y_coords: np.ndarray,
+        columns: Iterable[Tuple[int, np.ndarray]],
+        tile_size: int,
+        block_size: int,
+        rotation: Optional[GridRotation] = None
+) -> None:
+    """
+    Записывает файл тайлов и файл описания по полосам высот.
+
+    :param path: Путь к файлу тайлов.
+    :param x_coords: Координаты узлов по оси X.
+    :param y_coords: Координаты узлов по оси Y.
+    :param columns: Полосы (j0, band): band - высоты узлов [:, j0:j0 + tile_size + 1] (последняя полоса
+                    может быть уже), j0 кратно tile_size, полосы идут по возрастанию j0.
+    :param tile_size: Число ячеек в тайле по каждой оси, степень двойки.
+    :param block_size: Число ячеек в блоке пирамиды по каждой оси, степень двойки не больше tile_size.
+    :param rotation: Поворот сетки; None - сетка не повернута.
+    :raises ValueError: Если размеры тайла или блока некорректны.
+    """
+    for name, value in (("tile_size", tile_size), ("block_size", block_size)):
+        if value < 1 or value & (value - 1):
+            raise ValueError(f"{name} должен быть степенью двойки: {value}")
+    if block_size > tile_size:
+        raise ValueError(f"block_size {block_size} больше tile_size {tile_size}")
+
+    nx, ny = x_coords.size, y_coords.size
+    n_tiles_x, n_tiles_y = -(-max(nx - 1, 1) // tile_size), -(-max(ny - 1, 1) // tile_size)
+    blocks_per_tile = tile_size // block_size
+    block_min = np.full((n_tiles_x * blocks_per_tile, n_tiles_y * blocks_per_tile), np.nan)
+    block_max = np.full_like(block_min, np.nan)
+    z_min, z_max = np.inf, -np.inf
+    digest = hashlib.blake2b(f"{tile_size}".encode(), digest_size=16)
+    rotation_parameters = np.empty(0) if rotation is None else rotation.parameters
+    for axis in (x_coords, y_coords, rotation_parameters):
+        digest.update(memoryview(np.ascontiguousarray(axis)).cast("B"))
+
+    tiles = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.float64, shape=(n_tiles_x, n_tiles_y, tile_size + 1, tile_size + 1))
+    for j0, band in columns:
+        tj = j0 // tile_size
+        band = np.asarray(band, dtype=np.float64)
+        if np.isinf(band).any():
+            raise ArrayValidationError("height_matrix содержит бесконечные значения")
+        if not np.isnan(band).all():
+            z_min, z_max = min(z_min, float(np.nanmin(band))), max(z_max, float(np.nanmax(band)))
+        for ti in range(n_tiles_x):
+            tile = np.full((tile_size + 1, tile_size + 1), np.nan)
+            part = band[ti * tile_size:(ti + 1) * tile_size + 1]
+            tile[:part.shape[0], :part.shape[1]] = part
+            tiles[ti, tj] = tile
+            digest.update(memoryview(tile).cast("B"))
+
+            cell_min, cell_max = _tile_cell_envelope(tile)
+            shape = (blocks_per_tile, block_size, blocks_per_tile, block_size)
+            rows = slice(ti * blocks_per_tile, (ti + 1) * blocks_per_tile)
+            cols = slice(tj * blocks_per_tile, (tj + 1) * blocks_per_tile)
+            with np.errstate(invalid="ignore"):
+                block_min[rows, cols] = np.fmin.reduce(np.fmin.reduce(cell_min.reshape(shape), axis=3), axis=1)
+                block_max[rows, cols] = np.fmax.reduce(np.fmax.reduce(cell_max.reshape(shape), axis=3), axis=1)
+    tiles.flush()
+    del tiles
+
+    blocks_x, blocks_y = -(-max(nx - 1, 1) // block_size), -(-max(ny - 1, 1) // block_size)
+    temporary = f"{meta_path(path)}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as meta_file:
+        np.savez(meta_file, version=TILED_FORMAT_VERSION, x_coords=x_coords, y_coords=y_coords,
+                 tile_size=tile_size, block_size=block_size, z_range=np.array([z_min, z_max]),
+                 content_hash=digest.hexdigest(), rotation=rotation_parameters,
+                 block_min=block_min[:blocks_x, :blocks_y], block_max=block_max[:blocks_x, :blocks_y])
+    os.replace(temporary, meta_path(path))
+
+
+def _tile_cell_envelope(tile: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Оболочки ячеек тайла по высотам углов, расширенные как в MinMaxPyramid.from_surface."""
+    cell_min, cell_max = cell_corner_range(tile)
+    padding = cell_plane_padding(tile)
+    return cell_min - padding, cell_max + padding
@@ -1,13 +1,40 @@
+import copy
+import warnings
+import numpy as np
 from pydantic import ValidationError
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Hashable, Optional, Sequence, Tuple, Union
+from src.batch_engine import (
+    bracket_segments,
+    cull_segments,
+    endpoint_candidate_mask,
+    find_candidate_segments,
+    reachable_cells
+)
 from src.grid_math import (
     bilinear_interpolation_4terms,
     binary_search_nearest,
-    bresenham_grid_with_corners,
-    is_point_in_rectangle
+    traverse_grid_cells_batch
+)
+from src.intersection_result import IntersectionResult
+from src.model import GridModel, TrajectoriesModel, TrajectoryListModel
+from src.numba_kernels import MODE_BILINEAR, MODE_PLANE, NUMBA_AVAILABLE, fused_segment_hits
+from src.proximity import ProximityResult, find_closest_approach
+from src.result_cache import ResultCache, content_hash
+from src.segment_index import SegmentIndex
+from src.spatial_geometry import line_bilinear_intersection_parameters, line_plane_intersection_parameters
+from src.stats import NULL_STATS, ProcessorStats
+from src.survey import Survey, sample_surveys
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.tiled_surface import TiledSurface
+from src.trajectory_arrays import (
+    TrajectoryBatch,
+    pack_trajectories,
+    point_trajectory_index,
+    segment_starts,
+    trajectory_z_ranges
 )
-from src.model import GridModel, TrajectoriesModel
-from src.spatial_geometry import best_fit_plane, line_plane_intersection, line_from_two_points
+from src.validation import ArrayValidationError, validate_trajectory_arrays
 
 
 class TrajectoryProcessor:
@@ -15,62 +42,496 @@ class TrajectoryProcessor:
     Класс для обработки траекторий и нахождения их пересечений с поверхностью.
     """
 
-    def __init__(self) -> None:
-        """Инициализация TrajectoryProcessor."""
-        pass
+    def __init__(
+            self,
+            surface: Optional[Union[PreparedSurface, SurfaceStack, TiledSurface]] = None,
+            surface_mode: str = "plane",
+            stats: Optional[ProcessorStats] = None,
+            backend: str = "numpy",
+            candidate_flag: int = 1,
+            cache: Optional[ResultCache] = None
+    ) -> None:
+        """
+        Инициализация TrajectoryProcessor.
 
-    def calculate_intersections(self, data: Dict) -> Optional[List[Optional[List[Tuple[float, float, float]]]]]:
+        :param surface: Подготовленная поверхность, набор горизонтов SurfaceStack или поверхность в файле
+                        тайлов TiledSurface. Если задана, во входных данных calculate_intersections
+                        достаточно передать только траектории.
+        :param surface_mode: Модель поверхности внутри ячейки при поиске пересечений:
+                             "plane" - плоскость наименьших квадратов по четырем углам,
+                             "bilinear" - билинейный патч, как в bilinear_interpolation_4terms.
+        :param stats: Статистика этапов и счетчиков ProcessorStats; по умолчанию отключена (NULL_STATS).
+        :param backend: Реализация обхода ячеек и пересечения с ними: "numpy" - векторные операции NumPy,
+                        "numba" - скомпилированное ядро fused_segment_hits. Если numba не установлена,
+                        выдается предупреждение и используется "numpy"; для TiledSurface, высоты
+                        которой не загружены в память целиком, всегда используется "numpy".
+        :param candidate_flag: Метод отбора отрезков-кандидатов, как в find_candidate_segments:
+                               0 и 1 - по высотам поверхности в концах отрезка, 2 - по оболочке высот
+                               вдоль всего отрезка (находит и двойные пересечения между точками замеров).
+        :param cache: Кэш результатов ResultCache; если задан, intersect_batch и calculate_intersections
+                      не пересчитывают неизмененные траектории и отрезки.
+        :raises ValueError: Если режим поверхности, реализация или метод отбора неизвестны.
+        """
+        if surface_mode not in ("plane", "bilinear"):
+            raise ValueError(f"Неизвестный режим поверхности: {surface_mode}")
+        if backend not in ("numpy", "numba"):
+            raise ValueError(f"Неизвестная реализация: {backend}")
+        if candidate_flag not in (0, 1, 2):
+            raise ValueError(f"Неизвестный метод отбора кандидатов: {candidate_flag}")
+        if backend == "numba" and not NUMBA_AVAILABLE:
+            warnings.warn("numba не установлена, используется реализация numpy", RuntimeWarning, stacklevel=2)
+            backend = "numpy"
+        self.surface = surface
+        self.surface_mode = surface_mode
+        self.stats = stats if stats is not None else NULL_STATS
+        self.backend = backend
+        self.candidate_flag = candidate_flag
+        self.cache = cache
+
+    def calculate_intersections(
+            self,
+            data: Dict,
+            trusted: bool = False
+    ) -> Optional[List[Optional[List[Tuple[float, float, float]]]]]:
         """
         Вычисляет пересечения траекторий с поверхностью.
 
-        :param data: Входные данные, соответствующие модели TrajectoriesModel.
+        Сетка и траектории в виде массивов NumPy проверяются векторно (validate_grid_arrays,
+        validate_trajectory_arrays) без копирования; списки Python, как и раньше, проверяются pydantic.
+
+        :param data: Входные данные, соответствующие модели TrajectoriesModel. Если процессор создан
+                     с подготовленной поверхностью, ключ "grid" можно не передавать. Сетка может быть
+                     задана массивами NumPy, траектории - списком массивов формы (n, 3). Поверхность
+                     по сетке из data строится только для этого вызова: поверхность процессора
+                     (и префикс ключей кэша результатов) не меняется.
+        :param trusted: Не проверять массивы NumPy (данные уже проверены вызывающим кодом).
         :return: Список пересечений для каждой траектории или None при ошибке валидации.
         """
         try:
-            self.data = TrajectoriesModel(**data)
-            result, max_grid_z, min_grid_z = self.check_boundary_values()
-
-            for i in range(len(result)):
-                if result[i] is not None:
-                    potential_intersection_points_neighbors = self.find_potential_intersection_points_neighbors(
-                        self.data.trajectories[i], max_grid_z, min_grid_z, 1)
-                    result[i] = self.find_line_plane_intersection(potential_intersection_points_neighbors)
-            result = [item if item is not None else [] for item in data]
-            return result
+            with self.stats.stage("validation"):
+                surface, points, offsets = self._prepare_input(data, trusted)
+            processor = self
+            if surface is not self.surface:
+                processor = copy.copy(self)
+                processor.surface = surface
+            return processor.intersect_batch(TrajectoryBatch(points, offsets), trusted=True).to_lists()
         except ValidationError as e:
             print("❌ Ошибка валидации данных:")
             print(e.json())
             return None
+        except ArrayValidationError as e:
+            print("❌ Ошибка валидации данных:")
+            print(e)
+            return None
 
-    def check_boundary_values(self) -> Tuple[List[Optional[List[Tuple[float, float, float]]]], float, float]:
+    def _prepare_input(
+            self, data: Dict, trusted: bool
+    ) -> Tuple[Optional[Union[PreparedSurface, SurfaceStack, TiledSurface]], np.ndarray, np.ndarray]:
         """
-        Проверяет граничные значения высот траекторий относительно сетки.
+        Проверяет входные данные, при необходимости подготавливает поверхность по сетке из data
+        и упаковывает траектории.
 
-        :return: Кортеж, содержащий:
-                 - Список результатов: None, если траектория выходит за границы, [] если находится в пределах.
-                 - Максимальное значение высоты в сетке.
-                 - Минимальное значение высоты в сетке.
+        :return: Кортеж (surface, points, offsets): поверхность для этого вызова (self.surface, если сетка
+                 не передана) и массивы, как в pack_trajectories.
         """
-        result: List[Optional[List[Tuple[float, float, float]]]] = []
+        grid = data.get("grid")
+        trajectories = data.get("trajectories")
+        numpy_grid = isinstance(grid, dict) and isinstance(grid.get("height_matrix"), np.ndarray)
+        numpy_trajectories = isinstance(trajectories, np.ndarray) or (
+            isinstance(trajectories, (list, tuple)) and len(trajectories) > 0
+            and all(isinstance(trajectory, np.ndarray) for trajectory in trajectories)
+        )
 
-        for trajectory in self.data.trajectories:
-            max_trajectory_z: float = max(point[2] for point in trajectory)
-            min_trajectory_z: float = min(point[2] for point in trajectory)
+        surface = self.surface
+        if numpy_grid:
+            surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"], trusted=trusted)
+        if numpy_trajectories or isinstance(trajectories, TrajectoryBatch):
+            if not numpy_grid and (grid is not None or surface is None):
+                surface = PreparedSurface.from_grid(GridModel.model_validate(grid))
+            if isinstance(trajectories, TrajectoryBatch):
+                points, offsets = trajectories.points, trajectories.offsets
+            else:
+                points, offsets = pack_trajectories(trajectories)
+            if not trusted:
+                points, offsets = validate_trajectory_arrays(points, offsets)
+            self.data = TrajectoryListModel.model_construct(trajectories=trajectories)
+            return surface, points, offsets
 
-            max_grid_z: float = float('-inf')
-            min_grid_z: float = float('inf')
+        if numpy_grid or (grid is None and surface is not None):
+            self.data = TrajectoryListModel(trajectories=trajectories)
+        else:
+            self.data = TrajectoriesModel(**data)
+            surface = PreparedSurface.from_grid(self.data.grid)
+        return (surface, *pack_trajectories(self.data.trajectories))
 
-            for row in self.data.grid.height_matrix:
-                for value in row:
-                    if value is not None:
-                        max_grid_z = max(max_grid_z, value)
-                        min_grid_z = min(min_grid_z, value)
+    def intersect_batch(
+            self,
+            batch: TrajectoryBatch,
+            trusted: bool = False,
+            segment_index: Optional[SegmentIndex] = None
+    ) -> IntersectionResult:
+        """
+        Вычисляет пересечения набора траекторий с подготовленной поверхностью процессора
+        без преобразования в списки Python.
+
+        :param batch: Набор траекторий TrajectoryBatch.
+        :param trusted: Не проверять массивы набора (validate_trajectory_arrays).
+        :param segment_index: Индекс отрезков, построенный по этому же набору; если задан, поиск кандидатов
+                              выполняется только для отрезков, пересекающих область и диапазон высот поверхности.
+                              С кэшем результатов индекс не используется.
+        Для повернутой сетки (surface.rotation) точки траекторий одним аффинным преобразованием
+        переводятся в систему координат сетки, а координаты пересечений - обратно в мировые;
+        параметр t и номера отрезков и ячеек при этом не меняются.
+
+        :return: Пересечения в виде столбцов IntersectionResult; для набора поверхностей SurfaceStack -
+                 со столбцом horizon (см. _stack_batch).
+        :raises ValueError: Если поверхность не задана или индекс построен по другому набору траекторий
+                            (SegmentIndex.matches).
+        :raises ArrayValidationError: Если массивы набора не прошли проверку.
+        """
+        if self.surface is None:
+            raise ValueError("Для intersect_batch процессор должен быть создан с подготовленной поверхностью")
+        stats = self.stats
+        points, offsets = batch.points, batch.offsets
+        if not trusted:
+            with stats.stage("validation"):
+                points, offsets = validate_trajectory_arrays(points, offsets)
+        if stats.enabled:
+            stats.count("calls")
+            stats.count("points", points.shape[0])
+            stats.count("segments", points.shape[0] - np.count_nonzero(offsets[1:] > offsets[:-1]))
+
+        if segment_index is not None and not segment_index.matches(points, offsets):
+            raise ValueError("Индекс отрезков построен по другому набору траекторий")
+        rotation = self.surface.rotation
+        if rotation is not None:
+            with stats.stage("rotation"):
+                points = rotation.to_local(points)
+
+        if isinstance(self.surface, SurfaceStack):
+            result = self._stack_batch(points, offsets, batch.ids, segment_index)
+        elif self.cache is not None:
+            result = self._cached_batch(points, offsets, batch.ids)
+        else:
+            result = self._compute_batch(points, offsets, batch.ids, segment_index)
+        if rotation is not None:
+            result.xyz = rotation.to_world(result.xyz)
+        return result
 
-            if max_trajectory_z > max_grid_z or min_trajectory_z < min_grid_z:
-                result.append([])
+    def _compute_batch(
+            self,
+            points: np.ndarray,
+            offsets: np.ndarray,
+            ids: Optional[Sequence[Hashable]] = None,
+            segment_index: Optional[SegmentIndex] = None
+    ) -> IntersectionResult:
+        """Вычисляет пересечения проверенных массивов траекторий (этапы intersect_batch после проверки)."""
+        stats = self.stats
+        trajectory_count = len(offsets) - 1
+        with stats.stage("boundary"):
+            result, max_grid_z, min_grid_z = self.check_boundary_values((points, offsets))
+        with stats.stage("candidates"):
+            starts = segment_index.query_surface(self.surface).starts if segment_index is not None else None
+            candidates = self.find_potential_intersection_segments(
+                points, offsets, max_grid_z, min_grid_z, self.candidate_flag, starts)
+        stats.count("candidate_segments", candidates.size)
+        with stats.stage("cull"):
+            culled = cull_segments(self.surface, points, candidates)
+            inside = np.fromiter((item is not None for item in result), dtype=bool, count=len(result))
+            culled = culled[inside[point_trajectory_index(offsets, culled)]]
+        stats.count("segments_culled", candidates.size - culled.size)
+        candidates = culled
+        if candidates.size == 0:
+            return IntersectionResult.empty(trajectory_count, ids)
+
+        segment, cell_i, cell_j, t, xyz = self._segment_hits(points[candidates], points[candidates + 1])
+        start_index = candidates[segment]
+        trajectory = point_trajectory_index(offsets, start_index)
+        return IntersectionResult(
+            trajectory, start_index - offsets[trajectory], cell_i, cell_j, t, xyz, trajectory_count, ids)
+
+    def _stack_batch(
+            self,
+            points: np.ndarray,
+            offsets: np.ndarray,
+            ids: Optional[Sequence[Hashable]] = None,
+            segment_index: Optional[SegmentIndex] = None
+    ) -> IntersectionResult:
+        """
+        Вычисляет пересечения проверенных массивов траекторий со всеми горизонтами набора SurfaceStack.
+
+        Отрезки, не достигающие ни одного горизонта, сначала отсеиваются по пирамиде набора; для остальных
+        ячейки концов находятся один раз для всех горизонтов (endpoint_candidate_mask), и каждый
+        отрезок-кандидат обходится по ячейкам один раз. Участки отрезков в ячейках затем отсеиваются по пирамиде и
+        пересекаются с каждым горизонтом, для которого отрезок отобран кандидатом, поэтому результат
+        совпадает с отдельными расчетами по каждому горизонту. Пересечения упорядочены вдоль траекторий
+        (по измеренной глубине), совпадающие точки - по номеру горизонта. Кэш результатов и реализация
+        "numba" для набора поверхностей не используются.
+        """
+        stack: SurfaceStack = self.surface
+        stats = self.stats
+        trajectory_count = len(offsets) - 1
+        with stats.stage("boundary"):
+            min_trajectory_z, max_trajectory_z = trajectory_z_ranges(points, offsets)
+            inside = ~((min_trajectory_z > stack.surface_z_max[:, None])
+                       | (max_trajectory_z < stack.surface_z_min[:, None]))
+        with stats.stage("candidates"):
+            starts = segment_index.query_surface(stack).starts if segment_index is not None else None
+            starts = segment_starts(offsets) if starts is None else np.asarray(starts, dtype=np.int64)
+            starts = cull_segments(stack, points, starts)
+            if self.candidate_flag == 2:
+                starts = bracket_segments(stack, points, starts)
+                mask = np.ones((len(stack), starts.size), dtype=bool)
             else:
-                result.append(None)
+                starts, mask = endpoint_candidate_mask(
+                    stack, points, offsets, stack.surface_z_max[:, None], stack.surface_z_min[:, None],
+                    self.candidate_flag, starts)
+            candidates = mask.any(axis=0)
+            starts, mask = starts[candidates], mask[:, candidates]
+        stats.count("candidate_segments", starts.size)
+        with stats.stage("cull"):
+            mask &= inside[:, point_trajectory_index(offsets, starts)]
+            culled = mask.any(axis=0)
+            starts, mask = starts[culled], mask[:, culled]
+        stats.count("segments_culled", culled.size - starts.size)
+
+        start, end = points[starts], points[starts + 1]
+        with stats.stage("traversal"):
+            segment, cell_i, cell_j, t_enter, t_exit, z_low, z_high, last_piece = self._traverse_cells(start, end)
+        stats.count("cells_traversed", segment.size)
+        solve = self._solve_bilinear if self.surface_mode == "bilinear" else self._solve_plane
+        hits = [(np.empty(0, dtype=np.int64),) * 4 + (np.empty(0),)]
+        for number, surface in enumerate(stack.surfaces):
+            with stats.stage("traversal"):
+                pieces = np.flatnonzero(mask[number, segment])
+                pieces = pieces[reachable_cells(surface, cell_i[pieces], cell_j[pieces], z_low[pieces], z_high[pieces])]
+            stats.count("cells_culled", segment.size - pieces.size)
+            stats.count("plane_fits", pieces.size)
+            if pieces.size:
+                found = solve(surface, start, end, segment[pieces], cell_i[pieces], cell_j[pieces],
+                              t_enter[pieces], t_exit[pieces], last_piece[pieces])
+                hits.append((np.full(found[0].size, number, dtype=np.int64),) + found)
+
+        horizon, hit_segment, hit_i, hit_j, t = (np.concatenate(column) for column in zip(*hits))
+        order = np.lexsort((horizon, t, hit_segment))
+        horizon, hit_segment, hit_i, hit_j, t = (column[order] for column in (horizon, hit_segment, hit_i, hit_j, t))
+        line_point = start[hit_segment]
+        xyz = line_point + t[:, None] * (end[hit_segment] - line_point)
+        stats.count("accepted_intersections", t.size)
+
+        start_index = starts[hit_segment]
+        trajectory = point_trajectory_index(offsets, start_index)
+        return IntersectionResult(trajectory, start_index - offsets[trajectory], hit_i, hit_j, t, xyz,
+                                  trajectory_count, ids, horizon=horizon, horizon_names=stack.names)
+
+    def _cached_batch(
+            self, points: np.ndarray, offsets: np.ndarray, ids: Optional[Sequence[Hashable]] = None
+    ) -> IntersectionResult:
+        """
+        Вычисляет пересечения с кэшем результатов.
+
+        Пересечения отрезка зависят только от его концов, поэтому кэшируются и траектории целиком
+        (ключ - хеш всех точек, запись сохраняется и на диск), и отдельные отрезки (ключ - байты
+        двух точек, только в памяти). Для измененной траектории пересчитываются лишь отрезки,
+        которых нет в кэше.
+        """
+        cache = self.cache
+        prefix = f"{self.surface.content_hash}:{self.surface_mode}:{self.candidate_flag}"
+        trajectory_count = len(offsets) - 1
+        rows: List[Optional[Dict[str, np.ndarray]]] = [None] * trajectory_count
+        missing: List[Tuple[int, str]] = []
+        for k in range(trajectory_count):
+            key = content_hash(points[offsets[k]:offsets[k + 1]], prefix=f"{prefix}:trajectory".encode())
+            rows[k] = cache.get(key)
+            if rows[k] is None:
+                missing.append((k, key))
+        if missing and cache.segment_entries:
+            self._fill_from_segments(points, offsets, missing, rows, f"{prefix}:segment")
+        elif missing:
+            self._fill_from_trajectories(points, offsets, missing, rows)
+
+        columns = self._concatenate_rows(rows, ("segment", "cell_i", "cell_j", "t", "xyz"))
+        trajectory = np.repeat(np.arange(trajectory_count, dtype=np.int64), [row["t"].size for row in rows])
+        return IntersectionResult(trajectory, columns["segment"], columns["cell_i"], columns["cell_j"],
+                                  columns["t"], columns["xyz"], trajectory_count, ids)
+
+    def _fill_from_trajectories(
+            self,
+            points: np.ndarray,
+            offsets: np.ndarray,
+            missing: List[Tuple[int, str]],
+            rows: List[Optional[Dict[str, np.ndarray]]]
+    ) -> None:
+        """Вычисляет траектории, отсутствующие в кэше, одним вызовом и сохраняет их записи."""
+        parts = [points[offsets[k]:offsets[k + 1]] for k, _ in missing]
+        lengths = np.array([part.shape[0] for part in parts], dtype=np.int64)
+        computed = self._compute_batch(np.concatenate(parts), np.concatenate([[0], np.cumsum(lengths)]))
+        bounds = computed.bounds()
+        for n, (k, key) in enumerate(missing):
+            selected = slice(bounds[n], bounds[n + 1])
+            rows[k] = {"segment": computed.segment[selected], "cell_i": computed.cell_i[selected],
+                       "cell_j": computed.cell_j[selected], "t": computed.t[selected], "xyz": computed.xyz[selected]}
+            self.cache.put(key, rows[k])
+
+    def _fill_from_segments(
+            self,
+            points: np.ndarray,
+            offsets: np.ndarray,
+            missing: List[Tuple[int, str]],
+            rows: List[Optional[Dict[str, np.ndarray]]],
+            prefix: str
+    ) -> None:
+        """Собирает записи траекторий, отсутствующих в кэше, из записей отрезков, вычисляя недостающие."""
+        cache = self.cache
+        trajectories = np.array([k for k, _ in missing], dtype=np.int64)
+        lengths = np.maximum(offsets[trajectories + 1] - offsets[trajectories] - 1, 0)
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        starts = np.repeat(offsets[trajectories], lengths) + np.arange(bounds[-1]) - np.repeat(bounds[:-1], lengths)
+
+        raw = np.ascontiguousarray(np.stack([points[starts], points[starts + 1]], axis=1)).tobytes()
+        size = 2 * 3 * 8
+        prefix_bytes = prefix.encode()
+        keys = [prefix_bytes + raw[n * size:(n + 1) * size] for n in range(starts.size)]
+        values = cache.get_many(keys)
+
+        to_compute: Dict[bytes, int] = {}
+        for n, value in enumerate(values):
+            if value is None:
+                to_compute.setdefault(keys[n], n)
+        if to_compute:
+            selected = np.fromiter(to_compute.values(), dtype=np.int64, count=len(to_compute))
+            pairs = np.stack([points[starts[selected]], points[starts[selected] + 1]], axis=1).reshape(-1, 3)
+            computed = self._compute_batch(pairs, 2 * np.arange(selected.size + 1, dtype=np.int64))
+            hit_bounds = computed.bounds()
+            computed_values = {}
+            no_hits = self._concatenate_rows([], ("cell_i", "cell_j", "t", "xyz"))
+            for n, key in enumerate(to_compute):
+                if hit_bounds[n] == hit_bounds[n + 1]:
+                    computed_values[key] = no_hits
+                else:
+                    rows_slice = slice(hit_bounds[n], hit_bounds[n + 1])
+                    computed_values[key] = {
+                        "cell_i": computed.cell_i[rows_slice], "cell_j": computed.cell_j[rows_slice],
+                        "t": computed.t[rows_slice], "xyz": computed.xyz[rows_slice]}
+            cache.put_many(computed_values.items())
+            values = [computed_values[keys[n]] if value is None else value for n, value in enumerate(values)]
+
+        for number, (k, key) in enumerate(missing):
+            parts = values[bounds[number]:bounds[number + 1]]
+            hit_counts = [part["t"].size for part in parts]
+            value = self._concatenate_rows([part for part in parts if part["t"].size], ("cell_i", "cell_j", "t", "xyz"))
+            value["segment"] = np.repeat(np.arange(len(parts), dtype=np.int64), hit_counts)
+            rows[k] = value
+            cache.put(key, value)
+
+    @staticmethod
+    def _concatenate_rows(parts: List[Dict[str, np.ndarray]], names: Tuple[str, ...]) -> Dict[str, np.ndarray]:
+        """Объединяет столбцы записей кэша; пустой список дает пустые столбцы."""
+        empty = {"segment": np.empty(0, dtype=np.int64), "cell_i": np.empty(0, dtype=np.int64),
+                 "cell_j": np.empty(0, dtype=np.int64), "t": np.empty(0), "xyz": np.empty((0, 3))}
+        return {name: np.concatenate([part[name] for part in parts] + [empty[name]]) for name in names}
+
+    def intersect_surveys(
+            self,
+            surveys: Sequence[Survey],
+            tolerance: float = 0.1,
+            ids: Optional[Sequence[Hashable]] = None
+    ) -> IntersectionResult:
+        """
+        Вычисляет пересечения скважин, заданных инклинометрией (MD, зенитный угол, азимут), с поверхностью.
+
+        Траектории строятся методом минимальной кривизны; точки выбираются адаптивно (Survey.sample):
+        интервалы сгущаются только вблизи поверхности, пока хорда отклоняется от дуги больше tolerance.
+        Измеренная глубина пересечения интерполируется по параметру t на хорде. Интервалы между замерами
+        длинные, поэтому с ними лучше использовать candidate_flag = 2, который находит и двойные пересечения.
+
+        :param surveys: Инклинометрии скважин.
+        :param tolerance: Допустимое отклонение хорды от дуги минимальной кривизны.
+        :param ids: Идентификаторы скважин.
+        :return: Пересечения IntersectionResult со столбцом md.
+        """
+        if self.surface is None:
+            raise ValueError("Для intersect_surveys процессор должен быть создан с подготовленной поверхностью")
+        batch, md = sample_surveys(surveys, self.surface, tolerance, ids)
+        result = self.intersect_batch(batch, trusted=True)
+        start = batch.offsets[result.trajectory] + result.segment
+        result.md = md[start] + result.t * (md[start + 1] - md[start])
+        return result
+
+    def closest_approach(
+            self,
+            batch: TrajectoryBatch,
+            trusted: bool = False,
+            true_distance: bool = True
+    ) -> ProximityResult:
+        """
+        Находит для каждой траектории, в том числе не пересекающей поверхность, точку наибольшего
+        сближения с поверхностью: наименьшее вертикальное расстояние и наименьшее расстояние
+        в пространстве, ближайшие точки и ячейки (find_closest_approach). Ячейки отсеиваются
+        по пирамиде оболочек высот, поэтому длинные горизонтальные участки вдоль горизонта
+        не требуют перебора всех ячеек под ними. Модель поверхности внутри ячейки - surface_mode процессора.
+
+        :param batch: Набор траекторий TrajectoryBatch.
+        :param trusted: Не проверять массивы набора (validate_trajectory_arrays).
+        :param true_distance: Искать также наименьшее расстояние в пространстве.
+        :return: Сближения ProximityResult, по одной строке на траекторию; координаты - в мировой системе.
+        :raises ValueError: Если поверхность не задана или задан набор горизонтов SurfaceStack.
+        :raises ArrayValidationError: Если массивы набора не прошли проверку.
+        """
+        if self.surface is None:
+            raise ValueError("Для closest_approach процессор должен быть создан с подготовленной поверхностью")
+        if isinstance(self.surface, SurfaceStack):
+            raise ValueError("closest_approach не поддерживает набор горизонтов SurfaceStack")
+        points, offsets = batch.points, batch.offsets
+        if not trusted:
+            with self.stats.stage("validation"):
+                points, offsets = validate_trajectory_arrays(points, offsets)
+        rotation = self.surface.rotation
+        if rotation is not None:
+            points = rotation.to_local(points)
+        with self.stats.stage("proximity"):
+            result = find_closest_approach(
+                self.surface, points, offsets, self.surface_mode, true_distance, batch.ids, self.stats)
+        if rotation is not None:
+            result.xyz = rotation.to_world(result.xyz)
+            result.true_xyz = rotation.to_world(result.true_xyz)
+            result.true_surface_xyz = rotation.to_world(result.true_surface_xyz)
+        return result
+
+    def check_boundary_values(
+            self,
+            packed: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Tuple[List[Optional[List[Tuple[float, float, float]]]], float, float]:
+        """
+        Проверяет граничные значения высот траекторий относительно сетки.
+
+        Диапазон высот сетки вычисляется один раз при подготовке поверхности, а диапазоны
+        высот всех траекторий - одной векторной операцией, поэтому время работы линейно
+        по суммарному числу точек траекторий и не зависит от размера сетки. Расстояние до поверхности
+        у траекторий, не пересекающих ее, находит closest_approach.
 
+        :param packed: Траектории, уже упакованные pack_trajectories; если не заданы, упаковываются self.data.trajectories.
+        :return: Кортеж, содержащий:
+                 - Список результатов: None, если траектория целиком лежит выше или ниже сетки
+                   (или пустая), [] если ее диапазон высот пересекается с диапазоном сетки.
+                 - Максимальное значение высоты в сетке.
+                 - Минимальное значение высоты в сетке.
+        """
+        max_grid_z: float = self.surface.z_max
+        min_grid_z: float = self.surface.z_min
+
+        if packed is not None:
+            points, offsets = packed
+        elif isinstance(self.data.trajectories, TrajectoryBatch):
+            points, offsets = self.data.trajectories.points, self.data.trajectories.offsets
+        else:
+            points, offsets = pack_trajectories(self.data.trajectories)
+        min_trajectory_z, max_trajectory_z = trajectory_z_ranges(points, offsets)
+        outside = (min_trajectory_z > max_grid_z) | (max_trajectory_z < min_grid_z)
+
+        result: List[Optional[List[Tuple[float, float, float]]]] = [
+            None if is_outside else [] for is_outside in outside.tolist()
+        ]
         return result, max_grid_z, min_grid_z
 
     def find_potential_intersection_points_neighbors(
@@ -97,12 +558,12 @@ class TrajectoryProcessor:
         z_neighbors_xy: List[List[Optional[float]]] = []
 
         for t in trajectory:
-            neighbors_x = binary_search_nearest(self.data.grid.x_coords, t[0])
-            neighbors_y = binary_search_nearest(self.data.grid.y_coords, t[1])
+            neighbors_x = binary_search_nearest(self.surface.x_axis, t[0])
+            neighbors_y = binary_search_nearest(self.surface.y_axis, t[1])
 
             if all(idx is not None for idx in neighbors_x["index"] + neighbors_y["index"]):
                 z_neighbors_xy.append([
-                    self.data.grid.height_matrix[neighbors_x["index"][dx]][neighbors_y["index"][dy]]
+                    self.surface.height_at(neighbors_x["index"][dx], neighbors_y["index"][dy])
                     for dx in (0, 1) for dy in (0, 1)
                 ])
             else:
@@ -142,6 +603,189 @@ class TrajectoryProcessor:
 
         return potential_intersection_points_neighbors
 
+    def find_potential_intersection_segments(
+            self,
+            points: np.ndarray,
+            offsets: np.ndarray,
+            max_grid_z: float,
+            min_grid_z: float,
+            flag: int,
+            starts: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Находит отрезки всех траекторий, на которых возможно пересечение с поверхностью, одной векторной операцией.
+        Результат совпадает с find_potential_intersection_points_neighbors для точек внутри сетки.
+
+        :param points: Упакованные точки траекторий, форма (N, 3).
+        :param offsets: Смещения траекторий, длина T + 1.
+        :param max_grid_z: Максимальная высота в сетке.
+        :param min_grid_z: Минимальная высота в сетке.
+        :param flag: Метод отбора, как в find_potential_intersection_points_neighbors.
+        :param starts: Проверять только отрезки с этими начальными точками; по умолчанию - все.
+        :return: Индексы начальных точек отрезков-кандидатов в массиве points.
+        """
+        return find_candidate_segments(self.surface, points, offsets, max_grid_z, min_grid_z, flag, starts)
+
+    def find_surface_intersection(
+            self,
+            potential_intersection_points_neighbors: List[List[Tuple[float, float, float]]]
+    ) -> List[Tuple[float, float, float]]:
+        """
+        Находит пересечения отрезков-кандидатов с поверхностью в режиме, выбранном при создании процессора.
+
+        :param potential_intersection_points_neighbors: Список пар точек кандидатов, образующих прямые.
+        :return: Список координат точек пересечения траектории и поверхности.
+        """
+        if self.surface_mode == "bilinear":
+            return self.find_line_bilinear_intersection(potential_intersection_points_neighbors)
+        return self.find_line_plane_intersection(potential_intersection_points_neighbors)
+
+    def _traverse_cells(self, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Обходит ячейки, через которые проходят отрезки, без отсева по высотам.
+
+        :param start: Начальные точки отрезков, форма (S, 3).
+        :param end: Конечные точки отрезков, форма (S, 3).
+        :return: Кортеж (segment, cell_i, cell_j, t_enter, t_exit, z_low, z_high, last_piece) для всех участков
+                 отрезков: z_low и z_high - диапазон высот отрезка внутри ячейки, last_piece - признак
+                 последнего участка своего отрезка.
+        """
+        segment, cell_i, cell_j, t_enter, t_exit = traverse_grid_cells_batch(
+            start[:, 0], start[:, 1], end[:, 0], end[:, 1], self.surface.x_axis, self.surface.y_axis)
+        dz = end[segment, 2] - start[segment, 2]
+        z_enter = start[segment, 2] + t_enter * dz
+        z_exit = start[segment, 2] + t_exit * dz
+        last_piece = np.append(segment[1:] != segment[:-1], True)
+        return (segment, cell_i, cell_j, t_enter, t_exit,
+                np.minimum(z_enter, z_exit), np.maximum(z_enter, z_exit), last_piece)
+
+    def _traverse_candidate_cells(self, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Обходит ячейки, через которые проходят отрезки-кандидаты, и оставляет только те,
+        оболочка высот которых пересекается с диапазоном высот отрезка внутри ячейки.
+
+        :param start: Начальные точки отрезков, форма (S, 3).
+        :param end: Конечные точки отрезков, форма (S, 3).
+        :return: Кортеж (segment, cell_i, cell_j, t_enter, t_exit, last_piece) для оставшихся участков
+                 отрезков; last_piece - признак последнего участка своего отрезка.
+        """
+        with self.stats.stage("traversal"):
+            segment, cell_i, cell_j, t_enter, t_exit, z_low, z_high, last_piece = self._traverse_cells(start, end)
+            reachable = np.flatnonzero(reachable_cells(self.surface, cell_i, cell_j, z_low, z_high))
+        self.stats.count("cells_traversed", segment.size)
+        self.stats.count("cells_culled", segment.size - reachable.size)
+        self.stats.count("plane_fits", reachable.size)
+        return (segment[reachable], cell_i[reachable], cell_j[reachable],
+                t_enter[reachable], t_exit[reachable], last_piece[reachable])
+
+    def _plane_hits(self, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Находит пересечения отрезков с плоскостями ячеек.
+
+        :return: Кортеж (segment, cell_i, cell_j, t) для найденных пересечений.
+        """
+        pieces = self._traverse_candidate_cells(start, end)
+        return self._solve_plane(self.surface, start, end, *pieces)
+
+    def _bilinear_hits(self, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Находит пересечения отрезков с билинейными патчами ячеек (до двух в ячейке).
+
+        :return: Кортеж (segment, cell_i, cell_j, t) для найденных пересечений в порядке следования вдоль отрезков.
+        """
+        pieces = self._traverse_candidate_cells(start, end)
+        return self._solve_bilinear(self.surface, start, end, *pieces)
+
+    def _solve_plane(
+            self, surface: PreparedSurface, start: np.ndarray, end: np.ndarray, segment: np.ndarray,
+            cell_i: np.ndarray, cell_j: np.ndarray, t_enter: np.ndarray, t_exit: np.ndarray, last_piece: np.ndarray
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        Пересекает участки отрезков внутри ячеек с плоскостями ячеек поверхности.
+
+        :return: Кортеж (segment, cell_i, cell_j, t) для пересечений, лежащих на участке отрезка внутри ячейки.
+        """
+        with self.stats.stage("solve"):
+            planes = surface.coefficients.planes(cell_i, cell_j)
+            t = line_plane_intersection_parameters(planes, start[segment], end[segment] - start[segment])
+
+            with np.errstate(invalid="ignore"):
+                accepted = (t_enter <= t) & ((t < t_exit) | (last_piece & (t <= t_exit)))
+        if self.stats.enabled:
+            self.stats.count("rejected_by_rectangle", np.count_nonzero(~np.isnan(t) & ~accepted))
+        return segment[accepted], cell_i[accepted], cell_j[accepted], t[accepted]
+
+    def _solve_bilinear(
+            self, surface: PreparedSurface, start: np.ndarray, end: np.ndarray, segment: np.ndarray,
+            cell_i: np.ndarray, cell_j: np.ndarray, t_enter: np.ndarray, t_exit: np.ndarray, last_piece: np.ndarray
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        Пересекает участки отрезков внутри ячеек с билинейными патчами ячеек поверхности.
+
+        :return: Кортеж (segment, cell_i, cell_j, t) для найденных пересечений в порядке следования вдоль отрезков.
+        """
+        with self.stats.stage("solve"):
+            patches = surface.coefficients.bilinear_patches(cell_i, cell_j)
+            cell_bounds = np.stack([
+                surface.x_coords[cell_i], surface.x_coords[cell_i + 1],
+                surface.y_coords[cell_j], surface.y_coords[cell_j + 1],
+            ], axis=1)
+            roots = line_bilinear_intersection_parameters(
+                patches, cell_bounds, start[segment], end[segment] - start[segment])
+
+            with np.errstate(invalid="ignore"):
+                accepted = ((t_enter[:, None] <= roots)
+                            & ((roots < t_exit[:, None]) | (last_piece[:, None] & (roots <= t_exit[:, None]))))
+            piece, root = np.nonzero(accepted)
+        if self.stats.enabled:
+            self.stats.count("rejected_by_rectangle", np.count_nonzero(~np.isnan(roots) & ~accepted))
+        return segment[piece], cell_i[piece], cell_j[piece], roots[piece, root]
+
+    def _fused_hits(self, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Находит пересечения отрезков с поверхностью скомпилированным ядром fused_segment_hits.
+        Обход ячеек и пересечение выполняются за один проход, их время учитывается в этапе solve.
+
+        :return: Кортеж (segment, cell_i, cell_j, t) для найденных пересечений в порядке следования вдоль отрезков.
+        """
+        surface, pyramid = self.surface, self.surface.pyramid
+        mode = MODE_BILINEAR if self.surface_mode == "bilinear" else MODE_PLANE
+        with self.stats.stage("solve"):
+            segment, cell_i, cell_j, t, counters = fused_segment_hits(
+                np.ascontiguousarray(start), np.ascontiguousarray(end), surface.x_coords, surface.y_coords,
+                surface.heights, pyramid.levels_min[0], pyramid.levels_max[0], pyramid.block_shift, mode)
+        for name, value in zip(("cells_traversed", "cells_culled", "plane_fits", "rejected_by_rectangle"), counters):
+            self.stats.count(name, value)
+        return segment, cell_i, cell_j, t
+
+    def _segment_hits(self, start: np.ndarray, end: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Находит пересечения отрезков с поверхностью в режиме, выбранном при создании процессора.
+
+        :param start: Начальные точки отрезков, форма (S, 3).
+        :param end: Конечные точки отрезков, форма (S, 3).
+        :return: Кортеж (segment, cell_i, cell_j, t, xyz): индексы отрезков, ячейки, параметры
+                 и координаты точек пересечения формы (M, 3).
+        """
+        if self.backend == "numba" and not isinstance(self.surface, TiledSurface):
+            segment, cell_i, cell_j, t = self._fused_hits(start, end)
+        elif self.surface_mode == "bilinear":
+            segment, cell_i, cell_j, t = self._bilinear_hits(start, end)
+        else:
+            segment, cell_i, cell_j, t = self._plane_hits(start, end)
+        line_point = start[segment]
+        xyz = line_point + t[:, None] * (end[segment] - line_point)
+        self.stats.count("accepted_intersections", t.size)
+        return segment, cell_i, cell_j, t, xyz
+
+    @staticmethod
+    def _pairs_to_arrays(
+            potential_intersection_points_neighbors: List[List[Tuple[float, float, float]]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Преобразует список пар точек в массивы начальных и конечных точек отрезков."""
+        segments = np.asarray(potential_intersection_points_neighbors, dtype=np.float64).reshape(-1, 2, 3)
+        return segments[:, 0], segments[:, 1]
+
     def find_line_plane_intersection(self,
                                      potential_intersection_points_neighbors: List[List[Tuple[float, float, float]]]) -> \
             List[
@@ -149,31 +793,39 @@ class TrajectoryProcessor:
         """
         Находит пересечения траекторий с плоскостью используя точки кандидаты найденные в функции find_potential_intersection_points_neighbors.
 
+        Ячейки, через которые проходит каждый отрезок, и интервал параметра t отрезка внутри каждой ячейки
+        находятся точным обходом сетки (traverse_grid_cells_batch). Ячейки, оболочка высот которых
+        не пересекается с диапазоном высот отрезка внутри ячейки, пропускаются. Коэффициенты плоскостей
+        берутся из кэша поверхности (surface.coefficients), а пересечение с плоскостью ячейки принимается,
+        только если оно лежит на участке отрезка внутри этой ячейки.
+
         :param potential_intersection_points_neighbors: Список пар точек кандидатов, образующих прямые.
         :return: Список координат точек пересечения траекторию и поверхности.
         """
-        result: List[Tuple[float, float, float]] = []
+        if not potential_intersection_points_neighbors:
+            return []
+        start, end = self._pairs_to_arrays(potential_intersection_points_neighbors)
+        segment, _, _, t = self._plane_hits(start, end)
+        line_point = start[segment]
+        intersections = line_point + t[:, None] * (end[segment] - line_point)
+        return [tuple(point) for point in intersections]
 
-        for segment in potential_intersection_points_neighbors:
-            corners = bresenham_grid_with_corners(
-                segment[0][0], segment[0][1],
-                segment[1][0], segment[1][1],
-                self.data.grid.x_coords, self.data.grid.y_coords
-            )
-
-            for corner in corners:
-                points = [
-                    (corner["value"][dx], corner["value"][dy],
-                     self.data.grid.height_matrix[int(corner["index"][dx])][int(corner["index"][dy])])
-                    for dx in (0, 2) for dy in (1, 3)
-                ]
-
-                plane = best_fit_plane(points)
-                line_point, line_dir = line_from_two_points(segment[0], segment[1])
-
-                if plane:
-                    intersection = line_plane_intersection(plane, line_point, line_dir)
-                    if is_point_in_rectangle(intersection, points):
-                        result.append(intersection)
+    def find_line_bilinear_intersection(
+            self,
+            potential_intersection_points_neighbors: List[List[Tuple[float, float, float]]]
+    ) -> List[Tuple[float, float, float]]:
+        """
+        Находит пересечения отрезков-кандидатов с билинейными патчами ячеек (та же поверхность, что и
+        в bilinear_interpolation_4terms). Пересечение отрезка с патчем находится точно, как корни
+        квадратного уравнения по t, поэтому в одной ячейке может быть найдено два пересечения.
 
-        return result
+        :param potential_intersection_points_neighbors: Список пар точек кандидатов, образующих прямые.
+        :return: Список координат точек пересечения траектории и поверхности в порядке следования вдоль отрезков.
+        """
+        if not potential_intersection_points_neighbors:
+            return []
+        start, end = self._pairs_to_arrays(potential_intersection_points_neighbors)
+        segment, _, _, t = self._bilinear_hits(start, end)
+        line_point = start[segment]
+        intersections = line_point + t[:, None] * (end[segment] - line_point)
+        return [tuple(point) for point in intersections]
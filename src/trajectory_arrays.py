@@ -0,0 +1,124 @@
+import numpy as np
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+
+def pack_trajectories(trajectories: Sequence[Sequence[Sequence[float]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Упаковывает список траекторий в один массив точек и массив смещений.
+
+    :param trajectories: Список траекторий, каждая - список точек [x, y, z].
+    :return: Кортеж (points, offsets): points - массив float64 формы (N, 3),
+             offsets - массив int64 длины len(trajectories) + 1; точки траектории k
+             лежат в points[offsets[k]:offsets[k + 1]].
+    """
+    lengths = np.fromiter((len(trajectory) for trajectory in trajectories), dtype=np.int64, count=len(trajectories))
+    offsets = np.zeros(len(trajectories) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    points = np.empty((offsets[-1], 3), dtype=np.float64)
+    for k, trajectory in enumerate(trajectories):
+        if lengths[k]:
+            points[offsets[k]:offsets[k + 1]] = trajectory
+    return points, offsets
+
+
+def trajectory_z_ranges(points: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Вычисляет минимальную и максимальную высоту каждой траектории.
+
+    :param points: Массив точек формы (N, 3).
+    :param offsets: Массив смещений траекторий длины T + 1.
+    :return: Кортеж массивов (min_z, max_z) длины T; для пустых траекторий min_z = inf, max_z = -inf.
+    """
+    count = len(offsets) - 1
+    min_z = np.full(count, np.inf)
+    max_z = np.full(count, -np.inf)
+
+    non_empty = offsets[1:] > offsets[:-1]
+    if non_empty.any():
+        starts = offsets[:-1][non_empty]
+        z = points[:, 2]
+        min_z[non_empty] = np.minimum.reduceat(z, starts)
+        max_z[non_empty] = np.maximum.reduceat(z, starts)
+    return min_z, max_z
+
+
+def segment_starts(offsets: np.ndarray) -> np.ndarray:
+    """
+    Возвращает индексы точек, с которых начинаются отрезки траекторий.
+
+    :param offsets: Массив смещений траекторий длины T + 1.
+    :return: Массив int64 индексов i, для которых точки i и i + 1 принадлежат одной траектории.
+    """
+    mask = np.ones(offsets[-1], dtype=bool)
+    ends = offsets[1:][offsets[1:] > offsets[:-1]] - 1
+    mask[ends] = False
+    return np.flatnonzero(mask).astype(np.int64)
+
+
+def point_trajectory_index(offsets: np.ndarray, point_index: np.ndarray) -> np.ndarray:
+    """
+    Определяет, какой траектории принадлежат точки.
+
+    :param offsets: Массив смещений траекторий длины T + 1.
+    :param point_index: Индексы точек в упакованном массиве.
+    :return: Массив индексов траекторий той же длины.
+    """
+    return np.searchsorted(offsets, point_index, side="right") - 1
+
+
+class TrajectoryBatch:
+    """
+    Компактное представление набора траекторий: все точки в одном массиве float64 формы (N, 3),
+    смещения траекторий в массиве int64 длины T + 1 и, по желанию, идентификаторы скважин.
+    """
+
+    def __init__(self, points: np.ndarray, offsets: np.ndarray, ids: Optional[Sequence[Hashable]] = None) -> None:
+        """
+        Создает набор траекторий из упакованных массивов (без копирования, если типы уже float64 и int64).
+
+        :param points: Массив точек формы (N, 3).
+        :param offsets: Смещения траекторий длины T + 1; точки траектории k - points[offsets[k]:offsets[k + 1]].
+        :param ids: Идентификаторы траекторий длины T.
+        :raises ValueError: Если длина ids не совпадает с числом траекторий.
+        """
+        self.points: np.ndarray = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.offsets: np.ndarray = np.asarray(offsets, dtype=np.int64)
+        self.ids: Optional[List[Hashable]] = list(ids) if ids is not None else None
+        if self.ids is not None and len(self.ids) != len(self):
+            raise ValueError(f"Число идентификаторов {len(self.ids)} не совпадает с числом траекторий {len(self)}")
+
+    @classmethod
+    def from_lists(
+            cls, trajectories: Sequence[Sequence[Sequence[float]]], ids: Optional[Sequence[Hashable]] = None
+    ) -> "TrajectoryBatch":
+        """
+        Создает набор из списка траекторий, как в pack_trajectories.
+
+        :param trajectories: Список траекторий, каждая - список точек [x, y, z] или массив формы (n, 3).
+        :param ids: Идентификаторы траекторий.
+        :return: Набор траекторий.
+        """
+        points, offsets = pack_trajectories(trajectories)
+        return cls(points, offsets, ids)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def trajectory(self, k: int) -> np.ndarray:
+        """
+        Возвращает точки траектории k (представление без копирования).
+
+        :param k: Индекс траектории.
+        :return: Массив формы (n, 3).
+        """
+        return self.points[self.offsets[k]:self.offsets[k + 1]]
+
+    def to_lists(self) -> List[List[List[float]]]:
+        """Преобразует набор в список траекторий, каждая - список точек [x, y, z]."""
+        return [self.trajectory(k).tolist() for k in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти массивов точек и смещений в байтах."""
+        return self.points.nbytes + self.offsets.nbytes
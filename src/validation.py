@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Tuple
+
+NULL_POLICIES = ("allow", "forbid")
+
+
+class ArrayValidationError(ValueError):
+    """
+    Ошибка векторной проверки входных массивов сетки или траекторий.
+    """
+
+
+def _as_float64(name: str, values) -> np.ndarray:
+    """Приводит значения к массиву float64 без копирования, если они уже им являются."""
+    array = np.asarray(values)
+    if array.dtype == object:
+        try:
+            array = array.astype(np.float64)
+        except (TypeError, ValueError):
+            raise ArrayValidationError(f"{name}: значения должны быть числами") from None
+    elif not (np.issubdtype(array.dtype, np.floating) or np.issubdtype(array.dtype, np.integer)):
+        raise ArrayValidationError(f"{name}: недопустимый тип данных {array.dtype}")
+    return np.asarray(array, dtype=np.float64)
+
+
+def validate_axis(name: str, coords) -> np.ndarray:
+    """
+    Проверяет координаты узлов оси сетки.
+
+    :param name: Имя оси для сообщения об ошибке.
+    :param coords: Координаты узлов.
+    :return: Одномерный массив float64 (без копирования, если вход уже такой).
+    :raises ArrayValidationError: Если координаты не одномерные, не конечные или не строго возрастают.
+    """
+    coords = _as_float64(name, coords)
+    if coords.ndim != 1:
+        raise ArrayValidationError(f"{name} должны быть одномерными")
+    if not np.isfinite(coords).all():
+        raise ArrayValidationError(f"{name} содержат NaN или бесконечность")
+    if coords.size > 1 and not (coords[1:] > coords[:-1]).all():
+        raise ArrayValidationError(f"{name} должны строго возрастать")
+    return coords
+
+
+def validate_grid_arrays(
+        x_coords, y_coords, height_matrix, null_policy: str = "allow"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Проверяет массивы сетки векторными операциями, без поэлементной валидации pydantic.
+
+    Проверяются типы данных, размерности, согласованность формы высот (len(x_coords), len(y_coords)),
+    строгое возрастание координат и значения высот: бесконечности запрещены, NaN (и None)
+    обозначают пустые узлы и допускаются в зависимости от null_policy.
+
+    :param x_coords: Координаты узлов по оси X.
+    :param y_coords: Координаты узлов по оси Y.
+    :param height_matrix: Матрица высот.
+    :param null_policy: "allow" - пустые узлы допустимы, "forbid" - запрещены.
+    :return: Кортеж массивов float64 (x_coords, y_coords, heights); массивы float64 не копируются.
+    :raises ArrayValidationError: Если массивы не прошли проверку.
+    """
+    if null_policy not in NULL_POLICIES:
+        raise ValueError(f"Неизвестная политика пустых узлов: {null_policy}")
+
+    x_coords = validate_axis("x_coords", x_coords)
+    y_coords = validate_axis("y_coords", y_coords)
+    heights = _as_float64("height_matrix", height_matrix)
+    if heights.shape != (x_coords.size, y_coords.size):
+        raise ArrayValidationError(
+            f"Форма height_matrix {heights.shape} не совпадает с ({x_coords.size}, {y_coords.size})"
+        )
+    if np.isinf(heights).any():
+        raise ArrayValidationError("height_matrix содержит бесконечные значения")
+    if null_policy == "forbid" and np.isnan(heights).any():
+        raise ArrayValidationError("height_matrix содержит пустые узлы")
+    return x_coords, y_coords, heights
+
+
+def validate_trajectory_arrays(points, offsets) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Проверяет упакованные траектории (см. pack_trajectories) векторными операциями.
+
+    :param points: Массив точек формы (N, 3).
+    :param offsets: Смещения траекторий длины T + 1.
+    :return: Кортеж (points, offsets) с типами float64 и int64 (без копирования, если типы уже такие).
+    :raises ArrayValidationError: Если массивы не прошли проверку.
+    """
+    points = _as_float64("points", points)
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ArrayValidationError(f"points должны иметь форму (N, 3), получено {points.shape}")
+    if not np.isfinite(points).all():
+        raise ArrayValidationError("points содержат NaN или бесконечность")
+
+    offsets = np.asarray(offsets)
+    if offsets.ndim != 1 or offsets.size == 0 or not np.issubdtype(offsets.dtype, np.integer):
+        raise ArrayValidationError("offsets должны быть непустым одномерным массивом целых чисел")
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets[0] != 0 or offsets[-1] != points.shape[0] or (offsets[1:] < offsets[:-1]).any():
+        raise ArrayValidationError("offsets должны неубывать от 0 до числа точек")
+    return points, offsets
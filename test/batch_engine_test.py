@@ -0,0 +1,170 @@
+import unittest
+
+import numpy as np
+
+from src.batch_engine import cull_segments, find_candidate_segments, locate_cells
+from src.grid_axis import GridAxis
+from src.grid_math import binary_search_nearest
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import pack_trajectories
+
+
+def make_random_case(seed: int, trajectories_count: int = 40, points_count: int = 25, uniform: bool = False):
+    """
+    Создает сетку со случайной поверхностью и пустыми узлами, а также траектории внутри нее.
+    Часть точек траекторий попадает точно в узлы сетки.
+    """
+    rng = np.random.default_rng(seed)
+    if uniform:
+        x_coords = 1000.0 + 1.5 * np.arange(30)
+        y_coords = -20.0 + 0.7 * np.arange(25)
+    else:
+        x_coords = np.cumsum(rng.uniform(0.5, 2.0, 30))
+        y_coords = np.cumsum(rng.uniform(0.5, 2.0, 25))
+    heights = rng.normal(0.0, 1.0, (x_coords.size, y_coords.size))
+    heights[rng.random(heights.shape) < 0.05] = np.nan
+    surface = PreparedSurface(x_coords, y_coords, heights)
+
+    trajectories = []
+    for _ in range(trajectories_count):
+        x = rng.uniform(x_coords[0], x_coords[-1], points_count)
+        y = rng.uniform(y_coords[0], y_coords[-1], points_count)
+        on_node = rng.random(points_count) < 0.2
+        x[on_node] = rng.choice(x_coords, on_node.sum())
+        y[on_node] = rng.choice(y_coords, on_node.sum())
+        z = rng.normal(0.0, 2.0, points_count)
+        trajectories.append(np.column_stack([x, y, z]).tolist())
+    return surface, trajectories
+
+
+class TestLocateCells(unittest.TestCase):
+    """
+    Тесты для векторного поиска ячеек вдоль оси.
+    """
+
+    def test_matches_binary_search_nearest(self):
+        """
+        Проверяет, что индексы и порядок узлов совпадают с binary_search_nearest.
+        """
+        coords = np.array([0.0, 1.0, 2.5, 4.0, 7.0])
+        values = np.array([0.0, 0.5, 1.0, 2.5, 3.0, 6.9, 7.0])
+        cell, on_node, inside = locate_cells(GridAxis(coords), values)
+        self.assertTrue(inside.all())
+        for k, value in enumerate(values):
+            expected = binary_search_nearest(coords.tolist(), value)["index"]
+            actual = [cell[k], cell[k] + 1] if on_node[k] else [cell[k] + 1, cell[k]]
+            self.assertEqual(actual, expected)
+
+    def test_outside(self):
+        """
+        Проверяет определение значений за пределами оси.
+        """
+        _, _, inside = locate_cells(GridAxis([0.0, 1.0, 2.0]), np.array([-0.1, 2.1, 1.0]))
+        np.testing.assert_array_equal(inside, [False, False, True])
+
+
+class TestFindCandidateSegments(unittest.TestCase):
+    """
+    Тесты для векторного отбора отрезков-кандидатов.
+    """
+
+    def assert_same_as_scalar(self, flag: int):
+        """Сравнивает кандидатов векторного и скалярного путей на нескольких случайных наборах."""
+        for seed in range(6):
+            surface, trajectories = make_random_case(seed, uniform=seed % 2 == 1)
+            processor = TrajectoryProcessor(surface)
+            points, offsets = pack_trajectories(trajectories)
+
+            candidates = find_candidate_segments(surface, points, offsets, surface.z_max, surface.z_min, flag)
+            actual = [[points[k].tolist(), points[k + 1].tolist()] for k in candidates]
+
+            expected = []
+            for trajectory in trajectories:
+                expected.extend(processor.find_potential_intersection_points_neighbors(
+                    trajectory, surface.z_max, surface.z_min, flag))
+
+            self.assertEqual(actual, expected)
+            self.assertGreater(len(actual), 0)
+
+    def test_bilinear_flag_matches_scalar(self):
+        """
+        Проверяет совпадение с find_potential_intersection_points_neighbors при flag = 0.
+        """
+        self.assert_same_as_scalar(0)
+
+    def test_extrema_flag_matches_scalar(self):
+        """
+        Проверяет совпадение с find_potential_intersection_points_neighbors при flag = 1.
+        """
+        self.assert_same_as_scalar(1)
+
+    def test_segments_do_not_cross_trajectories(self):
+        """
+        Проверяет, что последняя точка одной траектории и первая точка следующей не образуют отрезок.
+        """
+        surface = PreparedSurface([0.0, 1.0], [0.0, 1.0], [[0.0, 0.0], [0.0, 0.0]])
+        points, offsets = pack_trajectories([[[0.5, 0.5, 1.0]], [[0.5, 0.5, -1.0], [0.5, 0.5, 1.0]]])
+        candidates = find_candidate_segments(surface, points, offsets, 0.0, 0.0, 1)
+        np.testing.assert_array_equal(candidates, [1])
+
+    def test_unknown_flag(self):
+        """
+        Проверяет, что неизвестный метод отбора приводит к ошибке.
+        """
+        surface = PreparedSurface([0.0, 1.0], [0.0, 1.0], [[0.0, 0.0], [0.0, 0.0]])
+        points, offsets = pack_trajectories([[[0.5, 0.5, 1.0], [0.5, 0.5, -1.0]]])
+        with self.assertRaises(ValueError):
+            find_candidate_segments(surface, points, offsets, 0.0, 0.0, 3)
+
+    def test_envelope_flag_finds_double_crossing(self):
+        """
+        Проверяет, что при flag = 2 остается отрезок, проходящий под куполом между точками над поверхностью,
+        который не находят flag 0 и 1, и отбрасываются отрезки над поверхностью и за пределами сетки.
+        """
+        coords = np.linspace(-10.0, 10.0, 41)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        surface = PreparedSurface(coords, coords, 10.0 - xx ** 2 - yy ** 2)
+        points, offsets = pack_trajectories([
+            [[-5.0, 0.3, 5.0], [5.0, 0.3, 5.0]],
+            [[-5.0, 0.3, 11.0], [5.0, 0.3, 11.0]],
+            [[-30.0, 0.3, 5.0], [-20.0, 0.3, -50.0]],
+        ])
+        for flag in (0, 1):
+            self.assertEqual(find_candidate_segments(surface, points, offsets, 10.0, -190.0, flag).size, 0)
+        np.testing.assert_array_equal(find_candidate_segments(surface, points, offsets, 10.0, -190.0, 2), [0])
+
+    def test_envelope_flag_keeps_extrema_candidates_with_hits(self):
+        """
+        Проверяет, что flag = 2 не теряет пересечений, найденных с flag = 1.
+        """
+        surface, trajectories = make_random_case(3)
+        data = {"trajectories": trajectories}
+        extrema = TrajectoryProcessor(surface).calculate_intersections(data)
+        envelope = TrajectoryProcessor(surface, candidate_flag=2).calculate_intersections(data)
+        for found, more in zip(extrema, envelope):
+            self.assertTrue(set(map(tuple, found)) <= set(map(tuple, more)))
+        self.assertGreater(sum(map(len, envelope)), sum(map(len, extrema)))
+
+
+class TestCullSegments(unittest.TestCase):
+    """
+    Тесты для отбрасывания отрезков по пирамиде минимумов и максимумов.
+    """
+
+    def test_lateral_above_surface_is_culled(self):
+        """
+        Проверяет, что длинный горизонтальный отрезок над поверхностью отбрасывается, а пересекающий - остается.
+        """
+        coords = np.arange(200, dtype=float)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        surface = PreparedSurface(coords, coords, np.sin(xx / 10.0) + np.cos(yy / 10.0))
+        points, offsets = pack_trajectories([
+            [[1.0, 1.0, 2.5], [198.0, 150.0, 2.2]],
+            [[1.0, 1.0, 2.5], [198.0, 150.0, -2.5]],
+        ])
+        np.testing.assert_array_equal(cull_segments(surface, points, np.array([0, 2])), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+from src.cell_coefficients import CellCoefficientCache
+from src.grid_math import bilinear_interpolation_4terms
+from src.spatial_geometry import best_fit_plane
+from src.surface import PreparedSurface
+
+
+def make_surface(seed: int = 0) -> PreparedSurface:
+    """Создает поверхность на неравномерной сетке со случайными высотами и пустыми узлами."""
+    rng = np.random.default_rng(seed)
+    x_coords = np.cumsum(rng.uniform(0.5, 2.0, 40))
+    y_coords = np.cumsum(rng.uniform(0.5, 2.0, 30))
+    heights = rng.normal(-2500.0, 10.0, (40, 30))
+    heights[rng.random(heights.shape) < 0.05] = np.nan
+    return PreparedSurface(x_coords, y_coords, heights)
+
+
+class TestCellCoefficientCache(unittest.TestCase):
+    """
+    Тесты для кэша коэффициентов поверхности по ячейкам.
+    """
+
+    def setUp(self):
+        self.surface = make_surface()
+
+    def test_planes_match_best_fit_plane(self):
+        """
+        Проверяет, что коэффициенты плоскостей совпадают с best_fit_plane, а для ячеек с пустыми углами равны None.
+        """
+        cache = CellCoefficientCache(self.surface, mode="eager")
+        for i in range(0, 39, 3):
+            for j in range(0, 29, 3):
+                points = [
+                    (self.surface.x_coords[i + dx], self.surface.y_coords[j + dy], self.surface.height_at(i + dx, j + dy))
+                    for dx in (0, 1) for dy in (0, 1)
+                ]
+                expected = best_fit_plane(points)
+                actual = cache.plane(i, j)
+                if expected is None:
+                    self.assertIsNone(actual)
+                else:
+                    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+    def test_bilinear_patches(self):
+        """
+        Проверяет, что билинейный патч в локальных координатах совпадает с bilinear_interpolation_4terms.
+        """
+        cache = CellCoefficientCache(self.surface, mode="eager", bilinear=True)
+        i, j = np.nonzero(self.surface.cell_valid)
+        i, j = i[:50], j[:50]
+        a0, a1, a2, a3 = cache.bilinear_patches(i, j).T
+        for k in range(i.size):
+            x0, x1 = self.surface.x_coords[i[k]], self.surface.x_coords[i[k] + 1]
+            y0, y1 = self.surface.y_coords[j[k]], self.surface.y_coords[j[k] + 1]
+            u, v = 0.3, 0.8
+            expected = bilinear_interpolation_4terms(
+                x0 + u * (x1 - x0), y0 + v * (y1 - y0), x0, x1, y0, y1, self.surface.corner_heights(i[k], j[k]))
+            self.assertAlmostEqual(a0[k] + a1[k] * u + a2[k] * v + a3[k] * u * v, expected, places=8)
+
+        with self.assertRaises(ValueError):
+            CellCoefficientCache(self.surface, mode="eager").bilinear_patches(i, j)
+
+    def test_lazy_matches_eager(self):
+        """
+        Проверяет, что ленивый режим с вытеснением блоков дает те же коэффициенты, что и полный.
+        """
+        eager = CellCoefficientCache(self.surface, mode="eager", bilinear=True)
+        lazy = CellCoefficientCache(self.surface, mode="lazy", bilinear=True, tile_size=8, max_tiles=3)
+        rng = np.random.default_rng(1)
+        for _ in range(5):
+            i = rng.integers(0, 39, 100)
+            j = rng.integers(0, 29, 100)
+            np.testing.assert_array_equal(lazy.planes(i, j), eager.planes(i, j))
+            np.testing.assert_array_equal(lazy.bilinear_patches(i, j), eager.bilinear_patches(i, j))
+        self.assertLessEqual(lazy.memory_footprint()["tiles_cached"], 3)
+        self.assertGreater(lazy.misses, 0)
+
+    def test_memory_footprint(self):
+        """
+        Проверяет отчет об объеме памяти и автоматический выбор режима.
+        """
+        eager = CellCoefficientCache(self.surface, mode="eager")
+        footprint = eager.memory_footprint()
+        self.assertEqual(footprint["mode"], "eager")
+        self.assertEqual(footprint["bytes"], 39 * 29 * 4 * 8)
+        self.assertEqual(footprint["eager_bytes"], footprint["bytes"])
+
+        lazy = CellCoefficientCache(self.surface, mode="lazy", tile_size=8, max_tiles=2)
+        self.assertEqual(lazy.memory_footprint()["bytes"], 0)
+        self.assertEqual(lazy.memory_footprint()["lazy_max_bytes"], 2 * 64 * 4 * 8)
+
+        self.assertEqual(CellCoefficientCache(self.surface, eager_limit_bytes=1000).mode, "lazy")
+        self.assertEqual(CellCoefficientCache(self.surface).mode, "eager")
+        with self.assertRaises(ValueError):
+            CellCoefficientCache(self.surface, mode="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
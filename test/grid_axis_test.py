@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from src.grid_axis import GridAxis, locate_in
+
+
+class TestGridAxis(unittest.TestCase):
+    """
+    Тесты для оси сетки.
+    """
+
+    def assert_matches_searchsorted(self, coords: np.ndarray):
+        """Сравнивает поиск по оси с np.searchsorted на узлах, соседних с узлами числах и случайных точках."""
+        axis = GridAxis(coords)
+        rng = np.random.default_rng(0)
+        values = np.concatenate([
+            coords, np.nextafter(coords, np.inf), np.nextafter(coords, -np.inf),
+            rng.uniform(coords[0] - 10, coords[-1] + 10, 500),
+        ])
+        for side in ("left", "right"):
+            expected = np.searchsorted(coords, values, side=side) - 1
+            np.testing.assert_array_equal(axis.locate(values, side), expected)
+            self.assertEqual([axis.locate_scalar(value, side) for value in values], expected.tolist())
+
+    def test_uniform_axis(self):
+        """
+        Проверяет определение равномерной оси и арифметический поиск ячеек.
+        """
+        coords = 61352.0 + 25.0 * np.arange(700)
+        self.assertTrue(GridAxis(coords).uniform)
+        self.assertEqual(GridAxis(coords).step, 25.0)
+        self.assert_matches_searchsorted(coords)
+        self.assert_matches_searchsorted(np.linspace(-3.7, 1000.3, 1001))
+
+    def test_non_uniform_axis(self):
+        """
+        Проверяет поиск ячеек по неравномерной оси.
+        """
+        coords = np.cumsum(np.random.default_rng(1).uniform(0.5, 2.0, 300))
+        self.assertFalse(GridAxis(coords).uniform)
+        self.assert_matches_searchsorted(coords)
+
+    def test_degenerate_axes(self):
+        """
+        Проверяет оси из одного узла и без узлов.
+        """
+        self.assertFalse(GridAxis([1.0]).uniform)
+        self.assertEqual(GridAxis([1.0]).locate_scalar(2.0), 0)
+        self.assertEqual(len(GridAxis([])), 0)
+
+    def test_locate_in_sequence(self):
+        """
+        Проверяет поиск по обычной отсортированной последовательности.
+        """
+        self.assertEqual(locate_in([0, 1, 2], 1), 1)
+        self.assertEqual(locate_in([0, 1, 2], 1, side="left"), 0)
+        self.assertEqual(locate_in(GridAxis([0, 1, 2]), 1.5), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,9 @@
 import unittest
 import math
 
+from src.grid_axis import GridAxis
 from src.grid_math import bilinear_interpolation_4terms, binary_search_nearest, is_point_in_rectangle, \
-    bresenham_grid_with_corners
+    bresenham_grid_with_corners, traverse_grid_cells, traverse_grid_cells_batch
 
 
 class TestBilinearInterpolation(unittest.TestCase):
@@ -81,6 +82,28 @@ class TestBinarySearch(unittest.TestCase):
         self.assertEqual(result["value"], [None, None])
         self.assertEqual(result["index"], [None, None])
 
+    def test_value_outside_array(self):
+        """
+        Тест для значений за пределами массива.
+
+        Проверяет, что для значений левее первого и правее последнего элемента возвращаются None.
+        """
+        arr = [1, 2, 3, 4, 5]
+        for target in (0.5, 5.5):
+            result = binary_search_nearest(arr, target)
+            self.assertEqual(result["index"], [None, None])
+
+    def test_grid_axis(self):
+        """
+        Тест для поиска по оси GridAxis.
+
+        Проверяет, что для равномерной и неравномерной оси результат совпадает с поиском по списку.
+        """
+        for arr in ([1, 2, 3, 4, 5], [1, 1.5, 3, 7, 7.5]):
+            axis = GridAxis(arr)
+            for target in (1, 1.2, 3, 4.5, 5, 7.5):
+                self.assertEqual(binary_search_nearest(axis, target), binary_search_nearest(arr, target))
+
 
 class TestIsPointInRectangle(unittest.TestCase):
     """
@@ -159,6 +182,96 @@ class TestBresenhamGridWithCorners(unittest.TestCase):
         result = bresenham_grid_with_corners(1, 0, 1, 3, grid_x, grid_y)
         self.assertEqual(len(result), 3)
 
+    def test_grid_axis(self):
+        """
+        Тест для осей GridAxis.
+
+        Проверяет, что результат для осей GridAxis совпадает с результатом для списков координат.
+        """
+        grid_x = [0, 1, 2, 3]
+        grid_y = [0, 0.5, 2, 3]
+        for segment in ((0, 0, 2, 2), (0.5, 0.2, 2.9, 2.9), (3, 3, 0, 0), (1, 0, 1, 3)):
+            self.assertEqual(
+                bresenham_grid_with_corners(*segment, GridAxis(grid_x), GridAxis(grid_y)),
+                bresenham_grid_with_corners(*segment, grid_x, grid_y)
+            )
+
+
+class TestTraverseGridCells(unittest.TestCase):
+    """
+    Тесты для точного обхода ячеек сетки отрезком.
+    """
+
+    def test_diagonal_through_nodes(self):
+        """
+        Тест для диагонали, проходящей точно через узлы сетки.
+
+        Проверяет, что ячейки, которых отрезок касается только в узле, не возвращаются.
+        """
+        result = traverse_grid_cells(0, 0, 2, 2, [0, 1, 2, 3], [0, 1, 2, 3])
+        self.assertEqual(result, [(0, 0, 0.0, 0.5), (1, 1, 0.5, 1.0)])
+
+    def test_diagonal_touches_all_cells(self):
+        """
+        Тест для наклонного отрезка.
+
+        Проверяет, что возвращаются все пересекаемые ячейки с непрерывными интервалами t,
+        в том числе ячейка (1, 1), которую пропускает bresenham_grid_with_corners.
+        """
+        grid = [0, 1, 2, 3]
+        result = traverse_grid_cells(0.5, 0.2, 2.5, 1.7, grid, grid)
+        self.assertEqual([cell[:2] for cell in result], [(0, 0), (1, 0), (1, 1), (2, 1)])
+        self.assertEqual(result[0][2], 0.0)
+        self.assertEqual(result[-1][3], 1.0)
+        for previous, current in zip(result, result[1:]):
+            self.assertAlmostEqual(previous[3], current[2])
+
+        bresenham = bresenham_grid_with_corners(0.5, 0.2, 2.5, 1.7, grid, grid)
+        self.assertNotIn((1, 1), [cell["index"][:2] for cell in bresenham])
+
+    def test_reverse_direction(self):
+        """
+        Тест для отрезка, идущего в обратном направлении.
+
+        Проверяет, что ячейки возвращаются в порядке прохождения отрезка.
+        """
+        grid = [0, 1, 2, 3]
+        result = traverse_grid_cells(2.5, 1.7, 0.5, 0.2, grid, grid)
+        self.assertEqual([cell[:2] for cell in result], [(2, 1), (1, 1), (1, 0), (0, 0)])
+
+    def test_clipping_and_outside(self):
+        """
+        Тест для отрезков, выходящих за пределы сетки.
+
+        Проверяет, что отрезок обрезается по границе сетки, а отрезок вне сетки не дает ячеек.
+        """
+        grid = [0, 1, 2, 3]
+        result = traverse_grid_cells(-1, 0.5, 5, 0.5, grid, grid)
+        self.assertEqual([cell[:2] for cell in result], [(0, 0), (1, 0), (2, 0)])
+        self.assertAlmostEqual(result[0][2], 1 / 6)
+        self.assertAlmostEqual(result[-1][3], 4 / 6)
+        self.assertEqual(traverse_grid_cells(-1, -1, -2, 5, grid, grid), [])
+
+    def test_point_segment(self):
+        """
+        Тест для отрезка нулевой длины в плоскости XY (вертикальная скважина).
+
+        Проверяет, что возвращается одна ячейка со всем интервалом t.
+        """
+        self.assertEqual(traverse_grid_cells(0.5, 1.5, 0.5, 1.5, [0, 1, 2], [0, 1, 2]), [(0, 1, 0.0, 1.0)])
+
+    def test_batch(self):
+        """
+        Тест для обхода нескольких отрезков сразу.
+
+        Проверяет, что номера отрезков соответствуют порядку входных данных.
+        """
+        axis = GridAxis([0, 1, 2, 3])
+        segment, i, j, _, _ = traverse_grid_cells_batch([0.5, 9.0, 2.5], [0.5, 9.0, 0.5], [1.5, 9.5, 2.5],
+                                                        [0.5, 9.5, 2.5], axis, axis)
+        self.assertEqual(segment.tolist(), [0, 0, 2, 2, 2])
+        self.assertEqual(list(zip(i.tolist(), j.tolist())), [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.grid_rotation import GridRotation
+from src.result_cache import ResultCache
+from src.segment_index import SegmentIndex
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.survey import Survey
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+ROTATION = GridRotation(90.0, 5.0, 5.0)
+
+
+def make_surface(rotation=ROTATION) -> PreparedSurface:
+    """Создает наклонную плоскость z = -100 + x + 2y (x, y - координаты до поворота) на сетке 11 x 11."""
+    coords = np.arange(11.0)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    return PreparedSurface(coords, coords, -100.0 + xx + 2.0 * yy, rotation=rotation)
+
+
+def make_batch(count: int = 40, seed: int = 0) -> TrajectoryBatch:
+    """Создает наклонные траектории в мировых координатах, часть из которых выходит за повернутую сетку."""
+    rng = np.random.default_rng(seed)
+    trajectories = [np.linspace([*rng.uniform(-3, 13, 2), -50.0], [*rng.uniform(-3, 13, 2), -150.0], 8)
+                    for _ in range(count)]
+    return TrajectoryBatch.from_lists(trajectories)
+
+
+class TestGridRotation(unittest.TestCase):
+    """
+    Тесты для поворота сетки и расчета пересечений с повернутыми поверхностями.
+    """
+
+    def test_transform(self):
+        """
+        Проверяет поворот против часовой стрелки вокруг центра, обратное преобразование и описанный прямоугольник.
+        """
+        np.testing.assert_allclose(ROTATION.to_world([[6.0, 5.0, -1.0]]), [[5.0, 6.0, -1.0]], atol=1e-12)
+        points = np.random.default_rng(0).normal(size=(10, 3))
+        rotation = GridRotation(-37.5, 100.0, 200.0)
+        np.testing.assert_allclose(rotation.to_world(rotation.to_local(points)), points, atol=1e-12)
+        np.testing.assert_array_equal(rotation.to_local(points)[:, 2], points[:, 2])
+        low, high = GridRotation(45.0).world_bounds(np.array([0.0, 1.0]), np.array([0.0, 1.0]))
+        np.testing.assert_allclose(low, [-np.sqrt(0.5), 0.0], atol=1e-12)
+        np.testing.assert_allclose(high, [np.sqrt(0.5), np.sqrt(2.0)], atol=1e-12)
+        self.assertIsNone(GridRotation.from_parameters(np.empty(0)))
+        self.assertEqual(GridRotation.from_parameters(rotation.parameters), rotation)
+
+    def test_intersections(self):
+        """
+        Проверяет пересечения вертикальных скважин с повернутой плоскостью: точка (3, 6) в мировых координатах
+        лежит в узле (6, 7) сетки, точка (5, 12) - вне повернутой сетки.
+        """
+        batch = TrajectoryBatch.from_lists([[[3.0, 6.0, 0.0], [3.0, 6.0, -200.0]],
+                                            [[5.0, 12.0, 0.0], [5.0, 12.0, -200.0]]])
+        for surface_mode in ("plane", "bilinear"):
+            result = TrajectoryProcessor(make_surface(), surface_mode=surface_mode).intersect_batch(batch)
+            np.testing.assert_array_equal(result.trajectory, [0])
+            np.testing.assert_allclose(result.xyz, [[3.0, 6.0, -80.0]], atol=1e-9)
+
+    def test_matches_local_coordinates(self):
+        """
+        Проверяет, что расчет по повернутой поверхности совпадает с расчетом по неповернутой для траекторий,
+        переведенных в систему координат сетки, в том числе для набора горизонтов, тайлов, индекса
+        отрезков и кэша результатов.
+        """
+        surface, plain = make_surface(), make_surface(None)
+        batch = make_batch()
+        local = TrajectoryBatch(ROTATION.to_local(batch.points), batch.offsets)
+        expected = TrajectoryProcessor(plain).intersect_batch(local)
+        self.assertGreater(len(expected), 0)
+        self.assertLess(len(set(expected.trajectory.tolist())), len(batch))
+
+        stack = SurfaceStack.from_surfaces([surface, surface])
+        index = SegmentIndex(batch.points, batch.offsets)
+        with tempfile.TemporaryDirectory() as directory:
+            tiled = TiledSurface.create(os.path.join(directory, "tiles.npy"), surface.x_coords, surface.y_coords,
+                                        surface.heights, tile_size=4, block_size=2, rotation=ROTATION)
+            results = [
+                TrajectoryProcessor(surface).intersect_batch(batch),
+                TrajectoryProcessor(surface).intersect_batch(batch, segment_index=index),
+                TrajectoryProcessor(surface, cache=ResultCache()).intersect_batch(batch),
+                TrajectoryProcessor(tiled).intersect_batch(batch),
+            ]
+            stack_result = TrajectoryProcessor(stack).intersect_batch(batch)
+        for result in results:
+            np.testing.assert_array_equal(result.segment, expected.segment)
+            np.testing.assert_array_equal(result.t, expected.t)
+            np.testing.assert_allclose(result.xyz, ROTATION.to_world(expected.xyz), atol=1e-9)
+        np.testing.assert_array_equal(stack_result.t[::2], expected.t)
+        self.assertNotEqual(surface.content_hash, plain.content_hash)
+
+    def test_surveys(self):
+        """
+        Проверяет, что точки инклинометрии сгущаются вблизи повернутой поверхности, а пересечение
+        совпадает с пересечением плотно заданной траектории.
+        """
+        surface = make_surface()
+        survey = Survey([0.0, 100.0, 200.0], [0.0, 30.0, 60.0], [10.0, 10.0, 10.0], origin=(3.0, 6.0, -40.0))
+        result = TrajectoryProcessor(surface, candidate_flag=2).intersect_surveys([survey], tolerance=0.01)
+        md = np.linspace(0.0, 200.0, 20001)
+        dense = TrajectoryBatch.from_lists([survey.interpolate(md)])
+        expected = TrajectoryProcessor(surface, candidate_flag=2).intersect_batch(dense)
+        self.assertEqual(len(result), 1)
+        np.testing.assert_allclose(result.xyz, expected.xyz, atol=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from src.intersection_result import COLUMNS, IntersectionResult
+
+
+class TestIntersectionResult(unittest.TestCase):
+    """
+    Тесты для столбцового представления пересечений.
+    """
+
+    def setUp(self):
+        self.result = IntersectionResult(
+            trajectory=[0, 0, 2], segment=[1, 3, 0], cell_i=[4, 5, 6], cell_j=[7, 8, 9], t=[0.5, 0.25, 1.0],
+            xyz=[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]], trajectory_count=4, ids=["A", "B", "C", "D"],
+        )
+
+    def test_to_lists(self):
+        """
+        Проверяет преобразование в формат calculate_intersections, включая траектории без пересечений.
+        """
+        self.assertEqual(self.result.to_lists(), [[(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)], [], [(7.0, 8.0, 9.0)], []])
+        np.testing.assert_array_equal(self.result.bounds(), [0, 2, 2, 3, 3])
+
+    def test_columns(self):
+        """
+        Проверяет набор и типы столбцов, а также столбец идентификаторов.
+        """
+        columns = self.result.columns()
+        self.assertEqual(list(columns), list(COLUMNS) + ["id"])
+        self.assertEqual(columns["trajectory"].dtype, np.int64)
+        np.testing.assert_array_equal(columns["z"], [3.0, 6.0, 9.0])
+        self.assertEqual(list(columns["id"]), ["A", "A", "C"])
+
+    def test_empty(self):
+        """
+        Проверяет пустой результат.
+        """
+        result = IntersectionResult.empty(2)
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.to_lists(), [[], []])
+        self.assertNotIn("id", result.columns())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.grid_rotation import GridRotation
+from src.irap import convert_irap_to_tiles, load_surface_cache, read_irap, read_irap_header
+
+IRAP_TEXT = """-996 3 10.0 5.0
+100.0 120.0 200.0 210.0
+3 0.0 100.0 200.0
+0 0 0 0 0 0 0
+1.0 2.0 3.0
+4.0 9999900.0 6.0
+7.0 8.0
+9.0
+"""
+
+
+class TestIrapReader(unittest.TestCase):
+    """
+    Тесты для чтения поверхностей IRAP ASCII.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "surface.irap")
+        with open(self.filename, "w") as irap_file:
+            irap_file.write(IRAP_TEXT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_header(self):
+        """
+        Проверяет разбор заголовка.
+        """
+        with open(self.filename) as irap_file:
+            header = read_irap_header(irap_file)
+            self.assertEqual(irap_file.readline().split(), ["1.0", "2.0", "3.0"])
+        self.assertEqual((header.x_cnt, header.y_cnt), (3, 3))
+        self.assertEqual((header.x_min, header.x_max, header.y_min, header.y_max), (100.0, 120.0, 200.0, 210.0))
+
+    def test_read_irap(self):
+        """
+        Проверяет, что высоты транспонируются в форму (x_cnt, y_cnt), а значение 9999900 заменяется на NaN.
+        """
+        surface = read_irap(self.filename)
+        np.testing.assert_array_equal(surface.x_coords, [100.0, 110.0, 120.0])
+        np.testing.assert_array_equal(surface.y_coords, [200.0, 205.0, 210.0])
+        np.testing.assert_array_equal(surface.heights, [
+            [1.0, 4.0, 7.0],
+            [2.0, np.nan, 8.0],
+            [3.0, 6.0, 9.0],
+        ])
+        self.assertTrue(surface.x_axis.uniform and surface.y_axis.uniform)
+
+    def test_value_count_mismatch(self):
+        """
+        Проверяет ошибку при числе значений, не совпадающем с заголовком.
+        """
+        with open(self.filename, "a") as irap_file:
+            irap_file.write("10.0\n")
+        with self.assertRaises(ValueError):
+            read_irap(self.filename)
+
+    def test_rotated_grid(self):
+        """
+        Проверяет, что поворот из заголовка сохраняется в поверхности, кэше и файле тайлов без пересчета сетки.
+        """
+        with open(self.filename, "w") as irap_file:
+            irap_file.write(IRAP_TEXT.replace("3 0.0 100.0 200.0", "3 30.0 100.0 200.0"))
+        surface = read_irap(self.filename, use_cache=True)
+        self.assertEqual(surface.rotation, GridRotation(30.0, 100.0, 200.0))
+        np.testing.assert_array_equal(surface.x_coords, [100.0, 110.0, 120.0])
+        self.assertEqual(load_surface_cache(self.filename + ".npy", source=self.filename).rotation, surface.rotation)
+        tiles_path = os.path.join(self.directory.name, "tiles.npy")
+        tiled = convert_irap_to_tiles(self.filename, tiles_path, tile_size=2, block_size=2)
+        self.assertEqual(tiled.rotation, surface.rotation)
+        self.assertIsNone(read_irap_header(io.StringIO(IRAP_TEXT)).rotation)
+
+    def test_compact_storage(self):
+        """
+        Проверяет чтение высот в float32 и то, что кэш в другом режиме хранения не используется.
+        """
+        read_irap(self.filename, use_cache=True)
+        surface = read_irap(self.filename, use_cache=True, storage="compact")
+        self.assertEqual(surface.storage, "compact")
+        self.assertEqual(surface.heights.dtype, np.float32)
+        self.assertEqual(load_surface_cache(self.filename + ".npy", source=self.filename).storage, "compact")
+        np.testing.assert_array_equal(surface.heights, read_irap(self.filename).heights)
+
+    def test_binary_cache(self):
+        """
+        Проверяет, что кэш создается при первом чтении, отображается в память при повторном
+        и не используется после изменения исходного файла.
+        """
+        expected = read_irap(self.filename)
+        read_irap(self.filename, use_cache=True)
+        self.assertTrue(os.path.exists(self.filename + ".npy"))
+
+        cached = load_surface_cache(self.filename + ".npy", source=self.filename)
+        self.assertIsInstance(np.load(self.filename + ".npy", mmap_mode="r"), np.memmap)
+        np.testing.assert_array_equal(cached.heights, expected.heights)
+        np.testing.assert_array_equal(cached.x_coords, expected.x_coords)
+        np.testing.assert_array_equal(read_irap(self.filename, use_cache=True).heights, expected.heights)
+
+        with open(self.filename, "w") as irap_file:
+            irap_file.write(IRAP_TEXT.replace("1.0 2.0 3.0", "1.0 2.0 30.0"))
+        os.utime(self.filename, ns=(0, 0))
+        self.assertIsNone(load_surface_cache(self.filename + ".npy", source=self.filename))
+        self.assertEqual(read_irap(self.filename, use_cache=True).heights[2, 0], 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
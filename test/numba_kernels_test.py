@@ -0,0 +1,107 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.numba_kernels import MODE_BILINEAR, MODE_PLANE, NUMBA_AVAILABLE, fused_segment_hits
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def make_case(seed: int = 0):
+    """Создает поверхность с пустыми узлами и набор наклонных траекторий, пересекающих ее."""
+    rng = np.random.default_rng(seed)
+    x_coords = np.cumsum(rng.uniform(5.0, 15.0, 30))
+    y_coords = np.cumsum(rng.uniform(5.0, 15.0, 25))
+    xx, yy = np.meshgrid(x_coords, y_coords, indexing="ij")
+    heights = 8.0 * np.sin(xx / 40.0) * np.cos(yy / 30.0)
+    heights[rng.random(heights.shape) < 0.05] = np.nan
+    surface = PreparedSurface(x_coords, y_coords, heights)
+
+    trajectories = []
+    for _ in range(40):
+        start = rng.uniform(x_coords[0] - 20.0, x_coords[-1] + 20.0, 2)
+        end = rng.uniform(x_coords[0], x_coords[-1], 2)
+        xy = start + np.outer(np.linspace(0.0, 1.0, 25), end - start)
+        z = 20.0 - 40.0 * np.linspace(0.0, 1.0, 25) + 6.0 * np.sin(np.linspace(0.0, 12.0, 25))
+        trajectories.append(np.column_stack([xy, z]))
+    # Вертикальная скважина точно через узел сетки и отрезок вдоль линии сетки.
+    trajectories.append(np.array([[x_coords[5], y_coords[7], 30.0], [x_coords[5], y_coords[7], -30.0]]))
+    trajectories.append(np.array([[x_coords[3], y_coords[2], 10.0], [x_coords[3], y_coords[20], -10.0]]))
+    return surface, TrajectoryBatch.from_lists(trajectories)
+
+
+class TestNumbaKernels(unittest.TestCase):
+    """
+    Тесты для объединенного ядра обхода ячеек и пересечения с ними.
+    """
+
+    def assert_same_hits(self, expected, actual):
+        for column in ("trajectory", "segment", "cell_i", "cell_j"):
+            np.testing.assert_array_equal(getattr(actual, column), getattr(expected, column))
+        np.testing.assert_array_equal(actual.t, expected.t)
+        np.testing.assert_array_equal(actual.xyz, expected.xyz)
+
+    def test_kernel_matches_numpy(self):
+        """
+        Проверяет, что ядро (скомпилированное или, без numba, обычная функция Python) дает те же пересечения
+        и счетчики, что обход traverse_grid_cells_batch с решением по плоскостям и патчам, в том числе
+        для компактной поверхности с блоками 4 x 4 ячейки на уровне 0 пирамиды.
+        """
+        base, batch = make_case()
+        start, end = batch.points[:-1], batch.points[1:]
+        cases = [(storage, surface_mode, mode) for storage in ("float64", "compact")
+                 for surface_mode, mode in (("plane", MODE_PLANE), ("bilinear", MODE_BILINEAR))]
+        for storage, surface_mode, mode in cases:
+            with self.subTest(storage=storage, surface_mode=surface_mode):
+                surface = PreparedSurface.from_surface(base, storage)
+                stats = ProcessorStats()
+                processor = TrajectoryProcessor(surface, surface_mode=surface_mode, stats=stats)
+                expected = processor._bilinear_hits(start, end) if mode == MODE_BILINEAR \
+                    else processor._plane_hits(start, end)
+                pyramid = surface.pyramid
+                *actual, counters = fused_segment_hits(
+                    start, end, surface.x_coords, surface.y_coords, surface.heights,
+                    pyramid.levels_min[0], pyramid.levels_max[0], pyramid.block_shift, mode)
+                self.assertGreater(expected[0].size, 0)
+                for expected_column, actual_column in zip(expected, actual):
+                    np.testing.assert_array_equal(actual_column, expected_column)
+                self.assertEqual(counters.tolist(), [stats.counters[name] for name in (
+                    "cells_traversed", "cells_culled", "plane_fits", "rejected_by_rectangle")])
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "numba не установлена")
+    def test_numba_backend(self):
+        """
+        Проверяет, что процессор с backend="numba" дает те же результаты и счетчики, что с backend="numpy",
+        для поверхностей в обоих режимах хранения.
+        """
+        base, batch = make_case(seed=1)
+        for storage, surface_mode in ((storage, mode) for storage in ("float64", "compact")
+                                      for mode in ("plane", "bilinear")):
+            with self.subTest(storage=storage, surface_mode=surface_mode):
+                surface = PreparedSurface.from_surface(base, storage)
+                numpy_stats, numba_stats = ProcessorStats(), ProcessorStats()
+                expected = TrajectoryProcessor(surface, surface_mode=surface_mode, stats=numpy_stats) \
+                    .intersect_batch(batch)
+                actual = TrajectoryProcessor(surface, surface_mode=surface_mode, stats=numba_stats,
+                                             backend="numba").intersect_batch(batch)
+                self.assertGreater(len(expected), 0)
+                self.assert_same_hits(expected, actual)
+                self.assertEqual(numba_stats.counters, numpy_stats.counters)
+
+    def test_backend_selection(self):
+        """
+        Проверяет ошибку для неизвестной реализации и переход на numpy, если numba не установлена.
+        """
+        with self.assertRaises(ValueError):
+            TrajectoryProcessor(backend="cuda")
+        with mock.patch("src.trajectoryProcessor.NUMBA_AVAILABLE", False):
+            with self.assertWarns(RuntimeWarning):
+                processor = TrajectoryProcessor(backend="numba")
+        self.assertEqual(processor.backend, "numpy")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from src.packed_mask import PackedMask
+
+
+class TestPackedMask(unittest.TestCase):
+    """
+    Тесты для булева массива, упакованного по биту на элемент.
+    """
+
+    def setUp(self):
+        self.mask = np.random.default_rng(0).random((13, 7)) < 0.3
+        self.packed = PackedMask(self.mask)
+
+    def test_lookup(self):
+        """
+        Проверяет выборку по массивам индексов и по одному элементу, распаковку и подсчет.
+        """
+        i, j = np.nonzero(np.ones_like(self.mask))
+        np.testing.assert_array_equal(self.packed[i, j], self.mask[i, j])
+        self.assertEqual(bool(self.packed[12, 6]), self.mask[12, 6])
+        np.testing.assert_array_equal(self.packed.unpack(), self.mask)
+        self.assertEqual(self.packed.sum(), self.mask.sum())
+        self.assertEqual(self.packed.nbytes, 12)
+        self.assertTrue(self.packed.any())
+        self.assertFalse(self.packed.all())
+        self.assertTrue(PackedMask(np.ones((3, 3), dtype=bool)).all())
+
+    def test_out_of_bounds(self):
+        """
+        Проверяет ошибку для индекса вне массива.
+        """
+        with self.assertRaises(ValueError):
+            self.packed[np.array([13]), np.array([0])]
+
+
+if __name__ == "__main__":
+    unittest.main()
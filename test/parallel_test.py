@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.numba_kernels import NUMBA_AVAILABLE
+from src.parallel import calculate_intersections_parallel
+from src.result_cache import ResultCache
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def make_case():
+    """Создает волнистую поверхность и набор наклонных траекторий, часть которых ее пересекает."""
+    coords = np.linspace(0.0, 100.0, 51)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    surface = PreparedSurface(coords, coords, 5.0 * np.sin(xx / 10.0) * np.cos(yy / 15.0))
+
+    rng = np.random.default_rng(0)
+    trajectories = []
+    for _ in range(23):
+        start = rng.uniform(5.0, 95.0, 2)
+        end = rng.uniform(5.0, 95.0, 2)
+        t = np.linspace(0.0, 1.0, 30)
+        xy = start + np.outer(t, end - start)
+        trajectories.append(np.column_stack([xy, np.linspace(20.0, -20.0, 30)]).tolist())
+    return surface, trajectories
+
+
+class TestCalculateIntersectionsParallel(unittest.TestCase):
+    """
+    Тесты для параллельного расчета пересечений.
+    """
+
+    def test_matches_serial(self):
+        """
+        Проверяет, что параллельный расчет возвращает те же пересечения в том же порядке, что и последовательный.
+        """
+        surface, trajectories = make_case()
+        expected = TrajectoryProcessor(surface).calculate_intersections({"trajectories": trajectories})
+        self.assertGreater(sum(len(item) for item in expected), 0)
+
+        self.assertEqual(calculate_intersections_parallel(surface, trajectories, workers=1), expected)
+        self.assertEqual(calculate_intersections_parallel(surface, trajectories, workers=2, chunk_size=4), expected)
+
+    def test_processor_options(self):
+        """
+        Проверяет, что метод отбора кандидатов, реализация, статистика и кэш передаются рабочим процессам:
+        горизонтальные отрезки над волнами поверхности находятся только с candidate_flag=2,
+        счетчики совпадают с последовательным расчетом, а записи кэша на диске доступны после расчета.
+        """
+        surface, trajectories = make_case()
+        trajectories += [[[0.0, y, 2.0], [100.0, y, 2.0]] for y in (0.5, 12.0, 31.0)]
+        serial_stats, parallel_stats = ProcessorStats(), ProcessorStats()
+        expected = TrajectoryProcessor(surface, stats=serial_stats, candidate_flag=2).calculate_intersections(
+            {"trajectories": trajectories})
+        self.assertNotEqual(expected, TrajectoryProcessor(surface).calculate_intersections(
+            {"trajectories": trajectories}))
+
+        with tempfile.TemporaryDirectory() as directory:
+            actual = calculate_intersections_parallel(
+                surface, trajectories, workers=2, chunk_size=4, stats=parallel_stats, candidate_flag=2,
+                backend="numba" if NUMBA_AVAILABLE else "numpy", cache=ResultCache(directory=directory))
+            self.assertEqual(actual, expected)
+            for name in ("points", "segments", "candidate_segments", "accepted_intersections"):
+                self.assertEqual(parallel_stats.counters[name], serial_stats.counters[name])
+            self.assertEqual(parallel_stats.counters["calls"], 7)
+
+            cache = ResultCache(directory=directory)
+            cached = TrajectoryProcessor(surface, candidate_flag=2, cache=cache).calculate_intersections(
+                {"trajectories": trajectories})
+            self.assertEqual(cached, expected)
+            self.assertEqual(cache.memory_footprint()["disk_hits"], len(trajectories))
+
+    def test_compact_storage(self):
+        """
+        Проверяет параллельный расчет по компактной поверхности: рабочие процессы получают высоты float32,
+        упакованные маски и пирамиду из блоков через разделяемую память.
+        """
+        surface, trajectories = make_case()
+        compact = PreparedSurface.from_surface(surface, "compact")
+        expected = TrajectoryProcessor(compact).calculate_intersections({"trajectories": trajectories})
+        self.assertEqual(calculate_intersections_parallel(compact, trajectories, workers=2, chunk_size=4), expected)
+
+    def test_surface_stack(self):
+        """
+        Проверяет параллельный расчет по набору горизонтов SurfaceStack: рабочие процессы восстанавливают набор
+        по общему массиву высот и массивам горизонтов в разделяемой памяти, результат совпадает с последовательным.
+        """
+        surface, trajectories = make_case()
+        stack = SurfaceStack(surface.x_coords, surface.y_coords,
+                             np.stack([surface.heights + shift for shift in (-8.0, 0.0, 8.0)]), names=["a", "b", "c"])
+        for surface_mode in ("plane", "bilinear"):
+            with self.subTest(surface_mode=surface_mode):
+                expected = TrajectoryProcessor(stack, surface_mode=surface_mode).calculate_intersections(
+                    {"trajectories": trajectories})
+                self.assertGreater(sum(len(item) for item in expected), sum(
+                    len(item) for item in TrajectoryProcessor(surface).calculate_intersections(
+                        {"trajectories": trajectories})))
+                actual = calculate_intersections_parallel(
+                    stack, trajectories, workers=2, chunk_size=4, surface_mode=surface_mode)
+                self.assertEqual(actual, expected)
+
+    def test_tiled_surface(self):
+        """
+        Проверяет параллельный расчет по поверхности в файле тайлов: рабочие процессы открывают тот же файл.
+        """
+        surface, trajectories = make_case()
+        with tempfile.TemporaryDirectory() as directory:
+            tiled = TiledSurface.create(os.path.join(directory, "tiles.npy"), surface.x_coords, surface.y_coords,
+                                        surface.heights, tile_size=16, block_size=4, max_tiles=4)
+            expected = TrajectoryProcessor(tiled).calculate_intersections({"trajectories": trajectories})
+            actual = calculate_intersections_parallel(tiled, trajectories, workers=2, chunk_size=4)
+        self.assertGreater(sum(len(item) for item in expected), 0)
+        self.assertEqual(actual, expected)
+
+    def test_spawn_context(self):
+        """
+        Проверяет работу с рабочими процессами, запущенными методом spawn.
+        """
+        surface, trajectories = make_case()
+        expected = TrajectoryProcessor(surface, surface_mode="bilinear").calculate_intersections(
+            {"trajectories": trajectories})
+        actual = calculate_intersections_parallel(
+            surface, trajectories, workers=2, surface_mode="bilinear", mp_context=multiprocessing.get_context("spawn"))
+        self.assertEqual(actual, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
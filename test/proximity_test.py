@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.grid_rotation import GridRotation
+from src.proximity import COLUMNS, cell_patches
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+def make_surface(rotation=None) -> PreparedSurface:
+    """Создает волнистую поверхность на сетке 13 x 13 с шагом 5 и одним пустым узлом."""
+    coords = np.arange(0.0, 61.0, 5.0)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    heights = -100.0 + 8.0 * np.sin(xx / 12.0) * np.cos(yy / 9.0) + 0.3 * xx
+    heights[2, 9] = np.nan
+    return PreparedSurface(coords, coords, heights, rotation=rotation)
+
+
+def make_batch(count: int = 12, seed: int = 0) -> TrajectoryBatch:
+    """Создает наклонные и горизонтальные траектории из редких точек, часть которых пересекает поверхность."""
+    rng = np.random.default_rng(seed)
+    trajectories = []
+    for _ in range(count):
+        start = [*rng.uniform(2.0, 58.0, 2), rng.uniform(-120.0, -70.0)]
+        end = [*rng.uniform(2.0, 58.0, 2), start[2] + rng.uniform(-15.0, 15.0)]
+        trajectories.append(np.linspace(start, end, 4))
+    return TrajectoryBatch.from_lists(trajectories, ids=[f"well-{k}" for k in range(count)])
+
+
+def sample_surface(surface: PreparedSurface, surface_mode: str, steps: int = 21) -> np.ndarray:
+    """Возвращает точки поверхности в модели surface_mode на равномерной сетке steps x steps в каждой ячейке."""
+    cell_i, cell_j = (index.ravel() for index in np.meshgrid(
+        np.arange(surface.x_coords.size - 1), np.arange(surface.y_coords.size - 1), indexing="ij"))
+    patches, bounds = cell_patches(surface, cell_i, cell_j, surface_mode)
+    u, v = (value.ravel() for value in np.meshgrid(np.linspace(0, 1, steps), np.linspace(0, 1, steps), indexing="ij"))
+    a0, a1, a2, a3 = (patches[:, k, None] for k in range(4))
+    points = np.stack([bounds[:, 0, None] + u * (bounds[:, 1] - bounds[:, 0])[:, None],
+                       bounds[:, 2, None] + v * (bounds[:, 3] - bounds[:, 2])[:, None],
+                       a0 + a1 * u + a2 * v + a3 * u * v], axis=2).reshape(-1, 3)
+    return points[~np.isnan(points[:, 2])]
+
+
+class TestClosestApproach(unittest.TestCase):
+    """
+    Тесты для поиска наибольшего сближения траекторий с поверхностью.
+    """
+
+    def test_inclined_plane(self):
+        """
+        Проверяет вертикальное и истинное расстояние до плоскости z = x - 100 с наклоном 45 градусов:
+        для вертикальной скважины ближайшая точка поверхности лежит в другой ячейке, пересекающая
+        скважина дает ноль, а скважина вне сетки - NaN и -1.
+        """
+        coords = np.arange(0.0, 101.0, 5.0)
+        xx, _ = np.meshgrid(coords, coords, indexing="ij")
+        surface = PreparedSurface(coords, coords, xx - 100.0)
+        batch = TrajectoryBatch.from_lists([[[50, 50, 0], [50, 50, -20]], [[10, 10, -95], [90, 10, -95]],
+                                            [[200, 200, 0], [200, 200, -10]], [[50, 50, 0], [50, 50, -90]]])
+        for surface_mode in ("plane", "bilinear"):
+            result = TrajectoryProcessor(surface, surface_mode=surface_mode).closest_approach(batch)
+            np.testing.assert_allclose(result.vertical_distance, [30.0, -5.0, np.nan, 0.0], atol=1e-9)
+            np.testing.assert_allclose(result.true_distance, [30.0, 5.0, np.nan, 0.0] / np.array(
+                [np.sqrt(2.0), np.sqrt(2.0), 1.0, 1.0]), atol=1e-6)
+            np.testing.assert_allclose(result.xyz[[0, 1, 3]], [[50, 50, -20], [10, 10, -95], [50, 50, -50]])
+            np.testing.assert_allclose(result.true_surface_xyz[0], [65.0, 50.0, -35.0], atol=1e-6)
+            np.testing.assert_array_equal(result.segment, [0, 0, -1, 0])
+            np.testing.assert_array_equal(result.cell_i[[0, 1]], [10, 2])
+            self.assertEqual(result.true_cell_i[2], -1)
+
+    def test_matches_sampling(self):
+        """
+        Проверяет, что вертикальное и истинное расстояния не больше найденных перебором плотно
+        заданных точек траекторий и поверхности и отличаются от них не больше чем на шаг перебора.
+        """
+        surface, batch = make_surface(), make_batch()
+        dense = [np.concatenate([np.linspace(start, end, 201) for start, end in zip(trajectory[:-1], trajectory[1:])])
+                 for trajectory in (batch.trajectory(k) for k in range(len(batch)))]
+        for surface_mode in ("plane", "bilinear"):
+            processor = TrajectoryProcessor(surface, surface_mode=surface_mode)
+            result = processor.closest_approach(batch)
+            vertical = processor.closest_approach(TrajectoryBatch.from_lists(dense), true_distance=False)
+            self.assertTrue(np.any(result.vertical_distance != 0.0))
+            surface_points = sample_surface(surface, surface_mode)
+            for k in range(len(batch)):
+                self.assertLessEqual(abs(result.vertical_distance[k]), abs(vertical.vertical_distance[k]) + 1e-9)
+                self.assertGreater(abs(result.vertical_distance[k]), abs(vertical.vertical_distance[k]) - 0.1)
+                if result.vertical_distance[k] == 0.0:
+                    self.assertEqual(result.true_distance[k], 0.0)
+                    continue
+                reach = abs(result.vertical_distance[k]) + 1.0
+                near = surface_points[np.all((surface_points > dense[k].min(axis=0) - reach)
+                                             & (surface_points < dense[k].max(axis=0) + reach), axis=1)]
+                sampled = np.sqrt(((dense[k][::2, None, :] - near[None]) ** 2).sum(axis=2)).min()
+                self.assertLessEqual(result.true_distance[k], sampled + 1e-9)
+                self.assertGreater(result.true_distance[k], sampled - 0.3)
+                self.assertLessEqual(result.true_distance[k], abs(result.vertical_distance[k]))
+
+    def test_columns_and_stats(self):
+        """
+        Проверяет столбцы результата, идентификаторы и счетчики отсева.
+        """
+        stats = ProcessorStats()
+        batch = make_batch()
+        result = TrajectoryProcessor(make_surface(), stats=stats).closest_approach(batch)
+        columns = result.columns()
+        self.assertEqual(list(columns)[:len(COLUMNS)], list(COLUMNS))
+        self.assertEqual(columns["id"][3], "well-3")
+        np.testing.assert_array_equal(columns["surface_z"], result.surface_z)
+        self.assertEqual(len(result), len(batch))
+        self.assertGreater(stats.counters["proximity_segments_pruned"], 0)
+        self.assertGreater(stats.stage_seconds["proximity"], 0.0)
+        with self.assertRaises(ValueError):
+            TrajectoryProcessor(SurfaceStack.from_surfaces([make_surface()])).closest_approach(batch)
+
+    def test_rotated_and_tiled(self):
+        """
+        Проверяет, что для повернутой поверхности и поверхности в файле тайлов результат совпадает
+        с расчетом по обычной поверхности в системе координат сетки.
+        """
+        rotation = GridRotation(30.0, 10.0, 20.0)
+        batch = make_batch()
+        local = TrajectoryBatch(rotation.to_local(batch.points), batch.offsets)
+        expected = TrajectoryProcessor(make_surface()).closest_approach(local)
+
+        rotated = TrajectoryProcessor(make_surface(rotation)).closest_approach(batch)
+        np.testing.assert_allclose(rotated.vertical_distance, expected.vertical_distance, atol=1e-9)
+        np.testing.assert_allclose(rotated.true_distance, expected.true_distance, atol=1e-9)
+        np.testing.assert_allclose(rotated.true_surface_xyz, rotation.to_world(expected.true_surface_xyz), atol=1e-9)
+
+        surface = make_surface()
+        with tempfile.TemporaryDirectory() as directory:
+            tiled = TiledSurface.create(os.path.join(directory, "tiles.npy"), surface.x_coords, surface.y_coords,
+                                        surface.heights, tile_size=4, block_size=2)
+            result = TrajectoryProcessor(tiled).closest_approach(local)
+        np.testing.assert_allclose(result.vertical_distance, expected.vertical_distance, atol=1e-9)
+        np.testing.assert_allclose(result.true_distance, expected.true_distance, atol=1e-9)
+        np.testing.assert_array_equal(result.true_segment, expected.true_segment)
+
+
+if __name__ == "__main__":
+    unittest.main()
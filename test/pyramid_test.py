@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from src.pyramid import MinMaxPyramid
+from src.surface import PreparedSurface
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+    """
+    Тесты для пирамиды минимумов и максимумов высот.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.cell_min = rng.normal(0.0, 10.0, (37, 23))
+        self.cell_max = self.cell_min + rng.uniform(0.0, 5.0, self.cell_min.shape)
+        self.cell_min[rng.random(self.cell_min.shape) < 0.1] = np.nan
+        self.cell_max[np.isnan(self.cell_min)] = np.nan
+        self.pyramid = MinMaxPyramid(self.cell_min, self.cell_max)
+
+    def test_levels(self):
+        """
+        Проверяет, что каждый уровень вдвое меньше предыдущего, а верхний уровень содержит глобальную оболочку.
+        """
+        self.assertEqual(self.pyramid.levels_min[1].shape, (19, 12))
+        self.assertEqual(self.pyramid.levels_min[-1].shape, (1, 1))
+        self.assertEqual(self.pyramid.levels_min[-1][0, 0], np.nanmin(self.cell_min))
+        self.assertEqual(self.pyramid.levels_max[-1][0, 0], np.nanmax(self.cell_max))
+        self.assertGreater(self.pyramid.nbytes, self.cell_min.nbytes * 2)
+
+    def test_envelope_is_conservative(self):
+        """
+        Проверяет, что оболочка прямоугольника никогда не уже точной оболочки его ячеек.
+        """
+        rng = np.random.default_rng(2)
+        i0 = rng.integers(0, 37, 200)
+        i1 = np.minimum(i0 + rng.integers(0, 37, 200), 36)
+        j0 = rng.integers(0, 23, 200)
+        j1 = np.minimum(j0 + rng.integers(0, 23, 200), 22)
+        env_min, env_max = self.pyramid.envelope(i0, i1, j0, j1)
+        for k in range(200):
+            block_min = self.cell_min[i0[k]:i1[k] + 1, j0[k]:j1[k] + 1]
+            block_max = self.cell_max[i0[k]:i1[k] + 1, j0[k]:j1[k] + 1]
+            if np.isnan(block_min).all():
+                continue
+            self.assertLessEqual(env_min[k], np.nanmin(block_min))
+            self.assertGreaterEqual(env_max[k], np.nanmax(block_max))
+
+    def test_single_cell_is_exact(self):
+        """
+        Проверяет, что оболочка одной ячейки совпадает с ее значениями, а пустая ячейка дает NaN.
+        """
+        i, j = np.nonzero(~np.isnan(self.cell_min))
+        env_min, env_max = self.pyramid.envelope(i, i, j, j)
+        np.testing.assert_array_equal(env_min, self.cell_min[i, j])
+        np.testing.assert_array_equal(env_max, self.cell_max[i, j])
+
+        i, j = np.nonzero(np.isnan(self.cell_min))
+        env_min, _ = self.pyramid.envelope(i[:1], i[:1], j[:1], j[:1])
+        self.assertTrue(np.isnan(env_min[0]))
+
+    def test_overlaps(self):
+        """
+        Проверяет проверку пересечения диапазона высот с оболочкой.
+        """
+        top = self.pyramid.levels_max[-1][0, 0]
+        result = self.pyramid.overlaps([0, 0], [36, 36], [0, 0], [22, 22], [top + 1, top - 1], [top + 2, top + 1])
+        np.testing.assert_array_equal(result, [False, True])
+
+    def test_float32_levels(self):
+        """
+        Проверяет, что уровни float32 округляются наружу: минимумы не больше, максимумы не меньше значений float64.
+        """
+        pyramid = MinMaxPyramid(self.cell_min, self.cell_max, dtype=np.float32)
+        valid = ~np.isnan(self.cell_min)
+        self.assertEqual(pyramid.nbytes * 2, self.pyramid.nbytes)
+        self.assertTrue(np.all(pyramid.levels_min[0][valid] <= self.cell_min[valid]))
+        self.assertTrue(np.all(pyramid.levels_max[0][valid] >= self.cell_max[valid]))
+        self.assertTrue(np.all(np.isnan(pyramid.levels_min[0][~valid])))
+        self.assertLessEqual(pyramid.levels_min[-1][0, 0], self.pyramid.levels_min[-1][0, 0])
+
+    def test_plane_padding(self):
+        """
+        Проверяет расширение оболочки ячейки на отклонение плоскости наименьших квадратов от углов.
+        """
+        surface = PreparedSurface([0.0, 1.0], [0.0, 1.0], [[0.0, 0.0], [0.0, 1.0]])
+        self.assertEqual(MinMaxPyramid.from_surface(surface).levels_min[0][0, 0], -0.25)
+        self.assertEqual(MinMaxPyramid.from_surface(surface, plane_padding=False).levels_min[0][0, 0], 0.0)
+        self.assertTrue(surface.pyramid.cell_overlaps(0, 0, 1.1, 1.2))
+        self.assertFalse(surface.pyramid.cell_overlaps(0, 0, 1.3, 1.4))
+
+
+if __name__ == "__main__":
+    unittest.main()
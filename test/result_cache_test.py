@@ -0,0 +1,119 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.result_cache import ENTRY_OVERHEAD_BYTES, ResultCache, content_hash
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+from test.batch_engine_test import make_random_case
+
+COLUMNS = ("trajectory", "segment", "cell_i", "cell_j", "t", "xyz")
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Тесты для кэша результатов.
+    """
+
+    def test_lru_by_bytes(self):
+        """
+        Проверяет вытеснение давно не использованных записей при превышении объема и статистику попаданий.
+        """
+        entry = {"t": np.zeros(100)}
+        cache = ResultCache(max_bytes=2 * (ENTRY_OVERHEAD_BYTES + 800))
+        cache.put("a", entry)
+        cache.put("b", entry)
+        self.assertIs(cache.get("a"), entry)
+        cache.put("c", entry)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+        footprint = cache.memory_footprint()
+        self.assertEqual((footprint["hits"], footprint["misses"], footprint["evictions"]), (1, 1, 1))
+        self.assertLessEqual(footprint["bytes"], cache.max_bytes)
+
+    def test_disk_backend(self):
+        """
+        Проверяет, что записи на диске доступны другому экземпляру кэша.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            ResultCache(directory=directory).put("key", {"t": np.arange(3.0)})
+            ResultCache(directory=directory).put(("memory", b"only"), {"t": np.arange(3.0)})
+            cache = ResultCache(directory=directory)
+            np.testing.assert_array_equal(cache.get("key")["t"], [0.0, 1.0, 2.0])
+            self.assertIsNone(cache.get(("memory", b"only")))
+            self.assertEqual(cache.disk_hits, 1)
+
+    def test_content_hash(self):
+        """
+        Проверяет, что хеш зависит от значений, формы и префикса.
+        """
+        values = np.arange(6.0)
+        self.assertEqual(content_hash(values), content_hash(values.copy()))
+        self.assertNotEqual(content_hash(values), content_hash(values.reshape(2, 3)))
+        self.assertNotEqual(content_hash(values), content_hash(values, prefix=b"plane"))
+
+
+class TestProcessorCache(unittest.TestCase):
+    """
+    Тесты для расчета пересечений с кэшем результатов.
+    """
+
+    def assert_same(self, expected, actual):
+        for column in COLUMNS:
+            np.testing.assert_array_equal(getattr(actual, column), getattr(expected, column))
+
+    def test_cached_results_match(self):
+        """
+        Проверяет, что результаты с кэшем совпадают с расчетом без него, повторный вызов берет все траектории
+        из кэша, а после изменения одной точки пересчитываются только два соседних с ней отрезка.
+        """
+        surface, trajectories = make_random_case(5)
+        batch = TrajectoryBatch.from_lists(trajectories)
+        cache = ResultCache()
+        processor = TrajectoryProcessor(surface, cache=cache)
+        expected = TrajectoryProcessor(surface).intersect_batch(batch)
+        self.assertGreater(len(expected), 0)
+        self.assert_same(expected, processor.intersect_batch(batch))
+        self.assert_same(expected, processor.intersect_batch(batch))
+        self.assertEqual(cache.hits, len(batch))
+
+        points = batch.points.copy()
+        points[batch.offsets[3] + 4, 2] += 1.5
+        edited = TrajectoryBatch(points, batch.offsets)
+        misses = cache.misses
+        self.assert_same(TrajectoryProcessor(surface).intersect_batch(edited), processor.intersect_batch(edited))
+        self.assertEqual(cache.misses - misses, 1 + 2)
+
+    def test_without_segment_entries(self):
+        """
+        Проверяет расчет с кэшем только траекторий: измененная траектория пересчитывается целиком.
+        """
+        surface, trajectories = make_random_case(7)
+        batch = TrajectoryBatch.from_lists(trajectories)
+        cache = ResultCache(segment_entries=False)
+        processor = TrajectoryProcessor(surface, cache=cache)
+        expected = TrajectoryProcessor(surface).intersect_batch(batch)
+        self.assert_same(expected, processor.intersect_batch(batch))
+        self.assert_same(expected, processor.intersect_batch(batch))
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (len(batch), len(batch), len(batch)))
+
+    def test_key_depends_on_surface_and_mode(self):
+        """
+        Проверяет, что кэш не возвращает результаты для другой поверхности или другого режима.
+        """
+        surface, trajectories = make_random_case(6)
+        batch = TrajectoryBatch.from_lists(trajectories)
+        cache = ResultCache()
+        TrajectoryProcessor(surface, cache=cache).intersect_batch(batch)
+
+        shifted = PreparedSurface(surface.x_coords, surface.y_coords, surface.heights + 0.5)
+        for processor in (TrajectoryProcessor(shifted, cache=cache),
+                          TrajectoryProcessor(surface, surface_mode="bilinear", cache=cache)):
+            expected = TrajectoryProcessor(processor.surface, surface_mode=processor.surface_mode).intersect_batch(batch)
+            self.assert_same(expected, processor.intersect_batch(batch))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+
+from src.segment_index import SegmentIndex
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch, segment_starts
+
+
+def make_batch(seed: int, count: int = 200) -> TrajectoryBatch:
+    """Создает набор случайных наклонных траекторий разной длины, в том числе пустых и из одной точки."""
+    rng = np.random.default_rng(seed)
+    trajectories = []
+    for _ in range(count):
+        n = int(rng.integers(0, 12))
+        start, end = rng.uniform(-50.0, 150.0, 2), rng.uniform(-50.0, 150.0, 2)
+        xy = start + np.outer(np.linspace(0.0, 1.0, n), end - start)
+        trajectories.append(np.column_stack([xy, rng.uniform(-30.0, 30.0, n)]))
+    return TrajectoryBatch.from_lists(trajectories)
+
+
+class TestSegmentIndex(unittest.TestCase):
+    """
+    Тесты для R-дерева отрезков траекторий.
+    """
+
+    def test_query_matches_brute_force(self):
+        """
+        Проверяет, что запрос возвращает ровно те отрезки, параллелепипед которых пересекается с заданным.
+        """
+        batch = make_batch(0)
+        starts = segment_starts(batch.offsets)
+        a, b = batch.points[starts], batch.points[starts + 1]
+        segment_min, segment_max = np.minimum(a, b), np.maximum(a, b)
+
+        for capacity in (2, 4, 16):
+            index = SegmentIndex.from_batch(batch, node_capacity=capacity)
+            self.assertEqual(len(index), starts.size)
+            rng = np.random.default_rng(capacity)
+            for _ in range(20):
+                low = rng.uniform(-60.0, 100.0, 3)
+                high = low + rng.uniform(0.0, 80.0, 3)
+                expected = starts[((segment_min <= high) & (segment_max >= low)).all(axis=1)]
+                query = index.query(low, high)
+                np.testing.assert_array_equal(query.starts, expected)
+                self.assertEqual(query.pruned, starts.size - expected.size)
+                self.assertGreater(query.nodes_tested, 0)
+
+    def test_empty_batch(self):
+        """
+        Проверяет индекс без отрезков.
+        """
+        index = SegmentIndex.from_batch(TrajectoryBatch.from_lists([[[0.0, 0.0, 0.0]]]))
+        query = index.query((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+        self.assertEqual((query.starts.size, query.total, query.pruned), (0, 0, 0))
+
+    def test_intersect_batch_with_index(self):
+        """
+        Проверяет, что предварительный отбор по индексу не меняет результат intersect_batch.
+        """
+        coords = np.linspace(0.0, 100.0, 51)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        heights = 10.0 * np.sin(xx / 10.0) * np.cos(yy / 15.0)
+        heights[10:14, 20:25] = np.nan
+        processor = TrajectoryProcessor(PreparedSurface(coords, coords, heights))
+        batch = make_batch(1)
+        index = SegmentIndex.from_batch(batch)
+
+        expected = processor.intersect_batch(batch)
+        actual = processor.intersect_batch(batch, segment_index=index)
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(actual.to_lists(), expected.to_lists())
+        np.testing.assert_array_equal(actual.segment, expected.segment)
+        self.assertGreater(index.query_surface(processor.surface).pruned, 0)
+
+        with self.assertRaises(ValueError):
+            processor.intersect_batch(batch, segment_index=SegmentIndex.from_batch(make_batch(2, 10)))
+        shifted = TrajectoryBatch(batch.points + [1.0, 0.0, 0.0], batch.offsets)
+        self.assertEqual(len(SegmentIndex.from_batch(shifted)), len(index))
+        with self.assertRaises(ValueError):
+            processor.intersect_batch(batch, segment_index=SegmentIndex.from_batch(shifted))
+        self.assertTrue(index.matches(batch.points, batch.offsets))
+        self.assertFalse(index.matches(shifted.points, shifted.offsets))
+
+
+if __name__ == "__main__":
+    unittest.main()
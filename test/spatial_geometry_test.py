@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+
+from src.spatial_geometry import line_bilinear_intersection_parameters, line_plane_intersection_parameter, \
+    line_plane_intersection_parameters, segment_patch_closest_points
+
+
+class TestLinePlaneIntersectionParameters(unittest.TestCase):
+    """
+    Тесты для вычисления параметра t пересечения прямой и плоскости.
+    """
+
+    def test_scalar(self):
+        """
+        Проверяет пересечение, прямую в плоскости и параллельную прямую.
+        """
+        self.assertEqual(line_plane_intersection_parameter((0, 0, 1, 1), (0, 0, 1), (0, 0, -1)), 2.0)
+        self.assertEqual(line_plane_intersection_parameter((0, 0, 1, 0), (0, 0, 0), (1, 1, 0)), 0.0)
+        self.assertIsNone(line_plane_intersection_parameter((0, 0, 1, 1), (0, 0, 0), (1, 1, 0)))
+
+    def test_vectorized_matches_scalar(self):
+        """
+        Проверяет, что векторный вариант совпадает со скалярным, а плоскости с NaN дают NaN.
+        """
+        planes = np.array([[0, 0, 1, 1], [0, 0, 1, 0], [0, 0, 1, 1], [1, -1, 1, 0.5], [np.nan] * 4])
+        points = np.array([[0, 0, 1], [0, 0, 0], [0, 0, 0], [1, 2, 3], [0, 0, 0]], dtype=float)
+        dirs = np.array([[0, 0, -1], [1, 1, 0], [1, 1, 0], [0.5, 0.1, -2], [0, 0, 1]], dtype=float)
+        t = line_plane_intersection_parameters(planes, points, dirs)
+        for k in range(4):
+            expected = line_plane_intersection_parameter(tuple(planes[k]), tuple(points[k]), tuple(dirs[k]))
+            if expected is None:
+                self.assertTrue(np.isnan(t[k]))
+            else:
+                self.assertAlmostEqual(t[k], expected)
+        self.assertTrue(np.isnan(t[4]))
+
+
+class TestLineBilinearIntersectionParameters(unittest.TestCase):
+    """
+    Тесты для пересечения прямой с билинейным патчем.
+    """
+
+    cell = np.array([[0.0, 1.0, 0.0, 1.0]])
+
+    def test_flat_patch(self):
+        """
+        Проверяет пересечение вертикальной прямой с горизонтальным патчем.
+        """
+        roots = line_bilinear_intersection_parameters(
+            np.array([[1.0, 0.0, 0.0, 0.0]]), self.cell, np.array([[0.5, 0.5, 3.0]]), np.array([[0.0, 0.0, -4.0]]))
+        self.assertAlmostEqual(roots[0, 0], 0.5)
+        self.assertTrue(np.isnan(roots[0, 1]))
+
+    def test_double_crossing(self):
+        """
+        Проверяет, что горизонтальная прямая над седлом z = 4uv пересекает его дважды.
+        """
+        roots = line_bilinear_intersection_parameters(
+            np.array([[0.0, 0.0, 0.0, 4.0]]), self.cell, np.array([[0.0, 1.0, 0.75]]), np.array([[1.0, -1.0, 0.0]]))
+        np.testing.assert_allclose(roots[0], [0.25, 0.75])
+
+    def test_no_crossing(self):
+        """
+        Проверяет, что прямая, проходящая над патчем, не дает корней.
+        """
+        roots = line_bilinear_intersection_parameters(
+            np.array([[0.0, 0.0, 0.0, 4.0]]), self.cell, np.array([[0.0, 1.0, 2.0]]), np.array([[1.0, -1.0, 0.0]]))
+        self.assertTrue(np.isnan(roots).all())
+
+    def test_scaled_cell(self):
+        """
+        Проверяет пересечение для ячейки с ненулевым началом и неединичным размером.
+        """
+        cell = np.array([[10.0, 14.0, -2.0, 0.0]])
+        patch = np.array([[1.0, 2.0, 3.0, 4.0]])
+        point, direction = np.array([[11.0, -1.5, 10.0]]), np.array([[2.0, 1.0, -20.0]])
+        t = line_bilinear_intersection_parameters(patch, cell, point, direction)[0, 0]
+        x, y, z = point[0] + t * direction[0]
+        u, v = (x - 10.0) / 4.0, (y + 2.0) / 2.0
+        self.assertAlmostEqual(z, 1.0 + 2.0 * u + 3.0 * v + 4.0 * u * v)
+
+
+class TestSegmentPatchClosestPoints(unittest.TestCase):
+    """
+    Тесты для ближайших точек отрезка и патча.
+    """
+
+    cell = np.array([[0.0, 1.0, 0.0, 1.0]])
+
+    def test_plane(self):
+        """
+        Проверяет расстояние до наклонной плоскости z = u над горизонтальным отрезком, до края патча
+        сбоку от отрезка и до патча с NaN-коэффициентами.
+        """
+        patches = np.array([[0.0, 1.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [np.nan] * 4])
+        cells = np.repeat(self.cell, 3, axis=0)
+        points = np.array([[0.0, 0.0, 1.0], [3.0, 0.5, 1.0], [0.5, 0.5, 1.0]])
+        dirs = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 1.0]])
+        distance, t, u, v = segment_patch_closest_points(patches, cells, points, dirs)
+        np.testing.assert_allclose(distance[:2], [np.sqrt(0.5), 2.0])
+        np.testing.assert_allclose(u[:2], [0.5, 1.0])
+        np.testing.assert_allclose(t[1], 0.0)
+        self.assertTrue(np.isnan(distance[2]))
+
+    def test_saddle_matches_sampling(self):
+        """
+        Проверяет, что расстояние от наклонных отрезков до седла z = 4uv - 1 не больше найденного
+        перебором точек отрезка и патча и отличается от него не больше чем на шаг перебора.
+        """
+        rng = np.random.default_rng(0)
+        points = np.column_stack([rng.uniform(-0.5, 1.5, (20, 2)), rng.uniform(0.5, 1.5, 20)])
+        dirs = rng.normal(size=(20, 3)) * [1.0, 1.0, 0.2]
+        patches = np.repeat([[-1.0, 0.0, 0.0, 4.0]], 20, axis=0)
+        distance, _, _, _ = segment_patch_closest_points(patches, np.repeat(self.cell, 20, axis=0), points, dirs, 17)
+
+        grid = np.linspace(0.0, 1.0, 61)
+        uu, vv = (values.ravel() for values in np.meshgrid(grid, grid, indexing="ij"))
+        patch = np.column_stack([uu, vv, 4.0 * uu * vv - 1.0])
+        for k in range(20):
+            segment = points[k] + grid[:, None] * dirs[k]
+            sampled = np.sqrt(((segment[:, None, :] - patch[None, :, :]) ** 2).sum(axis=2)).min()
+            self.assertLessEqual(distance[k], sampled + 1e-9)
+            self.assertGreater(distance[k], sampled - 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
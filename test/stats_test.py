@@ -0,0 +1,102 @@
+import json
+import unittest
+
+import numpy as np
+
+from src.stats import COUNTERS, NULL_STATS, STAGES, NullStats, ProcessorStats
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+
+
+class TestProcessorStats(unittest.TestCase):
+    """
+    Тесты для статистики этапов и счетчиков.
+    """
+
+    def test_stage_and_count(self):
+        """
+        Проверяет накопление времени этапов и счетчиков, вызов callback, экспорт и сброс.
+        """
+        calls = []
+        stats = ProcessorStats(callback=lambda stage, seconds: calls.append((stage, seconds)))
+        for _ in range(2):
+            with stats.stage("boundary"):
+                pass
+        stats.count("points", 5)
+        stats.count("points", np.int64(2))
+
+        self.assertEqual([stage for stage, _ in calls], ["boundary", "boundary"])
+        self.assertAlmostEqual(stats.stage_seconds["boundary"], sum(seconds for _, seconds in calls))
+        exported = json.loads(stats.to_json())
+        self.assertEqual(exported["counters"]["points"], 7)
+        self.assertEqual(set(exported["stages"]), set(STAGES))
+        self.assertEqual(set(exported["counters"]), set(COUNTERS))
+
+        stats.reset()
+        self.assertEqual(stats.counters["points"], 0)
+
+    def test_null_stats(self):
+        """
+        Проверяет, что отключенная статистика ничего не накапливает.
+        """
+        with NULL_STATS.stage("boundary"):
+            NULL_STATS.count("points", 10)
+        self.assertFalse(NULL_STATS.enabled)
+        self.assertEqual(NULL_STATS.to_dict(), {"stages": {}, "counters": {}})
+
+    def test_disabled_stats_skip_counter_reductions(self):
+        """
+        Проверяет, что при отключенной статистике счетчики, требующие проходов по массивам
+        (segments, rejected_by_rectangle), не вычисляются.
+        """
+        class RecordingNullStats(NullStats):
+            def __init__(self):
+                self.names = []
+
+            def count(self, name, value=1):
+                self.names.append(name)
+
+        coords = np.linspace(0.0, 10.0, 11)
+        surface = PreparedSurface(coords, coords, np.zeros((11, 11)))
+        batch = TrajectoryBatch.from_lists([[[2.5, 2.5, 5.0], [7.5, 6.5, -5.0]]])
+        for surface_mode in ("plane", "bilinear"):
+            stats = RecordingNullStats()
+            result = TrajectoryProcessor(surface, surface_mode=surface_mode, stats=stats).intersect_batch(batch)
+            self.assertEqual(len(result), 1)
+            self.assertFalse({"calls", "points", "segments", "rejected_by_rectangle"} & set(stats.names))
+
+    def test_processor_counters(self):
+        """
+        Проверяет согласованность счетчиков процессора и то, что статистика не меняет результат.
+        """
+        coords = np.linspace(0.0, 100.0, 51)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        surface = PreparedSurface(coords, coords, 5.0 * np.sin(xx / 10.0) * np.cos(yy / 15.0))
+        rng = np.random.default_rng(0)
+        trajectories = []
+        for _ in range(20):
+            start, end = rng.uniform(5.0, 95.0, 2), rng.uniform(5.0, 95.0, 2)
+            xy = start + np.outer(np.linspace(0.0, 1.0, 15), end - start)
+            trajectories.append(np.column_stack([xy, np.linspace(20.0, -20.0, 15)]))
+        batch = TrajectoryBatch.from_lists(trajectories)
+
+        for surface_mode in ("plane", "bilinear"):
+            stats = ProcessorStats()
+            expected = TrajectoryProcessor(surface, surface_mode=surface_mode).intersect_batch(batch)
+            result = TrajectoryProcessor(surface, surface_mode=surface_mode, stats=stats).intersect_batch(batch)
+            self.assertEqual(result.to_lists(), expected.to_lists())
+
+            counters = stats.counters
+            self.assertEqual(counters["calls"], 1)
+            self.assertEqual(counters["points"], 300)
+            self.assertEqual(counters["segments"], 280)
+            self.assertEqual(counters["accepted_intersections"], len(result))
+            self.assertEqual(counters["cells_traversed"], counters["cells_culled"] + counters["plane_fits"])
+            self.assertLessEqual(counters["segments_culled"], counters["candidate_segments"])
+            self.assertGreater(counters["plane_fits"], 0)
+            self.assertTrue(all(stats.stage_seconds[stage] > 0.0 for stage in STAGES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.numba_kernels import NUMBA_AVAILABLE
+from src.result_cache import ResultCache
+from src.stats import ProcessorStats
+from src.streaming import iter_intersections, read_trajectories_csv
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+class TestIterIntersections(unittest.TestCase):
+    """
+    Тесты для потокового расчета пересечений.
+    """
+
+    def setUp(self):
+        coords = np.linspace(0.0, 100.0, 51)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        self.surface = PreparedSurface(coords, coords, 5.0 * np.sin(xx / 10.0) * np.cos(yy / 15.0))
+
+        rng = np.random.default_rng(1)
+        self.trajectories = []
+        for _ in range(7):
+            start, end = rng.uniform(5.0, 95.0, 2), rng.uniform(5.0, 95.0, 2)
+            xy = start + np.outer(np.linspace(0.0, 1.0, 20), end - start)
+            self.trajectories.append(np.column_stack([xy, np.linspace(20.0, -20.0, 20)]).tolist())
+
+    def test_matches_calculate_intersections(self):
+        """
+        Проверяет, что потоковый расчет по порциям совпадает с расчетом за один вызов и сохраняет порядок скважин.
+        """
+        expected = TrajectoryProcessor(self.surface).calculate_intersections({"trajectories": self.trajectories})
+        wells = ((f"W{k}", trajectory) for k, trajectory in enumerate(self.trajectories))
+        actual = list(iter_intersections(self.surface, wells, chunk_size=3))
+        self.assertEqual([well_id for well_id, _ in actual], [f"W{k}" for k in range(7)])
+        self.assertEqual([intersections for _, intersections in actual], expected)
+
+    def test_processor_options(self):
+        """
+        Проверяет, что метод отбора кандидатов, реализация, статистика и кэш передаются процессору:
+        горизонтальные отрезки над волнами поверхности находятся только с candidate_flag=2,
+        счетчики по всем порциям совпадают с расчетом за один вызов, а повторный расчет берется из кэша.
+        """
+        trajectories = self.trajectories + [[[0.0, y, 2.0], [100.0, y, 2.0]] for y in (0.5, 12.0, 31.0)]
+        serial_stats, streaming_stats = ProcessorStats(), ProcessorStats()
+        expected = TrajectoryProcessor(self.surface, stats=serial_stats, candidate_flag=2).calculate_intersections(
+            {"trajectories": trajectories})
+        self.assertNotEqual(expected, TrajectoryProcessor(self.surface).calculate_intersections(
+            {"trajectories": trajectories}))
+
+        cache = ResultCache()
+        actual = list(iter_intersections(
+            self.surface, enumerate(trajectories), chunk_size=4, stats=streaming_stats, candidate_flag=2,
+            backend="numba" if NUMBA_AVAILABLE else "numpy", cache=cache))
+        self.assertEqual([intersections for _, intersections in actual], expected)
+        for name in ("points", "segments", "candidate_segments", "accepted_intersections"):
+            self.assertEqual(streaming_stats.counters[name], serial_stats.counters[name])
+        self.assertEqual(streaming_stats.counters["calls"], 3)
+        misses = cache.memory_footprint()["misses"]
+        self.assertGreater(misses, 0)
+
+        cached = list(iter_intersections(self.surface, enumerate(trajectories), chunk_size=4, candidate_flag=2,
+                                         cache=cache))
+        self.assertEqual(cached, actual)
+        self.assertEqual(cache.memory_footprint()["misses"], misses)
+
+    def test_is_lazy(self):
+        """
+        Проверяет, что результаты первой порции выдаются до чтения следующих траекторий.
+        """
+        consumed = []
+
+        def source():
+            for k, trajectory in enumerate(self.trajectories):
+                consumed.append(k)
+                yield k, trajectory
+
+        next(iter_intersections(self.surface, source(), chunk_size=2))
+        self.assertEqual(consumed, [0, 1])
+
+
+class TestReadTrajectoriesCsv(unittest.TestCase):
+    """
+    Тесты для чтения траекторий из CSV.
+    """
+
+    def write_csv(self, text):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        filename = os.path.join(directory.name, "wells.csv")
+        with open(filename, "w") as csv_file:
+            csv_file.write(text)
+        return filename
+
+    def test_groups_rows_by_well(self):
+        """
+        Проверяет группировку строк подряд идущих скважин в траектории.
+        """
+        filename = self.write_csv("well,x,y,z\nA,0,0,1\nA,0,1,0\nB,5,5,5\n")
+        self.assertEqual(list(read_trajectories_csv(filename)), [
+            ("A", [[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]]),
+            ("B", [[5.0, 5.0, 5.0]]),
+        ])
+
+    def test_non_contiguous_well(self):
+        """
+        Проверяет ошибку, если строки скважины идут не подряд.
+        """
+        filename = self.write_csv("well,x,y,z\nA,0,0,1\nB,5,5,5\nA,0,1,0\n")
+        with self.assertRaises(ValueError):
+            list(read_trajectories_csv(filename))
+
+
+if __name__ == "__main__":
+    unittest.main()
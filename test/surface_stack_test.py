@@ -0,0 +1,125 @@
+import unittest
+
+import numpy as np
+
+from src.stats import ProcessorStats
+from src.surface import PreparedSurface
+from src.surface_stack import SurfaceStack
+from src.survey import Survey
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+from src.validation import ArrayValidationError
+
+
+def make_stack() -> SurfaceStack:
+    """
+    Создает набор из трех куполов z = shift + (x - 5)^2 / 4 + (y - 5)^2 / 4 на сетке 11 x 11
+    с пустым узлом во втором горизонте.
+    """
+    coords = np.arange(11.0)
+    xx, yy = np.meshgrid(coords, coords, indexing="ij")
+    dome = ((xx - 5) ** 2 + (yy - 5) ** 2) / 4
+    heights = np.stack([dome - 100.0, dome - 80.0, dome - 60.0])
+    heights[1, 8, 8] = np.nan
+    return SurfaceStack(coords, coords, heights, names=["top", "middle", "base"])
+
+
+def make_trajectories() -> list:
+    """Создает вертикальную, наклонную и горизонтальную (дважды пересекающую купол) траектории."""
+    return [
+        [[5.5, 5.5, float(z)] for z in range(0, -160, -20)],
+        [[1.0 + 0.1 * k, 2.0 + 0.08 * k, -10.0 - 12.0 * k] for k in range(12)],
+        [[0.5 + k, 5.2, -79.0] for k in range(10)],
+        [[8.0, 8.0, -50.0], [8.2, 8.2, -120.0]],
+        [[1.0, 1.0, 500.0], [2.0, 2.0, 400.0]],
+    ]
+
+
+class TestSurfaceStack(unittest.TestCase):
+    """
+    Тесты для набора поверхностей на общей сетке.
+    """
+
+    def test_layers_share_geometry(self):
+        """
+        Проверяет, что горизонты - представления общего массива высот с общими осями и диапазонами высот.
+        """
+        stack = make_stack()
+        self.assertEqual(stack.shape, (3, 11, 11))
+        self.assertEqual(len(stack), 3)
+        for k, surface in enumerate(stack.surfaces):
+            self.assertTrue(np.shares_memory(surface.heights, stack.heights))
+            self.assertIs(surface.x_axis, stack.x_axis)
+            self.assertEqual(surface.z_min, stack.surface_z_min[k])
+        self.assertEqual((stack.z_min, stack.z_max), (-100.0, -60.0 + 12.5))
+        np.testing.assert_array_equal(stack.corner_heights([0], [0])[:, 0], stack.heights[:, :2, :2].reshape(3, 4))
+        np.testing.assert_array_equal(
+            stack.pyramid.levels_min[0], np.fmin.reduce([s.pyramid.levels_min[0] for s in stack.surfaces]))
+
+    def test_invalid_stack(self):
+        """
+        Проверяет ошибки для высот неверной формы, несовпадающего числа имен и разных сеток.
+        """
+        coords = np.arange(3.0)
+        with self.assertRaises(ArrayValidationError):
+            SurfaceStack(coords, coords, np.zeros((3, 3)))
+        with self.assertRaises(ArrayValidationError):
+            SurfaceStack(coords, coords, np.zeros((2, 3, 4)))
+        with self.assertRaises(ArrayValidationError):
+            SurfaceStack(coords, coords, np.zeros((2, 3, 3)), names=["a"])
+        with self.assertRaises(ArrayValidationError):
+            SurfaceStack.from_surfaces([PreparedSurface(coords, coords, np.zeros((3, 3))),
+                                        PreparedSurface(coords + 1, coords, np.zeros((3, 3)))])
+
+    def test_matches_separate_surfaces(self):
+        """
+        Проверяет, что расчет по набору совпадает с отдельными расчетами по каждому горизонту
+        при всех режимах поверхности и методах отбора кандидатов, а пересечения упорядочены вдоль траекторий.
+        """
+        stack = make_stack()
+        batch = TrajectoryBatch.from_lists(make_trajectories())
+        for surface_mode in ("plane", "bilinear"):
+            for flag in (0, 1, 2):
+                result = TrajectoryProcessor(stack, surface_mode=surface_mode, candidate_flag=flag) \
+                    .intersect_batch(batch)
+                expected = []
+                for number, surface in enumerate(stack.surfaces):
+                    separate = TrajectoryProcessor(surface, surface_mode=surface_mode, candidate_flag=flag) \
+                        .intersect_batch(batch)
+                    expected += [(k, s, t, number)
+                                 for k, s, t in zip(separate.trajectory, separate.segment, separate.t)]
+                expected.sort()
+                self.assertEqual(list(zip(result.trajectory, result.segment, result.t, result.horizon)), expected)
+                self.assertGreater(len(set(result.horizon.tolist())), 1)
+
+    def test_single_traversal(self):
+        """
+        Проверяет, что отрезки обходятся по ячейкам один раз для всех горизонтов: для набора из трех
+        одинаковых горизонтов обходится столько же ячеек, сколько для одного.
+        """
+        surface = make_stack()[0]
+        stack = SurfaceStack.from_surfaces([surface] * 3)
+        batch = TrajectoryBatch.from_lists(make_trajectories())
+        stack_stats, surface_stats = ProcessorStats(), ProcessorStats()
+        result = TrajectoryProcessor(stack, stats=stack_stats).intersect_batch(batch)
+        TrajectoryProcessor(surface, stats=surface_stats).intersect_batch(batch)
+        self.assertEqual(stack_stats.counters["cells_traversed"], surface_stats.counters["cells_traversed"])
+        self.assertEqual(stack_stats.counters["accepted_intersections"],
+                         3 * surface_stats.counters["accepted_intersections"])
+        np.testing.assert_array_equal(result.horizon[:3], [0, 1, 2])
+
+    def test_labels_and_surveys(self):
+        """
+        Проверяет столбцы с номерами и именами горизонтов и возрастание MD пересечений скважины по инклинометрии.
+        """
+        stack = make_stack()
+        survey = Survey([0.0, 60.0, 130.0], [0.0, 4.0, 8.0], [45.0, 45.0, 45.0], origin=(2.0, 2.0, 0.0))
+        result = TrajectoryProcessor(stack, candidate_flag=2).intersect_surveys([survey])
+        columns = result.columns()
+        self.assertEqual(columns["horizon_name"].tolist(), ["base", "middle", "top"])
+        self.assertTrue(np.all(np.diff(result.md) > 0))
+        self.assertEqual(result.to_lists()[0], [tuple(point) for point in result.xyz])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.model import GridModel
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+from src.validation import ArrayValidationError
+
+
+class TestPreparedSurface(unittest.TestCase):
+    """
+    Тесты для подготовленной поверхности.
+    """
+
+    def setUp(self):
+        self.x_coords = [0.0, 1.0, 2.0]
+        self.y_coords = [0.0, 1.0, 2.0, 3.0]
+        self.height_matrix = [
+            [1.0, 2.0, 3.0, 4.0],
+            [5.0, None, 7.0, 8.0],
+            [9.0, 10.0, 11.0, -1.0],
+        ]
+
+    def test_arrays_are_contiguous_float64(self):
+        """
+        Проверяет, что координаты и высоты хранятся в непрерывных массивах float64, а None заменяется на NaN.
+        """
+        surface = PreparedSurface(self.x_coords, self.y_coords, self.height_matrix)
+        for array in (surface.x_coords, surface.y_coords, surface.heights):
+            self.assertEqual(array.dtype, np.float64)
+            self.assertTrue(array.flags["C_CONTIGUOUS"])
+        self.assertEqual(surface.shape, (3, 4))
+        self.assertTrue(math.isnan(surface.heights[1, 1]))
+        self.assertEqual(surface.null_mask.sum(), 1)
+
+    def test_z_range_ignores_nulls(self):
+        """
+        Проверяет, что диапазон высот вычисляется только по непустым узлам.
+        """
+        surface = PreparedSurface(self.x_coords, self.y_coords, self.height_matrix)
+        self.assertEqual(surface.z_min, -1.0)
+        self.assertEqual(surface.z_max, 11.0)
+
+    def test_cell_stats(self):
+        """
+        Проверяет минимум и максимум по углам ячеек и маску ячеек, все углы которых непустые.
+        """
+        surface = PreparedSurface(self.x_coords, self.y_coords, self.height_matrix)
+        self.assertEqual(surface.cell_min.shape, (2, 3))
+        self.assertFalse(surface.cell_valid[0, 0])
+        self.assertFalse(surface.cell_valid[1, 1])
+        self.assertTrue(surface.cell_valid[0, 2])
+        self.assertEqual(surface.cell_min[0, 2], 3.0)
+        self.assertEqual(surface.cell_max[0, 2], 8.0)
+        self.assertEqual(surface.cell_min[1, 2], -1.0)
+
+    def test_height_at_and_corner_heights(self):
+        """
+        Проверяет доступ к высотам отдельных узлов и углов ячеек.
+        """
+        surface = PreparedSurface(self.x_coords, self.y_coords, self.height_matrix)
+        self.assertIsNone(surface.height_at(1, 1))
+        self.assertEqual(surface.height_at(2, 0), 9.0)
+        corners = surface.corner_heights(np.array([0, 1]), np.array([2, 2]))
+        np.testing.assert_array_equal(corners, [[3.0, 4.0, 7.0, 8.0], [7.0, 8.0, 11.0, -1.0]])
+
+    def test_from_grid(self):
+        """
+        Проверяет создание поверхности из модели GridModel.
+        """
+        grid = GridModel(x_coords=self.x_coords, y_coords=self.y_coords, height_matrix=self.height_matrix)
+        surface = PreparedSurface.from_grid(grid)
+        np.testing.assert_array_equal(surface.x_coords, self.x_coords)
+
+    def test_compact_storage(self):
+        """
+        Проверяет компактный режим: высоты float32, упакованные маски пустых узлов и ячеек с непустыми углами,
+        пирамида float32 из блоков 4 x 4 ячейки не уже точной оболочки и меньший объем памяти.
+        """
+        surface = PreparedSurface(self.x_coords, self.y_coords, self.height_matrix)
+        compact = PreparedSurface(self.x_coords, self.y_coords, self.height_matrix, storage="compact")
+        self.assertEqual(compact.heights.dtype, np.float32)
+        self.assertIsNone(compact.cell_min)
+        self.assertEqual(compact.null_mask.sum(), 1)
+        np.testing.assert_array_equal(compact.null_mask.unpack(), surface.null_mask)
+        np.testing.assert_array_equal(compact.cell_valid.unpack(), surface.cell_valid)
+        cells = np.array([0, 0, 1]), np.array([0, 2, 1])
+        np.testing.assert_array_equal(compact.cell_valid[cells], [False, True, False])
+        self.assertEqual((compact.z_min, compact.z_max), (-1.0, 11.0))
+        self.assertIsNone(compact.height_at(1, 1))
+
+        pyramid = compact.pyramid
+        self.assertEqual((pyramid.block_size, pyramid.levels_min[0].shape), (4, (1, 1)))
+        self.assertEqual(pyramid.levels_min[0].dtype, np.float32)
+        self.assertEqual(pyramid.levels_min[0][0, 0], np.nanmin(surface.pyramid.levels_min[0]))
+        self.assertEqual(pyramid.levels_max[0][0, 0], np.nanmax(surface.pyramid.levels_max[0]))
+        self.assertLess(compact.memory_footprint()["bytes"], surface.memory_footprint()["bytes"] / 2)
+        with self.assertRaises(ArrayValidationError):
+            PreparedSurface(self.x_coords, self.y_coords, np.full((3, 4), 1e39), storage="compact")
+        with self.assertRaises(ValueError):
+            PreparedSurface(self.x_coords, self.y_coords, self.height_matrix, storage="float16")
+
+    def test_compact_accuracy(self):
+        """
+        Проверяет, что пересечения вертикальных скважин с компактной поверхностью отличаются от float64
+        не больше документированной ошибки (|z| * 2^-24 в полтора раза), а оболочка пирамиды float32
+        не уже оболочки округленных высот.
+        """
+        rng = np.random.default_rng(0)
+        coords = np.linspace(0.0, 1000.0, 51)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        heights = -2500.0 + 30.0 * np.sin(xx / 90.0) * np.cos(yy / 70.0) + rng.normal(0.0, 0.01, xx.shape)
+        surface = PreparedSurface(coords, coords, heights)
+        compact = PreparedSurface.from_surface(surface, "compact")
+        rounded = PreparedSurface(coords, coords, compact.heights.astype(np.float64))
+        cell_i, cell_j = np.meshgrid(np.arange(50), np.arange(50), indexing="ij")
+        block_min, block_max = compact.pyramid.cell_envelope(cell_i, cell_j)
+        self.assertTrue(np.all(block_min <= rounded.pyramid.levels_min[0]))
+        self.assertTrue(np.all(block_max >= rounded.pyramid.levels_max[0]))
+        self.assertLess(compact.memory_footprint()["bytes_per_node"], 5.5)
+
+        xy = rng.uniform(0, 1000, (200, 2))
+        starts, ends = np.column_stack([xy, np.full(200, -2400.0)]), np.column_stack([xy, np.full(200, -2600.0)])
+        batch = TrajectoryBatch.from_lists(list(np.stack([starts, ends], axis=1)))
+        expected = TrajectoryProcessor(surface, surface_mode="bilinear").intersect_batch(batch)
+        result = TrajectoryProcessor(compact, surface_mode="bilinear").intersect_batch(batch)
+        np.testing.assert_array_equal(result.trajectory, expected.trajectory)
+        np.testing.assert_allclose(result.z, expected.z, rtol=0, atol=1.5 * 2600.0 * 2.0 ** -24)
+
+    def test_shared_state(self):
+        """
+        Проверяет, что поверхность, восстановленная из shared_state, использует те же массивы
+        без копирования и пересчета и дает те же пересечения в обоих режимах хранения.
+        """
+        coords = np.linspace(0.0, 100.0, 21)
+        xx, yy = np.meshgrid(coords, coords, indexing="ij")
+        heights = 5.0 * np.sin(xx / 10.0) * np.cos(yy / 15.0)
+        heights[3, 4] = np.nan
+        batch = TrajectoryBatch.from_lists([[[x, 50.0, 20.0], [100.0 - x, 40.0, -20.0]] for x in (3.0, 31.0, 77.0)])
+        for storage in ("float64", "compact"):
+            with self.subTest(storage=storage):
+                surface = PreparedSurface(coords, coords, heights, storage=storage)
+                arrays, attributes = surface.shared_state()
+                restored = PreparedSurface.from_shared_state(arrays, attributes)
+                self.assertIs(restored.heights, surface.heights)
+                self.assertIs(restored.pyramid.levels_min[0], surface.pyramid.levels_min[0])
+                self.assertEqual(restored.pyramid.block_size, surface.pyramid.block_size)
+                self.assertEqual((restored.z_min, restored.z_max), (surface.z_min, surface.z_max))
+                np.testing.assert_array_equal(np.asarray(restored.cell_valid[np.arange(20), np.arange(20)]),
+                                              np.asarray(surface.cell_valid[np.arange(20), np.arange(20)]))
+                expected = TrajectoryProcessor(surface, surface_mode="bilinear").intersect_batch(batch)
+                result = TrajectoryProcessor(restored, surface_mode="bilinear").intersect_batch(batch)
+                self.assertGreater(len(expected), 0)
+                np.testing.assert_array_equal(result.xyz, expected.xyz)
+
+    def test_shape_mismatch(self):
+        """
+        Проверяет, что несогласованные размеры сетки приводят к ошибке.
+        """
+        with self.assertRaises(ValueError):
+            PreparedSurface(self.x_coords, self.y_coords[:-1], self.height_matrix)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+import numpy as np
+
+from src.survey import Survey, sample_surveys
+from src.surface import PreparedSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+
+
+def make_build_survey(radius: float = 1000.0, stations: int = 4, azimuth: float = 0.0) -> Survey:
+    """Создает инклинометрию участка набора угла от вертикали до горизонтали с постоянным радиусом."""
+    md = np.linspace(0.0, radius * np.pi / 2, stations)
+    return Survey(md, np.degrees(md / radius), np.full(stations, azimuth), origin=(100.0, 200.0, 50.0))
+
+
+class TestSurvey(unittest.TestCase):
+    """
+    Тесты для инклинометрии и метода минимальной кривизны.
+    """
+
+    def test_vertical_survey(self):
+        """
+        Проверяет, что вертикальная скважина уходит вниз на MD, а за последним замером продолжается прямой.
+        """
+        survey = Survey([0.0, 100.0, 250.0], [0.0, 0.0, 0.0], [0.0, 45.0, 90.0], origin=(1.0, 2.0, 10.0))
+        np.testing.assert_allclose(survey.positions, [[1.0, 2.0, 10.0], [1.0, 2.0, -90.0], [1.0, 2.0, -240.0]])
+        np.testing.assert_allclose(survey.interpolate([50.0, 300.0]), [[1.0, 2.0, -40.0], [1.0, 2.0, -290.0]])
+
+    def test_constant_build_lies_on_circle(self):
+        """
+        Проверяет точки замеров и интерполированные точки участка набора угла: они лежат на окружности,
+        x - восток, y - север, z убывает с глубиной.
+        """
+        radius = 1000.0
+        for azimuth, axis in ((0.0, 1), (90.0, 0)):
+            survey = make_build_survey(radius, azimuth=azimuth)
+            np.testing.assert_allclose(survey.positions[-1][axis] - survey.origin[axis], radius, atol=1e-9)
+            np.testing.assert_allclose(survey.positions[-1][2], 50.0 - radius, atol=1e-9)
+
+            angle = np.linspace(0.0, np.pi / 2, 37)
+            points = survey.interpolate(radius * angle)
+            np.testing.assert_allclose(points[:, axis] - survey.origin[axis], radius * (1 - np.cos(angle)), atol=1e-9)
+            np.testing.assert_allclose(50.0 - points[:, 2], radius * np.sin(angle), atol=1e-9)
+
+    def test_invalid_survey(self):
+        """
+        Проверяет ошибки для невозрастающих глубин и массивов разной длины.
+        """
+        with self.assertRaises(ValueError):
+            Survey([0.0, 10.0, 10.0], [0.0, 1.0, 2.0], [0.0, 0.0, 0.0])
+        with self.assertRaises(ValueError):
+            Survey([0.0, 10.0], [0.0], [0.0, 0.0])
+
+    def test_sample_refines_only_near_surface(self):
+        """
+        Проверяет, что сгущаются только интервалы вблизи поверхности и хорды отклоняются от дуги не больше допуска.
+        """
+        radius = 1000.0
+        survey = make_build_survey(radius, stations=16)
+        coords = np.linspace(0.0, 2000.0, 81)
+        surface = PreparedSurface(coords, coords, np.full((81, 81), -650.0))
+
+        md_everywhere, _ = survey.sample(tolerance=0.05)
+        md, xyz = survey.sample(surface, tolerance=0.05)
+        self.assertLess(md.size, md_everywhere.size / 3)
+        self.assertLess(md.size, radius * np.pi / 2 / 10)
+
+        middle = survey.interpolate((md[:-1] + md[1:]) / 2)
+        chord = (xyz[:-1] + xyz[1:]) / 2
+        near = (np.minimum(xyz[:-1, 2], xyz[1:, 2]) <= -650.0) & (np.maximum(xyz[:-1, 2], xyz[1:, 2]) >= -650.0)
+        self.assertEqual(np.count_nonzero(near), 1)
+        self.assertTrue(np.all(np.linalg.norm(middle - chord, axis=1)[near] <= 0.05))
+
+
+class TestIntersectSurveys(unittest.TestCase):
+    """
+    Тесты для пересечения скважин, заданных инклинометрией, с поверхностью.
+    """
+
+    def test_build_section_crossing_flat_surface(self):
+        """
+        Проверяет точку пересечения и MD для участка набора угла, пересекающего горизонтальную поверхность.
+        """
+        radius, depth = 1000.0, 700.0
+        surveys = [make_build_survey(radius), make_build_survey(radius, azimuth=90.0)]
+        coords = np.linspace(0.0, 2000.0, 41)
+        surface = PreparedSurface(coords, coords, np.full((41, 41), 50.0 - depth))
+
+        result = TrajectoryProcessor(surface).intersect_surveys(surveys, tolerance=0.01, ids=["N", "E"])
+        self.assertEqual(result.trajectory.tolist(), [0, 1])
+        angle = np.arcsin(depth / radius)
+        np.testing.assert_allclose(result.md, radius * angle, atol=0.05)
+        np.testing.assert_allclose(result.y[0] - 200.0, radius * (1 - np.cos(angle)), atol=0.02)
+        np.testing.assert_allclose(result.x[1] - 100.0, radius * (1 - np.cos(angle)), atol=0.02)
+        np.testing.assert_allclose(result.z, 50.0 - depth)
+        self.assertEqual(list(result.columns()["id"]), ["N", "E"])
+
+    def test_sample_surveys(self):
+        """
+        Проверяет, что глубины соответствуют точкам набора траекторий.
+        """
+        surveys = [make_build_survey(), Survey([0.0, 10.0], [0.0, 0.0], [0.0, 0.0])]
+        batch, md = sample_surveys(surveys, tolerance=1.0)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(md.size, batch.points.shape[0])
+        np.testing.assert_allclose(batch.trajectory(1)[:, 2], -md[batch.offsets[1]:])
+
+
+if __name__ == "__main__":
+    unittest.main()
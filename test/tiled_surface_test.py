@@ -0,0 +1,163 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.irap import convert_irap_to_tiles, read_irap
+from src.pyramid import MinMaxPyramid
+from src.surface import PreparedSurface
+from src.tiled_surface import TiledSurface
+from src.trajectoryProcessor import TrajectoryProcessor
+from src.trajectory_arrays import TrajectoryBatch
+from src.validation import ArrayValidationError
+
+
+def make_surface(seed: int = 0) -> PreparedSurface:
+    """Создает волнистую поверхность 45 x 38 узлов на неравномерной сетке с пустыми узлами."""
+    rng = np.random.default_rng(seed)
+    x_coords = np.cumsum(rng.uniform(0.5, 1.5, 45))
+    y_coords = np.cumsum(rng.uniform(0.5, 1.5, 38))
+    xx, yy = np.meshgrid(x_coords, y_coords, indexing="ij")
+    heights = -100.0 + 5.0 * np.sin(xx / 4.0) * np.cos(yy / 3.0) + rng.normal(0.0, 0.3, xx.shape)
+    heights[rng.random(heights.shape) < 0.03] = np.nan
+    return PreparedSurface(x_coords, y_coords, heights)
+
+
+def make_batch(surface: PreparedSurface, count: int = 60, seed: int = 1) -> TrajectoryBatch:
+    """Создает наклонные траектории, пересекающие поверхность, и горизонтальные вдоль нее."""
+    rng = np.random.default_rng(seed)
+    x_max, y_max = surface.x_coords[-1], surface.y_coords[-1]
+    trajectories = []
+    for _ in range(count):
+        start = [rng.uniform(0, x_max), rng.uniform(0, y_max), -80.0]
+        end = [rng.uniform(0, x_max), rng.uniform(0, y_max), rng.choice([-120.0, -100.0])]
+        trajectories.append(np.linspace(start, end, 15))
+    return TrajectoryBatch.from_lists(trajectories)
+
+
+class TestTiledSurface(unittest.TestCase):
+    """
+    Тесты для поверхности, хранящейся тайлами в отображаемом в память файле.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "surface.tiles.npy")
+        self.surface = make_surface()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create(self, **kwargs) -> TiledSurface:
+        surface = self.surface
+        return TiledSurface.create(self.path, surface.x_coords, surface.y_coords, surface.heights, **kwargs)
+
+    def test_heights_indexing(self):
+        """
+        Проверяет, что срезы и массивы индексов возвращают те же высоты, что и массив в памяти, включая узлы
+        на границах тайлов, а диапазон высот совпадает с PreparedSurface.
+        """
+        tiled = self.create(tile_size=8, block_size=4)
+        heights = self.surface.heights
+        np.testing.assert_array_equal(tiled.heights[:, :], heights)
+        np.testing.assert_array_equal(tiled.heights[7:33, 8:17], heights[7:33, 8:17])
+        i = np.array([0, 8, 16, 44, 9])
+        j = np.array([37, 8, 0, 16, 31])
+        np.testing.assert_array_equal(tiled.heights[..., i, j], heights[i, j])
+        np.testing.assert_array_equal(tiled.corner_heights(i[:3], j[1:4]), self.surface.corner_heights(i[:3], j[1:4]))
+        self.assertEqual(tiled.height_at(8, 16), self.surface.height_at(8, 16))
+        self.assertEqual((tiled.z_min, tiled.z_max), (self.surface.z_min, self.surface.z_max))
+        with self.assertRaises(IndexError):
+            tiled.heights[np.array([45]), np.array([0])]
+
+    def test_results_match_prepared_surface(self):
+        """
+        Проверяет, что конвейер TrajectoryProcessor на тайлах дает те же пересечения, что и на PreparedSurface,
+        при всех режимах поверхности и методах отбора кандидатов.
+        """
+        tiled = self.create(tile_size=16, block_size=4, max_tiles=3)
+        batch = make_batch(self.surface)
+        for surface_mode in ("plane", "bilinear"):
+            for flag in (0, 1, 2):
+                expected = TrajectoryProcessor(self.surface, surface_mode=surface_mode, candidate_flag=flag) \
+                    .intersect_batch(batch)
+                result = TrajectoryProcessor(tiled, surface_mode=surface_mode, candidate_flag=flag) \
+                    .intersect_batch(batch)
+                self.assertGreater(len(expected), 0)
+                np.testing.assert_array_equal(result.segment, expected.segment)
+                np.testing.assert_array_equal(result.xyz, expected.xyz)
+
+    def test_tile_cache_is_bounded(self):
+        """
+        Проверяет, что в памяти не больше max_tiles тайлов, а счетчики попаданий, промахов и времени чтения растут.
+        """
+        tiled = self.create(tile_size=8, block_size=8, max_tiles=2)
+        TrajectoryProcessor(tiled).intersect_batch(make_batch(self.surface))
+        tiled.heights[0:2, 0:2]
+        tiled.heights[0:2, 0:2]
+        footprint = tiled.memory_footprint()
+        self.assertEqual(footprint["tiles_total"], 30)
+        self.assertLessEqual(footprint["tiles_cached"], 2)
+        self.assertGreater(footprint["misses"], 0)
+        self.assertGreater(footprint["hits"], 0)
+        self.assertGreater(footprint["evictions"], 0)
+        self.assertGreater(footprint["load_seconds"], 0.0)
+
+        reopened = TiledSurface(self.path)
+        self.assertEqual(reopened.memory_footprint()["misses"], 0)
+        self.assertEqual(reopened.content_hash, tiled.content_hash)
+
+    def test_block_pyramid_is_conservative(self):
+        """
+        Проверяет, что оболочка блоков пирамиды не уже оболочки ячеек PreparedSurface.
+        """
+        tiled = self.create(tile_size=16, block_size=4)
+        exact = self.surface.pyramid
+        i = np.arange(44).repeat(37)
+        j = np.tile(np.arange(37), 44)
+        valid = ~np.isnan(exact.levels_min[0][i, j])
+        coarse_min, coarse_max = tiled.pyramid.envelope(i, i, j, j)
+        self.assertTrue(np.all(coarse_min[valid] <= exact.levels_min[0][i, j][valid]))
+        self.assertTrue(np.all(coarse_max[valid] >= exact.levels_max[0][i, j][valid]))
+        with self.assertRaises(ValueError):
+            MinMaxPyramid(np.zeros((2, 2)), np.zeros((2, 2)), block_size=3)
+
+    def test_invalid_arguments(self):
+        """
+        Проверяет ошибки для размеров тайла и блока и для формы высот.
+        """
+        with self.assertRaises(ValueError):
+            self.create(tile_size=12)
+        with self.assertRaises(ValueError):
+            self.create(tile_size=8, block_size=16)
+        with self.assertRaises(ArrayValidationError):
+            TiledSurface.create(self.path, self.surface.x_coords[:-1], self.surface.y_coords, self.surface.heights)
+
+    def test_convert_irap(self):
+        """
+        Проверяет потоковое преобразование файла IRAP в тайлы: высоты совпадают с read_irap.
+        """
+        surface = self.surface
+        heights = np.where(np.isnan(surface.heights), 9999900.0, surface.heights)
+        filename = os.path.join(self.directory.name, "surface.irap")
+        with open(filename, "w") as irap_file:
+            irap_file.write(f"-996 {surface.shape[1]} 1.0 1.0\n0.0 44.0 0.0 37.0\n{surface.shape[0]} 0.0 0.0 0.0\n")
+            irap_file.write("0 0 0 0 0 0 0\n")
+            values = heights.T.ravel().tolist()
+            for start in range(0, len(values), 6):
+                irap_file.write(" ".join(repr(value) for value in values[start:start + 6]) + "\n")
+
+        tiled = convert_irap_to_tiles(filename, self.path, tile_size=8, block_size=4, chunk_chars=1000)
+        expected = read_irap(filename)
+        np.testing.assert_array_equal(tiled.heights[:, :], expected.heights)
+        np.testing.assert_array_equal(tiled.x_coords, expected.x_coords)
+
+        with open(filename, "a") as irap_file:
+            irap_file.write("1.0\n")
+        with self.assertRaises(ValueError):
+            convert_irap_to_tiles(filename, self.path, tile_size=8, chunk_chars=1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
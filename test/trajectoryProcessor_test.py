@@ -1,9 +1,23 @@
 import unittest
+from unittest import mock
+from src.model import TrajectoryListModel
 from src.trajectoryProcessor import TrajectoryProcessor
+from src.surface import PreparedSurface
+from src.trajectory_arrays import TrajectoryBatch, trajectory_z_ranges
 from test.parser import parse
 import numpy as np
 
 
+def make_dome_grid(size: int = 11) -> dict:
+    """
+    Создает сетку с куполообразной поверхностью z = -100 + (x - c)^2 + (y - c)^2.
+    """
+    coords = [float(i) for i in range(size)]
+    center = (size - 1) / 2
+    height_matrix = [[-100.0 + (x - center) ** 2 + (y - center) ** 2 for y in coords] for x in coords]
+    return {"x_coords": coords, "y_coords": coords, "height_matrix": height_matrix}
+
+
 class TestTrajectoryProcessor(unittest.TestCase):
 
 
@@ -22,6 +36,259 @@ class TestTrajectoryProcessor(unittest.TestCase):
         print(answer)
         self.assertEqual(answer, [[(np.float64(70341.0), np.float64(311221.5), np.float64(-2520.26934412866))]])
 
+    def test_prepared_surface_matches_dict_path(self):
+        """
+        Проверяет, что расчет по подготовленной поверхности совпадает с расчетом по сетке из входного словаря.
+        """
+        grid = make_dome_grid()
+        trajectories = [
+            [[5.5, 5.5, float(z)] for z in range(-205, 0, 20)],
+            [[2.5, 7.5, float(z)] for z in range(-205, 0, 20)],
+        ]
+
+        expected = TrajectoryProcessor().calculate_intersections({"grid": grid, "trajectories": trajectories})
+
+        surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"])
+        processor = TrajectoryProcessor(surface)
+        answer = processor.calculate_intersections({"trajectories": trajectories})
+
+        self.assertEqual(answer, expected)
+        self.assertEqual(len(answer[0]), 1)
+        self.assertAlmostEqual(answer[0][0][2], -99.0, places=6)
+
+    def test_numpy_input_matches_list_input(self):
+        """
+        Проверяет, что сетка и траектории в виде массивов NumPy дают тот же результат, что и списки,
+        а некорректные массивы приводят к ошибке валидации.
+        """
+        grid = make_dome_grid()
+        trajectories = [
+            [[5.5, 5.5, float(z)] for z in range(-205, 0, 20)],
+            [[2.5, 7.5, float(z)] for z in range(-205, 0, 20)],
+        ]
+        expected = TrajectoryProcessor().calculate_intersections({"grid": grid, "trajectories": trajectories})
+
+        numpy_grid = {key: np.array(value) for key, value in grid.items()}
+        numpy_trajectories = [np.array(trajectory) for trajectory in trajectories]
+        for trusted in (False, True):
+            answer = TrajectoryProcessor().calculate_intersections(
+                {"grid": numpy_grid, "trajectories": numpy_trajectories}, trusted=trusted)
+            self.assertEqual(answer, expected)
+
+        numpy_grid["x_coords"] = numpy_grid["x_coords"][::-1].copy()
+        self.assertIsNone(TrajectoryProcessor().calculate_intersections(
+            {"grid": numpy_grid, "trajectories": numpy_trajectories}))
+
+    def test_trajectory_inside_grid_z_range(self):
+        """
+        Проверяет, что траектория, целиком лежащая внутри диапазона высот сетки, тоже проверяется на пересечение.
+        """
+        grid = make_dome_grid()
+        trajectory = [[2.5, 2.5, -95.0], [2.5, 2.5, -55.0]]
+        answer = TrajectoryProcessor().calculate_intersections({"grid": grid, "trajectories": [trajectory]})
+        self.assertEqual(len(answer[0]), 1)
+
+    def test_check_boundary_values(self):
+        """
+        Проверяет отбор траекторий по диапазону высот сетки.
+        """
+        grid = make_dome_grid()
+        processor = TrajectoryProcessor(PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"]))
+        processor.data = TrajectoryListModel(trajectories=[
+            [[1, 1, 10], [1, 1, 20]],
+            [[1, 1, -300], [1, 1, -200]],
+            [[1, 1, -300], [1, 1, 20]],
+            [[1, 1, -70]],
+            [],
+        ])
+        result, max_grid_z, min_grid_z = processor.check_boundary_values()
+        self.assertEqual(result, [None, None, [], [], None])
+        self.assertEqual(max_grid_z, -50.0)
+        self.assertEqual(min_grid_z, -100.0)
+
+    def test_grid_in_data_does_not_rebind_surface(self):
+        """
+        Проверяет, что сетка, переданная в data, используется только в этом вызове,
+        а поверхность процессора остается прежней.
+        """
+        grid = make_dome_grid()
+        surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"])
+        processor = TrajectoryProcessor(surface)
+        trajectories = [[[5.0, 5.0, 0.0], [5.0, 5.0, -200.0]]]
+        flat = {"x_coords": grid["x_coords"], "y_coords": grid["y_coords"],
+                "height_matrix": [[-10.0] * len(grid["y_coords"])] * len(grid["x_coords"])}
+
+        for grid_data in (flat, {key: np.asarray(value) for key, value in flat.items()}):
+            result = processor.calculate_intersections({"grid": grid_data, "trajectories": trajectories})
+            self.assertAlmostEqual(result[0][0][2], -10.0)
+            self.assertIs(processor.surface, surface)
+        result = processor.calculate_intersections({"trajectories": trajectories})
+        self.assertAlmostEqual(result[0][0][2], -100.0)
+
+        empty = TrajectoryProcessor()
+        self.assertEqual(len(empty.calculate_intersections({"grid": flat, "trajectories": trajectories})[0]), 1)
+        self.assertIsNone(empty.surface)
+
+    def test_intersection_restricted_to_segment(self):
+        """
+        Проверяет, что пересечение продолжения отрезка с плоскостью ячейки не считается пересечением.
+        """
+        processor = TrajectoryProcessor(PreparedSurface([0.0, 1.0, 2.0], [0.0, 1.0, 2.0], [[0.0] * 3] * 3))
+        self.assertEqual(processor.find_line_plane_intersection([[[0.2, 0.2, 1.0], [0.4, 0.4, 0.5]]]), [])
+        answer = processor.find_line_plane_intersection([[[0.2, 0.2, 1.0], [1.8, 0.6, -1.0]]])
+        self.assertEqual(len(answer), 1)
+        self.assertAlmostEqual(answer[0][0], 1.0)
+        self.assertAlmostEqual(answer[0][2], 0.0)
+
+    def test_find_surface_intersection_modes(self):
+        """
+        Проверяет, что find_surface_intersection в каждом режиме поверхности возвращает те же точки,
+        что и calculate_intersections процессора с тем же surface_mode.
+        """
+        surface = PreparedSurface([0.0, 1.0, 2.0], [0.0, 1.0], [[0.0, 0.0], [0.0, 1.0], [1.0, 0.0]])
+        pairs = [[[0.25, 0.25, 2.0], [0.25, 0.25, -1.0]], [[1.5, 0.5, 2.0], [0.5, 0.6, -1.0]]]
+        trajectories = {"trajectories": pairs}
+        for surface_mode in ("plane", "bilinear"):
+            with self.subTest(surface_mode=surface_mode):
+                processor = TrajectoryProcessor(surface, surface_mode=surface_mode)
+                expected = [point for points in processor.calculate_intersections(trajectories) for point in points]
+                self.assertTrue(expected)
+                self.assertEqual(processor.find_surface_intersection(pairs), expected)
+        self.assertAlmostEqual(
+            TrajectoryProcessor(surface, surface_mode="bilinear").find_surface_intersection(pairs[:1])[0][2], 0.0625)
+
+    def test_surface_modes(self):
+        """
+        Проверяет, что в режиме "bilinear" пересечение лежит на билинейной поверхности, а в режиме "plane" -
+        на плоскости наименьших квадратов.
+        """
+        surface = PreparedSurface([0.0, 1.0], [0.0, 1.0], [[0.0, 0.0], [0.0, 1.0]])
+        trajectories = {"trajectories": [[[0.25, 0.25, 2.0], [0.25, 0.25, -1.0]]]}
+
+        plane = TrajectoryProcessor(surface, surface_mode="plane").calculate_intersections(trajectories)
+        bilinear = TrajectoryProcessor(surface, surface_mode="bilinear").calculate_intersections(trajectories)
+
+        self.assertAlmostEqual(plane[0][0][2], 0.0)
+        self.assertAlmostEqual(bilinear[0][0][2], 0.0625)
+        with self.assertRaises(ValueError):
+            TrajectoryProcessor(surface, surface_mode="unknown")
+
+    def test_intersect_batch(self):
+        """
+        Проверяет, что intersect_batch возвращает столбцы, согласованные с calculate_intersections:
+        индексы траекторий и отрезков, ячейки и параметр t, по которым восстанавливаются точки пересечения.
+        """
+        grid = make_dome_grid()
+        surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"])
+        trajectories = [
+            [[x + 0.5, 4.3, z] for x, z in zip(range(0, 10), (-40.0, -120.0) * 5)],
+            [[1.0, 1.0, 500.0], [2.0, 2.0, 400.0]],
+            [[5.5, 5.5, float(z)] for z in range(-205, 0, 20)],
+        ]
+        for surface_mode in ("plane", "bilinear"):
+            processor = TrajectoryProcessor(surface, surface_mode=surface_mode)
+            expected = processor.calculate_intersections({"trajectories": trajectories})
+            batch = TrajectoryBatch.from_lists(trajectories, ids=["W1", "W2", "W3"])
+
+            result = processor.intersect_batch(batch)
+            self.assertEqual(result.to_lists(), expected)
+            self.assertEqual(processor.calculate_intersections({"trajectories": batch}), expected)
+
+            start = batch.points[batch.offsets[result.trajectory] + result.segment]
+            end = batch.points[batch.offsets[result.trajectory] + result.segment + 1]
+            np.testing.assert_allclose(start + result.t[:, None] * (end - start), result.xyz)
+            np.testing.assert_array_equal(np.floor(result.x), result.cell_i)
+            np.testing.assert_array_equal(np.floor(result.y), result.cell_j)
+            self.assertEqual(set(result.columns()["id"]), {"W1", "W3"})
+
+    def test_bilinear_mode_matches_plane_mode_on_dome(self):
+        """
+        Проверяет, что на гладкой поверхности оба режима находят одни и те же пересечения с близкими высотами.
+        """
+        grid = make_dome_grid()
+        surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"])
+        trajectories = {"trajectories": [
+            [[x + 0.5, 4.3, z] for x, z in zip(range(0, 10), (-40.0, -120.0) * 5)],
+        ]}
+        plane = TrajectoryProcessor(surface).calculate_intersections(trajectories)
+        bilinear = TrajectoryProcessor(surface, surface_mode="bilinear").calculate_intersections(trajectories)
+        self.assertEqual(len(plane[0]), len(bilinear[0]))
+        self.assertGreater(len(plane[0]), 0)
+        for p, b in zip(plane[0], bilinear[0]):
+            self.assertAlmostEqual(p[2], b[2], delta=1.0)
+
+    def test_envelope_candidates_find_double_crossing(self):
+        """
+        Проверяет, что с candidate_flag = 2 находятся оба пересечения длинного отрезка,
+        оба конца которого лежат по одну сторону поверхности.
+        """
+        grid = make_dome_grid()
+        surface = PreparedSurface(grid["x_coords"], grid["y_coords"], grid["height_matrix"])
+        trajectories = {"trajectories": [[[0.5, 5.2, -90.0], [9.5, 5.2, -90.0]]]}
+        self.assertEqual(TrajectoryProcessor(surface).calculate_intersections(trajectories), [[]])
+        for surface_mode in ("plane", "bilinear"):
+            result = TrajectoryProcessor(surface, surface_mode=surface_mode, candidate_flag=2) \
+                .calculate_intersections(trajectories)
+            self.assertEqual(len(result[0]), 2)
+            for x, _, z in result[0]:
+                self.assertAlmostEqual(abs(x - 5.0), np.sqrt(10.0 - 0.04), delta=0.3)
+                self.assertEqual(z, -90.0)
+        with self.assertRaises(ValueError):
+            TrajectoryProcessor(surface, candidate_flag=5)
+
+
+class TestBoundaryValuesScaling(unittest.TestCase):
+    """
+    Тест масштабируемости проверки граничных значений.
+    """
+
+    crossing = [[10.0, 10.0, float(z)] for z in range(-3000, 0, 150)]
+    above = [[10.0, 10.0, -500.0], [20.0, 20.0, -100.0]]
+
+    def reduce_boundary_values(self, size, pairs):
+        """
+        Выполняет check_boundary_values для pairs пар траекторий (пересекающая и лежащая выше сетки)
+        на сетке size x size без доступа к высотам сетки.
+
+        :return: Кортеж (число вызовов trajectory_z_ranges, число переданных точек, число траекторий, результат).
+        """
+        coords = np.arange(size, dtype=float)
+        heights = np.tile(np.linspace(-2000.0, -1000.0, size), (size, 1))
+        processor = TrajectoryProcessor(PreparedSurface(coords, coords, heights))
+        processor.surface.heights = None
+        processor.data = TrajectoryListModel.model_construct(trajectories=[self.crossing, self.above] * pairs)
+        with mock.patch("src.trajectoryProcessor.trajectory_z_ranges", wraps=trajectory_z_ranges) as ranges:
+            result, max_grid_z, min_grid_z = processor.check_boundary_values()
+        self.assertEqual((max_grid_z, min_grid_z), (-1000.0, -2000.0))
+        points, offsets = ranges.call_args.args
+        return ranges.call_count, len(points), len(offsets) - 1, result
+
+    def test_linear_in_trajectory_count(self):
+        """
+        Проверяет линейную зависимость работы от числа траекторий без измерения времени: при увеличении числа
+        траекторий в 4 раза редукция диапазонов высот по-прежнему выполняется одним вызовом trajectory_z_ranges,
+        а число обрабатываемых ею точек растет ровно в 4 раза.
+        """
+        pairs = 1000
+        calls, points, trajectories, result = self.reduce_boundary_values(100, pairs)
+        calls_4n, points_4n, trajectories_4n, result_4n = self.reduce_boundary_values(100, 4 * pairs)
+
+        self.assertEqual((calls, calls_4n), (1, 1))
+        self.assertEqual((trajectories, trajectories_4n), (2 * pairs, 8 * pairs))
+        self.assertEqual(points, pairs * (len(self.crossing) + len(self.above)))
+        self.assertEqual(points_4n, 4 * points)
+        self.assertEqual(result_4n, result * 4)
+        self.assertEqual(result[:2], [[], None])
+
+    def test_independent_of_grid_size(self):
+        """
+        Проверяет, что работа не зависит от размера сетки: высоты сетки не читаются, а trajectory_z_ranges
+        получает одни и те же точки для сеток 10 x 10 и 400 x 400.
+        """
+        small = self.reduce_boundary_values(10, 500)
+        large = self.reduce_boundary_values(400, 500)
+        self.assertEqual(small[:3], (1, 500 * (len(self.crossing) + len(self.above)), 1000))
+        self.assertEqual(large, small)
 
 if __name__ == "__main__":
     unittest.main()
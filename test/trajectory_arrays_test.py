@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from src.trajectory_arrays import TrajectoryBatch, pack_trajectories, trajectory_z_ranges
+
+
+class TestPackTrajectories(unittest.TestCase):
+    """
+    Тесты для упаковки траекторий в массив точек со смещениями.
+    """
+
+    def test_pack(self):
+        """
+        Проверяет, что точки всех траекторий лежат подряд, а смещения указывают на границы траекторий.
+        """
+        points, offsets = pack_trajectories([[[0, 0, 1], [0, 0, 2]], [], [[1, 1, 5]]])
+        self.assertEqual(points.shape, (3, 3))
+        self.assertEqual(points.dtype, np.float64)
+        np.testing.assert_array_equal(offsets, [0, 2, 2, 3])
+        np.testing.assert_array_equal(points[2], [1, 1, 5])
+
+    def test_empty_input(self):
+        """
+        Проверяет упаковку пустого списка траекторий.
+        """
+        points, offsets = pack_trajectories([])
+        self.assertEqual(points.shape, (0, 3))
+        np.testing.assert_array_equal(offsets, [0])
+
+
+class TestTrajectoryZRanges(unittest.TestCase):
+    """
+    Тесты для вычисления диапазонов высот траекторий.
+    """
+
+    def test_ranges_with_empty_trajectory(self):
+        """
+        Проверяет диапазоны высот, в том числе для пустой траектории.
+        """
+        points, offsets = pack_trajectories([[[0, 0, 3], [0, 0, -2], [0, 0, 1]], [], [[1, 1, 5]]])
+        min_z, max_z = trajectory_z_ranges(points, offsets)
+        np.testing.assert_array_equal(min_z, [-2, np.inf, 5])
+        np.testing.assert_array_equal(max_z, [3, -np.inf, 5])
+
+
+class TestTrajectoryBatch(unittest.TestCase):
+    """
+    Тесты для компактного набора траекторий.
+    """
+
+    def test_round_trip(self):
+        """
+        Проверяет создание набора из списков, доступ к траекториям без копирования и обратное преобразование.
+        """
+        trajectories = [[[0.0, 0.0, 1.0], [0.0, 0.0, 2.0]], [], [[1.0, 1.0, 5.0]]]
+        batch = TrajectoryBatch.from_lists(trajectories, ids=["A", "B", "C"])
+        self.assertEqual(len(batch), 3)
+        self.assertTrue(np.shares_memory(batch.trajectory(0), batch.points))
+        self.assertEqual(batch.to_lists(), trajectories)
+        self.assertEqual(batch.nbytes, 3 * 3 * 8 + 4 * 8)
+
+    def test_ids_length_mismatch(self):
+        """
+        Проверяет ошибку при числе идентификаторов, не совпадающем с числом траекторий.
+        """
+        with self.assertRaises(ValueError):
+            TrajectoryBatch(np.zeros((2, 3)), [0, 2], ids=["A", "B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
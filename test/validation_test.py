@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from src.validation import ArrayValidationError, validate_grid_arrays, validate_trajectory_arrays
+
+
+class TestValidateGridArrays(unittest.TestCase):
+    """
+    Тесты для векторной проверки массивов сетки.
+    """
+
+    def setUp(self):
+        self.x_coords = np.array([0.0, 1.0, 2.0])
+        self.y_coords = np.array([0.0, 1.0])
+        self.heights = np.array([[1.0, 2.0], [np.nan, 4.0], [5.0, 6.0]])
+
+    def test_zero_copy(self):
+        """
+        Проверяет, что массивы float64 возвращаются без копирования.
+        """
+        x_coords, y_coords, heights = validate_grid_arrays(self.x_coords, self.y_coords, self.heights)
+        self.assertTrue(np.shares_memory(x_coords, self.x_coords))
+        self.assertTrue(np.shares_memory(y_coords, self.y_coords))
+        self.assertTrue(np.shares_memory(heights, self.heights))
+
+    def test_lists_and_none(self):
+        """
+        Проверяет приведение списков к float64 с заменой None на NaN.
+        """
+        _, _, heights = validate_grid_arrays([0, 1], [0, 1], [[1, None], [2, 3]])
+        self.assertEqual(heights.dtype, np.float64)
+        self.assertTrue(np.isnan(heights[0, 1]))
+
+    def test_invalid_input(self):
+        """
+        Проверяет ошибки для невозрастающих координат, несовпадающей формы, бесконечностей,
+        нечисловых значений и пустых узлов при политике "forbid".
+        """
+        cases = [
+            (np.array([0.0, 2.0, 1.0]), self.y_coords, self.heights, "allow"),
+            (self.x_coords, np.array([0.0, np.nan]), self.heights, "allow"),
+            (self.x_coords, self.y_coords, self.heights.T, "allow"),
+            (self.x_coords, self.y_coords, np.where(np.isnan(self.heights), np.inf, self.heights), "allow"),
+            (self.x_coords, self.y_coords, [["a", 1.0], [1.0, 1.0], [1.0, 1.0]], "allow"),
+            (self.x_coords, self.y_coords, self.heights, "forbid"),
+        ]
+        for x_coords, y_coords, heights, null_policy in cases:
+            with self.assertRaises(ArrayValidationError):
+                validate_grid_arrays(x_coords, y_coords, heights, null_policy)
+
+
+class TestValidateTrajectoryArrays(unittest.TestCase):
+    """
+    Тесты для векторной проверки упакованных траекторий.
+    """
+
+    def test_valid(self):
+        """
+        Проверяет, что корректные массивы возвращаются без копирования.
+        """
+        points = np.zeros((4, 3))
+        offsets = np.array([0, 1, 1, 4], dtype=np.int64)
+        checked_points, checked_offsets = validate_trajectory_arrays(points, offsets)
+        self.assertTrue(np.shares_memory(checked_points, points))
+        self.assertTrue(np.shares_memory(checked_offsets, offsets))
+
+    def test_invalid(self):
+        """
+        Проверяет ошибки для неверной формы точек, NaN и несогласованных смещений.
+        """
+        cases = [
+            (np.zeros((4, 2)), [0, 4]),
+            (np.full((4, 3), np.nan), [0, 4]),
+            (np.zeros((4, 3)), [0, 3]),
+            (np.zeros((4, 3)), [0, 3, 2, 4]),
+            (np.zeros((4, 3)), [0.0, 4.0]),
+        ]
+        for points, offsets in cases:
+            with self.assertRaises(ArrayValidationError):
+                validate_trajectory_arrays(points, np.asarray(offsets))
+
+
+if __name__ == "__main__":
+    unittest.main()